@@ -193,10 +193,12 @@ async def demonstrate_dependency_management():
     # Create workflow with complex dependencies
     workflow = await create_sample_workflow()
     
-    # Show dependency visualization
-    dependency_viz = workflow_engine.dependency_manager.visualize_dependencies()
-    print("Dependency graph would be:")
-    print(dependency_viz)
+    # Show the compiled execution plan
+    plan = workflow_engine.compile_workflow(workflow)
+    print(f"Execution plan {plan.digest[:12]}:")
+    for step_id in plan.topological_order:
+        deps = plan.dependencies[step_id]
+        print(f"  {step_id}" + (f" after {', '.join(deps)}" if deps else ""))
     
     print(f"\nWorkflow: {workflow.name}")
     print(f"Total steps: {len(workflow.steps)}")
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Filesystem MCP Server Benchmarks
+
+Builds a synthetic directory tree and times the filesystem server's hot paths
+against their previous implementations.
+
+Usage:
+    python3 benchmark.py walk --root /tmp/fs_bench --files 1000000
+    python3 benchmark.py content --root /tmp/fs_bench_content --files 2000 --file-size 262144
+    python3 benchmark.py index --root /tmp/fs_bench_content
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 1.2
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from content_search import ContentMatcher, ContentSearchEngine, SearchStats
+from file_index import FileIndex
+from walker import TreeWalker
+
+MARKER = ".fs_bench_tree"
+
+
+def build_tree(root: Path, files: int, files_per_dir: int = 100, fanout: int = 10) -> int:
+    """
+    Create a synthetic tree with roughly ``files`` small files.
+
+    Directories hold ``files_per_dir`` files each and are nested ``fanout``
+    wide. Reuses an existing tree of the same size.
+    """
+    marker = root / MARKER
+    if marker.exists() and marker.read_text().strip() == str(files):
+        return files
+
+    root.mkdir(parents=True, exist_ok=True)
+    directories = max(1, files // files_per_dir)
+    created = 0
+
+    for index in range(directories):
+        # Spread directories over a fanout-wide tree: 3/7/2 -> d3/d7/d2
+        parts = []
+        n = index
+        while True:
+            parts.append(f"d{n % fanout}")
+            n //= fanout
+            if n == 0:
+                break
+        directory = root.joinpath(*reversed(parts), f"leaf{index}")
+        directory.mkdir(parents=True, exist_ok=True)
+
+        for file_index in range(files_per_dir):
+            if created >= files:
+                break
+            suffix = ".py" if file_index % 10 == 0 else ".txt"
+            with open(directory / f"file{file_index}{suffix}", "w") as f:
+                f.write(f"line {file_index}\n")
+            created += 1
+
+        if index and index % 1000 == 0:
+            print(f"  created {created} files...", file=sys.stderr)
+
+    marker.write_text(str(files))
+    return created
+
+
+def build_content_tree(root: Path, files: int, file_size: int, needle: str,
+                       files_per_dir: int = 100) -> int:
+    """Create files of ~file_size bytes of log-like text; every 10th contains needle"""
+    marker = root / MARKER
+    spec = f"{files}:{file_size}:{needle}"
+    if marker.exists() and marker.read_text().strip() == spec:
+        return files
+
+    root.mkdir(parents=True, exist_ok=True)
+    line = "2025-07-13 12:00:00 INFO worker-{:04d} processed request id={:08d} status=ok\n"
+    for index in range(files):
+        directory = root / f"dir{index // files_per_dir}"
+        directory.mkdir(exist_ok=True)
+        with open(directory / f"file{index}.log", "w") as f:
+            written = 0
+            number = 0
+            while written < file_size:
+                text = line.format(number % 10000, index * 100000 + number)
+                if index % 10 == 0 and number == 500:
+                    text = f"2025-07-13 12:00:00 ERROR {needle} in handler\n"
+                f.write(text)
+                written += len(text)
+                number += 1
+
+    marker.write_text(spec)
+    return files
+
+
+def content_baseline(root: Path, query: str) -> Dict[str, Any]:
+    """Previous implementation: read_text, lower the file, split and lower each line"""
+    matched = 0
+    scanned = 0
+    search_text = query.lower()
+    for item in root.glob("**/*"):
+        if not item.is_file() or item.name == MARKER:
+            continue
+        content = item.read_text(encoding="utf-8", errors="ignore")
+        scanned += len(content)
+        if search_text in content.lower():
+            matching_lines = []
+            for i, line in enumerate(content.split("\n"), 1):
+                if search_text in line.lower():
+                    matching_lines.append({"line": i, "content": line.strip()})
+            matched += 1
+    return {"matched": matched, "bytes": scanned}
+
+
+def content_engine(root: Path, query: str, processes: int, regex: bool = False,
+                   case_sensitive: bool = False) -> Dict[str, Any]:
+    """New implementation: walker + ContentSearchEngine"""
+    engine = ContentSearchEngine(processes=processes, process_threshold=0)
+    matcher = ContentMatcher(query, regex=regex, case_sensitive=case_sensitive)
+    stats = SearchStats()
+    entries = TreeWalker(pattern="*.log", files_only=True).walk(str(root))
+    try:
+        matched = sum(1 for _ in engine.search(entries, matcher, stats))
+    finally:
+        engine.shutdown()
+    return {"matched": matched, "bytes": stats.bytes_scanned}
+
+
+def glob_baseline(root: Path, pattern: str = "*") -> int:
+    """Previous implementation: Path.glob plus three syscalls per item"""
+    count = 0
+    for item in root.glob(f"**/{pattern}"):
+        stat = item.stat()
+        _ = {
+            "name": item.name,
+            "type": "directory" if item.is_dir() else "file",
+            "size": stat.st_size,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            "extension": item.suffix if item.is_file() else None
+        }
+        count += 1
+    return count
+
+
+def walker_run(root: Path, workers: int, pattern: str = None, max_results: int = None) -> int:
+    """New implementation: scandir walker with the same per-item formatting"""
+    count = 0
+    walker = TreeWalker(pattern=pattern, include_hidden=True, workers=workers,
+                        max_results=max_results)
+    for entry in walker.walk(str(root)):
+        stat = entry.stat
+        _ = {
+            "name": entry.name,
+            "type": "directory" if entry.is_dir else "file",
+            "size": stat.st_size,
+            "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+        }
+        count += 1
+    return count
+
+
+def timed(label: str, func: Callable[[], int]) -> Dict[str, Any]:
+    """Run func once and print items/second"""
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed else 0.0
+    print(f"{label:<40} {count:>9} items  {elapsed:8.2f}s  {rate:>12,.0f} items/s")
+    return {"label": label, "count": count, "seconds": elapsed}
+
+
+def bench_walk(args):
+    """Compare recursive listing and name search"""
+    root = Path(args.root)
+    print(f"Building tree of {args.files} files under {root}...")
+    build_tree(root, args.files)
+
+    timed("glob baseline (list all)", lambda: glob_baseline(root))
+    timed("walker 1 thread (list all)", lambda: walker_run(root, 1))
+    timed(f"walker {args.workers} threads (list all)", lambda: walker_run(root, args.workers))
+
+    timed("glob baseline (*.py)", lambda: glob_baseline(root, "*.py"))
+    timed(f"walker {args.workers} threads (*.py)", lambda: walker_run(root, args.workers, "*.py"))
+    timed(f"walker {args.workers} threads (*.py, max 100)",
+          lambda: walker_run(root, args.workers, "*.py", 100))
+
+
+def bench_content(args):
+    """Compare content search implementations in MB/s"""
+    root = Path(args.root)
+    print(f"Building {args.files} files of {args.file_size} bytes under {root}...")
+    build_content_tree(root, args.files, args.file_size, args.query)
+
+    runs = [
+        ("baseline read_text/lower", lambda: content_baseline(root, args.query)),
+        ("engine in-process", lambda: content_engine(root, args.query, 1)),
+        ("engine in-process (case sensitive)",
+         lambda: content_engine(root, args.query, 1, case_sensitive=True)),
+        ("engine in-process (regex)", lambda: content_engine(root, args.query + r"\s+in", 1, True)),
+        (f"engine {args.processes} processes", lambda: content_engine(root, args.query, args.processes)),
+        # A term on every line: the old code split and lowered every line
+        ("baseline common term", lambda: content_baseline(root, "status=ok")),
+        ("engine common term", lambda: content_engine(root, "status=ok", 1)),
+    ]
+    for label, func in runs:
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        mb = result["bytes"] / (1024 * 1024)
+        print(f"{label:<36} {result['matched']:>6} files matched  {mb:9.1f} MB  "
+              f"{elapsed:7.2f}s  {mb / elapsed:9.1f} MB/s")
+
+
+def bench_index(args):
+    """Compare repeated searches with and without a file index"""
+    root = Path(args.root)
+    print(f"Building {args.files} files of {args.file_size} bytes under {root}...")
+    build_content_tree(root, args.files, args.file_size, args.query)
+
+    with tempfile.TemporaryDirectory() as index_dir:
+        index = FileIndex(str(root), os.path.join(index_dir, "bench.db"), watch=False,
+                          max_content_size=args.file_size * 2)
+        timed("index build", lambda: index.refresh()["added"])
+        timed("index refresh (no changes)", lambda: index.refresh()["scanned"])
+
+        def walk_search():
+            return content_engine(root, args.query, 1)["matched"]
+
+        def index_search():
+            return sum(1 for _ in index.query(content=args.query, max_results=10 ** 9))
+
+        def index_name_search():
+            return sum(1 for _ in index.query(name_pattern="file1*.log", max_results=10 ** 9))
+
+        timed("walk + content search", walk_search)
+        timed("index content search", index_search)
+        timed("walk name search (file1*.log)",
+              lambda: walker_run(root, 1, "file1*.log"))
+        timed("index name search (file1*.log)", index_name_search)
+        index.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Filesystem MCP server benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    walk = subparsers.add_parser("walk", help="Recursive listing and name search")
+    walk.add_argument("--root", default="/tmp/fs_bench_tree", help="Synthetic tree location")
+    walk.add_argument("--files", type=int, default=1_000_000, help="Number of files")
+    walk.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Walker threads")
+    walk.set_defaults(func=bench_walk)
+
+    content = subparsers.add_parser("content", help="Content search throughput")
+    content.add_argument("--root", default="/tmp/fs_bench_content", help="Synthetic tree location")
+    content.add_argument("--files", type=int, default=2000, help="Number of files")
+    content.add_argument("--file-size", type=int, default=256 * 1024, help="Bytes per file")
+    content.add_argument("--query", default="DatabaseTimeout", help="Text to search for")
+    content.add_argument("--processes", type=int, default=os.cpu_count() or 4, help="Worker processes")
+    content.set_defaults(func=bench_content)
+
+    index = subparsers.add_parser("index", help="Repeated searches with a file index")
+    index.add_argument("--root", default="/tmp/fs_bench_content", help="Synthetic tree location")
+    index.add_argument("--files", type=int, default=2000, help="Number of files")
+    index.add_argument("--file-size", type=int, default=256 * 1024, help="Bytes per file")
+    index.add_argument("--query", default="DatabaseTimeout", help="Text to search for")
+    index.set_defaults(func=bench_index)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
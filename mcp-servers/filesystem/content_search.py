@@ -0,0 +1,361 @@
+"""
+Content Search Engine
+
+Searches file contents for search_files. Files are memory-mapped (small files
+are read directly), binaries are skipped by sniffing their first block, and
+matches are found with ``bytes.find``/``mmap.find`` or a compiled bytes regex
+directly on the mapped buffer, stopping after N matches per file. Large trees
+fan out over a process pool once enough data has been scanned in-process.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 1.2
+"""
+
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from io_executor import check_cancelled
+from walker import WalkEntry
+
+logger = logging.getLogger(__name__)
+
+SNIFF_BYTES = 8192
+MMAP_MIN_SIZE = 4 * 1024 * 1024
+FOLD_CHUNK = 1024 * 1024
+
+
+@dataclass
+class SearchStats:
+    """Counters for one content search"""
+    files_scanned: int = 0
+    bytes_scanned: int = 0
+    binary_skipped: int = 0
+    unreadable: int = 0
+    processes_used: int = 0
+    started: float = field(default_factory=time.perf_counter)
+
+    def merge(self, other: Dict[str, int]):
+        """Add counters returned by a worker process"""
+        self.files_scanned += other["files_scanned"]
+        self.bytes_scanned += other["bytes_scanned"]
+        self.binary_skipped += other["binary_skipped"]
+        self.unreadable += other["unreadable"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary, including throughput"""
+        elapsed = time.perf_counter() - self.started
+        return {
+            "files_scanned": self.files_scanned,
+            "bytes_scanned": self.bytes_scanned,
+            "binary_skipped": self.binary_skipped,
+            "unreadable": self.unreadable,
+            "processes_used": self.processes_used,
+            "elapsed_ms": round(elapsed * 1000, 2),
+            "throughput_mb_s": round(self.bytes_scanned / (1024 * 1024) / elapsed, 2) if elapsed else 0.0
+        }
+
+
+def _casefold_literal(query: str) -> bytes:
+    """
+    Build a bytes pattern matching query case-insensitively, including
+    non-ASCII letters that re.IGNORECASE can't fold in bytes mode.
+    """
+    parts = []
+    for char in query:
+        lower, upper = char.lower(), char.upper()
+        if char.isascii() or lower == upper:
+            parts.append(re.escape(char.encode("utf-8")))
+        else:
+            parts.append(b"(?:%s|%s)" % (re.escape(lower.encode("utf-8")),
+                                         re.escape(upper.encode("utf-8"))))
+    return b"".join(parts)
+
+
+class ContentMatcher:
+    """
+    Finds matching lines in a single file.
+
+    Picklable, so the same matcher is shipped to worker processes.
+    """
+
+    def __init__(self, query: str, regex: bool = False, case_sensitive: bool = False,
+                 max_matches: int = 10):
+        """
+        Initialize matcher.
+
+        Args:
+            query: Text (or regular expression) to search for
+            regex: Treat query as a regular expression
+            case_sensitive: Case sensitive matching
+            max_matches: Stop scanning a file after this many matching lines
+        """
+        self.max_matches = max_matches
+        self._needle: Optional[bytes] = None
+        self._folded_needle: Optional[bytes] = None
+        self._pattern = None
+
+        if not regex and case_sensitive:
+            # Plain substring: bytes.find / mmap.find, no regex engine
+            self._needle = query.encode("utf-8")
+        elif not regex and query.isascii():
+            # ASCII lowering keeps offsets, so chunks can be lowered and searched
+            self._folded_needle = query.lower().encode("ascii")
+        elif regex:
+            # Bytes regexes only fold ASCII case; ^ and $ anchor at lines
+            flags = re.MULTILINE | (0 if case_sensitive else re.IGNORECASE)
+            self._pattern = re.compile(query.encode("utf-8"), flags)
+        else:
+            self._pattern = re.compile(_casefold_literal(query), re.IGNORECASE)
+
+    def _finder(self, data) -> Callable[[int], int]:
+        """Return a function giving the offset of the next match at or after start, or -1"""
+        if self._needle is not None:
+            needle = self._needle
+            return lambda start: data.find(needle, start)
+
+        if self._folded_needle is not None:
+            return self._folded_finder(data)
+
+        pattern = self._pattern
+        size = len(data)
+
+        def find(start: int) -> int:
+            while start < size:
+                match = pattern.search(data, start)
+                if match is None:
+                    return -1
+                if data.find(b"\n", match.start(), match.end()) < 0:
+                    return match.start()
+                # Spans a newline: look for a match within that line only
+                line_start = data.rfind(b"\n", 0, match.start()) + 1
+                line_end = data.find(b"\n", match.start())
+                match = pattern.search(data, line_start, line_end)
+                if match is not None:
+                    return match.start()
+                start = line_end + 1
+            return -1
+
+        return find
+
+    def _folded_finder(self, data) -> Callable[[int], int]:
+        """Case-insensitive ASCII find over bounded, lowered chunks"""
+        needle = self._folded_needle
+        overlap = len(needle) - 1
+        size = len(data)
+        cache = {"index": -1, "chunk": b""}
+
+        def find(start: int) -> int:
+            index = start // FOLD_CHUNK
+            while index * FOLD_CHUNK < size:
+                base = index * FOLD_CHUNK
+                if cache["index"] != index:
+                    cache["index"] = index
+                    cache["chunk"] = data[base:base + FOLD_CHUNK + overlap].lower()
+                found = cache["chunk"].find(needle, max(0, start - base))
+                if found >= 0:
+                    return base + found
+                index += 1
+            return -1
+
+        return find
+
+    def search_file(self, path: str, stats: SearchStats) -> List[Dict[str, Any]]:
+        """
+        Search one file.
+
+        Args:
+            path: File path
+            stats: Counters to update
+
+        Returns:
+            Matching lines as {"line": number, "content": text}
+        """
+        try:
+            with open(path, "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if size == 0:
+                    stats.files_scanned += 1
+                    return []
+
+                if size < MMAP_MIN_SIZE:
+                    data = f.read()
+                else:
+                    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            stats.unreadable += 1
+            return []
+
+        try:
+            if b"\0" in data[:SNIFF_BYTES]:
+                stats.binary_skipped += 1
+                return []
+
+            stats.files_scanned += 1
+            stats.bytes_scanned += size
+            return self._scan(data)
+        finally:
+            if isinstance(data, mmap.mmap):
+                data.close()
+
+    def _scan(self, data) -> List[Dict[str, Any]]:
+        """Collect up to max_matches matching lines from a buffer"""
+        find = self._finder(data)
+        matches = []
+        line_number = 1
+        counted_to = 0
+        pos = 0
+        end_of_data = len(data)
+
+        while len(matches) < self.max_matches and pos < end_of_data:
+            start = find(pos)
+            if start < 0 or (start == end_of_data and data[-1:] == b"\n"):
+                # An empty match after the final newline isn't on a line
+                break
+
+            line_start = data.rfind(b"\n", 0, start) + 1
+            line_end = data.find(b"\n", start)
+            if line_end < 0:
+                line_end = end_of_data
+
+            # Only the span up to this match is counted, once
+            line_number += data[counted_to:line_start].count(b"\n")
+            counted_to = line_start
+
+            text = data[line_start:line_end].decode("utf-8", errors="replace").strip()
+            matches.append({"line": line_number, "content": text})
+
+            # One entry per line, like the line-by-line scan it replaces
+            pos = line_end + 1
+
+        return matches
+
+
+def _search_batch(matcher: ContentMatcher, paths: List[str]) -> Tuple[List[List[Dict[str, Any]]], Dict[str, int]]:
+    """Worker process entry point: search a batch of files"""
+    stats = SearchStats()
+    results = [matcher.search_file(path, stats) for path in paths]
+    return results, {
+        "files_scanned": stats.files_scanned,
+        "bytes_scanned": stats.bytes_scanned,
+        "binary_skipped": stats.binary_skipped,
+        "unreadable": stats.unreadable
+    }
+
+
+class ContentSearchEngine:
+    """
+    Runs content searches, in-process for small jobs and on a process pool
+    for large trees.
+
+    Every search starts in-process; once ``process_threshold`` bytes have been
+    scanned without reaching the result limit, the remaining files are sent to
+    the pool in batches. Results are yielded in walk order either way.
+    """
+
+    def __init__(self, processes: int = 0, process_threshold: int = 64 * 1024 * 1024,
+                 batch_size: int = 64):
+        """
+        Initialize engine.
+
+        Args:
+            processes: Worker processes (0 = CPU count, 1 = never use a pool)
+            process_threshold: Bytes scanned in-process before fanning out
+            batch_size: Files per worker task
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self.process_threshold = process_threshold
+        self.batch_size = batch_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use"""
+        if self._pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+            logger.info(f"Content search pool started with {self.processes} processes")
+        return self._pool
+
+    def search(self, entries: Iterable[WalkEntry], matcher: ContentMatcher,
+               stats: SearchStats) -> Iterator[Tuple[WalkEntry, List[Dict[str, Any]]]]:
+        """
+        Search file entries.
+
+        Args:
+            entries: Files to search, typically straight from a TreeWalker
+            matcher: Content matcher
+            stats: Counters to update
+
+        Yields:
+            (entry, matching lines) for every file with at least one match
+        """
+        entries = iter(entries)
+        scanned = 0
+
+        for entry in entries:
+            check_cancelled()
+            lines = matcher.search_file(entry.path, stats)
+            if lines:
+                yield entry, lines
+
+            scanned += entry.stat.st_size
+            if self.processes > 1 and scanned >= self.process_threshold:
+                break
+        else:
+            return
+
+        yield from self._search_in_pool(entries, matcher, stats)
+
+    def _search_in_pool(self, entries: Iterator[WalkEntry], matcher: ContentMatcher,
+                        stats: SearchStats) -> Iterator[Tuple[WalkEntry, List[Dict[str, Any]]]]:
+        """Fan remaining entries out to the process pool, yielding in order"""
+        pool = self._get_pool()
+        stats.processes_used = self.processes
+        in_flight = deque()
+        max_in_flight = self.processes * 2
+
+        def submit_next() -> bool:
+            batch = []
+            for entry in entries:
+                batch.append(entry)
+                if len(batch) >= self.batch_size:
+                    break
+            if not batch:
+                return False
+            future = pool.submit(_search_batch, matcher, [entry.path for entry in batch])
+            in_flight.append((batch, future))
+            return True
+
+        try:
+            while len(in_flight) < max_in_flight and submit_next():
+                pass
+
+            while in_flight:
+                check_cancelled()
+                batch, future = in_flight.popleft()
+                results, worker_stats = future.result()
+                stats.merge(worker_stats)
+                submit_next()
+
+                for entry, lines in zip(batch, results):
+                    if lines:
+                        yield entry, lines
+        finally:
+            # Early stop or cancellation: drop batches that haven't started
+            for _, future in in_flight:
+                future.cancel()
+
+    def shutdown(self):
+        """Shut down the process pool"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
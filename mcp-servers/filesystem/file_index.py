@@ -0,0 +1,512 @@
+"""
+Persistent File Index
+
+Optional per-root index for the filesystem MCP server. Each indexed root gets a
+SQLite database holding a path/metadata table and an FTS5 trigram index over
+the contents of text files. The index is updated incrementally, either from
+size/mtime diffs of a scandir walk or from filesystem events when ``watchdog``
+is installed, and answers search_files name and content queries without
+re-walking and re-reading the tree.
+
+Content hits are always re-verified against the file on disk, so results
+never contain stale matches; freshness of the candidate set is reported with
+every answer.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 1.2
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from stat import S_ISDIR
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from content_search import ContentMatcher, SNIFF_BYTES, SearchStats
+from io_executor import check_cancelled
+from walker import TreeWalker, WalkEntry
+
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    WATCHDOG_AVAILABLE = True
+except ImportError:
+    WATCHDOG_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = "1"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    ctime REAL NOT NULL,
+    mode INTEGER NOT NULL,
+    has_content INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS files_name ON files(name);
+CREATE VIRTUAL TABLE IF NOT EXISTS contents USING fts5(body, tokenize='trigram');
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _glob_to_sqlite(pattern: str) -> str:
+    """Translate an fnmatch-style pattern to SQLite GLOB syntax"""
+    return pattern.replace("[!", "[^")
+
+
+class _ChangeCollector(FileSystemEventHandler if WATCHDOG_AVAILABLE else object):
+    """Collects paths touched by filesystem events"""
+
+    def __init__(self, index: "FileIndex"):
+        super().__init__()
+        self.index = index
+
+    def on_any_event(self, event):
+        self.index.mark_dirty(event.src_path)
+        dest_path = getattr(event, "dest_path", None)
+        if dest_path:
+            self.index.mark_dirty(dest_path)
+
+
+class FileIndex:
+    """
+    Index of one directory tree.
+
+    All methods are blocking and thread-safe; the server calls them from its
+    I/O executor.
+    """
+
+    def __init__(self, root: str, db_path: str,
+                 exclude_dirs: Optional[Iterable[str]] = None,
+                 max_content_size: int = 1024 * 1024,
+                 max_staleness: float = 30.0,
+                 watch: bool = True):
+        """
+        Initialize index.
+
+        Args:
+            root: Directory to index
+            db_path: SQLite database file
+            exclude_dirs: Directory names or globs never indexed
+            max_content_size: Larger files are indexed by metadata only
+            max_staleness: Seconds after which a scan-mode index rescans
+                before answering
+            watch: Use filesystem events when watchdog is available
+        """
+        self.root = os.path.abspath(root)
+        self.db_path = db_path
+        self.exclude_dirs = list(exclude_dirs or [])
+        self.max_content_size = max_content_size
+        self.max_staleness = max_staleness
+        self._excludes = TreeWalker(exclude_dirs=self.exclude_dirs)
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('schema', ?)", (SCHEMA_VERSION,))
+        self._db.execute("INSERT OR IGNORE INTO meta VALUES ('root', ?)", (self.root,))
+        self._db.commit()
+
+        self._last_refresh: Optional[float] = None
+        stored = self._db.execute("SELECT value FROM meta WHERE key = 'last_refresh'").fetchone()
+        if stored:
+            self._last_refresh = float(stored[0])
+
+        self._dirty: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._observer = None
+        if watch and WATCHDOG_AVAILABLE:
+            self._start_watcher()
+
+    @property
+    def mode(self) -> str:
+        """'watch' when kept current by filesystem events, otherwise 'scan'"""
+        return "watch" if self._observer is not None else "scan"
+
+    def _start_watcher(self):
+        """Start a watchdog observer; fall back to scan mode on failure"""
+        try:
+            observer = Observer()
+            observer.schedule(_ChangeCollector(self), self.root, recursive=True)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+            logger.info(f"Watching {self.root} for index updates")
+        except Exception as e:
+            logger.warning(f"Filesystem watcher unavailable for {self.root}, using scans: {e}")
+            self._observer = None
+
+    def mark_dirty(self, path: str):
+        """Record a path changed since the last refresh (called by the watcher)"""
+        with self._dirty_lock:
+            self._dirty.add(path)
+
+    def covers(self, path: str) -> bool:
+        """Whether path lies inside this index's root"""
+        path = os.path.abspath(path)
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    # Updating
+
+    def ensure_fresh(self, refresh: str = "auto") -> Dict[str, Any]:
+        """
+        Bring the index up to date according to the refresh policy.
+
+        Args:
+            refresh: 'auto' (rescan if never built or stale in scan mode,
+                otherwise apply pending changes), 'force' (full rescan) or
+                'never' (answer from the index as is)
+
+        Returns:
+            Statistics of the update performed, if any
+        """
+        with self._lock:
+            if refresh == "never" and self._last_refresh is not None:
+                return {}
+            if refresh == "force" or self._last_refresh is None:
+                return self.refresh()
+            if self._observer is None and time.time() - self._last_refresh > self.max_staleness:
+                return self.refresh()
+            # Watcher events and changes made through the server itself
+            return self._apply_pending()
+
+    def refresh(self, subtree: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Incrementally re-sync the index (or one subtree) with the disk.
+
+        Only files whose size or mtime changed are re-read.
+
+        Returns:
+            Counts of added, updated and removed entries and the duration
+        """
+        started = time.perf_counter()
+        top = os.path.abspath(subtree) if subtree else self.root
+        stats = {"added": 0, "updated": 0, "removed": 0, "scanned": 0}
+
+        with self._lock:
+            if top == self.root:
+                with self._dirty_lock:
+                    self._dirty.clear()
+
+            known = {
+                path: (file_id, size, mtime_ns)
+                for file_id, path, size, mtime_ns in self._rows_under(top)
+            }
+            seen = set()
+
+            if top != self.root and os.path.isdir(top) and not os.path.islink(top):
+                self._upsert_path(top, known, stats)
+                seen.add(top)
+
+            walker = TreeWalker(include_hidden=False, exclude_dirs=self.exclude_dirs)
+            for entry in walker.walk(top) if os.path.isdir(top) else ():
+                stats["scanned"] += 1
+                seen.add(entry.path)
+                self._upsert_entry(entry, known.get(entry.path), stats)
+                if stats["scanned"] % 5000 == 0:
+                    self._db.commit()
+
+            removed = [known[path][0] for path in known.keys() - seen]
+            self._delete_ids(removed)
+            stats["removed"] += len(removed)
+
+            if top == self.root:
+                self._last_refresh = time.time()
+                self._db.execute("INSERT OR REPLACE INTO meta VALUES ('last_refresh', ?)",
+                                 (str(self._last_refresh),))
+            self._db.commit()
+
+        stats["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        if top == self.root:
+            logger.info(f"Index refresh of {self.root}: {stats}")
+        return stats
+
+    def _apply_pending(self) -> Dict[str, Any]:
+        """Apply paths reported by the watcher since the last update"""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return {}
+
+        totals = {"added": 0, "updated": 0, "removed": 0, "scanned": 0, "paths": len(dirty)}
+        for path in sorted(dirty):
+            check_cancelled()
+            if not self.covers(path) or self._is_excluded(path):
+                continue
+            if os.path.isdir(path) and not os.path.islink(path):
+                stats = self.refresh(subtree=path)
+            else:
+                stats = {"added": 0, "updated": 0, "removed": 0, "scanned": 1}
+                known = {p: (i, s, m) for i, p, s, m in self._rows_under(path)}
+                self._upsert_path(path, known, stats)
+                self._db.commit()
+            for key in ("added", "updated", "removed", "scanned"):
+                totals[key] += stats[key]
+
+        if self._observer is not None:
+            self._last_refresh = time.time()
+        return totals
+
+    def _is_excluded(self, path: str) -> bool:
+        """Whether a path is hidden or inside an excluded directory"""
+        relative = os.path.relpath(path, self.root)
+        for part in relative.split(os.sep):
+            if part.startswith(".") and part not in (".", ".."):
+                return True
+            if self._excludes.is_excluded(part):
+                return True
+        return False
+
+    def _rows_under(self, top: str) -> List[Tuple[int, str, int, int]]:
+        """Rows for top and everything below it"""
+        prefix = top.rstrip(os.sep) + os.sep
+        return self._db.execute(
+            "SELECT id, path, size, mtime_ns FROM files WHERE path = ? OR (path >= ? AND path < ?)",
+            (top, prefix, prefix[:-1] + chr(ord(os.sep) + 1))
+        ).fetchall()
+
+    def _upsert_path(self, path: str, known: Dict[str, Tuple[int, int, int]], stats: Dict[str, int]):
+        """Add, update or remove a single path"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            removed = [row[0] for row in known.values()]
+            self._delete_ids(removed)
+            stats["removed"] += len(removed)
+            return
+
+        entry = WalkEntry(path, os.path.basename(path), S_ISDIR(stat.st_mode), stat, 0)
+        self._upsert_entry(entry, known.get(path), stats)
+
+    def _upsert_entry(self, entry: WalkEntry, existing: Optional[Tuple[int, int, int]],
+                      stats: Dict[str, int]):
+        """Insert or update one entry, re-reading content only if it changed"""
+        stat = entry.stat
+        if existing is not None and existing[1] == stat.st_size and existing[2] == stat.st_mtime_ns:
+            return
+
+        body = None if entry.is_dir else self._read_text(entry.path, stat.st_size)
+        values = (entry.name, int(entry.is_dir), stat.st_size, stat.st_mtime_ns,
+                  stat.st_ctime, stat.st_mode, int(body is not None))
+
+        if existing is None:
+            cursor = self._db.execute(
+                "INSERT OR REPLACE INTO files (path, name, is_dir, size, mtime_ns, ctime, mode, has_content)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (entry.path,) + values
+            )
+            file_id = cursor.lastrowid
+            stats["added"] += 1
+        else:
+            file_id = existing[0]
+            self._db.execute(
+                "UPDATE files SET name = ?, is_dir = ?, size = ?, mtime_ns = ?, ctime = ?, mode = ?,"
+                " has_content = ? WHERE id = ?",
+                values + (file_id,)
+            )
+            self._db.execute("DELETE FROM contents WHERE rowid = ?", (file_id,))
+            stats["updated"] += 1
+
+        if body is not None:
+            self._db.execute("INSERT INTO contents (rowid, body) VALUES (?, ?)", (file_id, body))
+
+    def _read_text(self, path: str, size: int) -> Optional[str]:
+        """Read a file for content indexing; None for binaries and large files"""
+        if size > self.max_content_size:
+            return None
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if b"\0" in data[:SNIFF_BYTES]:
+            return None
+        return data.decode("utf-8", errors="ignore")
+
+    def _delete_ids(self, ids: List[int]):
+        """Remove entries and their content"""
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            self._db.execute(f"DELETE FROM files WHERE id IN ({marks})", chunk)
+            self._db.execute(f"DELETE FROM contents WHERE rowid IN ({marks})", chunk)
+
+    # Queries
+
+    def query(self, path: Optional[str] = None, name_pattern: Optional[str] = None,
+              content: Optional[str] = None, case_sensitive: bool = False,
+              regex: bool = False, files_only: bool = False,
+              max_results: int = 100) -> Iterator[Tuple[WalkEntry, Optional[List[Dict[str, Any]]]]]:
+        """
+        Answer a name and/or content query from the index.
+
+        Args:
+            path: Restrict to this directory (default: the whole root)
+            name_pattern: Glob matched against file names
+            content: Text (or regex) the file must contain
+            case_sensitive: Case sensitive content matching
+            regex: Treat content as a regular expression
+            files_only: Only return files
+            max_results: Maximum number of results
+
+        Yields:
+            (entry built from the stored metadata, matching lines or None)
+        """
+        top = os.path.abspath(path) if path else self.root
+        prefix = top.rstrip(os.sep) + os.sep
+        clauses = ["f.path >= ?", "f.path < ?"]
+        params: List[Any] = [prefix, prefix[:-1] + chr(ord(os.sep) + 1)]
+
+        if name_pattern and name_pattern not in ("*", "**"):
+            clauses.append("f.name GLOB ?")
+            params.append(_glob_to_sqlite(name_pattern))
+        if files_only or content:
+            clauses.append("f.is_dir = 0")
+
+        if content and not regex and len(content) >= 3:
+            # Trigram phrase match is case-insensitive, so it yields a superset
+            # of case-sensitive hits; on-disk verification below is exact.
+            # Files too large to index have no contents row and are checked on disk
+            clauses.append("(f.id IN (SELECT rowid FROM contents WHERE contents MATCH ?)"
+                           " OR (f.has_content = 0 AND f.size > ?))")
+            params.extend(['"' + content.replace('"', '""') + '"', self.max_content_size])
+
+        sql = (f"SELECT f.path, f.name, f.is_dir, f.size, f.mtime_ns, f.ctime, f.mode FROM files f"
+               f" WHERE {' AND '.join(clauses)} ORDER BY f.path")
+
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+
+        matcher = ContentMatcher(content, regex=regex, case_sensitive=case_sensitive) if content else None
+        stats = SearchStats()
+        count = 0
+        for path_, name, is_dir, size, mtime_ns, ctime, mode in rows:
+            check_cancelled()
+            stat = os.stat_result((mode, 0, 0, 0, 0, 0, size, 0, mtime_ns / 1e9, ctime))
+            entry = WalkEntry(path_, name, bool(is_dir), stat, 0)
+            lines = None
+            if matcher is not None:
+                # Verify against the current file so stale candidates drop out
+                lines = matcher.search_file(path_, stats)
+                if not lines:
+                    continue
+            yield entry, lines
+            count += 1
+            if count >= max_results:
+                break
+
+    def status(self) -> Dict[str, Any]:
+        """Freshness and size of the index"""
+        with self._lock:
+            files, dirs, content_files = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(is_dir), 0), COALESCE(SUM(has_content), 0) FROM files"
+            ).fetchone()
+        with self._dirty_lock:
+            pending = len(self._dirty)
+
+        age = time.time() - self._last_refresh if self._last_refresh else None
+        return {
+            "root": self.root,
+            "mode": self.mode,
+            "entries": files,
+            "directories": dirs,
+            "content_indexed_files": content_files,
+            "refreshed_at": datetime.fromtimestamp(self._last_refresh).isoformat() if self._last_refresh else None,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "pending_changes": pending,
+            # Watch mode is current up to pending events; scan mode up to age_seconds
+            "stale": self._last_refresh is None or pending > 0 or (
+                self.mode == "scan" and age > self.max_staleness)
+        }
+
+    def close(self):
+        """Stop the watcher and close the database"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        with self._lock:
+            self._db.close()
+
+
+class FileIndexManager:
+    """Owns the indexes of a filesystem server, one per root"""
+
+    def __init__(self, index_dir: str, exclude_dirs: Optional[Iterable[str]] = None,
+                 max_indexes: int = 8, max_content_size: int = 1024 * 1024,
+                 max_staleness: float = 30.0, watch: bool = True):
+        """
+        Initialize manager.
+
+        Args:
+            index_dir: Directory holding the index databases
+            exclude_dirs: Directory names or globs never indexed
+            max_indexes: Maximum number of indexed roots
+            max_content_size: Larger files are indexed by metadata only
+            max_staleness: Rescan threshold for scan-mode indexes (seconds)
+            watch: Use filesystem events when watchdog is available
+        """
+        self.index_dir = index_dir
+        self.exclude_dirs = list(exclude_dirs or [])
+        self.max_indexes = max_indexes
+        self.max_content_size = max_content_size
+        self.max_staleness = max_staleness
+        self.watch = watch
+        self._indexes: Dict[str, FileIndex] = {}
+        self._lock = threading.Lock()
+
+        os.makedirs(index_dir, exist_ok=True)
+
+    def find(self, path: str) -> Optional[FileIndex]:
+        """Return the index covering path, if one exists"""
+        with self._lock:
+            candidates = [index for index in self._indexes.values() if index.covers(path)]
+        # Innermost root wins
+        return max(candidates, key=lambda index: len(index.root), default=None)
+
+    def get_or_create(self, root: str) -> FileIndex:
+        """Return the index covering root, creating one rooted there if needed"""
+        index = self.find(root)
+        if index is not None:
+            return index
+
+        root = os.path.abspath(root)
+        with self._lock:
+            if root in self._indexes:
+                return self._indexes[root]
+            if len(self._indexes) >= self.max_indexes:
+                raise ValueError(f"Index limit reached ({self.max_indexes} roots)")
+
+            db_name = hashlib.sha1(root.encode("utf-8")).hexdigest()[:16] + ".db"
+            index = FileIndex(
+                root, os.path.join(self.index_dir, db_name),
+                exclude_dirs=self.exclude_dirs,
+                max_content_size=self.max_content_size,
+                max_staleness=self.max_staleness,
+                watch=self.watch
+            )
+            self._indexes[root] = index
+            return index
+
+    def list_indexes(self) -> List[Dict[str, Any]]:
+        """Status of every index"""
+        with self._lock:
+            indexes = list(self._indexes.values())
+        return [index.status() for index in indexes]
+
+    def close(self):
+        """Close all indexes"""
+        with self._lock:
+            indexes, self._indexes = list(self._indexes.values()), {}
+        for index in indexes:
+            index.close()
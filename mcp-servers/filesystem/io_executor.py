@@ -0,0 +1,217 @@
+"""
+Blocking I/O Executor for the Filesystem MCP Server
+
+Runs blocking disk operations (stat, glob, read, copy, move) on a bounded
+thread pool so the asyncio loop stays responsive, and provides cooperative
+per-request cancellation for long-running operations.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 1.2
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Cancellation flag of the request currently being served. Executor jobs run
+# inside a copy of the submitting context, so blocking code can poll it.
+_current_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = \
+    contextvars.ContextVar("fs_io_cancel_event", default=None)
+
+# Thread-safe progress emitter of the request currently being served
+_current_progress: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = \
+    contextvars.ContextVar("fs_io_progress", default=None)
+
+
+class OperationCancelled(Exception):
+    """Raised inside a worker thread when its request has been cancelled"""
+    pass
+
+
+def check_cancelled():
+    """
+    Raise OperationCancelled if the current request has been cancelled.
+
+    Long-running blocking operations (tree walks, content scans) should call
+    this periodically so cancelled or timed-out requests free their worker.
+    """
+    event = _current_cancel_event.get()
+    if event is not None and event.is_set():
+        raise OperationCancelled("Operation cancelled")
+
+
+def is_cancelled() -> bool:
+    """Non-raising variant of check_cancelled()"""
+    event = _current_cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def progress_enabled() -> bool:
+    """Whether the current request asked for progress notifications"""
+    return _current_progress.get() is not None
+
+
+def report_progress(payload: Dict[str, Any]) -> bool:
+    """
+    Push an incremental update for the current request to its client.
+
+    Safe to call from executor threads. Returns False (and does nothing) when
+    the client did not ask for progress notifications.
+    """
+    emit = _current_progress.get()
+    if emit is None:
+        return False
+    emit(payload)
+    return True
+
+
+class BlockingIOExecutor:
+    """
+    Bounded thread pool for blocking filesystem work.
+
+    At most ``max_workers`` jobs are submitted to the pool at a time; further
+    callers wait on an asyncio semaphore, so a burst of requests queues on the
+    loop (where cancellation is free) rather than inside the pool.
+    """
+
+    def __init__(self, max_workers: int = 8, timeout: Optional[float] = None):
+        """
+        Initialize executor.
+
+        Args:
+            max_workers: Maximum number of concurrent blocking operations
+            timeout: Default per-operation timeout in seconds (None = no limit)
+        """
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="fs-io"
+        )
+        self._slots: Optional[asyncio.Semaphore] = None
+
+        # Statistics
+        self._active = 0
+        self._waiting = 0
+        self._completed = 0
+        self._cancelled = 0
+        self._timed_out = 0
+
+    @contextmanager
+    def request_scope(self, progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+                      ) -> Iterator[threading.Event]:
+        """
+        Bind a fresh cancellation flag (and optional progress sink) to the
+        current request.
+
+        Args:
+            progress: Coroutine function delivering progress payloads to the
+                client; report_progress() schedules it on this loop
+
+        Yields:
+            Event that, once set, makes check_cancelled() raise in every
+            executor job started from this request
+        """
+        event = threading.Event()
+        token = _current_cancel_event.set(event)
+        progress_token = None
+        if progress is not None:
+            loop = asyncio.get_running_loop()
+
+            def emit(payload: Dict[str, Any]):
+                loop.call_soon_threadsafe(
+                    lambda: loop.create_task(progress(payload))
+                )
+
+            progress_token = _current_progress.set(emit)
+        try:
+            yield event
+        finally:
+            if progress_token is not None:
+                _current_progress.reset(progress_token)
+            _current_cancel_event.reset(token)
+
+    async def run(self, func: Callable[..., Any], *args,
+                  timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Run a blocking callable on the pool.
+
+        Args:
+            func: Blocking callable
+            *args: Positional arguments for func
+            timeout: Override of the default timeout
+            **kwargs: Keyword arguments for func
+
+        Returns:
+            Return value of func
+
+        Raises:
+            asyncio.TimeoutError: If the operation exceeds its timeout
+            asyncio.CancelledError: If the awaiting task is cancelled
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers)
+
+        event = _current_cancel_event.get()
+        timeout = self.timeout if timeout is None else timeout
+
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._active += 1
+        try:
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            future = loop.run_in_executor(
+                self._executor,
+                functools.partial(context.run, func, *args, **kwargs)
+            )
+            try:
+                if timeout:
+                    result = await asyncio.wait_for(future, timeout=timeout)
+                else:
+                    result = await future
+            except asyncio.TimeoutError:
+                self._timed_out += 1
+                if event is not None:
+                    event.set()
+                raise
+            except asyncio.CancelledError:
+                self._cancelled += 1
+                if event is not None:
+                    event.set()
+                raise
+
+            self._completed += 1
+            return result
+        finally:
+            self._active -= 1
+            self._slots.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get executor statistics"""
+        return {
+            "max_workers": self.max_workers,
+            "active": self._active,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "cancelled": self._cancelled,
+            "timed_out": self._timed_out
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Shut down the underlying thread pool"""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        logger.info("Filesystem I/O executor shut down")
@@ -15,11 +15,12 @@ import os
 import shutil
 import tempfile
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Awaitable, Callable, Iterable, Iterator, Optional, Union
 from dataclasses import dataclass
 import logging
 import mimetypes
 import hashlib
+import re
 from datetime import datetime
 
 # MCP protocol imports
@@ -30,6 +31,13 @@ except ImportError:
     print("websockets library required. Install with: pip install websockets")
     raise
 
+from io_executor import (
+    BlockingIOExecutor, OperationCancelled, check_cancelled, progress_enabled, report_progress
+)
+from walker import TreeWalker, WalkEntry
+from content_search import ContentMatcher, ContentSearchEngine, SearchStats
+from file_index import FileIndexManager
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,10 +51,29 @@ class FileSystemConfig:
     allowed_extensions: List[str] = None
     denied_extensions: List[str] = None
     read_only: bool = False
+    io_workers: int = 8  # Parallel blocking disk operations
+    io_timeout: Optional[float] = 300.0  # Per-operation timeout in seconds
+    walk_workers: int = 4  # Threads per recursive directory walk
+    exclude_dirs: List[str] = None  # Directory names never descended into
+    stream_batch_size: int = 500  # Items per progress notification
+    search_processes: int = 0  # Content search worker processes (0 = CPU count, 1 = none)
+    search_process_threshold: int = 64 * 1024 * 1024  # Bytes scanned before using processes
+    index_roots: List[str] = None  # Directories indexed at startup for search_files
+    index_dir: Optional[str] = None  # Index databases (default: system temp dir)
+    index_max_staleness: float = 30.0  # Seconds before a non-watched index rescans
+    index_max_content_size: int = 1024 * 1024  # Larger files are indexed by metadata only
+    index_watch: bool = True  # Use filesystem events when watchdog is installed
+    max_indexes: int = 8
     
     def __post_init__(self):
         if self.allowed_extensions is None:
             self.allowed_extensions = []
+        if self.exclude_dirs is None:
+            self.exclude_dirs = []
+        if self.index_roots is None:
+            self.index_roots = []
+        if self.index_dir is None:
+            self.index_dir = os.path.join(tempfile.gettempdir(), "mcp_filesystem_index")
         if self.denied_extensions is None:
             self.denied_extensions = ['.exe', '.bat', '.cmd', '.scr', '.com']
 
@@ -145,13 +172,45 @@ class FileSystemMCPServer:
         self.validator = FileSystemValidator(config)
         self.tools = self._define_tools()
         
+        # Blocking disk I/O runs off the event loop
+        self.io = BlockingIOExecutor(config.io_workers, config.io_timeout)
+        self.content_search = ContentSearchEngine(
+            processes=config.search_processes,
+            process_threshold=config.search_process_threshold
+        )
+        # (client, request ID) -> (task, cancel event); JSON-RPC IDs are only unique per client
+        self._inflight: Dict[tuple, tuple] = {}
+        
         # Create sandbox directory if it doesn't exist
         sandbox_path = Path(config.sandbox_root)
         sandbox_path.mkdir(parents=True, exist_ok=True)
         
+        # Optional persistent indexes; built on first query
+        self.indexes = FileIndexManager(
+            config.index_dir,
+            exclude_dirs=config.exclude_dirs,
+            max_indexes=config.max_indexes,
+            max_content_size=config.index_max_content_size,
+            max_staleness=config.index_max_staleness,
+            watch=config.index_watch
+        )
+        for root in config.index_roots:
+            self.indexes.get_or_create(str(self.validator.validate_path(root)))
+        
         logger.info(f"Filesystem MCP server initialized")
         logger.info(f"Sandbox root: {config.sandbox_root}")
         logger.info(f"Allowed paths: {config.allowed_paths}")
+        logger.info(f"I/O workers: {config.io_workers}")
+    
+    def close(self):
+        """Cancel in-flight requests and release the I/O executor"""
+        for task, cancel_event in list(self._inflight.values()):
+            cancel_event.set()
+            task.cancel()
+        self._inflight.clear()
+        self.io.shutdown()
+        self.content_search.shutdown()
+        self.indexes.close()
     
     def _define_tools(self) -> Dict[str, Dict[str, Any]]:
         """Define available MCP tools"""
@@ -219,6 +278,15 @@ class FileSystemMCPServer:
                             "type": "boolean",
                             "description": "Include hidden files and directories",
                             "default": False
+                        },
+                        "exclude_dirs": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Directory names or globs to skip (added to server defaults)"
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "Maximum number of items (default: unlimited)"
                         }
                     },
                     "required": ["path"]
@@ -328,12 +396,17 @@ class FileSystemMCPServer:
                         },
                         "pattern": {
                             "type": "string",
-                            "description": "Search pattern (glob or regex)"
+                            "description": "Glob matched against names, or against trailing path components at any depth if it contains '/'"
                         },
                         "content_search": {
                             "type": "string",
                             "description": "Search within file contents"
                         },
+                        "regex": {
+                            "type": "boolean",
+                            "description": "Treat content_search as a regular expression",
+                            "default": False
+                        },
                         "case_sensitive": {
                             "type": "boolean",
                             "description": "Case sensitive search",
@@ -343,6 +416,63 @@ class FileSystemMCPServer:
                             "type": "integer",
                             "description": "Maximum number of results",
                             "default": 100
+                        },
+                        "include_hidden": {
+                            "type": "boolean",
+                            "description": "Include dot-files and search dot-directories (skipped by default)",
+                            "default": False
+                        },
+                        "exclude_dirs": {
+                            "type": "array",
+                            "items": {"type": "string"},
+                            "description": "Directory names or globs to skip (added to server defaults)"
+                        },
+                        "use_index": {
+                            "type": "boolean",
+                            "description": "Answer from a file index covering the path, if one exists",
+                            "default": True
+                        }
+                    },
+                    "required": ["path"]
+                }
+            },
+            "query_index": {
+                "description": "Query the persistent file index of a directory, creating it if needed",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "path": {
+                            "type": "string",
+                            "description": "Directory to query (indexed as a new root if not covered)"
+                        },
+                        "name_pattern": {
+                            "type": "string",
+                            "description": "Glob matched against file names"
+                        },
+                        "content": {
+                            "type": "string",
+                            "description": "Text the file must contain"
+                        },
+                        "regex": {
+                            "type": "boolean",
+                            "description": "Treat content as a regular expression",
+                            "default": False
+                        },
+                        "case_sensitive": {
+                            "type": "boolean",
+                            "description": "Case sensitive content matching",
+                            "default": False
+                        },
+                        "max_results": {
+                            "type": "integer",
+                            "description": "Maximum number of results",
+                            "default": 100
+                        },
+                        "refresh": {
+                            "type": "string",
+                            "enum": ["auto", "force", "never"],
+                            "description": "auto: update if stale or changed; force: full rescan; never: answer as is",
+                            "default": "auto"
                         }
                     },
                     "required": ["path"]
@@ -350,12 +480,19 @@ class FileSystemMCPServer:
             }
         }
     
-    async def handle_mcp_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+    async def handle_mcp_request(self, request: Dict[str, Any],
+                                 notify: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                                 client: Any = None) -> Dict[str, Any]:
         """
         Handle MCP protocol request.
         
         Args:
             request: MCP request message
+            notify: Coroutine function sending a notification to the client;
+                used to stream partial results when the request carries a
+                progressToken
+            client: Connection the request came from; cancellations only
+                reach requests sent by the same client
             
         Returns:
             MCP response message
@@ -368,7 +505,9 @@ class FileSystemMCPServer:
             if method == "tools/list":
                 response = await self._handle_tools_list()
             elif method == "tools/call":
-                response = await self._handle_tool_call(params)
+                response = await self._handle_cancellable_tool_call(request_id, params, notify, client)
+            elif method == "notifications/cancelled":
+                response = self._handle_cancel_notification(params, client)
             else:
                 response = {
                     "error": {
@@ -407,6 +546,47 @@ class FileSystemMCPServer:
             "tools": tools_list
         }
     
+    async def _handle_cancellable_tool_call(self, request_id: Any, params: Dict[str, Any],
+                                            notify: Optional[Callable] = None,
+                                            client: Any = None) -> Dict[str, Any]:
+        """Run a tool call that can be cancelled via notifications/cancelled"""
+        progress_token = (params.get("_meta") or {}).get("progressToken")
+        if notify is not None and progress_token is not None:
+            async def send_progress(payload: Dict[str, Any]):
+                await notify({
+                    "jsonrpc": "2.0",
+                    "method": "notifications/progress",
+                    "params": {"progressToken": progress_token, **payload}
+                })
+            progress = send_progress
+        else:
+            progress = None
+        
+        key = (client, request_id)
+        with self.io.request_scope(progress) as cancel_event:
+            entry = (asyncio.current_task(), cancel_event)
+            if request_id is not None:
+                self._inflight[key] = entry
+            try:
+                return await self._handle_tool_call(params)
+            finally:
+                # A newer request reusing the ID keeps its entry
+                if request_id is not None and self._inflight.get(key) is entry:
+                    del self._inflight[key]
+    
+    def _handle_cancel_notification(self, params: Dict[str, Any], client: Any = None) -> Dict[str, Any]:
+        """Handle notifications/cancelled for an in-flight tool call of the same client"""
+        request_id = params.get("requestId")
+        inflight = self._inflight.pop((client, request_id), None)
+        
+        if inflight:
+            task, cancel_event = inflight
+            cancel_event.set()
+            task.cancel()
+            logger.info(f"Cancelled request {request_id}: {params.get('reason', 'no reason given')}")
+        
+        return {"cancelled": inflight is not None, "requestId": request_id}
+    
     async def _handle_tool_call(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle tools/call request"""
         tool_name = params.get("name")
@@ -443,6 +623,13 @@ class FileSystemMCPServer:
                     "message": f"Security error: {str(e)}"
                 }
             }
+        except (asyncio.TimeoutError, OperationCancelled):
+            return {
+                "error": {
+                    "code": -32603,
+                    "message": f"Tool execution timed out or was cancelled: {tool_name}"
+                }
+            }
         except Exception as e:
             logger.error(f"Tool execution error: {e}")
             return {
@@ -454,6 +641,10 @@ class FileSystemMCPServer:
     
     async def _handle_read_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle read_file tool"""
+        return await self.io.run(self._read_file_sync, args)
+    
+    def _read_file_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of read_file, run on the I/O executor"""
         path = self.validator.validate_path(args["path"])
         encoding = args.get("encoding", "utf-8")
         
@@ -487,6 +678,10 @@ class FileSystemMCPServer:
     
     async def _handle_write_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle write_file tool"""
+        return await self.io.run(self._write_file_sync, args)
+    
+    def _write_file_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of write_file, run on the I/O executor"""
         self.validator.validate_write_operation()
         
         path = self.validator.validate_path(args["path"])
@@ -497,10 +692,12 @@ class FileSystemMCPServer:
         self.validator.validate_file_extension(path)
         self.validator.validate_file_size(len(content.encode(encoding)))
         
+        changed = self._first_missing(path)
         if create_dirs:
             path.parent.mkdir(parents=True, exist_ok=True)
         
         path.write_text(content, encoding=encoding)
+        self._note_change(changed)
         
         return {
             "success": True,
@@ -511,9 +708,14 @@ class FileSystemMCPServer:
     
     async def _handle_list_directory(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle list_directory tool"""
+        return await self.io.run(self._list_directory_sync, args)
+    
+    def _list_directory_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of list_directory, run on the I/O executor"""
         path = self.validator.validate_path(args["path"])
         recursive = args.get("recursive", False)
         include_hidden = args.get("include_hidden", False)
+        max_results = args.get("max_results")
         
         if not path.exists():
             raise FileNotFoundError(f"Directory not found: {path}")
@@ -521,32 +723,33 @@ class FileSystemMCPServer:
         if not path.is_dir():
             raise ValueError(f"Path is not a directory: {path}")
         
-        items = []
-        
-        if recursive:
-            pattern = "**/*" if include_hidden else "**/[!.]*"
-            for item in path.glob(pattern):
-                items.append(self._get_item_info(item))
-        else:
-            for item in path.iterdir():
-                if not include_hidden and item.name.startswith('.'):
-                    continue
-                items.append(self._get_item_info(item))
+        walker = self._make_walker(args, recursive=recursive, include_hidden=include_hidden,
+                                   max_results=max_results)
+        items = list(self._stream_results(
+            self._entry_info(entry) for entry in walker.walk(str(path))
+        ))
         
         return {
             "success": True,
             "path": str(path),
-            "items": sorted(items, key=lambda x: (x["type"], x["name"]))
+            "items": sorted(items, key=lambda x: (x["type"], x["name"])),
+            "truncated": max_results is not None and len(items) >= max_results
         }
     
     async def _handle_create_directory(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle create_directory tool"""
+        return await self.io.run(self._create_directory_sync, args)
+    
+    def _create_directory_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of create_directory, run on the I/O executor"""
         self.validator.validate_write_operation()
         
         path = self.validator.validate_path(args["path"])
         parents = args.get("parents", False)
         
+        changed = self._first_missing(path)
         path.mkdir(parents=parents, exist_ok=True)
+        self._note_change(changed)
         
         return {
             "success": True,
@@ -556,6 +759,10 @@ class FileSystemMCPServer:
     
     async def _handle_delete_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle delete_file tool"""
+        return await self.io.run(self._delete_file_sync, args)
+    
+    def _delete_file_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of delete_file, run on the I/O executor"""
         self.validator.validate_write_operation()
         
         path = self.validator.validate_path(args["path"])
@@ -571,6 +778,7 @@ class FileSystemMCPServer:
                 shutil.rmtree(path)
             else:
                 path.rmdir()  # Will fail if directory is not empty
+        self._note_change(path)
         
         return {
             "success": True,
@@ -580,6 +788,10 @@ class FileSystemMCPServer:
     
     async def _handle_copy_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle copy_file tool"""
+        return await self.io.run(self._copy_file_sync, args)
+    
+    def _copy_file_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of copy_file, run on the I/O executor"""
         self.validator.validate_write_operation()
         
         source = self.validator.validate_path(args["source"])
@@ -596,6 +808,7 @@ class FileSystemMCPServer:
             shutil.copy2(source, destination)
         elif source.is_dir():
             shutil.copytree(source, destination, dirs_exist_ok=overwrite)
+        self._note_change(destination)
         
         return {
             "success": True,
@@ -606,6 +819,10 @@ class FileSystemMCPServer:
     
     async def _handle_move_file(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle move_file tool"""
+        return await self.io.run(self._move_file_sync, args)
+    
+    def _move_file_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of move_file, run on the I/O executor"""
         self.validator.validate_write_operation()
         
         source = self.validator.validate_path(args["source"])
@@ -619,6 +836,7 @@ class FileSystemMCPServer:
             raise FileExistsError(f"Destination exists: {destination}")
         
         shutil.move(str(source), str(destination))
+        self._note_change(source, destination)
         
         return {
             "success": True,
@@ -629,6 +847,10 @@ class FileSystemMCPServer:
     
     async def _handle_get_file_info(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle get_file_info tool"""
+        return await self.io.run(self._get_file_info_sync, args)
+    
+    def _get_file_info_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of get_file_info, run on the I/O executor"""
         path = self.validator.validate_path(args["path"])
         
         if not path.exists():
@@ -643,19 +865,29 @@ class FileSystemMCPServer:
             info["content_type"] = content_type
             
             # File hash for integrity
+            md5 = hashlib.md5()
+            sha256 = hashlib.sha256()
             with open(path, "rb") as f:
-                content = f.read()
-                info["md5_hash"] = hashlib.md5(content).hexdigest()
-                info["sha256_hash"] = hashlib.sha256(content).hexdigest()
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    check_cancelled()
+                    md5.update(chunk)
+                    sha256.update(chunk)
+            info["md5_hash"] = md5.hexdigest()
+            info["sha256_hash"] = sha256.hexdigest()
         
         return info
     
     async def _handle_search_files(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Handle search_files tool"""
+        return await self.io.run(self._search_files_sync, args)
+    
+    def _search_files_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of search_files, run on the I/O executor"""
         path = self.validator.validate_path(args["path"])
         pattern = args.get("pattern", "*")
         content_search = args.get("content_search")
         case_sensitive = args.get("case_sensitive", False)
+        regex = args.get("regex", False)
         max_results = min(args.get("max_results", 100), self.config.max_search_results)
         
         if not path.exists():
@@ -664,38 +896,50 @@ class FileSystemMCPServer:
         if not path.is_dir():
             raise ValueError(f"Search path is not a directory: {path}")
         
-        results = []
+        include_hidden = args.get("include_hidden", False)
         
-        # File name pattern search
-        for item in path.glob(f"**/{pattern}"):
-            if len(results) >= max_results:
-                break
-                
-            item_info = self._get_item_info(item)
+        matcher = None
+        if content_search:
+            try:
+                matcher = ContentMatcher(content_search, regex=regex, case_sensitive=case_sensitive)
+            except re.error as e:
+                raise ValueError(f"Invalid content_search pattern: {e}")
+        
+        # An index only holds what a default walk would see
+        index = None
+        if (args.get("use_index", True) and not include_hidden
+                and not args.get("exclude_dirs") and "/" not in pattern):
+            index = self.indexes.find(str(path))
+        
+        stats = None
+        index_status = None
+        if index is not None:
+            index.ensure_fresh()
+            index_status = index.status()
+            hits = index.query(str(path), name_pattern=pattern, content=content_search,
+                               case_sensitive=case_sensitive, regex=regex,
+                               max_results=max_results)
+            matches = (self._entry_info(entry, lines) for entry, lines in hits)
+        else:
+            # Name-only searches stop walking as soon as max_results entries match
+            walker = self._make_walker(args, pattern=pattern, include_hidden=include_hidden,
+                                       files_only=bool(content_search),
+                                       max_results=None if content_search else max_results)
+            entries = walker.walk(str(path))
             
-            # Content search if specified
-            if content_search and item.is_file():
-                try:
-                    content = item.read_text(encoding='utf-8', errors='ignore')
-                    search_text = content_search if case_sensitive else content_search.lower()
-                    file_content = content if case_sensitive else content.lower()
-                    
-                    if search_text in file_content:
-                        # Find matching lines
-                        lines = content.split('\n')
-                        matching_lines = []
-                        for i, line in enumerate(lines, 1):
-                            check_line = line if case_sensitive else line.lower()
-                            if search_text in check_line:
-                                matching_lines.append({"line": i, "content": line.strip()})
-                        
-                        item_info["content_matches"] = matching_lines[:10]  # Limit to 10 matches
-                        results.append(item_info)
-                except:
-                    # Skip files that can't be read as text
-                    continue
+            if matcher is not None:
+                stats = SearchStats()
+                matches = self._content_matches(entries, matcher, stats)
             else:
-                results.append(item_info)
+                matches = (self._entry_info(entry) for entry in entries)
+        
+        results = []
+        for item_info in self._stream_results(matches):
+            results.append(item_info)
+            if len(results) >= max_results:
+                break
+        # Parallel walks finish directories in any order
+        results.sort(key=lambda item: item["path"])
         
         return {
             "success": True,
@@ -704,23 +948,129 @@ class FileSystemMCPServer:
             "content_search": content_search,
             "results": results,
             "total_found": len(results),
-            "truncated": len(results) >= max_results
+            "truncated": len(results) >= max_results,
+            "search_stats": stats.to_dict() if stats else None,
+            "index": index_status
+        }
+    
+    async def _handle_query_index(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle query_index tool"""
+        return await self.io.run(self._query_index_sync, args)
+    
+    def _query_index_sync(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Blocking implementation of query_index, run on the I/O executor"""
+        path = self.validator.validate_path(args["path"])
+        refresh = args.get("refresh", "auto")
+        max_results = min(args.get("max_results", 100), self.config.max_search_results)
+        
+        if not path.is_dir():
+            raise ValueError(f"Index path is not a directory: {path}")
+        
+        if refresh not in ("auto", "force", "never"):
+            raise ValueError(f"Invalid refresh mode: {refresh}")
+        
+        index = self.indexes.get_or_create(str(path))
+        update = index.ensure_fresh(refresh)
+        
+        try:
+            hits = index.query(str(path), name_pattern=args.get("name_pattern"),
+                               content=args.get("content"),
+                               case_sensitive=args.get("case_sensitive", False),
+                               regex=args.get("regex", False), max_results=max_results)
+            results = [self._entry_info(entry, lines) for entry, lines in hits]
+        except re.error as e:
+            raise ValueError(f"Invalid content pattern: {e}")
+        
+        return {
+            "success": True,
+            "path": str(path),
+            "results": results,
+            "total_found": len(results),
+            "truncated": len(results) >= max_results,
+            "update": update,
+            "index": index.status()
         }
     
+    def _content_matches(self, entries: Iterable[WalkEntry], matcher: ContentMatcher,
+                         stats: SearchStats) -> Iterator[Dict[str, Any]]:
+        """Yield item info with matching lines for files matched by the content engine"""
+        for entry, matching_lines in self.content_search.search(entries, matcher, stats):
+            yield self._entry_info(entry, matching_lines)
+    
+    def _note_change(self, *paths: Path):
+        """Tell covering file indexes about changes made through this server"""
+        for path in paths:
+            index = self.indexes.find(str(path))
+            if index is not None:
+                index.mark_dirty(str(path))
+    
+    @staticmethod
+    def _first_missing(path: Path) -> Path:
+        """Topmost not-yet-existing directory or file on the way to path"""
+        while not path.parent.exists() and path.parent != path:
+            path = path.parent
+        return path
+    
+    def _make_walker(self, args: Dict[str, Any], **options) -> TreeWalker:
+        """Create a tree walker honouring server and per-request exclusions"""
+        exclude_dirs = list(self.config.exclude_dirs) + list(args.get("exclude_dirs") or [])
+        return TreeWalker(exclude_dirs=exclude_dirs, workers=self.config.walk_workers, **options)
+    
+    def _stream_results(self, items: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Pass items through, pushing them to the client in batches as
+        notifications/progress when the request carries a progressToken.
+        """
+        if not progress_enabled():
+            yield from items
+            return
+        
+        batch = []
+        count = 0
+        for item in items:
+            count += 1
+            batch.append(item)
+            if len(batch) >= self.config.stream_batch_size:
+                report_progress({"progress": count, "items": batch})
+                batch = []
+            yield item
+        
+        if batch:
+            report_progress({"progress": count, "items": batch})
+    
     def _get_item_info(self, path: Path) -> Dict[str, Any]:
         """Get basic information about a file or directory"""
         stat = path.stat()
+        return self._format_item_info(path.name, str(path), path.is_dir(), stat)
+    
+    def _entry_info(self, entry: WalkEntry,
+                    content_matches: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """Get basic information from a walker entry without extra syscalls"""
+        info = self._format_item_info(entry.name, entry.path, entry.is_dir, entry.stat)
+        if content_matches is not None:
+            info["content_matches"] = content_matches
+        return info
+    
+    @staticmethod
+    def _format_item_info(name: str, path: str, is_dir: bool,
+                          stat: os.stat_result) -> Dict[str, Any]:
+        """Build the item info dictionary from an existing stat result"""
+        extension = None
+        if not is_dir:
+            # Same rule as Path.suffix
+            dot = name.rfind('.')
+            extension = name[dot:] if 0 < dot < len(name) - 1 else ""
         
         return {
-            "name": path.name,
-            "path": str(path),
-            "type": "directory" if path.is_dir() else "file",
+            "name": name,
+            "path": path,
+            "type": "directory" if is_dir else "file",
             "size": stat.st_size,
             "modified": datetime.fromtimestamp(stat.st_mtime).isoformat(),
             "created": datetime.fromtimestamp(stat.st_ctime).isoformat(),
             "permissions": oct(stat.st_mode)[-3:],
-            "is_hidden": path.name.startswith('.'),
-            "extension": path.suffix if path.is_file() else None
+            "is_hidden": name.startswith('.'),
+            "extension": extension
         }
 
 
@@ -739,34 +1089,56 @@ class MCPWebSocketServer:
         self.clients.add(websocket)
         logger.info(f"Client connected: {websocket.remote_address}")
         
+        # Requests are served concurrently so a slow operation doesn't block
+        # later requests (including cancellations) from the same client
+        pending = set()
+        
         try:
             async for message in websocket:
-                try:
-                    request = json.loads(message)
-                    response = await self.fs_server.handle_mcp_request(request)
-                    await websocket.send(json.dumps(response))
-                except json.JSONDecodeError:
-                    error_response = {
-                        "error": {
-                            "code": -32700,
-                            "message": "Parse error: Invalid JSON"
-                        }
-                    }
-                    await websocket.send(json.dumps(error_response))
-                except Exception as e:
-                    logger.error(f"Error handling client message: {e}")
-                    error_response = {
-                        "error": {
-                            "code": -32603,
-                            "message": f"Internal error: {str(e)}"
-                        }
-                    }
-                    await websocket.send(json.dumps(error_response))
+                task = asyncio.create_task(self._handle_message(websocket, message))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
         
         finally:
+            for task in pending:
+                task.cancel()
             self.clients.remove(websocket)
             logger.info(f"Client disconnected: {websocket.remote_address}")
     
+    async def _handle_message(self, websocket: WebSocketServerProtocol, message: str):
+        """Handle a single client message"""
+        try:
+            request = json.loads(message)
+            
+            async def notify(notification: Dict[str, Any]):
+                await websocket.send(json.dumps(notification))
+            
+            response = await self.fs_server.handle_mcp_request(request, notify, websocket)
+            
+            # Notifications don't get a response
+            if not str(request.get("method", "")).startswith("notifications/"):
+                await websocket.send(json.dumps(response))
+        except asyncio.CancelledError:
+            # Cancelled requests receive no response
+            pass
+        except json.JSONDecodeError:
+            error_response = {
+                "error": {
+                    "code": -32700,
+                    "message": "Parse error: Invalid JSON"
+                }
+            }
+            await websocket.send(json.dumps(error_response))
+        except Exception as e:
+            logger.error(f"Error handling client message: {e}")
+            error_response = {
+                "error": {
+                    "code": -32603,
+                    "message": f"Internal error: {str(e)}"
+                }
+            }
+            await websocket.send(json.dumps(error_response))
+    
     async def start_server(self):
         """Start the WebSocket server"""
         logger.info(f"Starting MCP WebSocket server on {self.host}:{self.port}")
@@ -793,6 +1165,7 @@ async def main():
     parser.add_argument("--allowed-paths", nargs="+", help="Allowed paths for operations")
     parser.add_argument("--read-only", action="store_true", help="Read-only mode")
     parser.add_argument("--max-file-size", type=int, default=50*1024*1024, help="Max file size in bytes")
+    parser.add_argument("--io-workers", type=int, default=8, help="Parallel blocking disk operations")
     
     args = parser.parse_args()
     
@@ -807,7 +1180,8 @@ async def main():
         allowed_paths=args.allowed_paths or [args.sandbox],
         sandbox_root=args.sandbox,
         max_file_size=args.max_file_size,
-        read_only=args.read_only
+        read_only=args.read_only,
+        io_workers=args.io_workers
     )
     
     # Create and start server
@@ -818,6 +1192,8 @@ async def main():
         await ws_server.start_server()
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
+    finally:
+        fs_server.close()
 
 
 if __name__ == "__main__":
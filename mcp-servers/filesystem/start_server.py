@@ -110,7 +110,20 @@ async def main():
         max_search_results=fs_config.get('max_search_results', 1000),
         allowed_extensions=fs_config.get('allowed_extensions', []),
         denied_extensions=fs_config.get('denied_extensions', []),
-        read_only=fs_config.get('read_only', False)
+        read_only=fs_config.get('read_only', False),
+        io_workers=fs_config.get('io_workers', 8),
+        io_timeout=fs_config.get('io_timeout', 300.0),
+        walk_workers=fs_config.get('walk_workers', 4),
+        exclude_dirs=fs_config.get('exclude_dirs', []),
+        stream_batch_size=fs_config.get('stream_batch_size', 500),
+        search_processes=fs_config.get('search_processes', 0),
+        search_process_threshold=fs_config.get('search_process_threshold', 64 * 1024 * 1024),
+        index_roots=fs_config.get('index_roots', []),
+        index_dir=fs_config.get('index_dir'),
+        index_max_staleness=fs_config.get('index_max_staleness', 30.0),
+        index_max_content_size=fs_config.get('index_max_content_size', 1024 * 1024),
+        index_watch=fs_config.get('index_watch', True),
+        max_indexes=fs_config.get('max_indexes', 8)
     )
     
     # Create and start servers
@@ -125,6 +138,8 @@ async def main():
     except Exception as e:
         logger.error(f"Server error: {e}")
         sys.exit(1)
+    finally:
+        fs_server.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+System MCP Server Benchmarks
+
+Builds synthetic inputs and times the system server's hot paths against
+their previous implementations.
+
+Usage:
+    python3 benchmark.py templates --path /tmp/system_bench/syslog --size-mb 1024
+    python3 benchmark.py search --path /tmp/system_bench/syslog --size-mb 1024
+    python3 benchmark.py network --listeners 200
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import re
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from log_index import LogIndex
+from log_parser import LogParser
+from log_search import LogSearchPool
+from network_monitor import NetworkMonitor
+from template_miner import TemplateMiner
+
+MARKER_SUFFIX = ".bench"
+
+# Message shapes for the synthetic syslog; {} fields are filled per line
+SYSLOG_MESSAGES = [
+    ("sshd", "Accepted publickey for {user} from {ip} port {port} ssh2: RSA SHA256:{hash}"),
+    ("sshd", "Failed password for invalid user {user} from {ip} port {port} ssh2"),
+    ("sshd", "Connection closed by {ip} port {port} [preauth]"),
+    ("CRON", "({user}) CMD (/usr/local/bin/job-{n}.sh > /dev/null 2>&1)"),
+    ("systemd", "Started Session {n} of user {user}."),
+    ("systemd", "{unit}.service: Succeeded."),
+    ("systemd", "{unit}.service: Main process exited, code=exited, status={n}/FAILURE"),
+    ("kernel", "[{uptime}] TCP: request_sock_TCP: Possible SYN flooding on port {port}. Sending cookies."),
+    ("kernel", "[{uptime}] EXT4-fs (sda{n}): mounted filesystem with ordered data mode"),
+    ("kernel", "[{uptime}] Out of memory: Killed process {pid} ({unit}) total-vm:{n}kB"),
+    ("nginx", "INFO GET /api/v{n}/items/{id} 200 took {ms}ms"),
+    ("nginx", "WARNING upstream timed out (110: Connection timed out) while reading from {ip}"),
+    ("app", "INFO request {uuid} completed in {ms} ms"),
+    ("app", "ERROR request {uuid} failed: database error code {n} after {ms}ms"),
+    ("dockerd", "container {hash} health status changed to {status}"),
+]
+
+
+def synthetic_line(rng: random.Random, timestamp: float) -> str:
+    """One syslog line with random variable fields"""
+    process, shape = rng.choice(SYSLOG_MESSAGES)
+    message = shape.format(
+        user=rng.choice(["root", "deploy", "alice", "bob", "www-data", "backup"]),
+        ip=f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+        port=rng.randrange(1024, 65536),
+        hash=f"{rng.getrandbits(64):016x}",
+        n=rng.randrange(1000),
+        unit=rng.choice(["nginx", "postgresql", "redis", "docker", "cron"]),
+        uptime=f"{timestamp % 100000:.6f}",
+        pid=rng.randrange(1, 65536),
+        id=rng.randrange(10 ** 6),
+        ms=rng.randrange(1, 5000),
+        uuid=f"{rng.getrandbits(32):08x}-{rng.getrandbits(16):04x}-{rng.getrandbits(16):04x}-"
+             f"{rng.getrandbits(16):04x}-{rng.getrandbits(48):012x}",
+        status=rng.choice(["healthy", "unhealthy", "starting"])
+    )
+    stamp = time.strftime("%b %d %H:%M:%S", time.localtime(timestamp))
+    return f"{stamp} host {process}[{rng.randrange(1, 65536)}]: {message}\n"
+
+
+def build_syslog(path: Path, size: int, seed: int = 1) -> int:
+    """Write a synthetic syslog of about `size` bytes; reuses one of the same size"""
+    marker = path.with_name(path.name + MARKER_SUFFIX)
+    if path.exists() and marker.exists() and marker.read_text().strip() == str(size):
+        return path.stat().st_size
+    
+    path.parent.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    timestamp = time.time() - size / 100  # ~100 bytes a line, one line a second
+    written = 0
+    with open(path, "w") as f:
+        while written < size:
+            chunk = []
+            for _ in range(10000):
+                chunk.append(synthetic_line(rng, timestamp))
+                timestamp += 1
+            text = "".join(chunk)
+            f.write(text)
+            written += len(text)
+            if written // (64 << 20) != (written - len(text)) // (64 << 20):
+                print(f"  wrote {written >> 20} MB...", file=sys.stderr)
+    
+    marker.write_text(str(size))
+    return written
+
+
+def message_batches(path: Path, batch: int = 10000) -> Iterator[List[str]]:
+    """Messages (the text after 'process[pid]: ') of each line, in batches"""
+    messages = []
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            messages.append(line.rstrip("\n").split(": ", 1)[-1])
+            if len(messages) >= batch:
+                yield messages
+                messages = []
+    if messages:
+        yield messages
+
+
+# Previous implementation: mask variables with one regex and intern the string
+BASELINE_MASK = re.compile(
+    r'\b[0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12}\b'
+    r'|\d+(?:[.:]\d+)+'
+    r'|\b0x[0-9a-fA-F]+\b'
+    r'|\b[0-9a-fA-F]*\d[0-9a-fA-F]*\b'
+    r'|\d+'
+)
+
+
+def templates_baseline(path: Path) -> Dict[str, int]:
+    lookup: Dict[str, int] = {}
+    lines = 0
+    for messages in message_batches(path):
+        for message in messages:
+            template = BASELINE_MASK.sub('<*>', message)[:200]
+            if template not in lookup:
+                lookup[template] = len(lookup)
+        lines += len(messages)
+    return {"lines": lines, "templates": len(lookup)}
+
+
+def templates_miner(path: Path, miner: TemplateMiner) -> Dict[str, int]:
+    lines = 0
+    for messages in message_batches(path):
+        miner.add_many(messages)
+        lines += len(messages)
+    return {"lines": lines, "templates": len(miner.templates)}
+
+
+def templates_ingest(path: Path, size: int) -> Dict[str, int]:
+    """Full ingestion (parse + mine + index) of the last `size` bytes"""
+    parser = LogParser({"log_paths": [str(path)]})
+    index = LogIndex({"initial_bytes": size, "max_index_lines": 10 ** 8},
+                     parser._parse_log_line, parser.templates)
+    store = index.refresh(str(path))
+    index.close()
+    return {"lines": store.count, "templates": len(parser.templates.templates)}
+
+
+def timed(label: str, func: Callable[[], Dict[str, int]]) -> Dict[str, Any]:
+    """Run func once and print lines/second"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    rate = result["lines"] / elapsed if elapsed else 0.0
+    print(f"{label:<40} {result['lines']:>10} lines  {result['templates']:>7} templates  "
+          f"{elapsed:8.2f}s  {rate:>12,.0f} lines/s")
+    return {"label": label, "seconds": elapsed, **result}
+
+
+def bench_templates(args):
+    """Template assignment throughput over a synthetic syslog"""
+    path = Path(args.path)
+    size = args.size_mb << 20
+    print(f"Building {args.size_mb} MB synthetic syslog at {path}...")
+    build_syslog(path, size)
+    
+    miner = TemplateMiner({})
+    timed("baseline regex mask + intern", lambda: templates_baseline(path))
+    timed("miner (cold)", lambda: templates_miner(path, miner))
+    # The table persists across calls: a second pass only looks templates up
+    timed("miner (warm table)", lambda: templates_miner(path, miner))
+    ingest = min(size, args.ingest_mb << 20)
+    timed(f"parse + mine + index ({ingest >> 20} MB)", lambda: templates_ingest(path, ingest))
+    
+    if args.show:
+        for template in sorted(miner.templates, key=lambda t: t.size, reverse=True)[:args.show]:
+            print(f"  {template.size:>10}  {template.text}")
+
+
+def search_baseline(path: Path, query: str) -> int:
+    """Previous implementation for whole files: regex every line in one process"""
+    query_regex = re.compile(query, re.IGNORECASE)
+    matched = 0
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            if query_regex.search(line):
+                matched += 1
+    return matched
+
+
+def search_sharded(path: Path, query: str, processes: int, shard_bytes: int) -> Tuple[int, float]:
+    pool = LogSearchPool({"search_processes": processes, "search_shard_bytes": shard_bytes})
+    try:
+        # Start the workers first so process start-up isn't timed
+        list(pool._get_pool().map(abs, range(processes)))
+        start = time.perf_counter()
+        matched = sum(1 for _ in pool.search(str(path), query, max_results=10 ** 9))
+        return matched, time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+
+def bench_search(args):
+    """Whole-file search throughput against worker count"""
+    path = Path(args.path)
+    size = args.size_mb << 20
+    print(f"Building {args.size_mb} MB synthetic syslog at {path}...")
+    build_syslog(path, size)
+    mb = path.stat().st_size / (1024 * 1024)
+    
+    def report(label: str, matched: int, elapsed: float, base: float):
+        print(f"{label:<32} {matched:>8} matches  {elapsed:8.2f}s  {mb / elapsed:9.1f} MB/s  "
+              f"x{base / elapsed:5.2f}")
+    
+    start = time.perf_counter()
+    matched = search_baseline(path, args.query)
+    baseline = time.perf_counter() - start
+    report("baseline line-by-line", matched, baseline, baseline)
+    
+    processes = 1
+    while True:
+        matched, elapsed = search_sharded(path, args.query, processes, args.shard_mb << 20)
+        report(f"sharded, {processes} process{'es' if processes > 1 else ''}", matched, elapsed, baseline)
+        if processes >= args.processes:
+            break
+        processes = min(processes * 2, args.processes)
+
+
+async def listener_fleet(count: int) -> List[asyncio.AbstractServer]:
+    """`count` TCP listeners on 127.0.0.1 that close every connection"""
+    def close(reader, writer):
+        writer.close()
+    
+    return [await asyncio.start_server(close, "127.0.0.1", 0) for _ in range(count)]
+
+
+def filtered_ports(count: int) -> Tuple[List[socket.socket], List[int]]:
+    """
+    Ports that silently drop connection attempts, like a filtering firewall:
+    listeners with a full accept queue that never accept.
+    """
+    held, ports = [], []
+    for _ in range(count):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(0)
+        port = listener.getsockname()[1]
+        held.append(listener)
+        for _ in range(2):
+            client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            client.setblocking(False)
+            client.connect_ex(("127.0.0.1", port))
+            held.append(client)
+        ports.append(port)
+    return held, ports
+
+
+async def network_run(args):
+    servers = await listener_fleet(args.listeners)
+    held, filtered = filtered_ports(args.filtered)
+    ports = [server.sockets[0].getsockname()[1] for server in servers]
+    # Closed ports: a listener's port + 1 is free unless it happens to be
+    # another listener
+    targets = ([f"127.0.0.1:{port}" for port in ports] +
+               [f"127.0.0.1:{port + 1}" for port in ports[:args.closed]] +
+               [f"127.0.0.1:{port}" for port in filtered])
+    monitor = NetworkMonitor({})
+    
+    def report(label: str, count: int, elapsed: float, base: float):
+        print(f"{label:<40} {count:>6} targets  {elapsed:8.3f}s  {count / elapsed:>10,.0f} targets/s  "
+              f"x{base / elapsed:6.1f}")
+    
+    try:
+        # Previous implementation: one check_port call per target, in turn
+        start = time.perf_counter()
+        for target in targets:
+            host, port = target.rsplit(":", 1)
+            await monitor.check_port({"host": host, "port": int(port), "timeout": args.timeout})
+        baseline = time.perf_counter() - start
+        report("check_port, sequential", len(targets), baseline, baseline)
+        
+        for concurrency in args.concurrency:
+            start = time.perf_counter()
+            result = await monitor.check_ports({"targets": targets, "timeout": args.timeout,
+                                                "concurrency": concurrency})
+            report(f"check_ports, concurrency {concurrency}", len(targets),
+                   time.perf_counter() - start, baseline)
+        print(f"  states: {result['summary']}")
+        
+        hosts = [f"127.0.0.{i}" for i in range(1, min(args.listeners, 254) + 1)]
+        for method in ("tcp", "icmp"):
+            start = time.perf_counter()
+            result = await monitor.ping_hosts({"hosts": hosts, "method": method, "timeout": args.timeout,
+                                               "tcp_port": ports[0]})
+            if not result["success"]:
+                print(f"ping_hosts ({method}): {result['error']}")
+                continue
+            elapsed = time.perf_counter() - start
+            print(f"{'ping_hosts, ' + method:<40} {len(hosts):>6} hosts    {elapsed:8.3f}s  "
+                  f"{len(hosts) / elapsed:>10,.0f} hosts/s  reachable {result['summary']['reachable']}")
+    finally:
+        for server in servers:
+            server.close()
+        for sock in held:
+            sock.close()
+
+
+def bench_network(args):
+    """Batch port checks and pings against a local listener fleet"""
+    asyncio.run(network_run(args))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="System MCP server benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    templates = subparsers.add_parser("templates", help="Log template mining throughput")
+    templates.add_argument("--path", default="/tmp/system_bench/syslog", help="Synthetic syslog location")
+    templates.add_argument("--size-mb", type=int, default=1024, help="Syslog size in MB")
+    templates.add_argument("--ingest-mb", type=int, default=64,
+                           help="Tail of the syslog to run full ingestion over")
+    templates.add_argument("--show", type=int, default=20, help="Print the N largest templates")
+    templates.set_defaults(func=bench_templates)
+    
+    search = subparsers.add_parser("search", help="Sharded log search scaling")
+    search.add_argument("--path", default="/tmp/system_bench/syslog", help="Synthetic syslog location")
+    search.add_argument("--size-mb", type=int, default=1024, help="Syslog size in MB")
+    search.add_argument("--query", default=r"database error code 42\d", help="Regex to search for")
+    search.add_argument("--processes", type=int, default=os.cpu_count() or 4, help="Most worker processes")
+    search.add_argument("--shard-mb", type=int, default=32, help="Shard size in MB")
+    search.set_defaults(func=bench_search)
+    
+    network = subparsers.add_parser("network", help="Batch port checks against local listeners")
+    network.add_argument("--listeners", type=int, default=200, help="Listening sockets")
+    network.add_argument("--closed", type=int, default=50, help="Closed ports added to the targets")
+    network.add_argument("--filtered", type=int, default=10, help="Ports that drop connection attempts")
+    network.add_argument("--timeout", type=float, default=1.0, help="Seconds per probe")
+    network.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 100], help="Concurrency levels")
+    network.set_defaults(func=bench_network)
+    
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Log Follower for System MCP Server
+
+Event-driven log following for tail_log. Each followed file has a single
+watcher, shared by every client following it: on Linux it wakes on inotify
+events for the file's directory (so rotations are seen as they happen),
+elsewhere it polls. New lines are read through a LogCursor, which handles
+rotation and truncation, parsed once and fanned out to every subscriber.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+import sys
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from log_index import LogCursor
+
+logger = logging.getLogger(__name__)
+
+# inotify(7) constants
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM |
+              IN_MOVED_TO | IN_CREATE | IN_DELETE)
+EVENT_HEADER = struct.Struct("iIII")
+
+
+class Inotify:
+    """Minimal inotify binding via libc, for directory watches"""
+    
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+    
+    @staticmethod
+    def available() -> bool:
+        """Whether inotify can be used on this platform"""
+        if not sys.platform.startswith("linux"):
+            return False
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6")
+            return hasattr(libc, "inotify_init1")
+        except OSError:
+            return False
+    
+    def add_watch(self, directory: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch({directory}): {os.strerror(errno)}")
+        return wd
+    
+    def remove_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+    
+    def read_events(self) -> List[tuple]:
+        """Pending (wd, mask, name) events; empty if there are none"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            events.append((wd, mask, name))
+        return events
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class LogFollower:
+    """
+    One watched file and its subscribers.
+    
+    Reads run on the executor; a change arriving while a read is in flight
+    marks the follower dirty so it reads again, never concurrently.
+    """
+    
+    def __init__(self, path: str, parse_line: Callable[[str, str, int], Dict[str, Any]],
+                 batch_lines: int, queue_size: int, initial_bytes: int = 64 * 1024):
+        self.path = path
+        self.parse_line = parse_line
+        self.batch_lines = batch_lines
+        self.queue_size = queue_size
+        self.subscribers: Set[asyncio.Queue] = set()
+        
+        # Start at the end of the file; an unfinished last line is backed up
+        # to so it is delivered whole once written
+        self.cursor = LogCursor(path)
+        self.cursor.open(0)
+        size = os.fstat(self.cursor.handle.fileno()).st_size
+        tail_start = max(0, size - initial_bytes)
+        self.cursor.handle.seek(tail_start)
+        last_newline = self.cursor.handle.read().rfind(b'\n')
+        self.cursor.offset = tail_start + last_newline + 1 if last_newline >= 0 else tail_start
+        
+        self.line_number = 0
+        self._reading: Optional[asyncio.Task] = None
+        self._dirty = False
+        self._poll_task: Optional[asyncio.Task] = None
+        
+        # Statistics
+        self.lines_read = 0
+        self.dropped_batches = 0
+    
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers.add(queue)
+        return queue
+    
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+    
+    def changed(self):
+        """Schedule a read of whatever has been appended"""
+        if self._reading is not None and not self._reading.done():
+            self._dirty = True
+            return
+        self._reading = asyncio.create_task(self._read_loop())
+    
+    def start_polling(self, interval: float):
+        """Fallback when inotify isn't available"""
+        async def poll():
+            while True:
+                await asyncio.sleep(interval)
+                self.changed()
+        self._poll_task = asyncio.create_task(poll())
+    
+    async def _read_loop(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            self._dirty = False
+            try:
+                event, entries = await loop.run_in_executor(None, self._read)
+            except FileNotFoundError:
+                # Rotated away and not recreated yet; the create event
+                # (or the next poll) picks the new file up
+                event, entries = None, await loop.run_in_executor(None, self._read_lines)
+            except Exception as e:
+                logger.error(f"Failed to read {self.path}: {e}")
+                return
+            
+            if event:
+                self._publish({"event": event, "path": self.path})
+            for i in range(0, len(entries), self.batch_lines):
+                self._publish({"lines": entries[i:i + self.batch_lines]})
+            
+            if not self._dirty:
+                return
+    
+    def _read(self):
+        """Blocking: check for rotation/truncation, then read new lines"""
+        drained = []
+        event = self.cursor.check(lambda: drained.extend(self._read_lines()))
+        return event, drained + self._read_lines()
+    
+    def _read_lines(self) -> List[Dict[str, Any]]:
+        entries = []
+        while True:
+            raw_lines = self.cursor.read_lines(1024 * 1024)
+            if not raw_lines:
+                return entries
+            for raw in raw_lines:
+                line = raw.decode('utf-8', errors='replace').strip()
+                if line:
+                    entries.append(self.parse_line(line, self.path, self.line_number))
+                    self.line_number += 1
+            self.lines_read += len(raw_lines)
+    
+    def _publish(self, item: Dict[str, Any]):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # A stalled client loses batches rather than holding up
+                # everyone else following the file
+                self.dropped_batches += 1
+    
+    async def close(self):
+        for task in (self._poll_task, self._reading):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self.cursor.close()
+
+
+class LogFollowManager:
+    """
+    Shares one follower per file between all clients following it.
+    
+    Features:
+    - inotify directory watches on Linux, polling elsewhere
+    - Rotation and truncation reported to subscribers as events
+    - Per-subscriber bounded queues
+    """
+    
+    def __init__(self, config: Dict[str, Any],
+                 parse_line: Callable[[str, str, int], Dict[str, Any]]):
+        """
+        Initialize follow manager.
+        
+        Args:
+            config: Follow configuration (follow_poll_interval,
+                follow_batch_lines, follow_queue_size, use_inotify)
+            parse_line: Parser for one line: (line, log_path, line_number)
+        """
+        self.parse_line = parse_line
+        self.poll_interval = config.get("follow_poll_interval", 1.0)
+        self.batch_lines = config.get("follow_batch_lines", 200)
+        self.queue_size = config.get("follow_queue_size", 1000)
+        self.use_inotify = config.get("use_inotify", True) and Inotify.available()
+        
+        self.followers: Dict[str, LogFollower] = {}
+        self._inotify: Optional[Inotify] = None
+        self._watches: Dict[str, int] = {}          # directory -> wd
+        self._watched: Dict[int, Dict[str, str]] = {}  # wd -> {name: path}
+        self._lock: Optional[asyncio.Lock] = None
+    
+    @asynccontextmanager
+    async def follow(self, path: str):
+        """
+        Subscribe to lines appended to `path` from now on.
+        
+        Yields an asyncio.Queue of {"lines": [...]} batches and
+        {"event": "rotated" | "truncated"} notices.
+        """
+        path = os.path.realpath(path)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        
+        async with self._lock:
+            follower = self.followers.get(path)
+            if follower is None:
+                follower = LogFollower(path, self.parse_line, self.batch_lines, self.queue_size)
+                self.followers[path] = follower
+                self._watch(follower)
+            queue = follower.subscribe()
+        
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                follower.unsubscribe(queue)
+                if not follower.subscribers:
+                    self.followers.pop(path, None)
+                    self._unwatch(follower)
+                    await follower.close()
+    
+    def _watch(self, follower: LogFollower):
+        if self.use_inotify:
+            try:
+                if self._inotify is None:
+                    self._inotify = Inotify()
+                    asyncio.get_running_loop().add_reader(self._inotify.fd, self._on_events)
+                directory, name = os.path.split(follower.path)
+                wd = self._watches.get(directory)
+                if wd is None:
+                    wd = self._watches[directory] = self._inotify.add_watch(directory)
+                self._watched.setdefault(wd, {})[name] = follower.path
+                return
+            except OSError as e:
+                logger.warning(f"inotify unavailable for {follower.path} ({e}), polling")
+        follower.start_polling(self.poll_interval)
+    
+    def _unwatch(self, follower: LogFollower):
+        directory, name = os.path.split(follower.path)
+        wd = self._watches.get(directory)
+        if wd is None:
+            return
+        names = self._watched.get(wd, {})
+        names.pop(name, None)
+        if not names:
+            self._watched.pop(wd, None)
+            self._watches.pop(directory, None)
+            self._inotify.remove_watch(wd)
+    
+    def _on_events(self):
+        """inotify fd is readable: wake followers whose file changed"""
+        woken = set()
+        for wd, _mask, name in self._inotify.read_events():
+            path = self._watched.get(wd, {}).get(name)
+            if path and path not in woken:
+                woken.add(path)
+                follower = self.followers.get(path)
+                if follower:
+                    follower.changed()
+    
+    async def close(self):
+        """Stop every follower and release the inotify instance"""
+        for follower in list(self.followers.values()):
+            await follower.close()
+        self.followers.clear()
+        if self._inotify is not None:
+            asyncio.get_running_loop().remove_reader(self._inotify.fd)
+            self._inotify.close()
+            self._inotify = None
+        self._watches.clear()
+        self._watched.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get follower statistics"""
+        return {
+            "mode": "inotify" if self.use_inotify else "polling",
+            "followers": {
+                path: {
+                    "subscribers": len(follower.subscribers),
+                    "lines_read": follower.lines_read,
+                    "dropped_batches": follower.dropped_batches,
+                    **follower.cursor.get_state()
+                }
+                for path, follower in self.followers.items()
+            }
+        }
@@ -0,0 +1,391 @@
+"""
+Log Index for System MCP Server
+
+Incremental, indexed log ingestion for the log parser. Each log file has a
+cursor (open handle, inode and byte offset) so new lines are read and parsed
+exactly once; rotation and truncation are detected from the inode and size.
+Parsed lines land in a compact columnar store (timestamp, level, process and
+message-template ids, the latter from a TemplateMiner shared by all files)
+with a block min/max time index and per-level bitmaps, so searches and
+pattern analysis run over pre-parsed columns instead of re-reading and
+re-parsing the file on every call.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+from template_miner import TemplateMiner
+
+logger = logging.getLogger(__name__)
+
+# Rows per block of the time-range index
+TIME_BLOCK_ROWS = 1024
+
+# Numeric level codes; 0 means the line had no recognizable level
+LEVEL_CODES = {
+    "DEBUG": 10,
+    "INFO": 20,
+    "WARN": 30,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50,
+    "FATAL": 50
+}
+LEVEL_NAMES = {0: None, 10: "DEBUG", 20: "INFO", 30: "WARNING", 40: "ERROR", 50: "CRITICAL"}
+
+def level_codes(min_level: Optional[str] = None, exact_level: Optional[str] = None,
+                include_unknown: bool = True) -> Optional[List[int]]:
+    """
+    Level codes selected by a minimum or exact level name (None: all).
+    
+    Lines without a level pass level filters unless include_unknown is
+    False, as they always have in the log tools.
+    """
+    if exact_level:
+        codes = [LEVEL_CODES.get(exact_level.upper(), -1)]
+    elif min_level:
+        threshold = LEVEL_CODES.get(min_level.upper(), 0)
+        codes = [code for code in LEVEL_NAMES if code and code >= threshold]
+    else:
+        return None
+    if include_unknown:
+        codes.append(0)
+    return codes
+
+
+class LogCursor:
+    """Read position in one log file, following it across rotations"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.handle = None
+        self.inode: Optional[int] = None
+        self.device: Optional[int] = None
+        self.offset = 0
+        self.rotations = 0
+        self.truncations = 0
+    
+    def open(self, start: int = 0):
+        """Open the current file at `path` and position at `start`"""
+        self.close()
+        self.handle = open(self.path, 'rb')
+        stat = os.fstat(self.handle.fileno())
+        self.inode, self.device = stat.st_ino, stat.st_dev
+        self.offset = start
+        self.handle.seek(start)
+    
+    def open_tail(self, size: int):
+        """Open positioned at the first line start within the last `size` bytes"""
+        start = max(0, os.stat(self.path).st_size - size)
+        self.open(start)
+        if start:
+            self.handle.readline()
+            self.offset = self.handle.tell()
+    
+    def close(self):
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+    
+    def check(self, drain: Callable[[], None]) -> Optional[str]:
+        """
+        Detect rotation or truncation of the file at `path`.
+        
+        On rotation drain() is called first, to consume what is left of the
+        old file through the still-open handle, and the new file is opened
+        from its start.
+        
+        Returns:
+            "rotated", "truncated" or None
+        """
+        stat = os.stat(self.path)
+        if (stat.st_ino, stat.st_dev) != (self.inode, self.device):
+            drain()
+            self.rotations += 1
+            self.open(0)
+            return "rotated"
+        if stat.st_size < self.offset:
+            self.truncations += 1
+            self.offset = 0
+            return "truncated"
+        return None
+    
+    def read_lines(self, limit: int) -> List[bytes]:
+        """
+        Complete lines from the cursor on, at most `limit` bytes' worth.
+        
+        A trailing line without its newline is left unread until it is
+        finished.
+        """
+        self.handle.seek(self.offset)
+        data = self.handle.read(limit)
+        end = data.rfind(b'\n')
+        if end < 0:
+            return []
+        self.offset += end + 1
+        return data[:end].split(b'\n')
+    
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "inode": self.inode,
+            "offset": self.offset,
+            "rotations": self.rotations,
+            "truncations": self.truncations
+        }
+
+
+class LogStore:
+    """
+    Columnar store of parsed lines for one log file.
+    
+    Columns grow by doubling; `max_rows` caps memory by discarding the oldest
+    half when reached, after which the indexes are rebuilt.
+    """
+    
+    def __init__(self, max_rows: int, miner: TemplateMiner, initial_capacity: int = 4096):
+        self.max_rows = max_rows
+        self.miner = miner
+        self.count = 0
+        self.first_line = 0
+        capacity = min(initial_capacity, max_rows)
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.levels = np.zeros(capacity, dtype=np.int8)
+        self.process_ids = np.full(capacity, -1, dtype=np.int32)
+        self.template_ids = np.zeros(capacity, dtype=np.int32)
+        self.lines: List[str] = []
+        
+        # Interned process names; template ids index the shared miner
+        self.processes: List[str] = []
+        self.process_lookup: Dict[str, int] = {}
+        
+        # Indexes
+        self.block_min = np.zeros(0, dtype=np.float64)
+        self.block_max = np.zeros(0, dtype=np.float64)
+        self.level_bitmaps: Dict[int, np.ndarray] = {}
+    
+    def _intern(self, value: str, table: List[str], lookup: Dict[str, int]) -> int:
+        index = lookup.get(value)
+        if index is None:
+            index = lookup[value] = len(table)
+            table.append(value)
+        return index
+    
+    def _grow(self, needed: int):
+        capacity = len(self.timestamps)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for name in ('timestamps', 'levels', 'process_ids', 'template_ids'):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            setattr(self, name, grown)
+    
+    def append(self, entries: List[Dict[str, Any]]):
+        """Append parsed entries (raw_line, parsed_timestamp, level, process, message)"""
+        if not entries:
+            return
+        if self.count + len(entries) > self.max_rows:
+            self._trim(max(self.count + len(entries) - self.max_rows, self.max_rows // 2))
+            entries = entries[-self.max_rows:]
+        
+        start, added = self.count, len(entries)
+        self._grow(start + added)
+        end = start + added
+        
+        self.timestamps[start:end] = [e['parsed_timestamp'] for e in entries]
+        self.levels[start:end] = [LEVEL_CODES.get((e.get('level') or '').upper(), 0)
+                                  for e in entries]
+        self.process_ids[start:end] = [
+            self._intern(e['process'], self.processes, self.process_lookup) if e.get('process') else -1
+            for e in entries
+        ]
+        self.template_ids[start:end] = self.miner.add_many([e.get('message') or '' for e in entries])
+        self.lines.extend(e['raw_line'] for e in entries)
+        self.count = end
+        
+        self._index(start, end)
+    
+    def _index(self, start: int, end: int):
+        """Extend the time blocks and level bitmaps over rows [start, end)"""
+        blocks = (end + TIME_BLOCK_ROWS - 1) // TIME_BLOCK_ROWS
+        first_block = start // TIME_BLOCK_ROWS
+        if blocks > len(self.block_min):
+            self.block_min = np.resize(self.block_min, blocks)
+            self.block_max = np.resize(self.block_max, blocks)
+        for block in range(first_block, blocks):
+            lo = block * TIME_BLOCK_ROWS
+            hi = min(end, lo + TIME_BLOCK_ROWS)
+            self.block_min[block] = self.timestamps[lo:hi].min()
+            self.block_max[block] = self.timestamps[lo:hi].max()
+        
+        size = (len(self.timestamps) + 7) // 8
+        rows = np.arange(start, end)
+        levels = self.levels[start:end]
+        for code in np.unique(levels).tolist():
+            bitmap = self.level_bitmaps.get(code)
+            if bitmap is None or len(bitmap) < size:
+                grown = np.zeros(size, dtype=np.uint8)
+                if bitmap is not None:
+                    grown[:len(bitmap)] = bitmap
+                bitmap = self.level_bitmaps[code] = grown
+            hits = rows[levels == code]
+            np.bitwise_or.at(bitmap, hits >> 3, (1 << (hits & 7)).astype(np.uint8))
+    
+    def _trim(self, drop: int):
+        """Discard the oldest `drop` rows and rebuild the indexes"""
+        drop = min(drop, self.count)
+        keep = self.count - drop
+        for name in ('timestamps', 'levels', 'process_ids', 'template_ids'):
+            column = getattr(self, name)
+            column[:keep] = column[drop:self.count]
+        del self.lines[:drop]
+        self.count = keep
+        self.first_line += drop
+        
+        self.block_min = np.zeros(0, dtype=np.float64)
+        self.block_max = np.zeros(0, dtype=np.float64)
+        self.level_bitmaps = {}
+        if keep:
+            self._index(0, keep)
+    
+    def select(self, start: Optional[float] = None, end: Optional[float] = None,
+               levels: Optional[List[int]] = None) -> np.ndarray:
+        """
+        Row numbers matching a time range and a set of level codes.
+        
+        The time range prunes whole blocks via their min/max before testing
+        rows; the level set is the OR of its bitmaps.
+        """
+        n = self.count
+        mask = np.ones(n, dtype=bool)
+        
+        if start is not None or end is not None:
+            lo = -np.inf if start is None else start
+            hi = np.inf if end is None else end
+            blocks = np.flatnonzero((self.block_max >= lo) & (self.block_min <= hi))
+            mask[:] = False
+            for block in blocks.tolist():
+                rows = slice(block * TIME_BLOCK_ROWS, min(n, (block + 1) * TIME_BLOCK_ROWS))
+                column = self.timestamps[rows]
+                mask[rows] = (column >= lo) & (column <= hi)
+        
+        if levels is not None:
+            bits = np.zeros((n + 7) // 8, dtype=np.uint8)
+            for code in levels:
+                bitmap = self.level_bitmaps.get(code)
+                if bitmap is not None:
+                    # Bitmaps only grow when their level is appended to
+                    used = min(len(bits), len(bitmap))
+                    bits[:used] |= bitmap[:used]
+            mask &= np.unpackbits(bits, bitorder='little')[:n].astype(bool)
+        
+        return np.flatnonzero(mask)
+    
+    def memory_bytes(self) -> int:
+        return (self.timestamps.nbytes + self.levels.nbytes + self.process_ids.nbytes +
+                self.template_ids.nbytes + sum(b.nbytes for b in self.level_bitmaps.values()) +
+                sum(len(line) for line in self.lines))
+
+
+class LogIndex:
+    """
+    Cursors and stores for every log file the parser has been asked about.
+    
+    Not thread-safe; the log parser serializes access per file.
+    """
+    
+    def __init__(self, config: Dict[str, Any],
+                 parse_line: Callable[[str, str, int], Dict[str, Any]],
+                 miner: Optional[TemplateMiner] = None):
+        """
+        Initialize log index.
+        
+        Args:
+            config: Index configuration (max_index_lines, initial_bytes,
+                ingest_chunk)
+            parse_line: Parser for one line: (line, log_path, line_number)
+            miner: Template miner shared with other users (default: own)
+        """
+        self.max_rows = config.get("max_index_lines", 200000)
+        self.initial_bytes = config.get("initial_bytes", 4 * 1024 * 1024)
+        self.ingest_chunk = config.get("ingest_chunk", 4 * 1024 * 1024)
+        self.parse_line = parse_line
+        self.miner = miner or TemplateMiner(config)
+        
+        self.cursors: Dict[str, LogCursor] = {}
+        self.stores: Dict[str, LogStore] = {}
+        
+        # Statistics
+        self.lines_parsed = 0
+        self.parse_seconds = 0.0
+    
+    def refresh(self, path: str) -> LogStore:
+        """Ingest lines appended to `path` since the last refresh"""
+        cursor = self.cursors.get(path)
+        store = self.stores.get(path)
+        if cursor is None:
+            cursor = self.cursors[path] = LogCursor(path)
+            store = self.stores[path] = LogStore(self.max_rows, self.miner)
+        
+        if cursor.handle is None:
+            # First look at this file: index its tail
+            cursor.open_tail(self.initial_bytes)
+        else:
+            cursor.check(lambda: self._ingest(cursor, store))
+        
+        self._ingest(cursor, store)
+        return store
+    
+    def _ingest(self, cursor: LogCursor, store: LogStore):
+        started = time.perf_counter()
+        while True:
+            raw_lines = cursor.read_lines(self.ingest_chunk)
+            if not raw_lines:
+                break
+            entries = []
+            line_number = store.first_line + store.count
+            for raw in raw_lines:
+                line = raw.decode('utf-8', errors='replace').strip()
+                if line:
+                    entries.append(self.parse_line(line, cursor.path, line_number + len(entries)))
+            store.append(entries)
+            self.lines_parsed += len(entries)
+        self.parse_seconds += time.perf_counter() - started
+    
+    def forget(self, path: str):
+        """Drop the cursor and store for a file"""
+        cursor = self.cursors.pop(path, None)
+        if cursor:
+            cursor.close()
+        self.stores.pop(path, None)
+    
+    def close(self):
+        for path in list(self.cursors):
+            self.forget(path)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index statistics"""
+        return {
+            "files": {
+                path: {
+                    "rows": store.count,
+                    "templates": len(np.unique(store.template_ids[:store.count])),
+                    "memory_bytes": store.memory_bytes(),
+                    **self.cursors[path].get_state()
+                }
+                for path, store in self.stores.items()
+            },
+            "templates": self.miner.get_stats(),
+            "lines_parsed": self.lines_parsed,
+            "lines_per_second": round(self.lines_parsed / self.parse_seconds) if self.parse_seconds else None
+        }
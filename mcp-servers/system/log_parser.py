@@ -9,14 +9,22 @@ Phase: 2.1
 """
 
 import asyncio
+import heapq
 import re
 import time
 import logging
-from typing import Dict, List, Any, Optional, Generator
+from typing import Dict, List, Any, Optional, Generator, Callable, Awaitable
 from pathlib import Path
 import json
 from collections import defaultdict, Counter
 
+import numpy as np
+
+from log_index import LogIndex, LogStore, LEVEL_CODES, LEVEL_NAMES, level_codes
+from log_follow import LogFollowManager
+from log_search import LogSearchPool
+from template_miner import TemplateMiner, WILDCARD
+
 logger = logging.getLogger(__name__)
 
 
@@ -88,16 +96,35 @@ class LogParser:
             )
         }
         
+        # Durations in messages ("took 12.5ms", "in 3 seconds"), recognized
+        # in mined templates as a <*> number with a time unit
+        self.duration_units = {"us": 0.001, "µs": 0.001, "ms": 1.0, "s": 1000.0,
+                               "sec": 1000.0, "secs": 1000.0, "seconds": 1000.0}
+        self.duration_token = re.compile(r'<\*>(?P<unit>ms|us|µs|s|sec|secs|seconds)')
+        
         # Log level mapping
-        self.log_levels = {
-            "DEBUG": 10,
-            "INFO": 20,
-            "WARN": 30,
-            "WARNING": 30,
-            "ERROR": 40,
-            "CRITICAL": 50,
-            "FATAL": 50
-        }
+        self.log_levels = LEVEL_CODES
+        
+        # Format and timestamp layout that matched last; lines in one file
+        # almost always share them
+        self._format_hint: Optional[str] = None
+        self._timestamp_hint: Optional[str] = None
+        
+        # Consecutive lines mostly share a timestamp string; strptime is
+        # the most expensive part of parsing a line
+        self._timestamp_cache: Dict[str, float] = {}
+        
+        # Lines are parsed once, on ingestion, into per-file columnar stores;
+        # one template table, kept across calls, serves every file and analysis
+        self.templates = TemplateMiner(config)
+        self.index = LogIndex(config, self._parse_log_line, self.templates)
+        self._index_locks: Dict[str, asyncio.Lock] = {}
+        
+        # Files too large to index whole are searched in shards on a pool
+        self.search_pool = LogSearchPool(config)
+        
+        # One watcher per followed file, shared by all tail_log followers
+        self.follow_manager = LogFollowManager(config, self._parse_log_line)
         
         logger.info("Log parser initialized")
     
@@ -127,8 +154,29 @@ class LogParser:
     
     async def shutdown(self):
         """Shutdown log parser"""
+        await self.follow_manager.close()
+        self.index.close()
+        self.search_pool.shutdown()
+        try:
+            self.templates.save()
+        except OSError as e:
+            logger.warning(f"Could not save log templates: {e}")
         logger.info("Log parser shutdown")
     
+    async def _with_index(self, log_file: str, query):
+        """
+        Bring a file's index up to date and run query(store) against it.
+        
+        Both run on the executor; a per-file lock keeps ingestion and
+        queries on the same store from overlapping.
+        """
+        lock = self._index_locks.setdefault(log_file, asyncio.Lock())
+        async with lock:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, lambda: query(self.index.refresh(log_file))
+            )
+    
     async def parse_logs(self, log_path: Optional[str] = None, pattern: Optional[str] = None,
                         lines: int = 100, level: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -185,41 +233,34 @@ class LogParser:
     async def _parse_single_log(self, log_path: str, pattern: Optional[str], 
                                lines: int, level: Optional[str]) -> List[Dict[str, Any]]:
         """Parse a single log file"""
-        entries = []
+        pattern_regex = re.compile(pattern, re.IGNORECASE) if pattern else None
         
-        try:
-            # Read last N lines efficiently
-            log_lines = await self._tail_file(log_path, lines * 2)  # Read extra for filtering
+        def query(store: LogStore) -> List[Dict[str, Any]]:
+            rows = store.select(levels=level_codes(min_level=level))
             
-            min_level = self.log_levels.get(level.upper(), 0) if level else 0
-            pattern_regex = re.compile(pattern, re.IGNORECASE) if pattern else None
-            
-            for line_num, line in enumerate(log_lines):
-                line = line.strip()
-                if not line:
+            # Newest first until we have enough
+            matched = []
+            for row in rows[::-1].tolist():
+                if pattern_regex and not pattern_regex.search(store.lines[row]):
                     continue
-                
-                # Parse line
-                parsed_entry = self._parse_log_line(line, log_path, line_num)
-                
-                # Apply level filter
-                if level and parsed_entry.get('level'):
-                    entry_level = self.log_levels.get(parsed_entry['level'].upper(), 0)
-                    if entry_level < min_level:
-                        continue
-                
-                # Apply pattern filter
-                if pattern_regex and not pattern_regex.search(line):
-                    continue
-                
-                entries.append(parsed_entry)
-            
-            return entries[-lines:] if len(entries) > lines else entries
+                matched.append(row)
+                if len(matched) >= lines:
+                    break
             
+            return [self._entry(store, log_path, row) for row in reversed(matched)]
+        
+        try:
+            return await self._with_index(log_path, query)
         except Exception as e:
             logger.error(f"Failed to parse {log_path}: {e}")
             return []
     
+    def _entry(self, store: LogStore, log_path: str, row: int) -> Dict[str, Any]:
+        """Full entry for an indexed row, re-parsed from its stored line"""
+        entry = self._parse_log_line(store.lines[row], log_path, store.first_line + row)
+        entry["parsed_timestamp"] = float(store.timestamps[row])
+        return entry
+    
     def _parse_log_line(self, line: str, log_path: str, line_num: int) -> Dict[str, Any]:
         """Parse a single log line"""
         entry = {
@@ -229,10 +270,16 @@ class LogParser:
             "parsed_timestamp": time.time()
         }
         
-        # Try different log formats
-        for format_name, pattern in self.log_patterns.items():
+        # Try different log formats, starting with the last one that matched
+        formats = self.log_patterns.items()
+        hint = self._format_hint
+        if hint:
+            formats = [(hint, self.log_patterns[hint])] + [f for f in formats if f[0] != hint]
+        
+        for format_name, pattern in formats:
             match = pattern.match(line)
             if match:
+                self._format_hint = format_name
                 entry["format"] = format_name
                 entry.update(match.groupdict())
                 
@@ -261,6 +308,22 @@ class LogParser:
     
     def _parse_timestamp(self, timestamp_str: str) -> float:
         """Parse various timestamp formats to Unix timestamp"""
+        cached = self._timestamp_cache.get(timestamp_str)
+        if cached is not None:
+            return cached
+        if len(self._timestamp_cache) >= 4096:
+            self._timestamp_cache.clear()
+        
+        parsed = self._strptime(timestamp_str)
+        if parsed is not None:
+            self._timestamp_cache[timestamp_str] = parsed
+            return parsed
+        
+        # If all parsing fails, return current time
+        return time.time()
+    
+    def _strptime(self, timestamp_str: str) -> Optional[float]:
+        """Try each known timestamp layout, the last one that worked first"""
         import datetime
         
         # Common timestamp formats
@@ -274,15 +337,26 @@ class LogParser:
             "%Y-%m-%dT%H:%M:%SZ"
         ]
         
+        if self._timestamp_hint:
+            formats.remove(self._timestamp_hint)
+            formats.insert(0, self._timestamp_hint)
+        
         for fmt in formats:
             try:
                 dt = datetime.datetime.strptime(timestamp_str, fmt)
-                return dt.timestamp()
             except ValueError:
                 continue
+            self._timestamp_hint = fmt
+            if "%Y" not in fmt:
+                # Syslog timestamps carry no year; December lines read in
+                # January belong to last year
+                now = datetime.datetime.now()
+                dt = dt.replace(year=now.year)
+                if dt > now + datetime.timedelta(days=1):
+                    dt = dt.replace(year=now.year - 1)
+            return dt.timestamp()
         
-        # If all parsing fails, return current time
-        return time.time()
+        return None
     
     def _extract_log_level(self, message: str) -> Optional[str]:
         """Extract log level from message"""
@@ -384,8 +458,12 @@ class LogParser:
                 if not Path(log_file).exists():
                     continue
                 
+                # max_results is global: later files only fill what is left
+                remaining = max_results - len(search_results)
+                if remaining <= 0:
+                    break
                 file_results = await self._search_single_log(
-                    log_file, query, time_range, level_filter, max_results
+                    log_file, query, time_range, level_filter, remaining
                 )
                 search_results.extend(file_results)
             
@@ -409,43 +487,26 @@ class LogParser:
                                 time_range: Optional[Dict], level_filter: Optional[str],
                                 max_results: int) -> List[Dict[str, Any]]:
         """Search a single log file"""
-        results = []
         query_regex = re.compile(query, re.IGNORECASE) if query else None
+        time_range = time_range or {}
         
-        try:
-            # For large files, we might want to limit the search scope
-            lines = await self._tail_file(log_file, 10000)  # Search last 10k lines
-            
-            for line_num, line in enumerate(lines):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Parse line
-                entry = self._parse_log_line(line, log_file, line_num)
-                
-                # Apply filters
-                if level_filter and entry.get('level'):
-                    if entry['level'].upper() != level_filter.upper():
-                        continue
-                
-                if time_range:
-                    entry_time = entry.get('parsed_timestamp', 0)
-                    if time_range.get('start') and entry_time < time_range['start']:
-                        continue
-                    if time_range.get('end') and entry_time > time_range['end']:
-                        continue
+        def search(store: LogStore) -> List[Dict[str, Any]]:
+            rows = store.select(start=time_range.get('start'), end=time_range.get('end'),
+                                levels=level_codes(exact_level=level_filter))
+            results = []
+            for row in rows.tolist():
+                line = store.lines[row]
                 
                 # Apply query filter and calculate relevance
                 if query_regex:
-                    match = query_regex.search(line)
-                    if not match:
+                    spans = [m.span() for m in query_regex.finditer(line)]
+                    if not spans:
                         continue
-                    
-                    # Calculate relevance score
-                    relevance = len(query_regex.findall(line))
-                    entry['relevance'] = relevance
-                    entry['match_positions'] = [m.span() for m in query_regex.finditer(line)]
+                    entry = self._entry(store, log_file, row)
+                    entry['relevance'] = len(spans)
+                    entry['match_positions'] = spans
+                else:
+                    entry = self._entry(store, log_file, row)
                 
                 results.append(entry)
                 
@@ -453,17 +514,34 @@ class LogParser:
                     break
             
             return results
-            
+        
+        try:
+            if self.search_pool.applies_to(log_file):
+                # Whole-file scan, sharded over the process pool
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(None, lambda: list(self.search_pool.search(
+                    log_file, query, time_range, level_filter, max_results
+                )))
+            return await self._with_index(log_file, search)
         except Exception as e:
             logger.error(f"Failed to search {log_file}: {e}")
             return []
     
-    async def tail_log(self, args: Dict[str, Any]) -> Dict[str, Any]:
+    async def tail_log(self, args: Dict[str, Any],
+                       progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+                       ) -> Dict[str, Any]:
         """
         Real-time log tailing.
         
+        With follow, new lines are collected for `duration` seconds as they
+        are written. If a progress sink is given they are pushed to it in
+        batches as they arrive (and only counted in the result); otherwise
+        they are returned at the end as before.
+        
         Args:
-            args: Tailing parameters
+            args: Tailing parameters (log_file, lines, follow, duration,
+                max_lines)
+            progress: Coroutine function receiving progress payloads
             
         Returns:
             Log tail results
@@ -473,68 +551,80 @@ class LogParser:
             lines = args.get("lines", 50)
             follow = args.get("follow", False)
             duration = args.get("duration", 30) if follow else 0
+            max_lines = args.get("max_lines")
             
             if not log_file or not Path(log_file).exists():
                 return {"success": False, "error": "Log file not found"}
             
-            # Get initial tail
-            initial_lines = await self._tail_file(log_file, lines)
+            if not (follow and duration > 0):
+                return self._tail_result(log_file, await self._tail_file(log_file, lines), follow)
             
-            result = {
-                "success": True,
-                "log_file": log_file,
-                "initial_lines": [
-                    self._parse_log_line(line, log_file, i) 
-                    for i, line in enumerate(initial_lines)
-                ],
-                "follow": follow
-            }
-            
-            if follow and duration > 0:
-                # Follow the log for specified duration
-                new_lines = await self._follow_log_file(log_file, duration)
-                result["new_lines"] = new_lines
-                result["duration"] = duration
+            # Subscribe before reading the tail so no line falls in between
+            async with self.follow_manager.follow(log_file) as updates:
+                result = self._tail_result(log_file, await self._tail_file(log_file, lines), follow)
+                followed = await self._follow_log_file(updates, duration, max_lines, progress)
             
+            result.update(followed)
+            result["duration"] = duration
             return result
             
         except Exception as e:
             logger.error(f"Failed to tail log: {e}")
             return {"success": False, "error": str(e)}
     
-    async def _follow_log_file(self, log_file: str, duration: float) -> List[Dict[str, Any]]:
-        """Follow a log file for new lines"""
+    def _tail_result(self, log_file: str, tail_lines: List[str], follow: bool) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "log_file": log_file,
+            "initial_lines": [
+                self._parse_log_line(line, log_file, i) 
+                for i, line in enumerate(tail_lines)
+            ],
+            "follow": follow
+        }
+    
+    async def _follow_log_file(self, updates: asyncio.Queue, duration: float,
+                               max_lines: Optional[int],
+                               progress: Optional[Callable[[Dict[str, Any]], Awaitable[None]]]
+                               ) -> Dict[str, Any]:
+        """Collect (or stream) followed lines until duration or max_lines is reached"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + duration
         new_lines = []
+        events = []
+        count = 0
         
-        try:
-            # Get initial file position
-            initial_size = Path(log_file).stat().st_size
-            
-            end_time = time.time() + duration
-            
-            while time.time() < end_time:
-                current_size = Path(log_file).stat().st_size
-                
-                if current_size > initial_size:
-                    # Read new content
-                    with open(log_file, 'r') as f:
-                        f.seek(initial_size)
-                        new_content = f.read()
-                        
-                        for line_num, line in enumerate(new_content.splitlines()):
-                            if line.strip():
-                                parsed_line = self._parse_log_line(line, log_file, line_num)
-                                new_lines.append(parsed_line)
-                    
-                    initial_size = current_size
-                
-                await asyncio.sleep(1)  # Check every second
+        while max_lines is None or count < max_lines:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                update = await asyncio.wait_for(updates.get(), remaining)
+            except asyncio.TimeoutError:
+                break
             
-            return new_lines
+            if "event" in update:
+                # Rotation or truncation
+                events.append({"event": update["event"], "timestamp": time.time()})
+                if progress:
+                    await progress({"progress": count, "event": update["event"]})
+                continue
             
-        except Exception as e:
-            logger.error(f"Failed to follow log file: {e}")
-            return []
+            batch = update["lines"]
+            if max_lines is not None:
+                batch = batch[:max_lines - count]
+            count += len(batch)
+            if progress:
+                await progress({"progress": count, "lines": batch})
+            else:
+                new_lines.extend(batch)
+        
+        result = {"new_line_count": count, "events": events}
+        if progress:
+            result["streamed"] = True
+        else:
+            result["new_lines"] = new_lines
+        return result
     
     async def analyze_patterns(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -564,6 +654,8 @@ class LogParser:
             elif analysis_type == "performance":
                 analysis_results.update(await self._analyze_performance_patterns(log_files, time_window))
             
+            self.templates.maybe_save()
+            
             return {
                 "success": True,
                 "analysis": analysis_results,
@@ -576,50 +668,51 @@ class LogParser:
     
     async def _analyze_frequency_patterns(self, log_files: List[str], time_window: int) -> Dict[str, Any]:
         """Analyze frequency patterns in logs"""
-        frequency_data = {
-            "messages_per_hour": defaultdict(int),
-            "top_processes": Counter(),
-            "top_messages": Counter(),
-            "hourly_distribution": defaultdict(int)
-        }
+        messages_per_hour = Counter()
+        top_processes = Counter()
+        top_messages = Counter()
+        hourly_distribution = Counter()
+        
+        window_start = time.time() - time_window
+        utc_offset = time.localtime().tm_gmtoff
         
-        current_time = time.time()
-        window_start = current_time - time_window
+        def count(store: LogStore):
+            rows = store.select(start=window_start)
+            if not len(rows):
+                return
+            timestamps = store.timestamps[rows]
+            
+            # Count by hour, and by local hour of day
+            hours, counts = np.unique((timestamps // 3600).astype(np.int64), return_counts=True)
+            messages_per_hour.update(dict(zip(hours.tolist(), counts.tolist())))
+            hours_of_day = (((timestamps + utc_offset) // 3600) % 24).astype(np.int64)
+            for hour, n in enumerate(np.bincount(hours_of_day, minlength=24).tolist()):
+                if n:
+                    hourly_distribution[hour] += n
+            
+            # Count by process and by message template
+            process_ids = store.process_ids[rows]
+            process_ids = process_ids[process_ids >= 0]
+            for pid, n in enumerate(np.bincount(process_ids).tolist()):
+                if n:
+                    top_processes[store.processes[pid]] += n
+            templates = self.templates.template_texts()
+            for tid, n in enumerate(np.bincount(store.template_ids[rows]).tolist()):
+                if n:
+                    top_messages[templates[tid][:200]] += n
         
         for log_file in log_files:
             try:
-                lines = await self._tail_file(log_file, 5000)
-                
-                for line in lines:
-                    entry = self._parse_log_line(line, log_file, 0)
-                    entry_time = entry.get('parsed_timestamp', current_time)
-                    
-                    if entry_time >= window_start:
-                        # Count by hour
-                        hour_key = int(entry_time // 3600)
-                        frequency_data["messages_per_hour"][hour_key] += 1
-                        
-                        # Count by process
-                        if 'process' in entry:
-                            frequency_data["top_processes"][entry['process']] += 1
-                        
-                        # Count similar messages
-                        message = entry.get('message', '')[:100]  # First 100 chars
-                        frequency_data["top_messages"][message] += 1
-                        
-                        # Hourly distribution
-                        hour_of_day = time.localtime(entry_time).tm_hour
-                        frequency_data["hourly_distribution"][hour_of_day] += 1
-                        
+                await self._with_index(log_file, count)
             except Exception as e:
                 logger.debug(f"Error analyzing {log_file}: {e}")
         
         # Convert to regular dicts for JSON serialization
         return {
-            "messages_per_hour": dict(frequency_data["messages_per_hour"]),
-            "top_processes": dict(frequency_data["top_processes"].most_common(10)),
-            "top_messages": dict(frequency_data["top_messages"].most_common(20)),
-            "hourly_distribution": dict(frequency_data["hourly_distribution"])
+            "messages_per_hour": dict(messages_per_hour),
+            "top_processes": dict(top_processes.most_common(10)),
+            "top_messages": dict(top_messages.most_common(20)),
+            "hourly_distribution": dict(hourly_distribution)
         }
     
     async def _analyze_error_patterns(self, log_files: List[str], time_window: int) -> Dict[str, Any]:
@@ -631,41 +724,61 @@ class LogParser:
             "top_error_messages": Counter()
         }
         
-        current_time = time.time()
-        window_start = current_time - time_window
+        window_start = time.time() - time_window
         
         error_keywords = ['error', 'fail', 'exception', 'critical', 'fatal', 'panic', 'segfault']
+        error_levels = level_codes(min_level="ERROR", include_unknown=False)
+        
+        def collect(store: LogStore, log_file: str):
+            rows = store.select(start=window_start)
+            if not len(rows):
+                return
+            
+            # A keyword in a template's fixed text is in every line it covers;
+            # lines of templates with variable parts are checked one by one
+            templates = self.templates.template_texts()
+            keyword_templates = np.array(
+                [any(keyword in text.replace(WILDCARD, " ").lower() for keyword in error_keywords)
+                 for text in templates],
+                dtype=bool
+            )
+            variable_templates = np.array([WILDCARD in text for text in templates], dtype=bool)
+            template_ids = store.template_ids[rows]
+            levels = store.levels[rows]
+            is_error = np.isin(levels, error_levels) | keyword_templates[template_ids]
+            for i in np.flatnonzero(~is_error & variable_templates[template_ids]).tolist():
+                line = store.lines[rows[i]]
+                lowered = line.lower()
+                if not any(keyword in lowered for keyword in error_keywords):
+                    continue
+                message = (self._parse_log_line(line, log_file, 0).get('message') or '').lower()
+                is_error[i] = any(keyword in message for keyword in error_keywords)
+            rows, template_ids, levels = rows[is_error], template_ids[is_error], levels[is_error]
+            
+            error_patterns["error_count"] += len(rows)
+            for code, n in enumerate(np.bincount(levels.astype(np.int64)).tolist()):
+                if n:
+                    error_patterns["error_types"][LEVEL_NAMES.get(code) or 'UNKNOWN'] += n
+            
+            # Group error messages by template
+            for tid, n in enumerate(np.bincount(template_ids).tolist()):
+                if n:
+                    error_patterns["top_error_messages"][templates[tid][:200]] += n
+            
+            # Only the newest entries make the timeline; parse just those
+            newest = rows[np.argsort(store.timestamps[rows], kind='stable')[-50:]]
+            for row in newest.tolist():
+                entry = self._entry(store, log_file, row)
+                error_patterns["error_timeline"].append({
+                    "timestamp": entry["parsed_timestamp"],
+                    "message": entry.get('message', '')[:200],
+                    "level": (entry.get('level') or '').upper(),
+                    "source": log_file
+                })
         
         for log_file in log_files:
             try:
-                lines = await self._tail_file(log_file, 5000)
-                
-                for line in lines:
-                    entry = self._parse_log_line(line, log_file, 0)
-                    entry_time = entry.get('parsed_timestamp', current_time)
-                    
-                    if entry_time >= window_start:
-                        message = entry.get('message', '').lower()
-                        level = entry.get('level', '').upper()
-                        
-                        # Check for errors
-                        is_error = (level in ['ERROR', 'CRITICAL', 'FATAL'] or
-                                  any(keyword in message for keyword in error_keywords))
-                        
-                        if is_error:
-                            error_patterns["error_count"] += 1
-                            error_patterns["error_types"][level or 'UNKNOWN'] += 1
-                            error_patterns["error_timeline"].append({
-                                "timestamp": entry_time,
-                                "message": entry.get('message', '')[:200],
-                                "level": level,
-                                "source": log_file
-                            })
-                            
-                            # Extract error message pattern
-                            error_msg = entry.get('message', '')[:100]
-                            error_patterns["top_error_messages"][error_msg] += 1
-                            
+                await self._with_index(log_file, lambda store: collect(store, log_file))
             except Exception as e:
                 logger.debug(f"Error analyzing {log_file}: {e}")
         
@@ -679,8 +792,90 @@ class LogParser:
     
     async def _analyze_performance_patterns(self, log_files: List[str], time_window: int) -> Dict[str, Any]:
         """Analyze performance patterns in logs"""
-        # This would analyze response times, request rates, etc.
-        # Implementation depends on specific log formats
+        durations: Dict[str, List[float]] = defaultdict(list)
+        per_minute = Counter()
+        slowest = []
+        
+        window_start = time.time() - time_window
+        
+        def collect(store: LogStore, log_file: str):
+            rows = store.select(start=window_start)
+            if not len(rows):
+                return
+            
+            minutes, counts = np.unique((store.timestamps[rows] // 60).astype(np.int64), return_counts=True)
+            per_minute.update(dict(zip(minutes.tolist(), counts.tolist())))
+            
+            # Only lines of templates that carry a duration are read, and
+            # the value is taken from the token position the template gives
+            templates = self.templates.template_texts()
+            template_ids = store.template_ids[rows]
+            for tid in np.unique(template_ids).tolist():
+                field = self._duration_field(templates[tid])
+                if field is None:
+                    continue
+                position, unit, suffix = field
+                scale = self.duration_units[unit]
+                values = durations[templates[tid][:200]]
+                for row in rows[template_ids == tid].tolist():
+                    try:
+                        token = store.lines[row].split()[position]
+                        ms = float(token[:len(token) - suffix]) * scale
+                    except (IndexError, ValueError):
+                        continue
+                    values.append(ms)
+                    slowest.append((ms, row, store, log_file))
+        
+        for log_file in log_files:
+            try:
+                await self._with_index(log_file, lambda store: collect(store, log_file))
+            except Exception as e:
+                logger.debug(f"Error analyzing {log_file}: {e}")
+        
+        timed_operations = []
+        for template, values in durations.items():
+            if not values:
+                continue
+            values = np.array(values)
+            timed_operations.append({
+                "template": template,
+                "count": len(values),
+                "avg_ms": round(float(values.mean()), 3),
+                "p50_ms": round(float(np.percentile(values, 50)), 3),
+                "p95_ms": round(float(np.percentile(values, 95)), 3),
+                "max_ms": round(float(values.max()), 3),
+                "total_ms": round(float(values.sum()), 3)
+            })
+        timed_operations.sort(key=lambda op: op["total_ms"], reverse=True)
+        
+        rates = list(per_minute.values())
         return {
-            "performance_analysis": "Not implemented - requires specific log format configuration"
-        }
\ No newline at end of file
+            "timed_operations": timed_operations[:20],
+            "throughput": {
+                "lines": sum(rates),
+                "avg_per_minute": round(sum(rates) / len(rates), 2) if rates else 0,
+                "peak_per_minute": max(rates) if rates else 0
+            },
+            "slowest_entries": [
+                {"duration_ms": ms, "timestamp": float(store.timestamps[row]),
+                 "line": store.lines[row][:200], "source": source}
+                for ms, row, store, source in heapq.nlargest(10, slowest, key=lambda item: item[0])
+            ]
+        }
+    
+    def _duration_field(self, template: str) -> Optional[tuple]:
+        """
+        Where a template carries a duration: (token position counted from
+        the end of the line, unit, length of the unit suffix on the token).
+        
+        Masking never changes token boundaries, so a line's last tokens line
+        up with its template's.
+        """
+        tokens = template.split()
+        for i, token in enumerate(tokens):
+            match = self.duration_token.fullmatch(token)
+            if match:
+                return i - len(tokens), match.group('unit'), len(match.group('unit'))
+            if token == '<*>' and i + 1 < len(tokens) and tokens[i + 1] in self.duration_units:
+                return i - len(tokens), tokens[i + 1], 0
+        return None
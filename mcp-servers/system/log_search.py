@@ -0,0 +1,242 @@
+"""
+Sharded Log Search for System MCP Server
+
+Parallel search of large log files for search_logs. A file is split into
+byte-range shards aligned on newlines; each shard is memory-mapped and
+scanned in a worker process with a compiled bytes regex, so only matching
+lines are decoded and parsed. Shard results come back in file order and the
+merge stops (cancelling shards that haven't started) once max_results is
+reached.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import logging
+import mmap
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from log_index import LEVEL_CODES
+
+logger = logging.getLogger(__name__)
+
+# Per-process line parser for workers, created on first use
+_worker_parser = None
+
+
+def shard_ranges(path: str, shard_bytes: int) -> List[Tuple[int, int]]:
+    """Byte ranges of about shard_bytes covering the file, each ending after a newline"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    ranges = []
+    with open(path, 'rb') as f:
+        start = 0
+        while start < size:
+            end = start + shard_bytes
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()
+                end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+
+def _parse_line(line: str, path: str, line_number: int) -> Dict[str, Any]:
+    global _worker_parser
+    if _worker_parser is None:
+        from log_parser import LogParser
+        _worker_parser = LogParser({"log_paths": []})
+    return _worker_parser._parse_log_line(line, path, line_number)
+
+
+def _accept(entry: Dict[str, Any], level_code: Optional[int],
+            start: Optional[float], end: Optional[float]) -> bool:
+    """Level (lines without a level pass) and time range filters"""
+    if level_code is not None:
+        code = LEVEL_CODES.get((entry.get('level') or '').upper(), 0)
+        if code and code != level_code:
+            return False
+    timestamp = entry.get('parsed_timestamp', 0)
+    if start is not None and timestamp < start:
+        return False
+    if end is not None and timestamp > end:
+        return False
+    return True
+
+
+def _scan_shard(path: str, start: int, end: int, query: str, level_code: Optional[int],
+                time_start: Optional[float], time_end: Optional[float],
+                limit: int) -> Dict[str, Any]:
+    """
+    Search one shard (runs in a worker process).
+    
+    Returns:
+        {"entries": [(line index within shard, entry)], "lines": newlines in shard}
+    """
+    entries = []
+    with open(path, 'rb') as f:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            if not query:
+                lines = data[start:end].split(b'\n')
+                for index, raw in enumerate(lines):
+                    if len(entries) >= limit:
+                        break
+                    line = raw.decode('utf-8', errors='replace').strip()
+                    if line:
+                        entry = _parse_line(line, path, index)
+                        if _accept(entry, level_code, time_start, time_end):
+                            entries.append((index, entry))
+                return {"entries": entries, "lines": data[start:end].count(b'\n')}
+            
+            # Candidate lines are found by the bytes regex on the mapping;
+            # spans are then taken on the decoded line, as before
+            byte_regex = re.compile(query.encode('utf-8'), re.IGNORECASE | re.MULTILINE)
+            query_regex = re.compile(query, re.IGNORECASE)
+            position = counted = start
+            line_index = 0
+            while len(entries) < limit:
+                match = byte_regex.search(data, position, end)
+                if not match:
+                    break
+                line_start = data.rfind(b'\n', start, match.start()) + 1 or start
+                line_end = data.find(b'\n', match.start(), end)
+                if line_end < 0:
+                    line_end = end
+                line_index += data[counted:line_start].count(b'\n')
+                counted = line_start
+                position = line_end + 1
+                
+                line = data[line_start:line_end].decode('utf-8', errors='replace').strip()
+                spans = [m.span() for m in query_regex.finditer(line)]
+                if not spans:
+                    continue
+                entry = _parse_line(line, path, line_index)
+                if not _accept(entry, level_code, time_start, time_end):
+                    continue
+                entry['relevance'] = len(spans)
+                entry['match_positions'] = spans
+                entries.append((line_index, entry))
+            
+            lines = line_index + data[counted:end].count(b'\n')
+            return {"entries": entries, "lines": lines}
+        finally:
+            data.close()
+
+
+class LogSearchPool:
+    """
+    Runs sharded searches of large log files on a process pool.
+    
+    Features:
+    - Newline-aligned byte-range shards
+    - mmap + compiled bytes regex per shard, parsing only matching lines
+    - In-order merge with a global result cutoff
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize search pool.
+        
+        Args:
+            config: Search configuration (search_processes,
+                search_shard_bytes, parallel_search_bytes)
+        """
+        self.processes = config.get("search_processes", 0) or os.cpu_count() or 1
+        self.shard_bytes = config.get("search_shard_bytes", 32 * 1024 * 1024)
+        self.min_file_bytes = config.get("parallel_search_bytes", 64 * 1024 * 1024)
+        self._pool: Optional[ProcessPoolExecutor] = None
+        
+        # Statistics
+        self.searches = 0
+        self.shards_scanned = 0
+        self.shards_cancelled = 0
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Create the process pool on first use"""
+        if self._pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            self._pool = ProcessPoolExecutor(max_workers=self.processes, mp_context=context)
+            logger.info(f"Log search pool started with {self.processes} processes")
+        return self._pool
+    
+    def applies_to(self, path: str) -> bool:
+        """Whether a file is large enough to be searched in shards"""
+        try:
+            return os.path.getsize(path) >= self.min_file_bytes
+        except OSError:
+            return False
+    
+    def search(self, path: str, query: str, time_range: Optional[Dict] = None,
+               level_filter: Optional[str] = None, max_results: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Search a whole file, blocking.
+        
+        Yields:
+            Matching entries in file order, at most max_results
+        """
+        time_range = time_range or {}
+        level_code = LEVEL_CODES.get(level_filter.upper(), -1) if level_filter else None
+        shards = deque(shard_ranges(path, self.shard_bytes))
+        self.searches += 1
+        
+        def submit(shard: Tuple[int, int]):
+            return self._get_pool().submit(
+                _scan_shard, path, shard[0], shard[1], query, level_code,
+                time_range.get('start'), time_range.get('end'), max_results
+            )
+        
+        in_flight = deque()
+        max_in_flight = self.processes * 2
+        line_base = 0
+        found = 0
+        try:
+            while shards and len(in_flight) < max_in_flight:
+                in_flight.append(submit(shards.popleft()))
+            
+            while in_flight:
+                result = in_flight.popleft().result()
+                self.shards_scanned += 1
+                if shards:
+                    in_flight.append(submit(shards.popleft()))
+                
+                for index, entry in result["entries"]:
+                    entry['line_number'] = line_base + index
+                    yield entry
+                    found += 1
+                    if found >= max_results:
+                        return
+                line_base += result["lines"]
+        finally:
+            # Cutoff reached (or the caller stopped): drop shards not started
+            for future in in_flight:
+                if future.cancel():
+                    self.shards_cancelled += 1
+            self.shards_cancelled += len(shards)
+    
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get search pool statistics"""
+        return {
+            "processes": self.processes,
+            "shard_bytes": self.shard_bytes,
+            "parallel_search_bytes": self.min_file_bytes,
+            "searches": self.searches,
+            "shards_scanned": self.shards_scanned,
+            "shards_cancelled": self.shards_cancelled
+        }
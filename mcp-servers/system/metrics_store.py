@@ -0,0 +1,399 @@
+"""
+Metrics Store for System MCP Server
+
+Columnar time series for host and per-process metrics, fed by the shared
+system sampler. Each series is a fixed-size NumPy ring buffer (a timestamp
+column plus one float column per metric) with downsampled rollups, so any
+window can be aggregated in a few vectorized operations and tools never have
+to sleep through a sampling period to produce history.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import logging
+import threading
+import time
+import warnings
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from sampler import SystemSampler, SystemSnapshot
+
+logger = logging.getLogger(__name__)
+
+HOST_METRICS = [
+    'cpu_percent', 'memory_percent', 'swap_percent', 'load_1m',
+    'net_bytes_sent_per_sec', 'net_bytes_recv_per_sec',
+    'disk_read_bytes_per_sec', 'disk_write_bytes_per_sec'
+]
+
+PROCESS_METRICS = ['cpu_percent', 'memory_percent', 'memory_rss', 'num_threads']
+
+# Rollup name -> bucket width in seconds
+ROLLUP_RESOLUTIONS = {"1s": 1.0, "1m": 60.0, "1h": 3600.0}
+
+DEFAULT_PERCENTILES = [50, 95, 99]
+
+
+class RingBuffer:
+    """
+    Fixed-capacity columnar ring buffer.
+    
+    Rows are a timestamp plus a float64 value per column. Appends overwrite
+    the oldest row once full; reads return rows oldest first.
+    """
+    
+    def __init__(self, columns: Sequence[str], capacity: int):
+        self.columns = list(columns)
+        self.capacity = max(1, int(capacity))
+        self.timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.full((self.capacity, len(self.columns)), np.nan, dtype=np.float64)
+        self.head = 0
+        self.count = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def append(self, timestamp: float, row: Sequence[float]):
+        """Append one row, overwriting the oldest when full"""
+        with self._lock:
+            self.timestamps[self.head] = timestamp
+            self.values[self.head] = row
+            self.head = (self.head + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+    
+    def _ordered(self):
+        """Copies of the stored rows, oldest first"""
+        with self._lock:
+            if self.count < self.capacity:
+                return self.timestamps[:self.count].copy(), self.values[:self.count].copy()
+            order = np.r_[self.head:self.capacity, 0:self.head]
+            return self.timestamps[order], self.values[order]
+    
+    def window(self, start: Optional[float] = None,
+               end: Optional[float] = None):
+        """
+        Rows with start <= timestamp <= end.
+        
+        Returns:
+            (timestamps, values) arrays, oldest first
+        """
+        timestamps, values = self._ordered()
+        lo = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+        hi = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='right')
+        return timestamps[lo:hi], values[lo:hi]
+    
+    def tail(self, rows: int):
+        """Last `rows` rows, oldest first"""
+        timestamps, values = self._ordered()
+        return timestamps[-rows:], values[-rows:]
+    
+    def clear(self):
+        """Drop all rows"""
+        with self._lock:
+            self.head = 0
+            self.count = 0
+
+
+class TimeSeries:
+    """
+    Raw ring buffer plus downsampled rollups.
+    
+    Each rollup keeps the per-bucket mean of every column; the bucket
+    currently being filled is accumulated separately and written out when
+    the next sample lands in a later bucket.
+    """
+    
+    def __init__(self, columns: Sequence[str], capacity: int,
+                 rollups: Dict[str, int]):
+        """
+        Args:
+            columns: Metric column names
+            capacity: Raw rows kept
+            rollups: Rollup name (see ROLLUP_RESOLUTIONS) -> buckets kept
+        """
+        self.columns = list(columns)
+        self.raw = RingBuffer(columns, capacity)
+        self.rollups: Dict[str, RingBuffer] = {}
+        self._buckets: Dict[str, Any] = {}
+        for name, buckets in rollups.items():
+            if name not in ROLLUP_RESOLUTIONS:
+                raise ValueError(f"Unknown rollup resolution: {name}")
+            self.rollups[name] = RingBuffer(columns, buckets)
+            # [bucket start, per-column sum, per-column count of samples]
+            self._buckets[name] = [None, np.zeros(len(self.columns)), np.zeros(len(self.columns))]
+        self.created = time.time()
+        self.last_update: Optional[float] = None
+        self._lock = threading.Lock()
+    
+    def append(self, timestamp: float, row: Sequence[float]):
+        """Append a raw row and fold it into every rollup"""
+        row = np.asarray(row, dtype=np.float64)
+        with self._lock:
+            self.raw.append(timestamp, row)
+            self.last_update = timestamp
+            for name, bucket in self._buckets.items():
+                self._fold(name, bucket, timestamp, row)
+    
+    def _fold(self, name: str, bucket: list, timestamp: float, row: np.ndarray):
+        width = ROLLUP_RESOLUTIONS[name]
+        start = timestamp - timestamp % width
+        if bucket[0] is not None and start != bucket[0]:
+            # Missing samples (NaN) don't count towards a column's mean
+            mean = np.full(len(self.columns), np.nan)
+            np.divide(bucket[1], bucket[2], out=mean, where=bucket[2] > 0)
+            self.rollups[name].append(bucket[0], mean)
+            bucket[1] = np.zeros(len(self.columns))
+            bucket[2] = np.zeros(len(self.columns))
+        bucket[0] = start
+        present = ~np.isnan(row)
+        bucket[1] = bucket[1] + np.where(present, row, 0.0)
+        bucket[2] = bucket[2] + present
+    
+    def buffer(self, resolution: str = "raw") -> RingBuffer:
+        """Ring buffer for a resolution ("raw" or a rollup name)"""
+        if resolution == "raw":
+            return self.raw
+        if resolution not in self.rollups:
+            raise ValueError(f"Resolution '{resolution}' not available "
+                             f"(have: raw, {', '.join(self.rollups)})")
+        return self.rollups[resolution]
+
+
+def json_float(value: float) -> Optional[float]:
+    """Python float for a NumPy value, with NaN (no data) as None"""
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def aggregate(timestamps: np.ndarray, values: np.ndarray, columns: Sequence[str],
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES) -> Dict[str, Dict[str, float]]:
+    """
+    Vectorized window statistics per column.
+    
+    rate is the change per second between the first and last row, which is
+    what matters for monotonically growing values such as RSS.
+    """
+    if not len(timestamps):
+        return {}
+    
+    with warnings.catch_warnings():
+        # Columns that are NaN for the whole window (e.g. unsupported
+        # counters) aggregate to NaN without a warning per call
+        warnings.simplefilter("ignore", RuntimeWarning)
+        avg = np.nanmean(values, axis=0)
+        low = np.nanmin(values, axis=0)
+        high = np.nanmax(values, axis=0)
+        pct = np.nanpercentile(values, percentiles, axis=0) if percentiles else None
+    span = timestamps[-1] - timestamps[0]
+    rate = (values[-1] - values[0]) / span if span > 0 else np.zeros(len(columns))
+    
+    stats = {}
+    for i, column in enumerate(columns):
+        column_stats = {
+            "avg": json_float(avg[i]),
+            "min": json_float(low[i]),
+            "max": json_float(high[i]),
+            "rate": json_float(rate[i]),
+            "last": json_float(values[-1, i])
+        }
+        if pct is not None:
+            for j, p in enumerate(percentiles):
+                column_stats[f"p{p:g}"] = json_float(pct[j, i])
+        stats[column] = column_stats
+    return stats
+
+
+class MetricsStore:
+    """
+    Host and per-process time series fed by the system sampler.
+    
+    Features:
+    - One host series, appended on every sampler sweep
+    - Per-PID series for explicitly tracked processes
+    - Raw rows plus 1s/1m/1h rollups
+    - Window queries with avg/min/max/percentile/rate aggregates
+    """
+    
+    def __init__(self, config: Dict[str, Any], sampler: SystemSampler):
+        """
+        Initialize metrics store.
+        
+        Args:
+            config: Store configuration (capacity, process_capacity,
+                rollups, max_tracked_processes)
+            sampler: Sampler whose snapshots feed the store
+        """
+        self.config = config
+        self.capacity = config.get("capacity", 3600)
+        self.process_capacity = config.get("process_capacity", 1800)
+        self.rollup_sizes = config.get("rollups", {"1s": 3600, "1m": 1440, "1h": 720})
+        self.max_tracked = config.get("max_tracked_processes", 32)
+        
+        self.host = TimeSeries(HOST_METRICS, self.capacity, self.rollup_sizes)
+        self.processes: Dict[int, TimeSeries] = {}
+        self.process_names: Dict[int, str] = {}
+        self.terminated: Dict[int, float] = {}
+        
+        self._lock = threading.Lock()
+        
+        self.sampler = sampler
+        sampler.add_listener(self.record)
+        
+        logger.info("Metrics store initialized")
+    
+    def track(self, pid: int, name: Optional[str] = None) -> bool:
+        """
+        Start recording a per-process series.
+        
+        Returns:
+            False if the tracking limit has been reached
+        """
+        with self._lock:
+            if pid in self.processes:
+                return True
+            if len(self.processes) >= self.max_tracked:
+                # Make room by dropping a process that has exited
+                if not self.terminated:
+                    return False
+                self._forget(min(self.terminated, key=self.terminated.get))
+            self.processes[pid] = TimeSeries(PROCESS_METRICS, self.process_capacity,
+                                             self.rollup_sizes)
+            self.process_names[pid] = name or ""
+        
+        # Record straight away from the latest snapshot if there is one
+        snapshot = self.sampler.snapshot
+        if snapshot is not None and pid in snapshot.processes:
+            self.processes[pid].append(snapshot.timestamp, self._process_row(snapshot.processes[pid]))
+        return True
+    
+    def untrack(self, pid: int) -> bool:
+        """Stop recording a process and drop its series"""
+        with self._lock:
+            return self._forget(pid)
+    
+    def _forget(self, pid: int) -> bool:
+        self.process_names.pop(pid, None)
+        self.terminated.pop(pid, None)
+        return self.processes.pop(pid, None) is not None
+    
+    def record(self, snapshot: SystemSnapshot):
+        """Sampler listener: append one row per series"""
+        self.host.append(snapshot.timestamp, self._host_row(snapshot))
+        
+        with self._lock:
+            tracked = list(self.processes.items())
+        for pid, series in tracked:
+            record = snapshot.processes.get(pid)
+            if record is None:
+                self.terminated.setdefault(pid, snapshot.timestamp)
+                continue
+            series.append(snapshot.timestamp, self._process_row(record))
+    
+    def _host_row(self, snapshot: SystemSnapshot) -> List[float]:
+        rates = snapshot.rates
+        swap = snapshot.swap_memory
+        return [
+            snapshot.cpu_percent if snapshot.cpu_percent is not None else np.nan,
+            snapshot.virtual_memory.percent,
+            swap.percent if swap is not None else np.nan,
+            snapshot.load_average[0] if snapshot.load_average else np.nan,
+            rates.get("net_io.bytes_sent_per_sec", np.nan),
+            rates.get("net_io.bytes_recv_per_sec", np.nan),
+            rates.get("disk_io.read_bytes_per_sec", np.nan),
+            rates.get("disk_io.write_bytes_per_sec", np.nan)
+        ]
+    
+    @staticmethod
+    def _process_row(record: Dict[str, Any]) -> List[float]:
+        return [
+            record.get('cpu_percent') or 0.0,
+            record.get('memory_percent') or 0.0,
+            record.get('memory_info', {}).get('rss', np.nan),
+            record.get('num_threads') or 0
+        ]
+    
+    def series(self, target: Any = "host") -> Optional[TimeSeries]:
+        """Series for "host" or a tracked PID"""
+        if target in (None, "host"):
+            return self.host
+        return self.processes.get(int(target))
+    
+    def query(self, target: Any = "host", window: Optional[float] = 300.0,
+              resolution: str = "raw", metrics: Optional[List[str]] = None,
+              percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+              include_samples: bool = False, max_samples: int = 500) -> Dict[str, Any]:
+        """
+        Aggregate a window of a series.
+        
+        Args:
+            target: "host" or a tracked PID
+            window: Seconds back from now (None for everything stored)
+            resolution: "raw" or a rollup name
+            metrics: Columns to include (default: all)
+            percentiles: Percentiles to compute
+            include_samples: Also return the rows themselves
+            max_samples: Most recent rows returned when include_samples is set
+        
+        Returns:
+            Window bounds, per-metric statistics and optionally samples
+        """
+        series = self.series(target)
+        if series is None:
+            return {"success": False, "error": f"Process {target} is not being tracked"}
+        
+        columns = metrics or series.columns
+        unknown = [c for c in columns if c not in series.columns]
+        if unknown:
+            return {"success": False, "error": f"Unknown metrics: {', '.join(unknown)}",
+                    "available_metrics": series.columns}
+        
+        try:
+            buffer = series.buffer(resolution)
+        except ValueError as e:
+            return {"success": False, "error": str(e)}
+        start = time.time() - window if window else None
+        timestamps, values = buffer.window(start)
+        index = [series.columns.index(c) for c in columns]
+        values = values[:, index]
+        
+        result = {
+            "success": True,
+            "target": target if target in (None, "host") else int(target),
+            "resolution": resolution,
+            "window": window,
+            "sample_count": int(len(timestamps)),
+            "start": float(timestamps[0]) if len(timestamps) else None,
+            "end": float(timestamps[-1]) if len(timestamps) else None,
+            "statistics": aggregate(timestamps, values, columns, percentiles)
+        }
+        
+        if include_samples:
+            result["samples"] = [
+                {"timestamp": float(ts), **{c: json_float(v) for c, v in zip(columns, row)}}
+                for ts, row in zip(timestamps[-max_samples:], values[-max_samples:])
+            ]
+        
+        if target not in (None, "host"):
+            pid = int(target)
+            result["name"] = self.process_names.get(pid, "")
+            if pid in self.terminated:
+                result["terminated"] = self.terminated[pid]
+        
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        buffers = [self.host.raw, *self.host.rollups.values()]
+        for series in list(self.processes.values()):
+            buffers.extend([series.raw, *series.rollups.values()])
+        return {
+            "host_rows": len(self.host.raw),
+            "tracked_processes": len(self.processes),
+            "terminated_processes": len(self.terminated),
+            "memory_bytes": sum(b.timestamps.nbytes + b.values.nbytes for b in buffers)
+        }
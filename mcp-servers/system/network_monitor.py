@@ -15,8 +15,13 @@ import subprocess
 import platform
 import time
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Callable
 import json
+from contextlib import AsyncExitStack
+
+from sampler import SystemSampler
+from network_state import NetworkState
+from network_probe import IcmpPinger, parse_target, summarize_rtts, tcp_probe
 
 logger = logging.getLogger(__name__)
 
@@ -34,12 +39,13 @@ class NetworkMonitor:
     - Network performance metrics
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], sampler: Optional[SystemSampler] = None):
         """
         Initialize network monitor.
         
         Args:
             config: Network monitoring configuration
+            sampler: Shared system sampler (a private one is created if omitted)
         """
         self.config = config
         self.platform = platform.system().lower()
@@ -49,17 +55,29 @@ class NetworkMonitor:
         self.include_loopback = config.get("include_loopback", False)
         self.dns_servers = config.get("dns_servers", ["8.8.8.8", "1.1.1.1"])
         
+        self.gateway_ttl = config.get("gateway_ttl", 60.0)
+        self.probe_concurrency = config.get("probe_concurrency", 100)
+        self.probe_timeout = config.get("probe_timeout", 2.0)
+        self.max_probe_targets = config.get("max_probe_targets", 1024)
+        
+        # Interface state refreshed on every sampler sweep, and cached
+        # connection tables
+        self.sampler = sampler or SystemSampler(config.get("sampler", {}))
+        self.state = NetworkState(config, self.sampler)
+        
         # Data storage
-        self.last_network_stats = None
         self.connection_history: List[Dict[str, Any]] = []
+        self._gateway: Optional[str] = None
+        self._gateway_at = 0.0
         
         logger.info("Network monitor initialized")
     
     async def initialize(self):
         """Initialize network monitor"""
         try:
-            # Get initial network statistics
-            self.last_network_stats = psutil.net_io_counters(pernic=True)
+            # First snapshot now; rates are available from the next sweep
+            await self.state.get_snapshot(max_age=0)
+            await self.sampler.start()
             
             logger.info("Network monitor ready")
         except Exception as e:
@@ -68,6 +86,7 @@ class NetworkMonitor:
     
     async def shutdown(self):
         """Shutdown network monitor"""
+        await self.sampler.stop()
         self.connection_history.clear()
         logger.info("Network monitor shutdown")
     
@@ -84,13 +103,10 @@ class NetworkMonitor:
             Network status information
         """
         try:
+            snapshot = await self.state.get_snapshot()
             interfaces = []
             
-            # Get network interface addresses
-            net_if_addrs = psutil.net_if_addrs()
-            net_if_stats = psutil.net_if_stats()
-            
-            for iface_name, addresses in net_if_addrs.items():
+            for iface_name, addresses in snapshot.addresses.items():
                 # Apply interface filter
                 if interface and iface_name != interface:
                     continue
@@ -104,107 +120,55 @@ class NetworkMonitor:
                 
                 iface_info = {
                     "name": iface_name,
-                    "addresses": []
+                    "addresses": addresses
                 }
-                
-                # Get interface statistics
-                if iface_name in net_if_stats:
-                    stats = net_if_stats[iface_name]
-                    iface_info.update({
-                        "is_up": stats.isup,
-                        "duplex": str(stats.duplex),
-                        "speed": stats.speed,
-                        "mtu": stats.mtu
-                    })
-                else:
-                    iface_info.update({
-                        "is_up": False,
-                        "duplex": "unknown",
-                        "speed": 0,
-                        "mtu": 0
-                    })
-                
-                # Process addresses
-                for addr in addresses:
-                    addr_info = {
-                        "family": str(addr.family),
-                        "address": addr.address
-                    }
-                    
-                    if addr.netmask:
-                        addr_info["netmask"] = addr.netmask
-                    if addr.broadcast:
-                        addr_info["broadcast"] = addr.broadcast
-                    
-                    iface_info["addresses"].append(addr_info)
+                iface_info.update(snapshot.link_stats.get(iface_name, {
+                    "is_up": False,
+                    "duplex": "unknown",
+                    "speed": 0,
+                    "mtu": 0
+                }))
                 
                 # Get I/O statistics if requested
                 if include_stats:
-                    io_stats = await self._get_interface_io_stats(iface_name)
+                    io_stats = self._interface_io_stats(snapshot, iface_name)
                     if io_stats:
                         iface_info["io_stats"] = io_stats
                 
                 interfaces.append(iface_info)
             
-            # Get default gateway
-            try:
-                gateways = psutil.net_if_addrs()
-                # This is a simplified approach - actual gateway detection is platform-specific
-                default_gateway = await self._get_default_gateway()
-            except Exception as e:
-                logger.debug(f"Failed to get default gateway: {e}")
-                default_gateway = None
+            gateway = snapshot.gateway
+            default_gateway = gateway["address"] if gateway else await self._cached_default_gateway()
             
             return {
                 "success": True,
                 "interfaces": interfaces,
                 "interface_count": len(interfaces),
                 "default_gateway": default_gateway,
-                "timestamp": time.time()
+                "gateway_interface": gateway["interface"] if gateway else None,
+                "timestamp": time.time(),
+                **snapshot.metadata()
             }
             
         except Exception as e:
             logger.error(f"Failed to get network status: {e}")
             return {"success": False, "error": str(e)}
     
-    async def _get_interface_io_stats(self, interface_name: str) -> Optional[Dict[str, Any]]:
-        """Get I/O statistics for a specific interface"""
-        try:
-            net_io_counters = psutil.net_io_counters(pernic=True)
-            
-            if interface_name in net_io_counters:
-                stats = net_io_counters[interface_name]
-                
-                io_stats = {
-                    "bytes_sent": stats.bytes_sent,
-                    "bytes_recv": stats.bytes_recv,
-                    "packets_sent": stats.packets_sent,
-                    "packets_recv": stats.packets_recv,
-                    "errin": stats.errin,
-                    "errout": stats.errout,
-                    "dropin": stats.dropin,
-                    "dropout": stats.dropout
-                }
-                
-                # Calculate rates if we have previous data
-                if self.last_network_stats and interface_name in self.last_network_stats:
-                    time_delta = time.time() - getattr(self, '_last_stats_time', time.time())
-                    if time_delta > 0:
-                        last_stats = self.last_network_stats[interface_name]
-                        
-                        for key in ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv']:
-                            current_val = getattr(stats, key)
-                            last_val = getattr(last_stats, key)
-                            rate = (current_val - last_val) / time_delta
-                            io_stats[f"{key}_per_sec"] = rate
-                
-                return io_stats
-            
-            return None
-            
-        except Exception as e:
-            logger.debug(f"Failed to get I/O stats for {interface_name}: {e}")
+    def _interface_io_stats(self, snapshot, interface_name: str) -> Optional[Dict[str, Any]]:
+        """I/O counters for an interface, with rates since the previous snapshot"""
+        counters = snapshot.io_counters.get(interface_name)
+        if counters is None:
             return None
+        io_stats = dict(counters)
+        io_stats.update(snapshot.rates.get(interface_name, {}))
+        return io_stats
+    
+    async def _cached_default_gateway(self) -> Optional[str]:
+        """Gateway via the platform route command, where /proc/net/route is missing"""
+        if time.time() - self._gateway_at > self.gateway_ttl:
+            self._gateway = await self._get_default_gateway()
+            self._gateway_at = time.time()
+        return self._gateway
     
     async def _get_default_gateway(self) -> Optional[str]:
         """Get default gateway address"""
@@ -274,58 +238,29 @@ class NetworkMonitor:
             per_interface = args.get("per_interface", True)
             include_rates = args.get("include_rates", True)
             
-            # Get overall network I/O counters
-            net_io = psutil.net_io_counters()
+            snapshot = await self.state.get_snapshot()
+            
+            # Overall counters are the sum over interfaces
+            overall = {}
+            for counters in snapshot.io_counters.values():
+                for key, value in counters.items():
+                    overall[key] = overall.get(key, 0) + value
             
             result = {
                 "success": True,
-                "overall_stats": {
-                    "bytes_sent": net_io.bytes_sent,
-                    "bytes_recv": net_io.bytes_recv,
-                    "packets_sent": net_io.packets_sent,
-                    "packets_recv": net_io.packets_recv,
-                    "errin": net_io.errin,
-                    "errout": net_io.errout,
-                    "dropin": net_io.dropin,
-                    "dropout": net_io.dropout
-                },
-                "timestamp": time.time()
+                "overall_stats": overall,
+                "timestamp": time.time(),
+                **snapshot.metadata()
             }
             
             # Get per-interface stats if requested
             if per_interface:
-                per_nic_stats = psutil.net_io_counters(pernic=True)
                 interface_stats = {}
-                
-                for iface_name, stats in per_nic_stats.items():
-                    interface_stats[iface_name] = {
-                        "bytes_sent": stats.bytes_sent,
-                        "bytes_recv": stats.bytes_recv,
-                        "packets_sent": stats.packets_sent,
-                        "packets_recv": stats.packets_recv,
-                        "errin": stats.errin,
-                        "errout": stats.errout,
-                        "dropin": stats.dropin,
-                        "dropout": stats.dropout
-                    }
-                    
-                    # Calculate rates
-                    if include_rates and self.last_network_stats and iface_name in self.last_network_stats:
-                        time_delta = time.time() - getattr(self, '_last_stats_time', time.time())
-                        if time_delta > 0:
-                            last_stats = self.last_network_stats[iface_name]
-                            
-                            for key in ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv']:
-                                current_val = getattr(stats, key)
-                                last_val = getattr(last_stats, key)
-                                rate = (current_val - last_val) / time_delta
-                                interface_stats[iface_name][f"{key}_per_sec"] = rate
-                
+                for iface_name, counters in snapshot.io_counters.items():
+                    interface_stats[iface_name] = dict(counters)
+                    if include_rates:
+                        interface_stats[iface_name].update(snapshot.rates.get(iface_name, {}))
                 result["interface_stats"] = interface_stats
-                
-                # Update last stats
-                self.last_network_stats = per_nic_stats
-                self._last_stats_time = time.time()
             
             return result
             
@@ -488,6 +423,171 @@ class NetworkMonitor:
             logger.error(f"Failed to check port: {e}")
             return {"success": False, "error": str(e)}
     
+    async def ping_hosts(self, args: Dict[str, Any],
+                         permitted: Optional[Callable[[str, Optional[int]], bool]] = None) -> Dict[str, Any]:
+        """
+        Check reachability of many hosts concurrently.
+        
+        Args:
+            args: Ping parameters (hosts, count, timeout per echo or connect,
+                concurrency, method: auto | icmp | tcp, tcp_port)
+            permitted: Per-target permission check (host, port)
+            
+        Returns:
+            Result table with one row per host
+        """
+        try:
+            hosts = list(dict.fromkeys(args.get("hosts") or []))
+            count = max(1, args.get("count", 1))
+            timeout = args.get("timeout", self.probe_timeout)
+            concurrency = max(1, args.get("concurrency", self.probe_concurrency))
+            method = args.get("method", "auto")
+            tcp_port = args.get("tcp_port", 80)
+            
+            if not hosts:
+                return {"success": False, "error": "hosts parameter required"}
+            if len(hosts) > self.max_probe_targets:
+                return {"success": False, "error": f"At most {self.max_probe_targets} hosts per call"}
+            if method not in ("auto", "icmp", "tcp"):
+                return {"success": False, "error": f"Unknown method: {method}"}
+            
+            started = time.perf_counter()
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def tcp_ping(host: str) -> list:
+                # A refused connection still proves the host is up
+                rtts = []
+                error = None
+                for _ in range(count):
+                    probe = await tcp_probe(host, tcp_port, timeout)
+                    if probe["state"] in ("open", "closed"):
+                        rtts.append(probe["rtt_ms"])
+                    elif probe["error"]:
+                        error = probe["error"]
+                stats = summarize_rtts(rtts, count)
+                return [host, bool(rtts), stats["rtt_avg"], stats["loss_percent"], f"tcp:{tcp_port}", error]
+            
+            async def icmp_ping(pinger: IcmpPinger, host: str) -> list:
+                result = await pinger.ping(host, count, timeout)
+                if result["error"] and method == "auto":
+                    return await tcp_ping(host)
+                stats = summarize_rtts(result["rtts"], count)
+                return [host, bool(result["rtts"]), stats["rtt_avg"], stats["loss_percent"],
+                        pinger.mode, result["error"]]
+            
+            async def probe(pinger: Optional[IcmpPinger], host: str) -> list:
+                if permitted is not None and not permitted(host, None):
+                    return [host, False, None, None, None, "Permission denied"]
+                async with semaphore:
+                    if pinger is not None:
+                        return await icmp_ping(pinger, host)
+                    return await tcp_ping(host)
+            
+            icmp_error = None
+            async with AsyncExitStack() as stack:
+                pinger = None
+                if method in ("auto", "icmp"):
+                    try:
+                        pinger = await stack.enter_async_context(IcmpPinger())
+                    except PermissionError as e:
+                        if method == "icmp":
+                            return {"success": False, "error": str(e)}
+                        icmp_error = str(e)
+                rows = await asyncio.gather(*(probe(pinger, host) for host in hosts))
+            
+            reachable = sum(1 for row in rows if row[1])
+            result = {
+                "success": True,
+                "columns": ["host", "reachable", "rtt_avg_ms", "loss_percent", "method", "error"],
+                "rows": rows,
+                "summary": {
+                    "total": len(rows),
+                    "reachable": reachable,
+                    "unreachable": len(rows) - reachable
+                },
+                "count": count,
+                "timeout": timeout,
+                "concurrency": concurrency,
+                "elapsed": round(time.perf_counter() - started, 3),
+                "timestamp": time.time()
+            }
+            if icmp_error:
+                result["icmp_unavailable"] = icmp_error
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to ping hosts: {e}")
+            return {"success": False, "error": str(e)}
+    
+    async def check_ports(self, args: Dict[str, Any],
+                          permitted: Optional[Callable[[str, Optional[int]], bool]] = None) -> Dict[str, Any]:
+        """
+        Check many host:port targets concurrently.
+        
+        Args:
+            args: Check parameters (targets as "host:port" or {host, port},
+                or hosts x ports; timeout per connect, concurrency)
+            permitted: Per-target permission check (host, port)
+            
+        Returns:
+            Result table with one row per target
+        """
+        try:
+            requested = list(args.get("targets") or [])
+            requested += [{"host": host, "port": port}
+                          for host in args.get("hosts") or [] for port in args.get("ports") or []]
+            
+            # Malformed targets get an error row instead of failing the batch
+            targets = []
+            invalid = []
+            for target in requested:
+                try:
+                    targets.append(parse_target(target))
+                except ValueError as e:
+                    host = target.get("host") if isinstance(target, dict) else str(target)
+                    port = target.get("port") if isinstance(target, dict) else None
+                    invalid.append([host, port, "error", None, str(e)])
+            targets = list(dict.fromkeys(targets))
+            timeout = args.get("timeout", self.probe_timeout)
+            concurrency = max(1, args.get("concurrency", self.probe_concurrency))
+            
+            if not targets and not invalid:
+                return {"success": False, "error": "targets (or hosts and ports) parameter required"}
+            if len(targets) + len(invalid) > self.max_probe_targets:
+                return {"success": False, "error": f"At most {self.max_probe_targets} targets per call"}
+            
+            started = time.perf_counter()
+            semaphore = asyncio.Semaphore(concurrency)
+            
+            async def probe(host: str, port: int) -> list:
+                if permitted is not None and not permitted(host, port):
+                    return [host, port, "denied", None, "Permission denied"]
+                async with semaphore:
+                    result = await tcp_probe(host, port, timeout)
+                return [host, port, result["state"], result["rtt_ms"], result["error"]]
+            
+            rows = await asyncio.gather(*(probe(host, port) for host, port in targets))
+            rows += invalid
+            
+            states: Dict[str, int] = {}
+            for row in rows:
+                states[row[2]] = states.get(row[2], 0) + 1
+            
+            return {
+                "success": True,
+                "columns": ["host", "port", "state", "rtt_ms", "error"],
+                "rows": rows,
+                "summary": {"total": len(rows), **states},
+                "timeout": timeout,
+                "concurrency": concurrency,
+                "elapsed": round(time.perf_counter() - started, 3),
+                "timestamp": time.time()
+            }
+            
+        except Exception as e:
+            logger.error(f"Failed to check ports: {e}")
+            return {"success": False, "error": str(e)}
+    
     async def get_connections(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """
         Get active network connections.
@@ -501,49 +601,19 @@ class NetworkMonitor:
         try:
             kind = args.get("kind", "inet")  # inet, inet4, inet6, tcp, udp, unix
             pid = args.get("pid")  # Filter by process ID
+            port = args.get("port")  # Filter by local or remote port
+            status = args.get("status")  # Filter by state, e.g. LISTEN
             
-            connections = []
-            
-            for conn in psutil.net_connections(kind=kind):
-                conn_info = {
-                    "fd": conn.fd,
-                    "family": str(conn.family),
-                    "type": str(conn.type),
-                    "status": conn.status
-                }
-                
-                if conn.laddr:
-                    conn_info["local_address"] = {
-                        "ip": conn.laddr.ip,
-                        "port": conn.laddr.port
-                    }
-                
-                if conn.raddr:
-                    conn_info["remote_address"] = {
-                        "ip": conn.raddr.ip,
-                        "port": conn.raddr.port
-                    }
-                
-                if conn.pid:
-                    conn_info["pid"] = conn.pid
-                    try:
-                        proc = psutil.Process(conn.pid)
-                        conn_info["process_name"] = proc.name()
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-                
-                # Apply PID filter
-                if pid and conn.pid != pid:
-                    continue
-                
-                connections.append(conn_info)
+            table = await self.state.get_connections(kind, fresh=args.get("fresh", False))
+            connections = table.select(pid=pid, port=port, status=status)
             
             return {
                 "success": True,
                 "connections": connections,
                 "count": len(connections),
                 "kind": kind,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                "table_age": round(table.age, 3)
             }
             
         except Exception as e:
@@ -0,0 +1,302 @@
+"""
+Network State for System MCP Server
+
+Cached network inspection for the network monitor. Interface addresses,
+link stats and per-NIC I/O counters are read once per sampler sweep into an
+immutable snapshot, with per-NIC rates computed between successive snapshots
+and the default gateway parsed from /proc/net/route instead of spawning
+`ip route`. Connection tables are scanned lazily, cached briefly and indexed
+by PID, port and status so filtered queries don't walk every socket.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import asyncio
+import logging
+import socket
+import struct
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+from sampler import SystemSampler
+
+logger = logging.getLogger(__name__)
+
+# Per-NIC counters that get a *_per_sec rate
+NIC_RATE_COUNTERS = ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv']
+
+ROUTE_TABLE = "/proc/net/route"
+RTF_UP = 0x1
+RTF_GATEWAY = 0x2
+
+
+def read_default_gateway(path: str = ROUTE_TABLE) -> Optional[Dict[str, str]]:
+    """
+    Default IPv4 route from the kernel's route table (Linux).
+    
+    Returns:
+        {"address": ..., "interface": ...}, or None if there is no default
+        route or the table isn't available
+    """
+    try:
+        with open(path, 'r') as f:
+            lines = f.readlines()[1:]
+    except OSError:
+        return None
+    
+    best = None
+    for line in lines:
+        fields = line.split()
+        if len(fields) < 8:
+            continue
+        interface, destination, gateway, flags, metric = fields[0], fields[1], fields[2], fields[3], fields[6]
+        flags = int(flags, 16)
+        if destination != "00000000" or not (flags & RTF_UP) or not (flags & RTF_GATEWAY):
+            continue
+        # Addresses are stored in host byte order (little-endian on Linux hosts)
+        candidate = (int(metric), socket.inet_ntoa(struct.pack("<L", int(gateway, 16))), interface)
+        if best is None or candidate < best:
+            best = candidate
+    
+    if best is None:
+        return None
+    return {"address": best[1], "interface": best[2]}
+
+
+@dataclass(frozen=True)
+class NetworkSnapshot:
+    """One consistent read of interface state and counters"""
+    version: int
+    timestamp: float
+    duration: float
+    addresses: Dict[str, List[Dict[str, Any]]]
+    link_stats: Dict[str, Dict[str, Any]]
+    io_counters: Dict[str, Dict[str, int]]
+    rates: Dict[str, Dict[str, float]]
+    gateway: Optional[Dict[str, str]]
+    
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+    
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "snapshot_version": self.version,
+            "snapshot_age": round(self.age, 3)
+        }
+
+
+class ConnectionTable:
+    """One scan of the connection table, indexed by PID, port and status"""
+    
+    def __init__(self, kind: str, connections: List[Dict[str, Any]]):
+        self.kind = kind
+        self.timestamp = time.time()
+        self.connections = connections
+        self.by_pid: Dict[int, List[int]] = {}
+        self.by_port: Dict[int, List[int]] = {}
+        self.by_status: Dict[str, List[int]] = {}
+        
+        for row, conn in enumerate(connections):
+            if conn.get("pid") is not None:
+                self.by_pid.setdefault(conn["pid"], []).append(row)
+            ports = {address["port"] for address in (conn.get("local_address"), conn.get("remote_address"))
+                     if address}
+            for port in ports:
+                self.by_port.setdefault(port, []).append(row)
+            self.by_status.setdefault(conn["status"], []).append(row)
+    
+    @property
+    def age(self) -> float:
+        return time.time() - self.timestamp
+    
+    def select(self, pid: Optional[int] = None, port: Optional[int] = None,
+               status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Connections matching every given filter, in table order"""
+        rows = None
+        for index, key in ((self.by_pid, pid), (self.by_port, port), (self.by_status, status)):
+            if key is None:
+                continue
+            matches = index.get(key, [])
+            rows = matches if rows is None else sorted(set(rows).intersection(matches))
+        if rows is None:
+            return list(self.connections)
+        return [self.connections[row] for row in rows]
+
+
+class NetworkState:
+    """
+    Background-refreshed network state shared by the network tools.
+    
+    Features:
+    - One addrs/stats/counters read per sampler sweep
+    - Per-NIC rates from successive snapshots
+    - Default gateway without a subprocess on Linux
+    - TTL-cached, indexed connection tables per kind
+    """
+    
+    def __init__(self, config: Dict[str, Any], sampler: Optional[SystemSampler] = None):
+        """
+        Initialize network state.
+        
+        Args:
+            config: Network configuration (refresh_interval, connection_ttl)
+            sampler: Shared system sampler whose sweeps refresh the snapshot;
+                without one the snapshot is refreshed on demand
+        """
+        self.sampler = sampler
+        self.interval = sampler.interval if sampler else config.get("refresh_interval", 5.0)
+        self.connection_ttl = config.get("connection_ttl", 5.0)
+        
+        self._snapshot: Optional[NetworkSnapshot] = None
+        self._version = 0
+        self._lock = threading.Lock()
+        self._tables: Dict[str, ConnectionTable] = {}
+        
+        # Statistics
+        self.samples = 0
+        self.table_scans = 0
+        
+        if sampler is not None:
+            sampler.add_listener(lambda snapshot: self.sample())
+    
+    @property
+    def snapshot(self) -> Optional[NetworkSnapshot]:
+        return self._snapshot
+    
+    async def get_snapshot(self, max_age: Optional[float] = None) -> NetworkSnapshot:
+        """
+        Latest snapshot, sampling on demand if there is none or it is too old.
+        
+        Args:
+            max_age: Maximum acceptable age in seconds (default: two intervals)
+        """
+        max_age = self.interval * 2 if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.age > max_age:
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(None, self.sample)
+        return snapshot
+    
+    def sample(self) -> NetworkSnapshot:
+        """Read interface state and counters once and publish a snapshot"""
+        with self._lock:
+            started = time.perf_counter()
+            now = time.time()
+            
+            addresses = {}
+            for name, entries in psutil.net_if_addrs().items():
+                formatted = []
+                for addr in entries:
+                    info = {"family": str(addr.family), "address": addr.address}
+                    if addr.netmask:
+                        info["netmask"] = addr.netmask
+                    if addr.broadcast:
+                        info["broadcast"] = addr.broadcast
+                    formatted.append(info)
+                addresses[name] = formatted
+            
+            link_stats = {
+                name: {"is_up": stats.isup, "duplex": str(stats.duplex),
+                       "speed": stats.speed, "mtu": stats.mtu}
+                for name, stats in psutil.net_if_stats().items()
+            }
+            io_counters = {name: counters._asdict()
+                           for name, counters in psutil.net_io_counters(pernic=True).items()}
+            
+            rates = {}
+            previous = self._snapshot
+            if previous is not None:
+                elapsed = now - previous.timestamp
+                for name, counters in io_counters.items():
+                    last = previous.io_counters.get(name)
+                    if not last or elapsed <= 0:
+                        continue
+                    deltas = {key: counters[key] - last[key] for key in NIC_RATE_COUNTERS}
+                    if min(deltas.values()) < 0:
+                        # Counter reset (interface re-created)
+                        continue
+                    rates[name] = {f"{key}_per_sec": delta / elapsed for key, delta in deltas.items()}
+            
+            self._version += 1
+            self.samples += 1
+            snapshot = NetworkSnapshot(
+                version=self._version,
+                timestamp=now,
+                duration=time.perf_counter() - started,
+                addresses=addresses,
+                link_stats=link_stats,
+                io_counters=io_counters,
+                rates=rates,
+                gateway=read_default_gateway()
+            )
+            self._snapshot = snapshot
+            return snapshot
+    
+    async def get_connections(self, kind: str = "inet", fresh: bool = False) -> ConnectionTable:
+        """Connection table for a kind, rescanned after connection_ttl seconds"""
+        table = self._tables.get(kind)
+        if fresh or table is None or table.age > self.connection_ttl:
+            loop = asyncio.get_running_loop()
+            table = await loop.run_in_executor(None, self._scan_connections, kind)
+            self._tables[kind] = table
+        return table
+    
+    def _scan_connections(self, kind: str) -> ConnectionTable:
+        """Scan the system connection table once"""
+        self.table_scans += 1
+        system = self.sampler.snapshot if self.sampler else None
+        names: Dict[int, Optional[str]] = {}
+        
+        connections = []
+        for conn in psutil.net_connections(kind=kind):
+            info = {
+                "fd": conn.fd,
+                "family": str(conn.family),
+                "type": str(conn.type),
+                "status": conn.status
+            }
+            if conn.laddr:
+                info["local_address"] = {"ip": conn.laddr.ip, "port": conn.laddr.port}
+            if conn.raddr:
+                info["remote_address"] = {"ip": conn.raddr.ip, "port": conn.raddr.port}
+            
+            if conn.pid:
+                info["pid"] = conn.pid
+                # Names come from the sampler's process table, or one
+                # lookup per PID rather than one per connection
+                if conn.pid not in names:
+                    record = system.processes.get(conn.pid) if system else None
+                    if record is not None:
+                        names[conn.pid] = record.get("name")
+                    else:
+                        try:
+                            names[conn.pid] = psutil.Process(conn.pid).name()
+                        except (psutil.NoSuchProcess, psutil.AccessDenied):
+                            names[conn.pid] = None
+                if names[conn.pid]:
+                    info["process_name"] = names[conn.pid]
+            
+            connections.append(info)
+        
+        return ConnectionTable(kind, connections)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get network state statistics"""
+        snapshot = self._snapshot
+        return {
+            "samples": self.samples,
+            "snapshot_age": round(snapshot.age, 3) if snapshot else None,
+            "last_sample_ms": round(snapshot.duration * 1000, 2) if snapshot else None,
+            "connection_tables": {
+                kind: {"connections": len(table.connections), "age": round(table.age, 3)}
+                for kind, table in self._tables.items()
+            },
+            "table_scans": self.table_scans
+        }
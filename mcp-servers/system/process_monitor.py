@@ -19,6 +19,9 @@ import time
 from typing import Dict, List, Any, Optional, Union
 import re
 
+from sampler import SystemSampler
+from metrics_store import MetricsStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,12 +38,15 @@ class ProcessMonitor:
     - Resource usage tracking per process
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], sampler: Optional[SystemSampler] = None,
+                 metrics_store: Optional[MetricsStore] = None):
         """
         Initialize process monitor.
         
         Args:
             config: Process monitoring configuration
+            sampler: Shared system sampler (a private one is created if omitted)
+            metrics_store: Shared metrics store (a private one is created if omitted)
         """
         self.config = config
         self.platform = platform.system().lower()
@@ -56,18 +62,19 @@ class ProcessMonitor:
         self.include_threads = config.get("include_threads", False)
         self.sort_by = config.get("sort_by", "cpu_percent")
         
-        # Process cache for monitoring
-        self.process_cache: Dict[int, Dict[str, Any]] = {}
-        self.last_update = 0
-        self.update_interval = 2.0
+        # Process table shared with the other monitors
+        self.sampler = sampler or SystemSampler(config.get("sampler", {}))
+        
+        # Per-process time series for monitored PIDs
+        self.metrics_store = metrics_store or MetricsStore(config.get("metrics", {}), self.sampler)
         
         logger.info("Process monitor initialized")
     
     async def initialize(self):
         """Initialize process monitor"""
         try:
-            # Initial process scan
-            await self._update_process_cache()
+            # Initial process scan, then background sampling
+            await self.sampler.start()
             logger.info("Process monitor ready")
         except Exception as e:
             logger.error(f"Failed to initialize process monitor: {e}")
@@ -75,7 +82,7 @@ class ProcessMonitor:
     
     async def shutdown(self):
         """Shutdown process monitor"""
-        self.process_cache.clear()
+        await self.sampler.stop()
         logger.info("Process monitor shutdown")
     
     async def list_processes(self, sort_by: str = "cpu_percent", limit: int = 50, 
@@ -92,61 +99,53 @@ class ProcessMonitor:
             Process list with metadata
         """
         try:
-            await self._update_process_cache()
+            snapshot = await self.sampler.get_snapshot()
+            name_filter = re.compile(filter_pattern, re.IGNORECASE) if filter_pattern else None
             
             processes = []
             
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent', 
-                                           'status', 'create_time', 'cmdline', 'username']):
-                try:
-                    proc_info = proc.info
-                    
-                    # Apply filter if specified
-                    if filter_pattern:
-                        if not re.search(filter_pattern, proc_info['name'], re.IGNORECASE):
-                            continue
-                    
-                    # Get additional info
-                    try:
-                        proc_info['memory_info'] = proc.memory_info()._asdict()
-                        proc_info['num_threads'] = proc.num_threads()
-                        proc_info['connections'] = len(proc.connections())
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        proc_info['memory_info'] = {}
-                        proc_info['num_threads'] = 0
-                        proc_info['connections'] = 0
-                    
-                    # Format timestamps
-                    if proc_info['create_time']:
-                        proc_info['create_time_formatted'] = time.strftime(
-                            '%Y-%m-%d %H:%M:%S', 
-                            time.localtime(proc_info['create_time'])
-                        )
-                    
-                    processes.append(proc_info)
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
+            for record in snapshot.processes.values():
+                # Apply filter if specified
+                if name_filter and not name_filter.search(record['name']):
                     continue
+                processes.append(record)
             
             # Sort processes
             if sort_by in ['cpu_percent', 'memory_percent']:
-                processes.sort(key=lambda x: x.get(sort_by, 0), reverse=True)
+                processes.sort(key=lambda x: x.get(sort_by) or 0, reverse=True)
             elif sort_by == 'name':
                 processes.sort(key=lambda x: x.get('name', '').lower())
             elif sort_by == 'pid':
                 processes.sort(key=lambda x: x.get('pid', 0))
             
-            # Apply limit
-            processes = processes[:limit]
+            # Apply limit, then fill in per-process fields for the survivors only
+            connection_counts = await self.sampler.get_connection_counts()
+            results = []
+            for record in processes[:limit]:
+                proc_info = {key: record.get(key) for key in (
+                    'pid', 'name', 'cpu_percent', 'memory_percent', 'status',
+                    'create_time', 'cmdline', 'username', 'memory_info', 'num_threads'
+                )}
+                proc_info['connections'] = connection_counts.get(record['pid'], 0)
+                
+                # Format timestamps
+                if proc_info['create_time']:
+                    proc_info['create_time_formatted'] = time.strftime(
+                        '%Y-%m-%d %H:%M:%S', 
+                        time.localtime(proc_info['create_time'])
+                    )
+                
+                results.append(proc_info)
             
             return {
                 "success": True,
-                "processes": processes,
-                "count": len(processes),
-                "total_processes": len(list(psutil.process_iter())),
+                "processes": results,
+                "count": len(results),
+                "total_processes": len(snapshot.processes),
                 "sort_by": sort_by,
                 "filter": filter_pattern,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                **snapshot.metadata()
             }
             
         except Exception as e:
@@ -166,15 +165,16 @@ class ProcessMonitor:
             Detailed process information
         """
         try:
+            snapshot = await self.sampler.get_snapshot()
+            
             if pid:
                 proc = psutil.Process(pid)
             elif name:
-                # Find process by name
-                processes = [p for p in psutil.process_iter(['pid', 'name']) 
-                           if p.info['name'] == name]
-                if not processes:
+                # Find process by name in the shared table
+                pids = snapshot.by_name.get(name)
+                if not pids:
                     return {"success": False, "error": f"Process '{name}' not found"}
-                proc = psutil.Process(processes[0].info['pid'])
+                proc = psutil.Process(pids[0])
             else:
                 return {"success": False, "error": "Either pid or name must be specified"}
             
@@ -195,7 +195,8 @@ class ProcessMonitor:
                     "cmdline": proc.cmdline(),
                     "cwd": proc.cwd(),
                     "username": proc.username(),
-                    "cpu_percent": proc.cpu_percent(),
+                    # A fresh Process reports 0.0 on its first call; use the sampled rate
+                    "cpu_percent": snapshot.processes.get(proc.pid, {}).get('cpu_percent', 0.0),
                     "memory_percent": proc.memory_percent(),
                     "memory_info": proc.memory_info()._asdict(),
                     "num_threads": proc.num_threads(),
@@ -214,10 +215,10 @@ class ProcessMonitor:
                     proc_info["parent"] = None
                 
                 if self.track_children:
-                    children = proc.children(recursive=True)
+                    # Parent links from the snapshot instead of another full sweep
                     proc_info["children"] = [
-                        {"pid": child.pid, "name": child.name()} 
-                        for child in children
+                        {"pid": child, "name": snapshot.processes[child]['name']}
+                        for child in snapshot.children_of(proc.pid)
                     ]
                 
                 # Network connections
@@ -257,7 +258,8 @@ class ProcessMonitor:
             return {
                 "success": True,
                 "process": proc_info,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                **snapshot.metadata()
             }
             
         except psutil.NoSuchProcess:
@@ -374,40 +376,38 @@ class ProcessMonitor:
             memory_threshold = criteria.get("memory_threshold")
             status_filter = criteria.get("status")
             
+            snapshot = await self.sampler.get_snapshot()
+            name_filter = re.compile(name_pattern, re.IGNORECASE) if name_pattern else None
             matching_processes = []
             
-            for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 
-                                           'memory_percent', 'status']):
-                try:
-                    proc_info = proc.info
-                    
-                    # Apply filters
-                    if name_pattern and not re.search(name_pattern, proc_info['name'], re.IGNORECASE):
-                        continue
-                    
-                    if username and proc_info.get('username') != username:
-                        continue
-                    
-                    if cpu_threshold and proc_info.get('cpu_percent', 0) < cpu_threshold:
-                        continue
-                    
-                    if memory_threshold and proc_info.get('memory_percent', 0) < memory_threshold:
-                        continue
-                    
-                    if status_filter and proc_info.get('status') != status_filter:
-                        continue
-                    
-                    matching_processes.append(proc_info)
-                    
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
+            for record in snapshot.processes.values():
+                # Apply filters
+                if name_filter and not name_filter.search(record['name']):
+                    continue
+                
+                if username and record.get('username') != username:
                     continue
+                
+                if cpu_threshold and record.get('cpu_percent', 0) < cpu_threshold:
+                    continue
+                
+                if memory_threshold and record.get('memory_percent', 0) < memory_threshold:
+                    continue
+                
+                if status_filter and record.get('status') != status_filter:
+                    continue
+                
+                matching_processes.append({key: record.get(key) for key in (
+                    'pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status'
+                )})
             
             return {
                 "success": True,
                 "processes": matching_processes,
                 "count": len(matching_processes),
                 "criteria": criteria,
-                "timestamp": time.time()
+                "timestamp": time.time(),
+                **snapshot.metadata()
             }
             
         except Exception as e:
@@ -418,71 +418,72 @@ class ProcessMonitor:
         """
         Monitor a specific process over time.
         
+        The process is tracked in the metrics store from the first call on;
+        each call returns the last `duration` seconds immediately instead of
+        sampling for that long. Call again (or use query_metrics) to see the
+        window fill up.
+        
         Args:
-            args: Monitoring parameters (pid, duration, interval)
+            args: Monitoring parameters (pid, duration, resolution,
+                include_samples)
             
         Returns:
             Process monitoring data
         """
         try:
             pid = args.get("pid")
-            duration = args.get("duration", 60)  # seconds
-            interval = args.get("interval", 2)   # seconds
+            duration = args.get("duration", 60)  # seconds of history
+            resolution = args.get("resolution", "raw")
             
             if not pid:
                 return {"success": False, "error": "PID required for monitoring"}
             
-            proc = psutil.Process(pid)
+            snapshot = await self.sampler.get_snapshot()
+            record = snapshot.processes.get(pid)
+            if record is None and self.metrics_store.series(pid) is None:
+                return {"success": False, "error": f"Process with PID {pid} not found"}
+            
+            if not self.metrics_store.track(pid, record['name'] if record else None):
+                return {
+                    "success": False,
+                    "error": f"Already tracking {self.metrics_store.max_tracked} processes"
+                }
+            
+            window = self.metrics_store.query(
+                pid, window=duration, resolution=resolution,
+                include_samples=args.get("include_samples", True)
+            )
+            if not window["success"]:
+                return window
+            
+            statistics = window["statistics"]
             monitoring_data = {
                 "pid": pid,
-                "name": proc.name(),
-                "start_time": time.time(),
-                "samples": []
+                "name": window["name"],
+                "tracking_since": self.metrics_store.series(pid).created,
+                "samples": window.get("samples", []),
+                "window_statistics": statistics
             }
+            if "terminated" in window:
+                monitoring_data["terminated"] = window["terminated"]
             
-            end_time = time.time() + duration
-            
-            while time.time() < end_time:
-                try:
-                    sample = {
-                        "timestamp": time.time(),
-                        "cpu_percent": proc.cpu_percent(),
-                        "memory_percent": proc.memory_percent(),
-                        "memory_rss": proc.memory_info().rss,
-                        "num_threads": proc.num_threads(),
-                        "status": proc.status()
-                    }
-                    
-                    monitoring_data["samples"].append(sample)
-                    
-                except psutil.NoSuchProcess:
-                    monitoring_data["terminated"] = time.time()
-                    break
-                
-                await asyncio.sleep(interval)
-            
-            # Calculate statistics
-            if monitoring_data["samples"]:
-                cpu_values = [s["cpu_percent"] for s in monitoring_data["samples"]]
-                memory_values = [s["memory_percent"] for s in monitoring_data["samples"]]
-                
+            if statistics:
                 monitoring_data["statistics"] = {
-                    "avg_cpu": sum(cpu_values) / len(cpu_values),
-                    "max_cpu": max(cpu_values),
-                    "avg_memory": sum(memory_values) / len(memory_values),
-                    "max_memory": max(memory_values),
-                    "sample_count": len(monitoring_data["samples"])
+                    "avg_cpu": statistics["cpu_percent"]["avg"],
+                    "max_cpu": statistics["cpu_percent"]["max"],
+                    "avg_memory": statistics["memory_percent"]["avg"],
+                    "max_memory": statistics["memory_percent"]["max"],
+                    "sample_count": window["sample_count"]
                 }
             
             return {
                 "success": True,
                 "monitoring_data": monitoring_data,
                 "duration": duration,
-                "interval": interval
+                "interval": self.sampler.interval,
+                "resolution": resolution
             }
             
-        except psutil.NoSuchProcess:
-            return {"success": False, "error": f"Process with PID {pid} not found"}
         except Exception as e:
             logger.error(f"Failed to monitor process: {e}")
             return {"success": False, "error": str(e)}
@@ -587,34 +588,17 @@ class ProcessMonitor:
             logger.error(f"Failed to check services: {e}")
             return {"success": False, "error": str(e)}
     
-    async def _update_process_cache(self):
-        """Update process cache for monitoring"""
-        try:
-            current_time = time.time()
-            
-            if current_time - self.last_update < self.update_interval:
-                return
-            
-            new_cache = {}
-            
-            for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_percent']):
-                try:
-                    proc_info = proc.info
-                    new_cache[proc_info['pid']] = {
-                        'name': proc_info['name'],
-                        'cpu_percent': proc_info['cpu_percent'],
-                        'memory_percent': proc_info['memory_percent'],
-                        'last_seen': current_time
-                    }
-                except (psutil.NoSuchProcess, psutil.AccessDenied):
-                    continue
-            
-            self.process_cache = new_cache
-            self.last_update = current_time
-            
-        except Exception as e:
-            logger.error(f"Failed to update process cache: {e}")
-    
     def get_cached_processes(self) -> Dict[int, Dict[str, Any]]:
-        """Get cached process information"""
-        return self.process_cache.copy()
\ No newline at end of file
+        """Get cached process information from the latest snapshot"""
+        snapshot = self.sampler.snapshot
+        if snapshot is None:
+            return {}
+        return {
+            pid: {
+                'name': record['name'],
+                'cpu_percent': record['cpu_percent'],
+                'memory_percent': record['memory_percent'],
+                'last_seen': snapshot.timestamp
+            }
+            for pid, record in snapshot.processes.items()
+        }
\ No newline at end of file
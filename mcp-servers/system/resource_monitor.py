@@ -16,6 +16,9 @@ import logging
 from typing import Dict, List, Any, Optional
 import json
 
+from sampler import SystemSampler, cpu_percent_between
+from metrics_store import MetricsStore, json_float
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,12 +35,15 @@ class ResourceMonitor:
     - Performance metrics collection
     """
     
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: Dict[str, Any], sampler: Optional[SystemSampler] = None,
+                 metrics_store: Optional[MetricsStore] = None):
         """
         Initialize resource monitor.
         
         Args:
             config: Resource monitoring configuration
+            sampler: Shared system sampler (a private one is created if omitted)
+            metrics_store: Shared metrics store (a private one is created if omitted)
         """
         self.config = config
         self.platform = platform.system().lower()
@@ -48,20 +54,23 @@ class ResourceMonitor:
         self.include_per_cpu = config.get("include_per_cpu", False)
         self.history_limit = config.get("history_limit", 100)
         
-        # Data storage
-        self.metrics_history: List[Dict[str, Any]] = []
-        self.last_network_stats = None
-        self.last_disk_stats = None
+        # System counters shared with the other monitors
+        self.sampler = sampler or SystemSampler(config.get("sampler", {}))
+        
+        # Host time series, appended by the sampler
+        self.metrics_store = metrics_store or MetricsStore(config.get("metrics", {}), self.sampler)
+        
+        # Static CPU facts
+        self.cpu_count_logical = psutil.cpu_count(logical=True)
+        self.cpu_count_physical = psutil.cpu_count(logical=False)
         
         logger.info("Resource monitor initialized")
     
     async def initialize(self):
         """Initialize resource monitor"""
         try:
-            # Initial readings to establish baselines
-            await self.get_cpu_usage(per_cpu=False, interval=0.1)
-            self.last_network_stats = psutil.net_io_counters()
-            self.last_disk_stats = psutil.disk_io_counters()
+            # Initial sweep; CPU utilization is available from the second one
+            await self.sampler.start()
             
             logger.info("Resource monitor ready")
         except Exception as e:
@@ -70,31 +79,45 @@ class ResourceMonitor:
     
     async def shutdown(self):
         """Shutdown resource monitor"""
-        self.metrics_history.clear()
+        await self.sampler.stop()
         logger.info("Resource monitor shutdown")
     
-    async def get_cpu_usage(self, per_cpu: bool = False, interval: float = 1.0) -> Dict[str, Any]:
+    async def get_cpu_usage(self, per_cpu: bool = False, interval: float = 1.0,
+                            fresh: bool = False) -> Dict[str, Any]:
         """
         Get CPU usage statistics.
         
+        By default utilization is the cpu_times delta between the sampler's
+        last two sweeps and returns immediately. With fresh=True (or before
+        the sampler has two sweeps) it is measured over `interval` seconds,
+        awaiting rather than blocking the event loop.
+        
         Args:
             per_cpu: Return per-CPU core statistics
-            interval: Measurement interval in seconds
+            interval: Measurement interval in seconds for fresh samples
+            fresh: Measure now instead of using the background sample
             
         Returns:
             CPU usage data
         """
         try:
-            # Get CPU percentages
-            if per_cpu:
-                cpu_percent_list = psutil.cpu_percent(interval=interval, percpu=True)
-                cpu_percent = sum(cpu_percent_list) / len(cpu_percent_list)
+            snapshot = await self.sampler.get_snapshot()
+            
+            if fresh or snapshot.cpu_percent is None:
+                before, per_cpu_before = psutil.cpu_times(), psutil.cpu_times(percpu=True)
+                await asyncio.sleep(interval)
+                cpu_times, per_cpu_after = psutil.cpu_times(), psutil.cpu_times(percpu=True)
+                cpu_percent = cpu_percent_between(before, cpu_times)
+                cpu_percent_list = [cpu_percent_between(b, a) for b, a
+                                    in zip(per_cpu_before, per_cpu_after)]
+                measured_over = interval
+                load_avg = self.sampler._safe(psutil.getloadavg) if hasattr(psutil, 'getloadavg') else None
             else:
-                cpu_percent = psutil.cpu_percent(interval=interval)
-                cpu_percent_list = None
-            
-            # Get CPU times
-            cpu_times = psutil.cpu_times()
+                cpu_times = snapshot.cpu_times
+                cpu_percent = snapshot.cpu_percent
+                cpu_percent_list = snapshot.per_cpu_percent
+                measured_over = self.sampler.interval
+                load_avg = snapshot.load_average
             
             # Get CPU frequency
             try:
@@ -107,21 +130,21 @@ class ResourceMonitor:
             except (AttributeError, OSError):
                 freq_info = None
             
-            # Get CPU count
-            cpu_count_logical = psutil.cpu_count(logical=True)
-            cpu_count_physical = psutil.cpu_count(logical=False)
-            
             result = {
                 "success": True,
                 "cpu_percent": cpu_percent,
                 "cpu_times": cpu_times._asdict(),
                 "cpu_count": {
-                    "logical": cpu_count_logical,
-                    "physical": cpu_count_physical
+                    "logical": self.cpu_count_logical,
+                    "physical": self.cpu_count_physical
                 },
                 "cpu_frequency": freq_info,
+                "measured_over": measured_over,
+                "fresh": fresh or snapshot.cpu_percent is None,
                 "timestamp": time.time()
             }
+            if not result["fresh"]:
+                result.update(snapshot.metadata())
             
             if per_cpu and cpu_percent_list:
                 result["per_cpu"] = [
@@ -129,17 +152,13 @@ class ResourceMonitor:
                     for i, percent in enumerate(cpu_percent_list)
                 ]
             
-            # Get load average (Unix-like systems)
+            # Load average (Unix-like systems)
             if hasattr(psutil, 'getloadavg'):
-                try:
-                    load_avg = psutil.getloadavg()
-                    result["load_average"] = {
-                        "1min": load_avg[0],
-                        "5min": load_avg[1],
-                        "15min": load_avg[2]
-                    }
-                except OSError:
-                    result["load_average"] = None
+                result["load_average"] = {
+                    "1min": load_avg[0],
+                    "5min": load_avg[1],
+                    "15min": load_avg[2]
+                } if load_avg else None
             
             return result
             
@@ -160,8 +179,10 @@ class ResourceMonitor:
             Memory usage data
         """
         try:
+            snapshot = await self.sampler.get_snapshot()
+            
             # Virtual memory (RAM)
-            virtual_memory = psutil.virtual_memory()
+            virtual_memory = snapshot.virtual_memory
             
             def format_bytes(bytes_value):
                 if not human_readable:
@@ -198,7 +219,7 @@ class ResourceMonitor:
             # Swap memory
             if include_swap:
                 try:
-                    swap_memory = psutil.swap_memory()
+                    swap_memory = snapshot.swap_memory
                     swap_info = {
                         "total": format_bytes(swap_memory.total),
                         "used": format_bytes(swap_memory.used),
@@ -286,28 +307,14 @@ class ResourceMonitor:
                     logger.debug(f"Cannot access {partition.mountpoint}: {e}")
                     continue
             
-            # Get disk I/O statistics
-            try:
-                disk_io = psutil.disk_io_counters()
-                io_stats = disk_io._asdict() if disk_io else {}
-                
-                # Calculate rates if we have previous data
-                if self.last_disk_stats:
-                    time_delta = time.time() - getattr(self, '_last_disk_time', time.time())
-                    if time_delta > 0:
-                        for key in ['read_bytes', 'write_bytes', 'read_count', 'write_count']:
-                            if key in io_stats and hasattr(self.last_disk_stats, key):
-                                current_val = getattr(disk_io, key)
-                                last_val = getattr(self.last_disk_stats, key)
-                                rate = (current_val - last_val) / time_delta
-                                io_stats[f"{key}_per_sec"] = rate
-                
-                self.last_disk_stats = disk_io
-                self._last_disk_time = time.time()
-                
-            except Exception as e:
-                logger.debug(f"Disk I/O stats not available: {e}")
-                io_stats = {}
+            # Get disk I/O statistics; rates are per sampler interval, so
+            # concurrent callers don't reset each other's baseline
+            snapshot = await self.sampler.get_snapshot()
+            disk_io = snapshot.disk_io
+            io_stats = disk_io._asdict() if disk_io else {}
+            for key, rate in snapshot.rates.items():
+                if key.startswith("disk_io."):
+                    io_stats[key[len("disk_io."):]] = rate
             
             return {
                 "success": True,
@@ -340,7 +347,7 @@ class ResourceMonitor:
             }
             
             # Collect current metrics
-            cpu_data = await self.get_cpu_usage(per_cpu=detailed, interval=1.0)
+            cpu_data = await self.get_cpu_usage(per_cpu=detailed)
             memory_data = await self.get_memory_usage(include_swap=True, human_readable=detailed)
             disk_data = await self.get_disk_usage(human_readable=detailed)
             
@@ -350,30 +357,17 @@ class ResourceMonitor:
                 "disk": disk_data
             })
             
-            # Network statistics
-            try:
-                net_io = psutil.net_io_counters()
-                net_stats = net_io._asdict() if net_io else {}
-                
-                # Calculate rates
-                if self.last_network_stats:
-                    time_delta = time.time() - getattr(self, '_last_network_time', time.time())
-                    if time_delta > 0:
-                        for key in ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv']:
-                            if hasattr(net_io, key) and hasattr(self.last_network_stats, key):
-                                current_val = getattr(net_io, key)
-                                last_val = getattr(self.last_network_stats, key)
-                                rate = (current_val - last_val) / time_delta
-                                net_stats[f"{key}_per_sec"] = rate
-                
-                self.last_network_stats = net_io
-                self._last_network_time = time.time()
-                
+            # Network statistics from the shared snapshot
+            snapshot = await self.sampler.get_snapshot()
+            if snapshot.net_io is not None:
+                net_stats = snapshot.net_io._asdict()
+                for key, rate in snapshot.rates.items():
+                    if key.startswith("net_io."):
+                        net_stats[key[len("net_io."):]] = rate
                 metrics["network"] = {"success": True, "stats": net_stats}
-                
-            except Exception as e:
-                logger.debug(f"Network stats not available: {e}")
-                metrics["network"] = {"success": False, "error": str(e)}
+            else:
+                metrics["network"] = {"success": False, "error": "Network counters not available"}
+            metrics.update(snapshot.metadata())
             
             # System uptime and boot time
             try:
@@ -390,21 +384,8 @@ class ResourceMonitor:
                 logger.debug(f"Uptime not available: {e}")
                 metrics["uptime"] = {"error": str(e)}
             
-            # Add to history
-            if len(self.metrics_history) >= self.history_limit:
-                self.metrics_history.pop(0)
-            
-            # Store simplified version in history
-            history_entry = {
-                "timestamp": metrics["timestamp"],
-                "cpu_percent": cpu_data.get("cpu_percent", 0),
-                "memory_percent": memory_data.get("memory_percent", 0),
-                "disk_percent": max([fs.get("percent", 0) for fs in disk_data.get("filesystems", [])], default=0)
-            }
-            self.metrics_history.append(history_entry)
-            
             if include_history:
-                metrics["history"] = self.metrics_history.copy()
+                metrics["history"] = self.get_metrics_history(self.history_limit)
             
             return {
                 "success": True,
@@ -417,94 +398,71 @@ class ResourceMonitor:
     
     async def monitor_resources(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Monitor system resources continuously.
+        Report system resources over a recent window.
+        
+        Answers from the host time series the sampler has been recording,
+        so the last `duration` seconds are returned immediately.
         
         Args:
-            args: Monitoring parameters (duration, interval, alerts)
+            args: Monitoring parameters (duration, resolution, alerts, thresholds)
             
         Returns:
             Resource monitoring data
         """
         try:
-            duration = args.get("duration", 60)  # seconds
-            interval = args.get("interval", 5)   # seconds
+            duration = args.get("duration", 60)  # seconds of history
+            resolution = args.get("resolution", "raw")
             enable_alerts = args.get("alerts", False)
             alert_thresholds = args.get("thresholds", {
                 "cpu_percent": 90,
-                "memory_percent": 85,
-                "disk_percent": 90
+                "memory_percent": 85
             })
             
+            window = self.metrics_store.query(
+                "host", window=duration, resolution=resolution,
+                metrics=["cpu_percent", "memory_percent", "load_1m"],
+                include_samples=True
+            )
+            if not window["success"]:
+                return window
+            
             monitoring_data = {
-                "start_time": time.time(),
-                "samples": [],
+                "start_time": window["start"],
+                "samples": [
+                    {
+                        "timestamp": sample["timestamp"],
+                        "cpu_percent": sample["cpu_percent"],
+                        "memory_percent": sample["memory_percent"],
+                        "load_average": sample["load_1m"]
+                    }
+                    for sample in window["samples"]
+                ],
                 "alerts": []
             }
             
-            end_time = time.time() + duration
-            
-            while time.time() < end_time:
-                # Collect sample
-                sample_start = time.time()
-                
-                cpu_data = await self.get_cpu_usage(per_cpu=False, interval=1.0)
-                memory_data = await self.get_memory_usage(include_swap=False, human_readable=False)
-                
-                sample = {
-                    "timestamp": sample_start,
-                    "cpu_percent": cpu_data.get("cpu_percent", 0),
-                    "memory_percent": memory_data.get("memory_percent", 0),
-                    "load_average": cpu_data.get("load_average")
-                }
-                
-                monitoring_data["samples"].append(sample)
-                
-                # Check alerts
-                if enable_alerts:
-                    alerts = []
-                    
-                    if sample["cpu_percent"] > alert_thresholds.get("cpu_percent", 90):
-                        alerts.append({
-                            "type": "cpu_high",
-                            "value": sample["cpu_percent"],
-                            "threshold": alert_thresholds["cpu_percent"],
-                            "timestamp": sample_start
-                        })
-                    
-                    if sample["memory_percent"] > alert_thresholds.get("memory_percent", 85):
-                        alerts.append({
-                            "type": "memory_high",
-                            "value": sample["memory_percent"],
-                            "threshold": alert_thresholds["memory_percent"],
-                            "timestamp": sample_start
-                        })
-                    
-                    monitoring_data["alerts"].extend(alerts)
-                
-                # Wait for next interval
-                elapsed = time.time() - sample_start
-                sleep_time = max(0, interval - elapsed)
-                if sleep_time > 0:
-                    await asyncio.sleep(sleep_time)
+            # Check alerts
+            if enable_alerts:
+                for sample in monitoring_data["samples"]:
+                    for metric, alert_type in (("cpu_percent", "cpu_high"),
+                                               ("memory_percent", "memory_high")):
+                        threshold = alert_thresholds.get(metric)
+                        value = sample[metric]
+                        if threshold is not None and value is not None and value > threshold:
+                            monitoring_data["alerts"].append({
+                                "type": alert_type,
+                                "value": value,
+                                "threshold": threshold,
+                                "timestamp": sample["timestamp"]
+                            })
             
             # Calculate statistics
-            if monitoring_data["samples"]:
-                cpu_values = [s["cpu_percent"] for s in monitoring_data["samples"]]
-                memory_values = [s["memory_percent"] for s in monitoring_data["samples"]]
-                
+            statistics = window["statistics"]
+            if statistics:
                 monitoring_data["statistics"] = {
                     "duration": duration,
-                    "sample_count": len(monitoring_data["samples"]),
-                    "cpu_stats": {
-                        "avg": sum(cpu_values) / len(cpu_values),
-                        "min": min(cpu_values),
-                        "max": max(cpu_values)
-                    },
-                    "memory_stats": {
-                        "avg": sum(memory_values) / len(memory_values),
-                        "min": min(memory_values),
-                        "max": max(memory_values)
-                    },
+                    "sample_count": window["sample_count"],
+                    "cpu_stats": statistics["cpu_percent"],
+                    "memory_stats": statistics["memory_percent"],
                     "alert_count": len(monitoring_data["alerts"])
                 }
             
@@ -587,7 +545,10 @@ class ResourceMonitor:
         return ", ".join(parts) if parts else "less than a minute"
     
     def get_metrics_history(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Get historical metrics data"""
-        if limit:
-            return self.metrics_history[-limit:]
-        return self.metrics_history.copy()
\ No newline at end of file
+        """Get historical metrics data from the host time series"""
+        buffer = self.metrics_store.host.raw
+        timestamps, values = buffer.tail(limit) if limit else buffer.window()
+        return [
+            {"timestamp": float(ts), **{c: json_float(v) for c, v in zip(buffer.columns, row)}}
+            for ts, row in zip(timestamps, values)
+        ]
\ No newline at end of file
@@ -0,0 +1,375 @@
+"""
+System Sampler for System MCP Server
+
+Background sampler shared by the process and resource monitors. One sweep per
+interval snapshots every process and the system counters into an immutable,
+versioned table; tools answer from the latest snapshot instead of walking
+/proc themselves, so concurrent clients cost almost nothing. Expensive
+per-process fields (network connections) are only collected when a tool
+actually asks for them, and cached for a short time.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+PROCESS_ATTRS = [
+    'pid', 'ppid', 'name', 'username', 'status', 'create_time',
+    'cpu_percent', 'memory_percent', 'memory_info', 'num_threads', 'cmdline'
+]
+
+RATE_COUNTERS = {
+    "net_io": ['bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv'],
+    "disk_io": ['read_bytes', 'write_bytes', 'read_count', 'write_count']
+}
+
+
+def cpu_percent_between(previous, current) -> Optional[float]:
+    """
+    CPU utilization between two cpu_times readings, as psutil computes it.
+    
+    Guest time is already included in user time on Linux, so it is left out
+    of the total; idle and iowait count as not busy.
+    """
+    if previous is None or current is None:
+        return None
+    
+    def split(times):
+        total = sum(times) - getattr(times, 'guest', 0) - getattr(times, 'guest_nice', 0)
+        idle = getattr(times, 'idle', 0) + getattr(times, 'iowait', 0)
+        return total, total - idle
+    
+    total_before, busy_before = split(previous)
+    total_after, busy_after = split(current)
+    elapsed = total_after - total_before
+    if elapsed <= 0:
+        return 0.0
+    busy = (busy_after - busy_before) / elapsed * 100
+    return round(max(0.0, min(100.0, busy)), 1)
+
+
+@dataclass(frozen=True)
+class SystemSnapshot:
+    """
+    One sweep of processes and system counters.
+    
+    Snapshots are never mutated after publication, so readers can use them
+    without locking. Process records are shared; copy before modifying.
+    """
+    version: int
+    timestamp: float
+    duration: float
+    processes: Dict[int, Dict[str, Any]]
+    by_name: Dict[str, List[int]]
+    cpu_times: Any
+    per_cpu_times: List[Any]
+    virtual_memory: Any
+    swap_memory: Any
+    net_io: Any
+    disk_io: Any
+    load_average: Optional[tuple]
+    rates: Dict[str, float] = field(default_factory=dict)
+    cpu_percent: Optional[float] = None
+    per_cpu_percent: Optional[List[float]] = None
+    
+    @property
+    def age(self) -> float:
+        """Seconds since this snapshot was taken"""
+        return time.time() - self.timestamp
+    
+    def children_of(self, pid: int, recursive: bool = True) -> List[int]:
+        """Child PIDs from the snapshot's parent links, without another sweep"""
+        children: Dict[int, List[int]] = {}
+        for record in self.processes.values():
+            children.setdefault(record.get('ppid'), []).append(record['pid'])
+        
+        result = []
+        stack = [pid]
+        while stack:
+            for child in children.get(stack.pop(), []):
+                if child != pid:
+                    result.append(child)
+                    if recursive:
+                        stack.append(child)
+        return result
+    
+    def metadata(self) -> Dict[str, Any]:
+        """Version and freshness, included in tool responses"""
+        return {
+            "snapshot_version": self.version,
+            "sampled_at": self.timestamp,
+            "sample_age": round(self.age, 3)
+        }
+
+
+class SystemSampler:
+    """
+    Periodic process and system counter sampler.
+    
+    Features:
+    - One process_iter sweep per interval, shared by all tools
+    - Versioned, immutable snapshots
+    - Counter rates (network, disk I/O) and CPU utilization computed
+      between sweeps, so nobody has to sleep to measure them
+    - Lazily sampled, TTL-cached connection counts
+    - On-demand sampling when the background loop isn't running
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize sampler.
+        
+        Args:
+            config: Sampler configuration (interval, lazy_ttl)
+        """
+        self.config = config
+        self.interval = config.get("interval", 2.0)
+        self.lazy_ttl = config.get("lazy_ttl", 10.0)
+        
+        self._snapshot: Optional[SystemSnapshot] = None
+        self._version = 0
+        self._task: Optional[asyncio.Task] = None
+        self._users = 0
+        self._sample_lock: Optional[asyncio.Lock] = None
+        self._listeners: List[Any] = []
+        
+        # Lazy fields
+        self._connection_counts: Dict[int, int] = {}
+        self._connection_counts_at = 0.0
+        
+        # Statistics
+        self.sweeps = 0
+        self.on_demand_sweeps = 0
+        self.last_sweep_duration = 0.0
+        
+        logger.info("System sampler initialized")
+    
+    @property
+    def snapshot(self) -> Optional[SystemSnapshot]:
+        """Latest published snapshot, without sampling"""
+        return self._snapshot
+    
+    @property
+    def running(self) -> bool:
+        """Whether the background loop is active"""
+        return self._task is not None and not self._task.done()
+    
+    async def start(self):
+        """Start background sampling; safe to call once per user"""
+        self._users += 1
+        if self.running:
+            return
+        
+        await self.refresh()
+        self._task = asyncio.create_task(self._sample_loop())
+        logger.info(f"System sampler started (interval {self.interval}s)")
+    
+    async def stop(self):
+        """Stop background sampling once its last user has stopped"""
+        self._users = max(0, self._users - 1)
+        if self._users or not self._task:
+            return
+        
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("System sampler stopped")
+    
+    def add_listener(self, callback):
+        """
+        Call callback(snapshot) after every sweep, on the sampling thread.
+        
+        Used by consumers that derive data from each snapshot (e.g. the
+        metrics store) instead of running their own sweeps.
+        """
+        self._listeners.append(callback)
+    
+    async def _sample_loop(self):
+        """Background loop publishing a snapshot every interval"""
+        while True:
+            try:
+                # Sleep out the rest of the interval since the last sweep
+                # (start() or an on-demand refresh) so deltas between
+                # snapshots cover a full interval
+                snapshot = self._snapshot
+                age = snapshot.age if snapshot is not None else self.interval
+                await asyncio.sleep(max(0.0, self.interval - age))
+                if self._snapshot is snapshot:
+                    await self.refresh()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"System sampler error: {e}")
+                await asyncio.sleep(self.interval)
+    
+    async def refresh(self) -> SystemSnapshot:
+        """Take a sweep now, off the event loop, coalescing concurrent callers"""
+        if self._sample_lock is None:
+            self._sample_lock = asyncio.Lock()
+        
+        version = self._version
+        async with self._sample_lock:
+            if self._version != version and self._snapshot is not None:
+                # Another caller sampled while we waited
+                return self._snapshot
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.sample)
+    
+    async def get_snapshot(self, max_age: Optional[float] = None) -> SystemSnapshot:
+        """
+        Latest snapshot, sampling on demand if there is none or it is too old.
+        
+        Args:
+            max_age: Maximum acceptable age in seconds (default: two intervals)
+        """
+        max_age = self.interval * 2 if max_age is None else max_age
+        snapshot = self._snapshot
+        if snapshot is None or snapshot.age > max_age:
+            self.on_demand_sweeps += 1
+            snapshot = await self.refresh()
+        return snapshot
+    
+    def sample(self) -> SystemSnapshot:
+        """Take one blocking sweep and publish it"""
+        started = time.perf_counter()
+        now = time.time()
+        
+        processes: Dict[int, Dict[str, Any]] = {}
+        by_name: Dict[str, List[int]] = {}
+        for proc in psutil.process_iter(PROCESS_ATTRS, ad_value=None):
+            record = proc.info
+            memory_info = record.get('memory_info')
+            record['memory_info'] = memory_info._asdict() if memory_info else {}
+            record['cpu_percent'] = record.get('cpu_percent') or 0.0
+            record['memory_percent'] = record.get('memory_percent') or 0.0
+            record['num_threads'] = record.get('num_threads') or 0
+            record['name'] = record.get('name') or ""
+            processes[record['pid']] = record
+            by_name.setdefault(record['name'], []).append(record['pid'])
+        
+        previous = self._snapshot
+        net_io = self._safe(psutil.net_io_counters)
+        disk_io = self._safe(psutil.disk_io_counters)
+        
+        rates: Dict[str, float] = {}
+        if previous is not None:
+            elapsed = now - previous.timestamp
+            if elapsed > 0:
+                for name, current, last in (("net_io", net_io, previous.net_io),
+                                            ("disk_io", disk_io, previous.disk_io)):
+                    if current is None or last is None:
+                        continue
+                    for key in RATE_COUNTERS[name]:
+                        rates[f"{name}.{key}_per_sec"] = \
+                            (getattr(current, key) - getattr(last, key)) / elapsed
+        
+        load_average = None
+        if hasattr(psutil, 'getloadavg'):
+            load_average = self._safe(psutil.getloadavg)
+        
+        cpu_times = psutil.cpu_times()
+        per_cpu_times = psutil.cpu_times(percpu=True)
+        cpu_percent = per_cpu_percent = None
+        if previous is not None:
+            cpu_percent = cpu_percent_between(previous.cpu_times, cpu_times)
+            if len(previous.per_cpu_times) == len(per_cpu_times):
+                per_cpu_percent = [cpu_percent_between(before, after) for before, after
+                                   in zip(previous.per_cpu_times, per_cpu_times)]
+        
+        self._version += 1
+        snapshot = SystemSnapshot(
+            version=self._version,
+            timestamp=now,
+            duration=time.perf_counter() - started,
+            processes=processes,
+            by_name=by_name,
+            cpu_times=cpu_times,
+            per_cpu_times=per_cpu_times,
+            virtual_memory=psutil.virtual_memory(),
+            swap_memory=self._safe(psutil.swap_memory),
+            net_io=net_io,
+            disk_io=disk_io,
+            load_average=load_average,
+            rates=rates,
+            cpu_percent=cpu_percent,
+            per_cpu_percent=per_cpu_percent
+        )
+        
+        self._snapshot = snapshot
+        self.sweeps += 1
+        self.last_sweep_duration = snapshot.duration
+        
+        for callback in self._listeners:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Snapshot listener failed: {e}")
+        
+        return snapshot
+    
+    @staticmethod
+    def _safe(func):
+        """Call a psutil counter function, returning None where unsupported"""
+        try:
+            return func()
+        except (AttributeError, OSError, RuntimeError, NotImplementedError):
+            return None
+    
+    async def get_connection_counts(self) -> Dict[int, int]:
+        """
+        Open inet connections per PID, sampled lazily.
+        
+        One system-wide table scan serves every process and is reused for
+        lazy_ttl seconds, instead of one connections() call per process.
+        """
+        if time.time() - self._connection_counts_at > self.lazy_ttl:
+            loop = asyncio.get_running_loop()
+            self._connection_counts = await loop.run_in_executor(None, self._count_connections)
+            self._connection_counts_at = time.time()
+        return self._connection_counts
+    
+    @staticmethod
+    def _count_connections() -> Dict[int, int]:
+        """Scan the connection tables once and count by owning PID"""
+        counts: Dict[int, int] = {}
+        try:
+            for conn in psutil.net_connections(kind='inet'):
+                if conn.pid is not None:
+                    counts[conn.pid] = counts.get(conn.pid, 0) + 1
+        except psutil.AccessDenied:
+            # Some platforms need privileges for the system-wide table
+            for proc in psutil.process_iter(['pid']):
+                try:
+                    # net_connections() replaced connections() in psutil 6
+                    connections = getattr(proc, 'net_connections', None) or proc.connections
+                    counts[proc.pid] = len(connections(kind='inet'))
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+        return counts
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sampler statistics"""
+        snapshot = self._snapshot
+        return {
+            "running": self.running,
+            "interval": self.interval,
+            "version": self._version,
+            "sweeps": self.sweeps,
+            "on_demand_sweeps": self.on_demand_sweeps,
+            "last_sweep_ms": round(self.last_sweep_duration * 1000, 2),
+            "processes": len(snapshot.processes) if snapshot else 0,
+            "snapshot_age": round(snapshot.age, 3) if snapshot else None
+        }
@@ -11,11 +11,12 @@ Phase: 2.1
 """
 
 import asyncio
+import contextvars
 import logging
 import sys
 import json
 import yaml
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable, Awaitable
 from pathlib import Path
 
 try:
@@ -32,6 +33,8 @@ from process_monitor import ProcessMonitor
 from resource_monitor import ResourceMonitor
 from log_parser import LogParser
 from network_monitor import NetworkMonitor
+from sampler import SystemSampler
+from metrics_store import MetricsStore
 
 # Import security types
 try:
@@ -56,6 +59,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Progress sink of the tool call being served, set when the request carries
+# a progressToken; streaming tools push partial results through it
+_request_progress: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], Awaitable[None]]]] = \
+    contextvars.ContextVar("system_request_progress", default=None)
+
 
 class SystemMCPServer:
     """
@@ -79,11 +87,18 @@ class SystemMCPServer:
         """
         self.config = self._load_config(config_path)
         
+        # One background sampler feeds the process and resource monitors
+        # and the time series they answer history queries from
+        self.sampler = SystemSampler(self.config.get("sampler", {}))
+        self.metrics_store = MetricsStore(self.config.get("metrics", {}), self.sampler)
+        
         # Initialize monitoring components
-        self.process_monitor = ProcessMonitor(self.config.get("process", {}))
-        self.resource_monitor = ResourceMonitor(self.config.get("resource", {}))
+        self.process_monitor = ProcessMonitor(self.config.get("process", {}),
+                                              self.sampler, self.metrics_store)
+        self.resource_monitor = ResourceMonitor(self.config.get("resource", {}),
+                                                self.sampler, self.metrics_store)
         self.log_parser = LogParser(self.config.get("logging", {}))
-        self.network_monitor = NetworkMonitor(self.config.get("network", {}))
+        self.network_monitor = NetworkMonitor(self.config.get("network", {}), self.sampler)
         
         # Server state
         self.connections: Dict[str, Any] = {}
@@ -105,6 +120,7 @@ class SystemMCPServer:
             "get_disk_usage": self._get_disk_usage,
             "get_network_stats": self._get_network_stats,
             "monitor_resources": self._monitor_resources,
+            "query_metrics": self._query_metrics,
             
             # Log analysis
             "parse_logs": self._parse_logs,
@@ -116,6 +132,8 @@ class SystemMCPServer:
             "network_status": self._network_status,
             "ping_host": self._ping_host,
             "check_port": self._check_port,
+            "ping_hosts": self._ping_hosts,
+            "check_ports": self._check_ports,
             "get_connections": self._get_connections,
             
             # System health
@@ -163,6 +181,16 @@ class SystemMCPServer:
                     "disk_percent": 90
                 }
             },
+            "sampler": {
+                "interval": 2.0,
+                "lazy_ttl": 10.0
+            },
+            "metrics": {
+                "capacity": 3600,
+                "process_capacity": 1800,
+                "max_tracked_processes": 32,
+                "rollups": {"1s": 3600, "1m": 1440, "1h": 720}
+            },
             "process": {
                 "track_children": True,
                 "include_threads": False,
@@ -181,12 +209,27 @@ class SystemMCPServer:
                     "/var/log/kern.log"
                 ],
                 "max_lines": 1000,
-                "follow_logs": True
+                "follow_logs": True,
+                "max_index_lines": 200000,
+                "initial_bytes": 4194304,
+                "use_inotify": True,
+                "follow_poll_interval": 1.0,
+                "follow_batch_lines": 200,
+                "parallel_search_bytes": 67108864,
+                "search_shard_bytes": 33554432,
+                "search_processes": 0,
+                "template_similarity": 0.4,
+                "template_depth": 4
             },
             "network": {
                 "interface_filter": [],
                 "include_loopback": False,
-                "dns_servers": ["8.8.8.8", "1.1.1.1"]
+                "dns_servers": ["8.8.8.8", "1.1.1.1"],
+                "connection_ttl": 5.0,
+                "gateway_ttl": 60.0,
+                "probe_concurrency": 100,
+                "probe_timeout": 2.0,
+                "max_probe_targets": 1024
             }
         }
         
@@ -244,37 +287,68 @@ class SystemMCPServer:
         
         logger.info(f"Client connected: {client_id}")
         
+        # Requests are served concurrently so a long follow doesn't hold up
+        # later requests from the same client
+        pending = set()
+        
         try:
             async for message_data in websocket:
-                try:
-                    if isinstance(message_data, str):
-                        message = json.loads(message_data)
-                    else:
-                        message = json.loads(message_data.decode())
-                    
-                    response = await self._process_message(message)
-                    await websocket.send(json.dumps(response))
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"Error processing message: {e}")
-                    error_response = {
-                        "error": {"code": -32700, "message": "Parse error"}
-                    }
-                    await websocket.send(json.dumps(error_response))
-                except Exception as e:
-                    logger.error(f"Client handler error: {e}")
-                    error_response = {
-                        "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
-                    }
-                    await websocket.send(json.dumps(error_response))
+                task = asyncio.create_task(self._handle_websocket_message(websocket, message_data))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
                 
         except Exception as e:
             logger.error(f"WebSocket handler error: {e}")
         finally:
+            for task in pending:
+                task.cancel()
             logger.info(f"Client disconnected: {client_id}")
     
-    async def _process_message(self, message: Dict[str, Any]) -> Dict[str, Any]:
-        """Process incoming MCP message"""
+    async def _handle_websocket_message(self, websocket: WebSocketServerProtocol, message_data):
+        """Handle one client message"""
+        try:
+            if isinstance(message_data, str):
+                message = json.loads(message_data)
+            else:
+                message = json.loads(message_data.decode())
+            
+            async def notify(notification: Dict[str, Any]):
+                await websocket.send(json.dumps(notification))
+            
+            response = await self._process_message(message, notify)
+            await websocket.send(json.dumps(response))
+            
+        except asyncio.CancelledError:
+            # Client went away mid-request
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Error processing message: {e}")
+            error_response = {
+                "error": {"code": -32700, "message": "Parse error"}
+            }
+            await websocket.send(json.dumps(error_response))
+        except Exception as e:
+            logger.error(f"Client handler error: {e}")
+            error_response = {
+                "error": {"code": -32603, "message": f"Internal error: {str(e)}"}
+            }
+            try:
+                await websocket.send(json.dumps(error_response))
+            except Exception:
+                pass
+    
+    async def _process_message(self, message: Dict[str, Any],
+                               notify: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+                               ) -> Dict[str, Any]:
+        """
+        Process incoming MCP message.
+        
+        Args:
+            message: MCP request
+            notify: Coroutine function sending a notification to the client;
+                tools stream partial results through it when the request
+                carries a progressToken
+        """
         method = message.get("method")
         params = message.get("params", {})
         message_id = message.get("id")
@@ -292,7 +366,20 @@ class SystemMCPServer:
             tool_name = params.get("name")
             arguments = params.get("arguments", {})
             
+            progress_token = (params.get("_meta") or {}).get("progressToken")
+            if notify is not None and progress_token is not None:
+                async def send_progress(payload: Dict[str, Any]):
+                    await notify({
+                        "jsonrpc": "2.0",
+                        "method": "notifications/progress",
+                        "params": {"progressToken": progress_token, **payload}
+                    })
+                progress = send_progress
+            else:
+                progress = None
+            
             if tool_name in self.tools:
+                token = _request_progress.set(progress)
                 try:
                     result = await self.tools[tool_name](arguments)
                     return {
@@ -317,6 +404,8 @@ class SystemMCPServer:
                             "message": f"Tool execution failed: {str(e)}"
                         }
                     }
+                finally:
+                    _request_progress.reset(token)
             else:
                 return {
                     "jsonrpc": "2.0",
@@ -394,7 +483,10 @@ class SystemMCPServer:
                     "type": "object",
                     "properties": {
                         "per_cpu": {"type": "boolean", "default": False},
-                        "interval": {"type": "number", "default": 1.0}
+                        "fresh": {"type": "boolean", "default": False,
+                                  "description": "Measure over interval now instead of using the background sample"},
+                        "interval": {"type": "number", "default": 1.0,
+                                     "description": "Measurement interval in seconds for fresh samples"}
                     }
                 }
             },
@@ -420,6 +512,22 @@ class SystemMCPServer:
                     }
                 }
             },
+            {
+                "name": "query_metrics",
+                "description": "Aggregate recorded host or process metrics over a time window",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "target": {"type": ["string", "integer"], "default": "host",
+                                   "description": "\"host\" or a PID tracked with monitor_process"},
+                        "window": {"type": "number", "default": 300, "description": "Seconds back from now"},
+                        "resolution": {"type": "string", "enum": ["raw", "1s", "1m", "1h"], "default": "raw"},
+                        "metrics": {"type": "array", "items": {"type": "string"}},
+                        "percentiles": {"type": "array", "items": {"type": "number"}, "default": [50, 95, 99]},
+                        "include_samples": {"type": "boolean", "default": False}
+                    }
+                }
+            },
             {
                 "name": "parse_logs",
                 "description": "Parse and analyze system log files",
@@ -433,6 +541,22 @@ class SystemMCPServer:
                     }
                 }
             },
+            {
+                "name": "tail_log",
+                "description": "Show the end of a log file and optionally follow it; followed lines are "
+                               "streamed as progress notifications when a progressToken is given",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "log_file": {"type": "string", "description": "Path to log file"},
+                        "lines": {"type": "integer", "default": 50},
+                        "follow": {"type": "boolean", "default": False},
+                        "duration": {"type": "number", "default": 30, "description": "Seconds to follow"},
+                        "max_lines": {"type": "integer", "description": "Stop following after this many new lines"}
+                    },
+                    "required": ["log_file"]
+                }
+            },
             {
                 "name": "network_status",
                 "description": "Get network interface status and statistics",
@@ -444,6 +568,50 @@ class SystemMCPServer:
                     }
                 }
             },
+            {
+                "name": "ping_hosts",
+                "description": "Check reachability of many hosts concurrently (ICMP where permitted, else TCP connect)",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "hosts": {"type": "array", "items": {"type": "string"}},
+                        "count": {"type": "integer", "default": 1, "description": "Probes per host"},
+                        "timeout": {"type": "number", "default": 2.0, "description": "Seconds per probe"},
+                        "concurrency": {"type": "integer", "default": 100},
+                        "method": {"type": "string", "enum": ["auto", "icmp", "tcp"], "default": "auto"},
+                        "tcp_port": {"type": "integer", "default": 80, "description": "Port for TCP probes"}
+                    },
+                    "required": ["hosts"]
+                }
+            },
+            {
+                "name": "check_ports",
+                "description": "Check many host:port targets concurrently",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "targets": {"type": "array", "items": {"type": "string"}, "description": "host:port entries"},
+                        "hosts": {"type": "array", "items": {"type": "string"}},
+                        "ports": {"type": "array", "items": {"type": "integer"}, "description": "Checked on every host in hosts"},
+                        "timeout": {"type": "number", "default": 2.0, "description": "Seconds per connect"},
+                        "concurrency": {"type": "integer", "default": 100}
+                    }
+                }
+            },
+            {
+                "name": "get_connections",
+                "description": "List network connections, optionally filtered by process, port or state",
+                "inputSchema": {
+                    "type": "object",
+                    "properties": {
+                        "kind": {"type": "string", "enum": ["inet", "inet4", "inet6", "tcp", "tcp4", "tcp6", "udp", "udp4", "udp6", "unix", "all"], "default": "inet"},
+                        "pid": {"type": "integer", "description": "Owning process ID"},
+                        "port": {"type": "integer", "description": "Local or remote port"},
+                        "status": {"type": "string", "description": "Connection state, e.g. LISTEN or ESTABLISHED"},
+                        "fresh": {"type": "boolean", "default": False, "description": "Rescan instead of using the cached table"}
+                    }
+                }
+            },
             {
                 "name": "health_check",
                 "description": "Perform comprehensive system health check",
@@ -502,7 +670,8 @@ class SystemMCPServer:
         """Get CPU usage statistics"""
         per_cpu = args.get("per_cpu", False)
         interval = args.get("interval", 1.0)
-        return await self.resource_monitor.get_cpu_usage(per_cpu, interval)
+        fresh = args.get("fresh", False)
+        return await self.resource_monitor.get_cpu_usage(per_cpu, interval, fresh)
     
     async def _get_memory_usage(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Get memory usage statistics"""
@@ -524,6 +693,17 @@ class SystemMCPServer:
         """Monitor system resources continuously"""
         return await self.resource_monitor.monitor_resources(args)
     
+    async def _query_metrics(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Query recorded metrics over a window"""
+        return self.metrics_store.query(
+            target=args.get("target", "host"),
+            window=args.get("window", 300),
+            resolution=args.get("resolution", "raw"),
+            metrics=args.get("metrics"),
+            percentiles=args.get("percentiles", [50, 95, 99]),
+            include_samples=args.get("include_samples", False)
+        )
+    
     async def _parse_logs(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Parse log files"""
         context = {"log_path": args.get("log_path")}
@@ -545,8 +725,8 @@ class SystemMCPServer:
         return await self.log_parser.search_logs(args)
     
     async def _tail_log(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        """Tail log files"""
-        return await self.log_parser.tail_log(args)
+        """Tail log files, streaming followed lines when progress was requested"""
+        return await self.log_parser.tail_log(args, _request_progress.get())
     
     async def _analyze_log_patterns(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Analyze log patterns"""
@@ -585,6 +765,21 @@ class SystemMCPServer:
         
         return await self.network_monitor.check_port(args)
     
+    def _network_target_permitted(self, host: str, port: Optional[int]) -> bool:
+        """Permission check for one target of a batch network tool"""
+        context = {"host": host}
+        if port is not None:
+            context["port"] = port
+        return self._check_permission(OperationType.NETWORK_ACCESS, context)
+    
+    async def _ping_hosts(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Ping many hosts concurrently"""
+        return await self.network_monitor.ping_hosts(args, self._network_target_permitted)
+    
+    async def _check_ports(self, args: Dict[str, Any]) -> Dict[str, Any]:
+        """Check many host:port targets concurrently"""
+        return await self.network_monitor.check_ports(args, self._network_target_permitted)
+    
     async def _get_connections(self, args: Dict[str, Any]) -> Dict[str, Any]:
         """Get network connections"""
         return await self.network_monitor.get_connections(args)
@@ -603,7 +798,7 @@ class SystemMCPServer:
         
         try:
             # CPU health
-            cpu_data = await self.resource_monitor.get_cpu_usage(False, 1.0)
+            cpu_data = await self.resource_monitor.get_cpu_usage(False)
             cpu_percent = cpu_data.get("cpu_percent", 0)
             health_data["checks"]["cpu"] = {
                 "status": "warning" if cpu_percent > 80 else "healthy",
@@ -672,7 +867,7 @@ class SystemMCPServer:
             }
             
             # Collect data from all monitors
-            cpu_data = await self.resource_monitor.get_cpu_usage(True, 1.0)
+            cpu_data = await self.resource_monitor.get_cpu_usage(True)
             memory_data = await self.resource_monitor.get_memory_usage(True, True)
             disk_data = await self.resource_monitor.get_disk_usage(None, True)
             process_data = await self.process_monitor.list_processes("cpu_percent", 10)
@@ -705,7 +900,7 @@ class SystemMCPServer:
             }
             
             # Quick metrics
-            cpu_data = await self.resource_monitor.get_cpu_usage(False, 1.0)
+            cpu_data = await self.resource_monitor.get_cpu_usage(False)
             memory_data = await self.resource_monitor.get_memory_usage(False, True)
             uptime_data = await self.resource_monitor.get_uptime()
             
@@ -0,0 +1,249 @@
+"""
+Template Miner for System MCP Server
+
+Online log template mining in the style of Drain (He et al., ICWS 2017).
+Messages are tokenized, obvious variables (numbers, hex, IPs, UUIDs) are
+masked, and a fixed-depth prefix tree keyed by token count and leading
+tokens narrows the candidate templates to a handful, so each line is mapped
+to a template id in a single pass. Templates generalize as lines arrive
+(differing tokens become <*>) while their ids stay stable, which lets the
+log index store one small integer per line and every analysis share it.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+WILDCARD = "<*>"
+
+# Digit runs are masked on every line (cheap) and the result is the cache key;
+# only on a cache miss are tokens that are nothing but masked digits, hex,
+# separators (hashes, UUIDs, IPs, versions) collapsed to a single wildcard.
+# Tokens such as "12ms" or "sda1" keep their text: "<*>ms", "sda<*>".
+DIGITS = re.compile(r'\d+')
+VARIABLE_TOKEN = re.compile(r'(?:<\*>|[a-fA-Fx.:\-])*<\*>(?:<\*>|[a-fA-Fx.:\-])*')
+
+
+def tokenize(masked: str) -> List[str]:
+    """Tokens of a digit-masked message, variable-looking ones as <*>"""
+    return [
+        WILDCARD if WILDCARD in token and VARIABLE_TOKEN.fullmatch(token) else token
+        for token in masked.split()
+    ]
+
+
+class LogTemplate:
+    """One mined template"""
+    
+    __slots__ = ("id", "tokens", "size")
+    
+    def __init__(self, template_id: int, tokens: List[str], size: int = 0):
+        self.id = template_id
+        self.tokens = tokens
+        self.size = size
+    
+    @property
+    def text(self) -> str:
+        return " ".join(self.tokens)
+    
+    def similarity(self, tokens: List[str]) -> tuple:
+        """(share of positions equal to `tokens`, wildcard count) for ranking"""
+        same = wildcards = 0
+        for mine, theirs in zip(self.tokens, tokens):
+            if mine == WILDCARD:
+                wildcards += 1
+            elif mine == theirs:
+                same += 1
+        return same / len(tokens), wildcards
+    
+    def merge(self, tokens: List[str]) -> bool:
+        """Generalize positions that differ; returns whether anything changed"""
+        changed = False
+        for i, (mine, theirs) in enumerate(zip(self.tokens, tokens)):
+            if mine != theirs and mine != WILDCARD:
+                self.tokens[i] = WILDCARD
+                changed = True
+        return changed
+
+
+class TemplateMiner:
+    """
+    Drain-style online template miner.
+    
+    Features:
+    - Prefix tree by token count and the first `depth` tokens
+    - Similarity threshold merge, wildcarding differing tokens
+    - Exact-message cache for repeated lines
+    - Stable integer template ids
+    - Optional JSON persistence of the template table
+    """
+    
+    def __init__(self, config: Dict[str, Any]):
+        """
+        Initialize template miner.
+        
+        Args:
+            config: Miner configuration (template_depth,
+                template_similarity, template_max_children,
+                template_path, template_save_interval)
+        """
+        self.depth = config.get("template_depth", 4)
+        self.similarity_threshold = config.get("template_similarity", 0.4)
+        self.max_children = config.get("template_max_children", 100)
+        self.cache_size = config.get("template_cache_size", 100000)
+        self.path = config.get("template_path")
+        if self.path:
+            self.path = os.path.expanduser(self.path)
+        self.save_interval = config.get("template_save_interval", 60.0)
+        
+        self.templates: List[LogTemplate] = []
+        self._tree: Dict[int, Dict[str, Any]] = {}
+        self._cache: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        
+        self._dirty = False
+        self._last_save = time.time()
+        
+        # Statistics
+        self.lines = 0
+        self.cache_hits = 0
+        
+        if self.path:
+            self.load()
+    
+    def add(self, message: str) -> int:
+        """Map one message to its template id, learning as needed"""
+        return self.add_many([message])[0]
+    
+    def add_many(self, messages: List[str]) -> List[int]:
+        """Map messages to template ids under a single lock acquisition"""
+        ids = []
+        with self._lock:
+            cache = self._cache
+            for message in messages:
+                masked = DIGITS.sub(WILDCARD, message)
+                template_id = cache.get(masked)
+                if template_id is None:
+                    template_id = self._match(tokenize(masked))
+                    if len(cache) >= self.cache_size:
+                        cache.clear()
+                    cache[masked] = template_id
+                else:
+                    self.templates[template_id].size += 1
+                    self.cache_hits += 1
+                ids.append(template_id)
+            self.lines += len(messages)
+        return ids
+    
+    def _match(self, tokens: List[str]) -> int:
+        leaf = self._leaf(tokens)
+        
+        best, best_rank = None, (-1.0, -1)
+        for template_id in leaf:
+            template = self.templates[template_id]
+            rank = template.similarity(tokens) if tokens else (1.0, 0)
+            if rank > best_rank:
+                best, best_rank = template, rank
+        
+        if best is not None and best_rank[0] >= self.similarity_threshold:
+            if best.merge(tokens):
+                self._dirty = True
+            best.size += 1
+            return best.id
+        
+        template = LogTemplate(len(self.templates), list(tokens), 1)
+        self.templates.append(template)
+        leaf.append(template.id)
+        self._dirty = True
+        return template.id
+    
+    def _leaf(self, tokens: List[str]) -> List[int]:
+        """Candidate template ids for a token sequence, creating the path"""
+        node = self._tree.setdefault(len(tokens), {})
+        for token in tokens[:self.depth]:
+            child = node.get(token)
+            if child is None:
+                child = node.get(WILDCARD)
+                if child is None:
+                    key = token if len(node) < self.max_children else WILDCARD
+                    child = node[key] = {}
+            node = child
+        return node.setdefault(None, [])
+    
+    def template(self, template_id: int) -> str:
+        """Current text of a template"""
+        return self.templates[template_id].text
+    
+    def template_texts(self) -> List[str]:
+        """Texts of all templates, indexed by id"""
+        with self._lock:
+            return [template.text for template in self.templates]
+    
+    def load(self):
+        """Load a saved template table, keeping ids"""
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not load log templates from {self.path}: {e}")
+            return
+        
+        with self._lock:
+            self.templates = []
+            self._tree = {}
+            self._cache = {}
+            for record in sorted(data.get("templates", []), key=lambda r: r["id"]):
+                template = LogTemplate(len(self.templates), record["template"].split(), record["size"])
+                self.templates.append(template)
+                self._leaf(template.tokens).append(template.id)
+        logger.info(f"Loaded {len(self.templates)} log templates from {self.path}")
+    
+    def save(self):
+        """Write the template table to template_path (atomically)"""
+        if not self.path:
+            return
+        with self._lock:
+            data = {
+                "version": 1,
+                "templates": [
+                    {"id": t.id, "template": t.text, "size": t.size} for t in self.templates
+                ]
+            }
+            self._dirty = False
+        self._last_save = time.time()
+        
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(data, f)
+        os.replace(temporary, self.path)
+    
+    def maybe_save(self):
+        """Save if templates changed and save_interval has passed"""
+        if self.path and self._dirty and time.time() - self._last_save >= self.save_interval:
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"Could not save log templates to {self.path}: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get miner statistics"""
+        return {
+            "templates": len(self.templates),
+            "lines": self.lines,
+            "cache_hits": self.cache_hits,
+            "path": self.path
+        }
@@ -629,6 +629,10 @@ class AgentOrchestrator:
         """Get workflow execution status"""
         return self.workflow_engine.get_workflow_status(workflow_id)
     
+    def get_workflow_trace(self, workflow_id: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Get workflow step timings as a Chrome trace"""
+        return self.workflow_engine.get_workflow_trace(workflow_id, path)
+    
     def get_running_workflows(self) -> List[Dict[str, Any]]:
         """Get all running workflows"""
         return self.workflow_engine.get_running_workflows()
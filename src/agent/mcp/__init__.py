@@ -12,6 +12,7 @@ from .client import MCPClient
 from .server import MCPServer
 from .protocol import MCPMessage, MCPMessageType, MCPCapability
 from .tools import ToolRegistry, MCPTool
+from .transport import StdioTransport
 
 __all__ = [
     'MCPClient',
@@ -20,5 +21,6 @@ __all__ = [
     'MCPMessageType',
     'MCPCapability',
     'ToolRegistry',
-    'MCPTool'
+    'MCPTool',
+    'StdioTransport'
 ]
\ No newline at end of file
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+MCP stdio Round-Trip Benchmark
+
+Spawns the basic MCP server as a subprocess, connects the MCP client over
+stdio and measures request/response latency for pings of different payload
+sizes, one at a time and with many requests in flight.
+
+Usage:
+    python -m src.agent.mcp.benchmark --requests 5000 --concurrency 32
+    python -m src.agent.mcp.benchmark --payload-sizes 0 65536 1048576
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 4.4
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from .client import MCPClient, MCPServerConfig
+from .protocol import MCPCapabilities, MCPClientInfo, MCPMessage, MCPMessageType
+from .transport import DEFAULT_MAX_FRAME_SIZE
+
+SERVER_NAME = "bench"
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """Latency percentiles in microseconds plus throughput"""
+    ordered = sorted(latencies)
+    count = len(ordered)
+
+    def percentile(p: float) -> float:
+        return ordered[min(count - 1, int(count * p))] * 1e6
+
+    return {
+        "count": count,
+        "mean_us": statistics.fmean(ordered) * 1e6,
+        "p50_us": percentile(0.50),
+        "p95_us": percentile(0.95),
+        "p99_us": percentile(0.99),
+        "max_us": ordered[-1] * 1e6,
+        "requests_per_s": count / elapsed if elapsed else 0.0
+    }
+
+
+def report(label: str, stats: Dict[str, float]):
+    """Print one result row"""
+    print(f"{label:<32} {stats['count']:>7}  p50 {stats['p50_us']:9.0f}us  "
+          f"p95 {stats['p95_us']:9.0f}us  p99 {stats['p99_us']:9.0f}us  "
+          f"{stats['requests_per_s']:>9,.0f} req/s")
+
+
+async def timed_ping(client: MCPClient, payload: str) -> float:
+    """Send one ping and return its round-trip time in seconds"""
+    message = MCPMessage(method=MCPMessageType.PING.value, params={"payload": payload} if payload else {})
+    start = time.perf_counter()
+    await client._send_request(SERVER_NAME, message)
+    return time.perf_counter() - start
+
+
+async def run_sequential(client: MCPClient, requests: int, payload: str) -> Dict[str, float]:
+    """One request in flight at a time"""
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(requests):
+        latencies.append(await timed_ping(client, payload))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run_concurrent(client: MCPClient, requests: int, concurrency: int,
+                         payload: str) -> Dict[str, float]:
+    """``concurrency`` workers issuing requests back to back"""
+    latencies: List[float] = []
+    per_worker = max(1, requests // concurrency)
+
+    async def worker():
+        for _ in range(per_worker):
+            latencies.append(await timed_ping(client, payload))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run_benchmark(args):
+    """Connect to a fresh server and run every configuration"""
+    client = MCPClient(MCPClientInfo(name="mcp-benchmark", version="1.0.0"), MCPCapabilities())
+    config = MCPServerConfig(
+        name=SERVER_NAME,
+        command=[sys.executable, "-m", "src.agent.mcp.server",
+                 "--max-frame-size", str(args.max_frame_size)],
+        env=dict(os.environ),
+        max_frame_size=args.max_frame_size
+    )
+
+    if not await client.connect_server(SERVER_NAME, config):
+        print("Failed to start benchmark server", file=sys.stderr)
+        return
+
+    try:
+        # Warm up the server process and both event loops
+        await run_sequential(client, min(100, args.requests), "")
+
+        for size in args.payload_sizes:
+            payload = "x" * size
+            requests = args.requests if size < 65536 else max(10, args.requests // 50)
+            report(f"sequential, {size} B payload",
+                   await run_sequential(client, requests, payload))
+            report(f"{args.concurrency} in flight, {size} B payload",
+                   await run_concurrent(client, requests, args.concurrency, payload))
+
+        print(f"transport: {client.get_transport_stats(SERVER_NAME)}")
+    finally:
+        await client.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP stdio round-trip benchmark")
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per configuration")
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight")
+    parser.add_argument("--payload-sizes", type=int, nargs="+", default=[0, 1024, 65536],
+                        help="Request payload sizes in bytes")
+    parser.add_argument("--max-frame-size", type=int, default=DEFAULT_MAX_FRAME_SIZE,
+                        help="Largest stdio message in bytes")
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
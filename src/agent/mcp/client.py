@@ -27,6 +27,7 @@ from .protocol import (
     create_error_response, create_success_response,
     validate_message, is_request, is_response, is_notification
 )
+from .transport import StdioTransport, DEFAULT_MAX_FRAME_SIZE, drain_stderr
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +42,7 @@ class MCPServerConfig:
     timeout: float = 30.0
     transport: str = "stdio"  # stdio, websocket, sse
     uri: Optional[str] = None  # for websocket/sse transport
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE  # stdio: largest message in bytes
 
 
 class MCPClient:
@@ -107,7 +109,12 @@ class MCPClient:
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                env=env
+                env=env,
+                limit=config.max_frame_size
+            )
+            transport = StdioTransport(
+                process.stdout, process.stdin,
+                max_frame_size=config.max_frame_size, name=server_name
             )
             
             # Store connection info
@@ -115,17 +122,23 @@ class MCPClient:
                 "config": config,
                 "transport": "stdio",
                 "process": process,
+                "stdio": transport,
                 "reader_task": None,
+                "stderr_task": None,
                 "initialized": False,
                 "server_info": None,
                 "server_capabilities": None
             }
             
-            # Start reading messages
+            # Start reading messages, and keep stderr drained so a chatty
+            # server never blocks on a full pipe
             reader_task = asyncio.create_task(
-                self._stdio_message_reader(server_name, process.stdout)
+                self._stdio_message_reader(server_name, transport)
             )
             self.connected_servers[server_name]["reader_task"] = reader_task
+            self.connected_servers[server_name]["stderr_task"] = asyncio.create_task(
+                drain_stderr(process.stderr, server_name)
+            )
             
             # Send initialize message
             await self._initialize_server(server_name)
@@ -275,22 +288,21 @@ class MCPClient:
             except Exception as e:
                 logger.error(f"Failed to discover prompts from {server_name}: {e}")
     
-    async def _stdio_message_reader(self, server_name: str, stdout):
+    async def _stdio_message_reader(self, server_name: str, transport: StdioTransport):
         """Read messages from stdio transport"""
         try:
             while True:
-                line = await stdout.readline()
-                if not line:
+                message = await transport.read_message()
+                if message is None:
                     break
                 
                 try:
-                    message = MCPMessage.from_json(line.decode().strip())
                     await self._handle_message(server_name, message)
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse message from {server_name}: {e}")
                 except Exception as e:
                     logger.error(f"Error handling message from {server_name}: {e}")
                     
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"stdio reader error for {server_name}: {e}")
         finally:
@@ -370,16 +382,13 @@ class MCPClient:
         server_info = self.connected_servers[server_name]
         transport = server_info["transport"]
         
-        message_json = message.to_json() + "\n"
-        
         if transport == "stdio":
-            process = server_info["process"]
-            process.stdin.write(message_json.encode())
-            await process.stdin.drain()
+            # Waits on drain() while the server's stdin pipe is full
+            await server_info["stdio"].write_message(message)
         
         elif transport == "websocket":
             websocket = server_info["websocket"]
-            await websocket.send(message_json.rstrip())
+            await websocket.send(message.to_json())
         
         else:
             raise ValueError(f"Unsupported transport: {transport}")
@@ -489,6 +498,13 @@ class MCPClient:
         """Get list of connected server names"""
         return [name for name, info in self.connected_servers.items() if info.get("initialized")]
     
+    def get_transport_stats(self, server_name: str) -> Optional[Dict[str, Any]]:
+        """Get frame and byte counters for a stdio server"""
+        server_info = self.connected_servers.get(server_name)
+        if not server_info or "stdio" not in server_info:
+            return None
+        return server_info["stdio"].get_stats()
+    
     def get_available_tools(self) -> List[MCPTool]:
         """Get all available tools"""
         return list(self.available_tools.values())
@@ -508,18 +524,22 @@ class MCPClient:
         
         server_info = self.connected_servers[server_name]
         
-        # Cancel reader task
-        if server_info["reader_task"]:
-            server_info["reader_task"].cancel()
-            try:
-                await server_info["reader_task"]
-            except asyncio.CancelledError:
-                pass
+        # Cancel reader tasks
+        for task_key in ("reader_task", "stderr_task"):
+            task = server_info.get(task_key)
+            if task:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
         
         # Close connection
         if server_info["transport"] == "stdio":
+            server_info["stdio"].close()
             process = server_info["process"]
-            process.terminate()
+            if process.returncode is None:
+                process.terminate()
             await process.wait()
         elif server_info["transport"] == "websocket":
             websocket = server_info["websocket"]
@@ -9,7 +9,6 @@ Session: 4.4
 """
 
 import asyncio
-import json
 import sys
 import logging
 from typing import Dict, List, Any, Optional, Callable
@@ -22,6 +21,7 @@ from .protocol import (
     validate_message, is_request, is_response
 )
 from .tools import ToolRegistry, get_default_tools
+from .transport import DEFAULT_MAX_FRAME_SIZE, FrameTooLargeError, open_stdio_transport
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +33,7 @@ class MCPServerConfig:
     version: str
     capabilities: MCPCapabilities
     tool_registry: Optional[ToolRegistry] = None
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE
 
 
 class MCPServer:
@@ -80,30 +81,27 @@ class MCPServer:
         """Start server with stdio transport"""
         logger.info("Starting MCP Server with stdio transport")
         
+        transport = await open_stdio_transport(self.config.max_frame_size)
+        
         try:
             # Read from stdin, write to stdout
             while True:
-                line = await asyncio.get_event_loop().run_in_executor(
-                    None, sys.stdin.readline
-                )
-                
-                if not line:
+                message = await transport.read_message()
+                if message is None:
                     break
                 
-                line = line.strip()
-                if not line:
-                    continue
-                
                 try:
-                    message = MCPMessage.from_json(line)
                     response = await self._handle_message(message)
                     
                     if response:
-                        response_json = response.to_json()
-                        print(response_json, flush=True)
+                        # Waits on drain() while the client isn't reading
+                        await transport.write_message(response)
                         
-                except json.JSONDecodeError as e:
-                    logger.error(f"Failed to parse message: {e}")
+                except FrameTooLargeError as e:
+                    logger.error(f"Response to {message.method} dropped: {e}")
+                    await transport.write_message(create_error_response(
+                        message.id, MCPErrorCode.INTERNAL_ERROR, str(e)
+                    ))
                 except Exception as e:
                     logger.error(f"Error handling message: {e}")
                     
@@ -112,6 +110,7 @@ class MCPServer:
         except Exception as e:
             logger.error(f"Server error: {e}")
         finally:
+            transport.close()
             logger.info("MCP Server stopped")
     
     async def _handle_message(self, message: MCPMessage) -> Optional[MCPMessage]:
@@ -398,7 +397,8 @@ def create_basic_server(
     enable_tools: bool = True,
     enable_resources: bool = False,
     enable_prompts: bool = False,
-    tool_registry: Optional[ToolRegistry] = None
+    tool_registry: Optional[ToolRegistry] = None,
+    max_frame_size: int = DEFAULT_MAX_FRAME_SIZE
 ) -> MCPServer:
     """Create a basic MCP server"""
     capabilities = MCPCapabilities()
@@ -414,7 +414,8 @@ def create_basic_server(
         name=name,
         version=version,
         capabilities=capabilities,
-        tool_registry=tool_registry
+        tool_registry=tool_registry,
+        max_frame_size=max_frame_size
     )
     
     return MCPServer(config)
@@ -431,6 +432,8 @@ async def main():
     parser.add_argument("--no-tools", action="store_true", help="Disable tools")
     parser.add_argument("--resources", action="store_true", help="Enable resources")
     parser.add_argument("--prompts", action="store_true", help="Enable prompts")
+    parser.add_argument("--max-frame-size", type=int, default=DEFAULT_MAX_FRAME_SIZE,
+                        help="Largest stdio message in bytes")
     
     args = parser.parse_args()
     
@@ -447,7 +450,8 @@ async def main():
         version=args.version,
         enable_tools=not args.no_tools,
         enable_resources=args.resources,
-        enable_prompts=args.prompts
+        enable_prompts=args.prompts,
+        max_frame_size=args.max_frame_size
     )
     
     await server.start_stdio()
@@ -0,0 +1,289 @@
+"""
+MCP stdio Transport
+
+Newline-delimited JSON-RPC framing over asyncio streams, shared by the client
+(subprocess pipes) and the server (its own stdin/stdout). Frames are read with
+a bounded ``StreamReader``, oversized frames are skipped instead of killing the
+connection, writes wait on ``drain()`` so a slow peer applies backpressure, and
+a child's stderr is drained into the logger so it can never fill its pipe.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 4.4
+"""
+
+import asyncio
+import json
+import logging
+import sys
+import threading
+from typing import Any, Dict, Optional
+
+from .protocol import MCPMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_FRAME_SIZE = 16 * 1024 * 1024
+STDERR_LINE_LIMIT = 64 * 1024
+
+
+class FrameTooLargeError(Exception):
+    """Raised when an outgoing message exceeds the transport's frame limit"""
+    pass
+
+
+class StdioTransport:
+    """
+    Message framing over a reader/writer pair.
+
+    One JSON-RPC message per line. The reader's buffer limit is the maximum
+    frame size, so a peer can't make us buffer an unbounded line.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: Any,
+                 max_frame_size: int = DEFAULT_MAX_FRAME_SIZE, name: str = "stdio"):
+        """
+        Initialize transport.
+
+        Args:
+            reader: Stream to read frames from, created with limit=max_frame_size
+            writer: Stream (or stream-like object with write/drain/close) to
+                write frames to
+            max_frame_size: Largest frame accepted or sent, in bytes
+            name: Peer name used in log messages
+        """
+        self.reader = reader
+        self.writer = writer
+        self.max_frame_size = max_frame_size
+        self.name = name
+
+        # Statistics
+        self.frames_read = 0
+        self.frames_written = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.oversized_frames = 0
+        self.invalid_frames = 0
+
+    async def read_frame(self) -> Optional[bytes]:
+        """
+        Read the next non-empty frame.
+
+        Returns:
+            Frame without its trailing newline, or None at end of stream
+        """
+        while True:
+            try:
+                line = await self.reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as e:
+                # EOF; a final frame may lack its newline
+                line = e.partial
+                if not line.strip():
+                    return None
+            except asyncio.LimitOverrunError as e:
+                await self._skip_frame(e.consumed)
+                continue
+
+            line = line.strip()
+            if line:
+                self.frames_read += 1
+                self.bytes_read += len(line)
+                return line
+
+    async def _skip_frame(self, consumed: int):
+        """Discard an oversized frame up to and including its newline"""
+        self.oversized_frames += 1
+        skipped = 0
+        while True:
+            if consumed:
+                await self.reader.readexactly(consumed)
+                skipped += consumed
+            try:
+                skipped += len(await self.reader.readuntil(b"\n"))
+                break
+            except asyncio.LimitOverrunError as e:
+                consumed = e.consumed
+            except asyncio.IncompleteReadError as e:
+                skipped += len(e.partial)
+                break
+        logger.error(f"Dropped {skipped} byte frame from {self.name} "
+                     f"(max frame size {self.max_frame_size})")
+
+    async def read_message(self) -> Optional[MCPMessage]:
+        """
+        Read and parse the next message, skipping frames that aren't valid JSON.
+
+        Returns:
+            Parsed message, or None at end of stream
+        """
+        while True:
+            frame = await self.read_frame()
+            if frame is None:
+                return None
+            try:
+                return MCPMessage.from_json(frame)
+            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError) as e:
+                self.invalid_frames += 1
+                logger.error(f"Failed to parse message from {self.name}: {e}")
+
+    async def write_frame(self, frame: bytes):
+        """
+        Write one frame and wait until the peer has room for more.
+
+        Raises:
+            FrameTooLargeError: If the frame exceeds max_frame_size
+        """
+        if len(frame) > self.max_frame_size:
+            raise FrameTooLargeError(
+                f"Frame of {len(frame)} bytes exceeds max frame size {self.max_frame_size}"
+            )
+        self.writer.write(frame + b"\n")
+        self.frames_written += 1
+        self.bytes_written += len(frame) + 1
+        await self.writer.drain()
+
+    async def write_message(self, message: MCPMessage):
+        """Serialize and write a message"""
+        await self.write_frame(message.to_json().encode())
+
+    def close(self):
+        """Close the write side"""
+        try:
+            self.writer.close()
+        except Exception as e:
+            logger.debug(f"Error closing transport to {self.name}: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get transport statistics"""
+        return {
+            "frames_read": self.frames_read,
+            "frames_written": self.frames_written,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "oversized_frames": self.oversized_frames,
+            "invalid_frames": self.invalid_frames,
+            "max_frame_size": self.max_frame_size
+        }
+
+
+async def drain_stderr(stream: asyncio.StreamReader, name: str,
+                       level: int = logging.INFO):
+    """
+    Forward a child process's stderr to the logger until it closes.
+
+    Output is read in chunks of STDERR_LINE_LIMIT bytes; lines longer than
+    that are logged in pieces rather than buffered whole.
+
+    Args:
+        stream: The child's stderr stream
+        name: Server name, used as the child logger suffix
+        level: Level the lines are logged at
+    """
+    stderr_logger = logger.getChild(f"stderr.{name}")
+
+    def log(line: bytes):
+        for start in range(0, len(line), STDERR_LINE_LIMIT):
+            text = line[start:start + STDERR_LINE_LIMIT].decode("utf-8", errors="replace").rstrip()
+            if text:
+                stderr_logger.log(level, text)
+
+    pending = b""
+    try:
+        while True:
+            chunk = await stream.read(STDERR_LINE_LIMIT)
+            if not chunk:
+                break
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                log(line)
+            if len(pending) >= STDERR_LINE_LIMIT:
+                log(pending)
+                pending = b""
+        log(pending)
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        logger.debug(f"stderr drain for {name} ended: {e}")
+
+
+class _BlockingStdoutWriter:
+    """
+    StreamWriter stand-in for a stdout that can't be attached to the loop
+    (a regular file, or a platform without pipe support). Writes are
+    buffered and flushed on a worker thread by drain().
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._buffer = []
+        self._lock = threading.Lock()
+
+    def write(self, data: bytes):
+        self._buffer.append(data)
+
+    def _flush(self):
+        with self._lock:
+            data, self._buffer = b"".join(self._buffer), []
+            if data:
+                self._stream.write(data)
+                self._stream.flush()
+
+    async def drain(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._flush)
+
+    def close(self):
+        self._flush()
+
+
+def _feed_from_thread(stream, reader: asyncio.StreamReader, loop: asyncio.AbstractEventLoop):
+    """Feed a StreamReader from a blocking stream on a daemon thread"""
+
+    def pump():
+        try:
+            while True:
+                data = stream.read1(65536) if hasattr(stream, "read1") else stream.read(65536)
+                if not data:
+                    break
+                loop.call_soon_threadsafe(reader.feed_data, data)
+        except (OSError, ValueError) as e:
+            logger.debug(f"stdin reader thread ended: {e}")
+        finally:
+            loop.call_soon_threadsafe(reader.feed_eof)
+
+    threading.Thread(target=pump, name="mcp-stdin", daemon=True).start()
+
+
+async def open_stdio_transport(max_frame_size: int = DEFAULT_MAX_FRAME_SIZE) -> StdioTransport:
+    """
+    Attach this process's stdin/stdout to the event loop.
+
+    Pipes, sockets and terminals are registered with the loop directly;
+    anything else (e.g. stdin redirected from a file) falls back to a
+    reader thread and executor-flushed writes.
+
+    Args:
+        max_frame_size: Largest frame accepted or sent, in bytes
+
+    Returns:
+        Transport for serving requests over stdio
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=max_frame_size)
+
+    try:
+        protocol = asyncio.StreamReaderProtocol(reader)
+        await loop.connect_read_pipe(lambda: protocol, sys.stdin.buffer)
+    except (ValueError, OSError, NotImplementedError) as e:
+        logger.debug(f"stdin can't be attached to the loop ({e}), using a reader thread")
+        _feed_from_thread(sys.stdin.buffer, reader, loop)
+
+    try:
+        write_transport, write_protocol = await loop.connect_write_pipe(
+            asyncio.streams.FlowControlMixin, sys.stdout.buffer
+        )
+        writer = asyncio.StreamWriter(write_transport, write_protocol, None, loop)
+    except (ValueError, OSError, NotImplementedError) as e:
+        logger.debug(f"stdout can't be attached to the loop ({e}), using blocking writes")
+        writer = _BlockingStdoutWriter(sys.stdout.buffer)
+
+    return StdioTransport(reader, writer, max_frame_size=max_frame_size, name="stdin")
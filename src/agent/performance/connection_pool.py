@@ -13,8 +13,9 @@ Phase: 4.6 - Performance Optimization
 import asyncio
 import logging
 import time
-from typing import Dict, List, Optional, Any, Set
-from dataclasses import dataclass
+from collections import deque
+from typing import Deque, Dict, List, Optional, Any, Set, Union
+from dataclasses import dataclass, field
 from enum import Enum
 import weakref
 from pathlib import Path
@@ -27,6 +28,7 @@ sys.path.append(str(Path(__file__).parent.parent.parent))
 from ..context.context_manager import ContextManager
 from ...mcp_client.client_manager import MCPClientManager, ClientType
 from ...mcp_client.base_client import BaseMCPClient
+from ...mcp_client.exceptions import ConnectionError as MCPConnectionError
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +44,13 @@ class ConnectionState(Enum):
 
 @dataclass
 class ConnectionInfo:
-    """Information about a pooled connection"""
+    """
+    Information about a pooled connection.
+    
+    One pooled connection is a single initialized client whose underlying
+    MCPConnection multiplexes requests by id, so it is leased to up to
+    ``PoolConfig.max_concurrent_per_connection`` callers at once.
+    """
     client: BaseMCPClient
     client_type: ClientType
     state: ConnectionState
@@ -51,6 +59,7 @@ class ConnectionInfo:
     use_count: int
     error_count: int
     connection_id: str
+    in_flight: int = 0
     
     def __post_init__(self):
         if self.created_at == 0:
@@ -64,6 +73,7 @@ class PoolConfig:
     """Connection pool configuration"""
     max_connections_per_type: int = 5
     min_connections_per_type: int = 1
+    max_concurrent_per_connection: int = 8  # leases sharing one connection
     connection_timeout: float = 30.0
     idle_timeout: float = 300.0  # 5 minutes
     max_retries: int = 3
@@ -71,6 +81,18 @@ class PoolConfig:
     health_check_interval: float = 60.0  # 1 minute
     enable_prewarming: bool = True
     cleanup_interval: float = 30.0  # 30 seconds
+    latency_samples: int = 1024  # acquire latencies kept per type
+
+
+@dataclass
+class TypePool:
+    """Connections and FIFO wait queue for one client type"""
+    connections: List[ConnectionInfo] = field(default_factory=list)
+    waiters: Deque[asyncio.Future] = field(default_factory=deque)
+    creating: int = 0
+    acquire_latencies: Deque[float] = field(default_factory=deque)
+    waits: int = 0
+    timeouts: int = 0
 
 
 class MCPConnectionPool:
@@ -79,6 +101,9 @@ class MCPConnectionPool:
     
     Features:
     - Connection reuse and pooling
+    - Multiplexed connections shared by several concurrent leases
+    - FIFO handoff to waiting callers, no polling
+    - Tool discovery cached once per server
     - Automatic connection health monitoring
     - Graceful connection recovery
     - Load balancing across connections
@@ -88,7 +113,7 @@ class MCPConnectionPool:
     
     def __init__(self, config: PoolConfig = None):
         self.config = config or PoolConfig()
-        self.pools: Dict[ClientType, List[ConnectionInfo]] = {}
+        self.pools: Dict[ClientType, TypePool] = {}
         self.active_connections: Dict[str, ConnectionInfo] = {}
         self.connection_counter = 0
         self.stats = {
@@ -100,15 +125,20 @@ class MCPConnectionPool:
             "errors": 0
         }
         
+        # tools/list results keyed by server URL, shared by every pooled client
+        self.tool_cache: Dict[str, List[Dict[str, Any]]] = {}
+        
         # Initialize pools for each client type
         for client_type in ClientType:
-            self.pools[client_type] = []
+            self.pools[client_type] = TypePool(
+                acquire_latencies=deque(maxlen=self.config.latency_samples)
+            )
         
         # Background tasks
         self._cleanup_task = None
         self._health_check_task = None
         self._running = False
-        
+    
     async def initialize(self, client_manager: MCPClientManager):
         """Initialize connection pool"""
         logger.info("Initializing MCP connection pool...")
@@ -124,61 +154,68 @@ class MCPConnectionPool:
         if self.config.enable_prewarming:
             await self._prewarm_connections()
         
-        logger.info(f"Connection pool initialized with {sum(len(pool) for pool in self.pools.values())} connections")
+        logger.info(f"Connection pool initialized with {self._connection_count()} connections")
     
-    async def get_connection(self, client_type: ClientType) -> Optional[ConnectionInfo]:
-        """Get a connection from the pool"""
+    async def get_connection(self, client_type: Union[ClientType, str]) -> Optional[ConnectionInfo]:
+        """
+        Lease a connection from the pool.
+        
+        Leases go to the least loaded connection with spare capacity, then to
+        a newly created connection while under the limit; otherwise the caller
+        queues and is handed the next released lease in arrival order.
+        """
         try:
-            # Try to get an idle connection from pool
-            pool = self.pools.get(client_type, [])
-            
-            for conn_info in pool:
-                if conn_info.state == ConnectionState.IDLE:
-                    # Mark as active
-                    conn_info.state = ConnectionState.ACTIVE
-                    conn_info.last_used = time.time()
-                    conn_info.use_count += 1
-                    
-                    self.active_connections[conn_info.connection_id] = conn_info
+            client_type = ClientType(client_type)
+        except ValueError:
+            logger.error(f"Unknown client type: {client_type}")
+            self.stats["errors"] += 1
+            return None
+        
+        pool = self.pools[client_type]
+        start = time.perf_counter()
+        try:
+            # Callers already queued are served first
+            if not pool.waiters:
+                conn_info = self._least_loaded(pool)
+                if conn_info:
+                    self._lease(conn_info)
                     self.stats["pool_hits"] += 1
-                    
                     logger.debug(f"Reusing connection {conn_info.connection_id} for {client_type.value}")
                     return conn_info
+                
+                # No spare capacity, create new connection if under limit
+                if self._can_grow(pool):
+                    conn_info = await self._create_connection(client_type)
+                    if conn_info:
+                        self.stats["pool_misses"] += 1
+                        return conn_info
             
-            # No idle connection available, create new one if under limit
-            if len(pool) < self.config.max_connections_per_type:
-                conn_info = await self._create_connection(client_type)
-                if conn_info:
-                    self.stats["pool_misses"] += 1
-                    return conn_info
-            
-            # Pool is full, wait for connection to become available
-            logger.warning(f"Connection pool full for {client_type.value}, waiting...")
+            # Pool is saturated, wait for a lease to be handed over
+            logger.debug(f"Connection pool saturated for {client_type.value}, waiting...")
             return await self._wait_for_connection(client_type)
-            
+        
         except Exception as e:
             logger.error(f"Error getting connection for {client_type.value}: {e}")
             self.stats["errors"] += 1
             return None
+        finally:
+            pool.acquire_latencies.append(time.perf_counter() - start)
     
     async def return_connection(self, connection_id: str):
-        """Return a connection to the pool"""
+        """Return a lease to the pool"""
         try:
-            conn_info = self.active_connections.pop(connection_id, None)
+            conn_info = self.active_connections.get(connection_id)
             if not conn_info:
                 logger.warning(f"Connection {connection_id} not found in active connections")
                 return
             
-            # Mark as idle
-            conn_info.state = ConnectionState.IDLE
-            conn_info.last_used = time.time()
-            
+            self._release(conn_info)
             logger.debug(f"Returned connection {connection_id} to pool")
-            
+        
         except Exception as e:
             logger.error(f"Error returning connection {connection_id}: {e}")
     
-    async def execute_with_pool(self, client_type: ClientType, 
+    async def execute_with_pool(self, client_type: Union[ClientType, str],
                               tool_name: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
         """Execute a tool using a pooled connection"""
         conn_info = await self.get_connection(client_type)
@@ -186,15 +223,12 @@ class MCPConnectionPool:
         if not conn_info:
             return {
                 "success": False,
-                "error": f"No connection available for {client_type.value}"
+                "error": f"No connection available for {getattr(client_type, 'value', client_type)}"
             }
         
         try:
             # Execute tool using the connection
-            result = await conn_info.client.call_tool(tool_name, parameters)
-            
-            # Return connection to pool
-            await self.return_connection(conn_info.connection_id)
+            result = await conn_info.client.execute_tool(tool_name, parameters)
             
             return {
                 "success": True,
@@ -202,9 +236,9 @@ class MCPConnectionPool:
                 "connection_id": conn_info.connection_id,
                 "use_count": conn_info.use_count
             }
-            
+        
         except Exception as e:
-            logger.error(f"Error executing tool {tool_name} on {client_type.value}: {e}")
+            logger.error(f"Error executing tool {tool_name} on {conn_info.client_type.value}: {e}")
             
             # Handle connection error
             await self._handle_connection_error(conn_info, e)
@@ -214,9 +248,90 @@ class MCPConnectionPool:
                 "error": str(e),
                 "connection_id": conn_info.connection_id
             }
+        
+        finally:
+            # Return lease to pool
+            await self.return_connection(conn_info.connection_id)
+    
+    def _connection_count(self) -> int:
+        """Total pooled connections across all types"""
+        return sum(len(pool.connections) for pool in self.pools.values())
+    
+    def _can_grow(self, pool: TypePool) -> bool:
+        """Whether another connection may be created for this type"""
+        return len(pool.connections) + pool.creating < self.config.max_connections_per_type
+    
+    def _least_loaded(self, pool: TypePool) -> Optional[ConnectionInfo]:
+        """Healthy connection with the fewest leases and spare capacity"""
+        best = None
+        for conn_info in pool.connections:
+            if conn_info.state not in (ConnectionState.IDLE, ConnectionState.ACTIVE):
+                continue
+            if conn_info.in_flight >= self.config.max_concurrent_per_connection:
+                continue
+            if best is None or conn_info.in_flight < best.in_flight:
+                best = conn_info
+        return best
+    
+    def _lease(self, conn_info: ConnectionInfo):
+        """Hand one lease of a connection to a caller"""
+        if conn_info.in_flight == 0:
+            self.active_connections[conn_info.connection_id] = conn_info
+            self.stats["active_connections"] += 1
+        conn_info.in_flight += 1
+        conn_info.state = ConnectionState.ACTIVE
+        conn_info.last_used = time.time()
+        conn_info.use_count += 1
+    
+    def _release(self, conn_info: ConnectionInfo):
+        """Take back one lease and pass spare capacity to waiters"""
+        conn_info.in_flight = max(0, conn_info.in_flight - 1)
+        conn_info.last_used = time.time()
+        if conn_info.in_flight == 0:
+            # Already gone if the connection was removed while leased
+            if self.active_connections.pop(conn_info.connection_id, None):
+                self.stats["active_connections"] -= 1
+            if conn_info.state == ConnectionState.ACTIVE:
+                conn_info.state = ConnectionState.IDLE
+        
+        self._dispatch(conn_info.client_type)
+    
+    def _dispatch(self, client_type: ClientType):
+        """Hand spare capacity to queued callers in FIFO order"""
+        pool = self.pools.get(client_type)
+        if pool is None:
+            # Pool already shut down
+            return
+        while pool.waiters:
+            waiter = pool.waiters[0]
+            if waiter.done():
+                # Timed out or cancelled while queued
+                pool.waiters.popleft()
+                continue
+            
+            conn_info = self._least_loaded(pool)
+            if conn_info is None:
+                if self._running and self._can_grow(pool):
+                    asyncio.create_task(self._grow(client_type))
+                return
+            
+            pool.waiters.popleft()
+            self._lease(conn_info)
+            self.stats["pool_hits"] += 1
+            waiter.set_result(conn_info)
+    
+    async def _grow(self, client_type: ClientType):
+        """Add a connection for queued callers"""
+        conn_info = await self._create_connection(client_type, leased=False)
+        if conn_info:
+            self.stats["pool_misses"] += 1
+            self._dispatch(client_type)
     
-    async def _create_connection(self, client_type: ClientType) -> Optional[ConnectionInfo]:
-        """Create a new connection"""
+    async def _create_connection(self, client_type: ClientType,
+                                 leased: bool = True) -> Optional[ConnectionInfo]:
+        """Create a new connection, leased to the caller unless leased=False"""
+        pool = self.pools[client_type]
+        pool.creating += 1
         try:
             # Get client info from manager
             client_info = self.client_manager.available_clients.get(client_type)
@@ -227,28 +342,27 @@ class MCPConnectionPool:
             # Create new client instance
             client = client_info.client_class()
             
-            # Initialize client
-            if await client.initialize():
+            # Initialize client, reusing tool discovery from earlier connections
+            if await client.initialize(tool_cache=self.tool_cache):
                 self.connection_counter += 1
                 connection_id = f"{client_type.value}_{self.connection_counter}"
                 
                 conn_info = ConnectionInfo(
                     client=client,
                     client_type=client_type,
-                    state=ConnectionState.ACTIVE,
+                    state=ConnectionState.IDLE,
                     created_at=time.time(),
                     last_used=time.time(),
-                    use_count=1,
+                    use_count=0,
                     error_count=0,
                     connection_id=connection_id
                 )
                 
                 # Add to pool
-                self.pools[client_type].append(conn_info)
-                self.active_connections[connection_id] = conn_info
-                
+                pool.connections.append(conn_info)
                 self.stats["total_connections"] += 1
-                self.stats["active_connections"] += 1
+                if leased:
+                    self._lease(conn_info)
                 
                 logger.debug(f"Created new connection {connection_id} for {client_type.value}")
                 return conn_info
@@ -256,35 +370,61 @@ class MCPConnectionPool:
             else:
                 logger.error(f"Failed to initialize connection for {client_type.value}")
                 return None
-                
+        
         except Exception as e:
             logger.error(f"Error creating connection for {client_type.value}: {e}")
             return None
+        finally:
+            pool.creating -= 1
     
     async def _wait_for_connection(self, client_type: ClientType) -> Optional[ConnectionInfo]:
-        """Wait for a connection to become available"""
-        start_time = time.time()
+        """Queue for a lease and wait until one is handed over"""
+        pool = self.pools[client_type]
+        waiter = asyncio.get_running_loop().create_future()
+        pool.waiters.append(waiter)
+        pool.waits += 1
         
-        while time.time() - start_time < self.config.connection_timeout:
-            # Check if any connections became idle
-            pool = self.pools.get(client_type, [])
-            for conn_info in pool:
-                if conn_info.state == ConnectionState.IDLE:
-                    return await self.get_connection(client_type)
-            
-            # Wait a bit before checking again
-            await asyncio.sleep(0.1)
+        # Capacity may already be free (e.g. an earlier waiter gave up)
+        self._dispatch(client_type)
         
-        logger.error(f"Timeout waiting for connection to {client_type.value}")
-        return None
+        try:
+            return await asyncio.wait_for(asyncio.shield(waiter), self.config.connection_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed over just as the timeout fired
+                return waiter.result()
+            pool.timeouts += 1
+            logger.error(f"Timeout waiting for connection to {client_type.value}")
+            return None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Caller went away after a lease was handed over; pass it on
+                self._release(waiter.result())
+            raise
+        finally:
+            if not waiter.done():
+                waiter.cancel()
+    
+    def _is_connection_failure(self, conn_info: ConnectionInfo, error: Exception) -> bool:
+        """Whether an error means the connection itself is unusable"""
+        if isinstance(error, MCPConnectionError):
+            return True
+        connections = getattr(conn_info.client, "_connections", {})
+        return bool(connections) and not any(c.is_connected for c in connections.values())
     
     async def _handle_connection_error(self, conn_info: ConnectionInfo, error: Exception):
         """Handle connection error"""
         conn_info.error_count += 1
-        conn_info.state = ConnectionState.ERROR
+        self.stats["errors"] += 1
         
-        # Remove from active connections
-        self.active_connections.pop(conn_info.connection_id, None)
+        # A failing tool call on a healthy connection doesn't take the
+        # connection (and every lease sharing it) out of service
+        if not self._is_connection_failure(conn_info, error):
+            return
+        
+        if conn_info.state in (ConnectionState.RECONNECTING, ConnectionState.CLOSED):
+            return
+        conn_info.state = ConnectionState.ERROR
         
         logger.error(f"Connection {conn_info.connection_id} error: {error}")
         
@@ -303,31 +443,43 @@ class MCPConnectionPool:
             # Wait before reconnecting
             await asyncio.sleep(self.config.retry_delay * conn_info.error_count)
             
-            # Try to reconnect
-            if await conn_info.client.initialize():
-                conn_info.state = ConnectionState.IDLE
+            # Try to reconnect; the restarted server's tools are discovered again
+            self._invalidate_tool_cache(conn_info)
+            if await conn_info.client.initialize(tool_cache=self.tool_cache):
+                conn_info.state = ConnectionState.ACTIVE if conn_info.in_flight else ConnectionState.IDLE
                 conn_info.error_count = 0
                 conn_info.last_used = time.time()
                 
                 self.stats["reconnections"] += 1
                 logger.info(f"Reconnected connection {conn_info.connection_id}")
+                self._dispatch(conn_info.client_type)
             else:
                 await self._remove_connection(conn_info)
-                
+        
         except Exception as e:
             logger.error(f"Failed to reconnect {conn_info.connection_id}: {e}")
             await self._remove_connection(conn_info)
     
+    def _invalidate_tool_cache(self, conn_info: ConnectionInfo):
+        """Forget cached tool lists of the servers a connection's client talks to"""
+        client_config = getattr(conn_info.client, "config", None)
+        for server in getattr(client_config, "servers", None) or []:
+            self.tool_cache.pop(getattr(server, "url", None), None)
+    
     async def _remove_connection(self, conn_info: ConnectionInfo):
         """Remove a connection from the pool"""
         try:
+            self._invalidate_tool_cache(conn_info)
+            
             # Remove from pool
-            pool = self.pools.get(conn_info.client_type, [])
-            if conn_info in pool:
-                pool.remove(conn_info)
+            pool = self.pools[conn_info.client_type]
+            if conn_info in pool.connections:
+                pool.connections.remove(conn_info)
+                self.stats["total_connections"] -= 1
             
             # Remove from active connections
-            self.active_connections.pop(conn_info.connection_id, None)
+            if self.active_connections.pop(conn_info.connection_id, None):
+                self.stats["active_connections"] -= 1
             
             # Shutdown client
             try:
@@ -336,13 +488,11 @@ class MCPConnectionPool:
                 pass
             
             conn_info.state = ConnectionState.CLOSED
-            
-            self.stats["total_connections"] -= 1
-            if conn_info.connection_id in self.active_connections:
-                self.stats["active_connections"] -= 1
-            
             logger.debug(f"Removed connection {conn_info.connection_id}")
             
+            # Queued callers may now get a replacement connection
+            self._dispatch(conn_info.client_type)
+        
         except Exception as e:
             logger.error(f"Error removing connection {conn_info.connection_id}: {e}")
     
@@ -352,14 +502,9 @@ class MCPConnectionPool:
         
         for client_type in ClientType:
             for _ in range(self.config.min_connections_per_type):
-                conn_info = await self._create_connection(client_type)
-                if conn_info:
-                    # Mark as idle immediately
-                    conn_info.state = ConnectionState.IDLE
-                    self.active_connections.pop(conn_info.connection_id, None)
-                    self.stats["active_connections"] -= 1
+                await self._create_connection(client_type, leased=False)
         
-        logger.info(f"Prewarmed {sum(len(pool) for pool in self.pools.values())} connections")
+        logger.info(f"Prewarmed {self._connection_count()} connections")
     
     async def _cleanup_loop(self):
         """Background task to clean up stale connections"""
@@ -379,15 +524,15 @@ class MCPConnectionPool:
         for client_type, pool in self.pools.items():
             connections_to_remove = []
             
-            for conn_info in pool:
+            for conn_info in pool.connections:
                 # Check if connection is stale
-                if (conn_info.state == ConnectionState.IDLE and 
+                if (conn_info.state == ConnectionState.IDLE and
                     current_time - conn_info.last_used > self.config.idle_timeout):
                     connections_to_remove.append(conn_info)
             
             # Remove stale connections
             for conn_info in connections_to_remove:
-                if len(pool) > self.config.min_connections_per_type:
+                if len(pool.connections) > self.config.min_connections_per_type:
                     await self._remove_connection(conn_info)
     
     async def _health_check_loop(self):
@@ -404,7 +549,7 @@ class MCPConnectionPool:
     async def _health_check_connections(self):
         """Perform health checks on all connections"""
         for client_type, pool in self.pools.items():
-            for conn_info in pool:
+            for conn_info in list(pool.connections):
                 if conn_info.state == ConnectionState.IDLE:
                     try:
                         # Simple health check - try to get tools
@@ -415,27 +560,55 @@ class MCPConnectionPool:
                             )
                     except Exception as e:
                         logger.warning(f"Health check failed for {conn_info.connection_id}: {e}")
-                        await self._handle_connection_error(conn_info, e)
+                        await self._handle_connection_error(conn_info, MCPConnectionError(str(e)))
+    
+    @staticmethod
+    def _latency_summary(samples: Deque[float]) -> Dict[str, float]:
+        """Acquire latency percentiles in milliseconds"""
+        if not samples:
+            return {"samples": 0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+        
+        ordered = sorted(samples)
+        count = len(ordered)
+        
+        def percentile(p: float) -> float:
+            return round(ordered[min(count - 1, int(count * p))] * 1000, 3)
+        
+        return {
+            "samples": count,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3)
+        }
     
     def get_pool_stats(self) -> Dict[str, Any]:
         """Get connection pool statistics"""
         pool_stats = {}
         
         for client_type, pool in self.pools.items():
+            connections = pool.connections
             pool_stats[client_type.value] = {
-                "total_connections": len(pool),
-                "idle_connections": len([c for c in pool if c.state == ConnectionState.IDLE]),
-                "active_connections": len([c for c in pool if c.state == ConnectionState.ACTIVE]),
-                "error_connections": len([c for c in pool if c.state == ConnectionState.ERROR]),
-                "reconnecting_connections": len([c for c in pool if c.state == ConnectionState.RECONNECTING])
+                "total_connections": len(connections),
+                "idle_connections": len([c for c in connections if c.state == ConnectionState.IDLE]),
+                "active_connections": len([c for c in connections if c.state == ConnectionState.ACTIVE]),
+                "error_connections": len([c for c in connections if c.state == ConnectionState.ERROR]),
+                "reconnecting_connections": len([c for c in connections if c.state == ConnectionState.RECONNECTING]),
+                "leases_in_flight": sum(c.in_flight for c in connections),
+                "waiting": len([w for w in pool.waiters if not w.done()]),
+                "waits": pool.waits,
+                "wait_timeouts": pool.timeouts,
+                "acquire_latency": self._latency_summary(pool.acquire_latencies)
             }
         
         return {
             "global_stats": self.stats,
             "pool_stats": pool_stats,
+            "tool_cache_servers": len(self.tool_cache),
             "config": {
                 "max_connections_per_type": self.config.max_connections_per_type,
                 "min_connections_per_type": self.config.min_connections_per_type,
+                "max_concurrent_per_connection": self.config.max_concurrent_per_connection,
                 "connection_timeout": self.config.connection_timeout,
                 "idle_timeout": self.config.idle_timeout
             }
@@ -453,9 +626,14 @@ class MCPConnectionPool:
         if self._health_check_task:
             self._health_check_task.cancel()
         
-        # Close all connections
+        # Close all connections and wake queued callers
         for client_type, pool in self.pools.items():
-            for conn_info in pool:
+            for waiter in pool.waiters:
+                if not waiter.done():
+                    waiter.cancel()
+            pool.waiters.clear()
+            
+            for conn_info in pool.connections:
                 try:
                     await conn_info.client.shutdown()
                 except:
@@ -465,4 +643,4 @@ class MCPConnectionPool:
         self.pools.clear()
         self.active_connections.clear()
         
-        logger.info("Connection pool shutdown complete")
\ No newline at end of file
+        logger.info("Connection pool shutdown complete")
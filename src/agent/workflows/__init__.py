@@ -8,20 +8,35 @@ Date: 2025-07-13
 Session: 2.2
 """
 
-from .workflow_engine import WorkflowEngine, WorkflowStatus
+from .workflow_engine import WorkflowEngine, WorkflowEngineConfig, WorkflowStatus
+from .step_scheduler import StepScheduler, SchedulingPolicy, WorkflowPlan
+from .workflow_journal import WorkflowJournal
+from .workflow_profiler import WorkflowProfile, SpanKind
+from .output_store import OutputStore, OutputRef
 from .workflow_parser import WorkflowParser, WorkflowDefinition
 from .step_executor import StepExecutor, StepType, StepResult
+from .step_hedging import HedgingConfig
 from .condition_evaluator import ConditionEvaluator
 from .workflow_templates import WorkflowTemplates
 
 __all__ = [
     'WorkflowEngine',
+    'WorkflowEngineConfig',
     'WorkflowStatus', 
+    'StepScheduler',
+    'SchedulingPolicy',
+    'WorkflowPlan',
+    'WorkflowJournal',
+    'WorkflowProfile',
+    'SpanKind',
+    'OutputStore',
+    'OutputRef',
     'WorkflowParser',
     'WorkflowDefinition',
     'StepExecutor',
     'StepType',
     'StepResult',
+    'HedgingConfig',
     'ConditionEvaluator',
     'WorkflowTemplates'
 ]
\ No newline at end of file
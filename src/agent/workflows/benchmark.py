@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Workflow Benchmarks
+
+schedule: runs random DAG workflows of wait steps with heavy-tailed
+durations and compares the makespan of the previous level-by-level
+execution (every step of a level must finish before the next level starts)
+with the dataflow scheduler, in declaration order and critical-path-first,
+under the same step concurrency budget.
+
+conditions: evaluations per second of typical step conditions, parsed on
+every evaluation versus compiled once and cached.
+
+hedge: workflows of one idempotent MCP step against a simulated backend
+where a small fraction of calls are much slower; step latency percentiles
+from the workflow profiles, with and without hedged requests.
+
+Usage:
+    python -m src.agent.workflows.benchmark schedule --steps 200 --budget 8
+    python -m src.agent.workflows.benchmark schedule --runs 10 --scale-ms 2
+    python -m src.agent.workflows.benchmark conditions --seconds 2
+    python -m src.agent.workflows.benchmark hedge --workflows 1000 --slow-fraction 0.02
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+from .condition_evaluator import compile_condition, compile_expression
+from .dependency_manager import Dependency, DependencyManager, DependencyType
+from .step_executor import StepType
+from .step_hedging import HedgingConfig
+from .step_scheduler import SchedulingPolicy
+from .workflow_profiler import SpanKind
+from .workflow_engine import WorkflowDefinition, WorkflowEngine, WorkflowEngineConfig, WorkflowStep
+
+
+def random_dag(steps: int, max_dependencies: int, window: int, scale: float,
+               alpha: float, rng: random.Random) -> WorkflowDefinition:
+    """
+    A layered-ish random DAG: each step depends on up to `max_dependencies`
+    of the `window` steps declared before it. Durations are Pareto
+    distributed (a few steps are much slower than the rest).
+    """
+    workflow_steps = []
+    for index in range(steps):
+        candidates = list(range(max(0, index - window), index))
+        count = min(len(candidates), rng.randint(0, max_dependencies))
+        duration = min(rng.paretovariate(alpha), 50.0) * scale
+        workflow_steps.append(WorkflowStep(
+            id=f"s{index}",
+            name=f"Step {index}",
+            step_type=StepType.WAIT,
+            action="wait",
+            parameters={"duration": duration},
+            dependencies=[f"s{dep}" for dep in rng.sample(candidates, count)],
+            retry_count=0,
+            estimated_duration=duration
+        ))
+    return WorkflowDefinition(id="bench", name="bench", description="", steps=workflow_steps)
+
+
+async def run_levels(engine: WorkflowEngine, workflow: WorkflowDefinition, budget: int) -> float:
+    """The previous execution model: one level at a time, a barrier between levels"""
+    manager = DependencyManager()
+    for step in workflow.steps:
+        manager.add_step(step.id, [Dependency(step_id=dep, dependency_type=DependencyType.SUCCESS)
+                                   for dep in step.dependencies])
+    steps_by_id = {step.id: step for step in workflow.steps}
+    semaphore = asyncio.Semaphore(budget)
+
+    async def run(step: WorkflowStep):
+        async with semaphore:
+            await engine._execute_step_with_recovery(step, workflow)
+
+    started = time.perf_counter()
+    for step_ids in manager.calculate_execution_order():
+        await asyncio.gather(*(run(steps_by_id[step_id]) for step_id in step_ids))
+    return time.perf_counter() - started
+
+
+async def run_dataflow(workflow: WorkflowDefinition, budget: int, policy: SchedulingPolicy) -> float:
+    engine = WorkflowEngine(config=WorkflowEngineConfig(max_concurrent_steps=budget, scheduling_policy=policy))
+    started = time.perf_counter()
+    await engine.execute_workflow(workflow)
+    return time.perf_counter() - started
+
+
+async def bench_schedule(args):
+    rng = random.Random(args.seed)
+    scale = args.scale_ms / 1000
+    makespans: Dict[str, List[float]] = {"levels": [], "dataflow fifo": [], "dataflow critical path": []}
+
+    for _ in range(args.runs):
+        seed = rng.random()
+
+        def workflow() -> WorkflowDefinition:
+            return random_dag(args.steps, args.max_dependencies, args.window, scale, args.alpha, random.Random(seed))
+
+        makespans["levels"].append(await run_levels(WorkflowEngine(), workflow(), args.budget))
+        makespans["dataflow fifo"].append(await run_dataflow(workflow(), args.budget, SchedulingPolicy.FIFO))
+        makespans["dataflow critical path"].append(
+            await run_dataflow(workflow(), args.budget, SchedulingPolicy.CRITICAL_PATH)
+        )
+
+        # Lower bound: the critical path itself, or total work over the budget
+        reference = workflow()
+        durations = {step.id: step.estimated_duration for step in reference.steps}
+        longest: Dict[str, float] = {}
+        for step in reference.steps:
+            longest[step.id] = durations[step.id] + max((longest[dep] for dep in step.dependencies), default=0.0)
+        bound = max(max(longest.values()), sum(durations.values()) / args.budget)
+        makespans.setdefault("lower bound", []).append(bound)
+
+    baseline = statistics.fmean(makespans["levels"])
+    print(f"{args.steps} steps, budget {args.budget}, {args.runs} random DAGs")
+    for label, values in makespans.items():
+        mean = statistics.fmean(values)
+        print(f"{label:<24} makespan {mean * 1000:9.1f}ms  x{baseline / mean:5.2f}")
+
+
+CONDITIONS = [
+    "status == 'ok'",
+    "count > 10 and flag",
+    "score >= 0.5 or count < 3",
+    "contains(message, 'done')",
+    "flag",
+    "not flag",
+    "count * 2 > 15 and status != 'failed'",
+]
+
+
+def evaluations_per_second(evaluate, context: Dict, seconds: float) -> float:
+    evaluations = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        for condition in CONDITIONS:
+            evaluate(condition)(context)
+        evaluations += len(CONDITIONS)
+    return evaluations / (time.perf_counter() - started)
+
+
+def bench_conditions(args):
+    context = {"status": "ok", "count": 12, "flag": True, "score": 0.7, "message": "job done"}
+    # Without the cache every evaluation parses the condition again, as the
+    # evaluator used to
+    def parse_each_time(condition: str):
+        compile_condition.cache_clear()
+        compile_expression.cache_clear()
+        return compile_condition(condition)
+
+    before = evaluations_per_second(parse_each_time, context, args.seconds)
+    after = evaluations_per_second(compile_condition, context, args.seconds)
+    print(f"{len(CONDITIONS)} conditions, {args.seconds:.1f}s each")
+    print(f"{'parsed per evaluation':<24} {before:12,.0f} evals/s")
+    print(f"{'compiled and cached':<24} {after:12,.0f} evals/s  x{after / before:5.2f}")
+
+
+class SimulatedBackend:
+    """Stands in for the MCP manager: mostly fast calls, a few very slow ones"""
+
+    def __init__(self, latency: float, slow_fraction: float, slow_factor: float, rng: random.Random):
+        self.latency = latency
+        self.slow_fraction = slow_fraction
+        self.slow_factor = slow_factor
+        self.rng = rng
+        self.calls = 0
+
+    async def route_and_execute_task(self, task: str, parameters: Dict) -> Dict:
+        self.calls += 1
+        latency = self.latency * self.rng.uniform(0.8, 1.2)
+        if self.rng.random() < self.slow_fraction:
+            latency *= self.slow_factor
+        await asyncio.sleep(latency)
+        return {"result": "ok"}
+
+
+def percentile(values: List[float], quantile: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(quantile * len(ordered)))]
+
+
+async def run_hedge(args, hedging: bool) -> None:
+    backend = SimulatedBackend(args.latency_ms / 1000, args.slow_fraction, args.slow_factor,
+                               random.Random(args.seed))
+    engine = WorkflowEngine(
+        orchestrator=SimpleNamespace(mcp_manager=backend, ollama_client=None),
+        config=WorkflowEngineConfig(max_concurrent_workflows=args.concurrency,
+                                    hedging=HedgingConfig(enabled=hedging))
+    )
+
+    def workflow(index: int) -> WorkflowDefinition:
+        return WorkflowDefinition(id=f"w{index}", name="hedge", description="", steps=[WorkflowStep(
+            id="read", name="Read", step_type=StepType.MCP_TOOL, action="read_file",
+            parameters={"path": "/tmp/data"}, retry_count=0, idempotent=True
+        )])
+
+    workflows = [workflow(index) for index in range(args.workflows)]
+    await asyncio.gather(*(engine.execute_workflow(w) for w in workflows))
+
+    # Execution spans from the profiler, after the latency window has filled
+    latencies = [span.duration * 1000 for w in workflows[args.warmup:] for span in w.profile.spans
+                 if span.kind == SpanKind.EXECUTION]
+    stats = engine.step_executor.hedger.get_stats()
+    label = "hedged" if hedging else "not hedged"
+    print(f"{label:<12} p50 {percentile(latencies, 0.5):7.1f}ms  p95 {percentile(latencies, 0.95):7.1f}ms  "
+          f"p99 {percentile(latencies, 0.99):7.1f}ms  max {max(latencies):7.1f}ms  "
+          f"backend calls {backend.calls} (hedges {stats['hedges_launched']}, won {stats['hedges_won']}, "
+          f"denied {stats['hedges_denied']})")
+
+
+async def bench_hedge(args):
+    print(f"{args.workflows} workflows, {args.concurrency} at a time, {args.latency_ms}ms calls, "
+          f"{args.slow_fraction:.0%} x{args.slow_factor:g} slow")
+    await run_hedge(args, hedging=False)
+    await run_hedge(args, hedging=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Workflow benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    schedule = subparsers.add_parser("schedule", help="Scheduling makespan")
+    schedule.add_argument("--steps", type=int, default=120, help="Steps per workflow")
+    schedule.add_argument("--budget", type=int, default=8, help="Concurrent step budget")
+    schedule.add_argument("--runs", type=int, default=5, help="Random workflows")
+    schedule.add_argument("--max-dependencies", type=int, default=3, help="Dependencies per step")
+    schedule.add_argument("--window", type=int, default=20, help="How far back dependencies reach")
+    schedule.add_argument("--scale-ms", type=float, default=5.0, help="Minimum step duration")
+    schedule.add_argument("--alpha", type=float, default=1.5, help="Pareto shape (lower is more skewed)")
+    schedule.add_argument("--seed", type=int, default=1, help="Random seed")
+
+    conditions = subparsers.add_parser("conditions", help="Condition evaluation throughput")
+    conditions.add_argument("--seconds", type=float, default=1.0, help="Measurement time per variant")
+
+    hedge = subparsers.add_parser("hedge", help="Tail latency with hedged requests")
+    hedge.add_argument("--workflows", type=int, default=600, help="Workflows (one MCP step each)")
+    hedge.add_argument("--concurrency", type=int, default=20, help="Workflows at a time")
+    hedge.add_argument("--latency-ms", type=float, default=10.0, help="Typical call latency")
+    hedge.add_argument("--slow-fraction", type=float, default=0.03, help="Fraction of slow calls")
+    hedge.add_argument("--slow-factor", type=float, default=20.0, help="How much slower slow calls are")
+    hedge.add_argument("--warmup", type=int, default=50, help="Workflows left out of the percentiles")
+    hedge.add_argument("--seed", type=int, default=1, help="Random seed")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    if args.command == "schedule":
+        asyncio.run(bench_schedule(args))
+    elif args.command == "conditions":
+        bench_conditions(args)
+    else:
+        asyncio.run(bench_hedge(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -11,13 +11,331 @@ Session: 2.2
 import re
 import ast
 import operator
-from typing import Dict, Any, Union
+from functools import lru_cache
+from typing import Dict, Any, Callable, Mapping, Union
 import logging
 
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# A compiled condition: context -> result
+CompiledCondition = Callable[[Mapping[str, Any]], bool]
+
+COMPARISON_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge,
+    'in': operator.contains,
+    'not_in': lambda x, y: not operator.contains(y, x)
+}
+
+FUNCTION_PATTERN = re.compile(r'^(?:exists|not_exists|contains|starts_with|ends_with|is_number|'
+                              r'is_string|is_empty|matches)\(')
+FUNCTION_CALL = re.compile(r'^(\w+)\((.*)\)$')
+
+# Node types a safe expression may contain: no calls, attribute access,
+# comprehensions or lambdas
+EXPRESSION_BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul,
+    ast.Div: operator.truediv, ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod
+}
+EXPRESSION_UNARY_OPERATORS = {ast.Not: operator.not_, ast.USub: operator.neg, ast.UAdd: operator.pos}
+EXPRESSION_COMPARISONS = {
+    ast.Eq: operator.eq, ast.NotEq: operator.ne, ast.Lt: operator.lt, ast.LtE: operator.le,
+    ast.Gt: operator.gt, ast.GtE: operator.ge, ast.Is: operator.is_, ast.IsNot: operator.is_not,
+    ast.In: lambda x, y: x in y, ast.NotIn: lambda x, y: x not in y
+}
+
+
+def _false(context: Mapping[str, Any]) -> bool:
+    return False
+
+
+def _guarded(compiled: CompiledCondition, condition: str) -> CompiledCondition:
+    """A failing sub-condition counts as false, as a top-level one does"""
+    def evaluate(context: Mapping[str, Any]) -> bool:
+        try:
+            return compiled(context)
+        except Exception as e:
+            logger.error(f"Condition evaluation failed: {condition} - {e}")
+            return False
+    return evaluate
+
+
+def _literal(expr: str) -> Any:
+    """Value of an operand that isn't a context variable"""
+    # Quoted string
+    if (expr.startswith('"') and expr.endswith('"')) or (expr.startswith("'") and expr.endswith("'")):
+        return expr[1:-1]
+    
+    # Number
+    try:
+        if '.' in expr:
+            return float(expr)
+        else:
+            return int(expr)
+    except ValueError:
+        pass
+    
+    # Boolean / null
+    if expr.lower() == 'true':
+        return True
+    elif expr.lower() == 'false':
+        return False
+    elif expr.lower() == 'null' or expr.lower() == 'none':
+        return None
+    
+    # Anything else is a string
+    return expr
+
+
+def _coerce_types(left: Any, right: Any) -> tuple:
+    """Coerce types for comparison"""
+    # If both are already the same type, return as-is
+    if type(left) == type(right):
+        return left, right
+    
+    # Try to convert to numbers if possible
+    try:
+        if isinstance(left, str) and isinstance(right, (int, float)):
+            return float(left), right
+        elif isinstance(right, str) and isinstance(left, (int, float)):
+            return left, float(right)
+    except ValueError:
+        pass
+    
+    # Convert both to strings for string comparison
+    return str(left), str(right)
+
+
+def _compile_function(condition: str) -> CompiledCondition:
+    """exists(x), contains(x, 'text'), matches(x, 'pattern'), ..."""
+    match = FUNCTION_CALL.match(condition)
+    if not match:
+        return _false
+    
+    func_name, args_str = match.groups()
+    args = [arg.strip().strip('"\'') for arg in args_str.split(',') if arg.strip()]
+    
+    if func_name == 'exists':
+        if not args:
+            return _false
+        name = args[0]
+        return lambda context: name in context
+    
+    elif func_name == 'not_exists':
+        if not args:
+            return _false
+        name = args[0]
+        return lambda context: name not in context
+    
+    elif func_name == 'contains' and len(args) >= 2:
+        name, substring = args[0], args[1]
+        return lambda context: name in context and substring in str(context[name])
+    
+    elif func_name == 'starts_with' and len(args) >= 2:
+        name, prefix = args[0], args[1]
+        return lambda context: name in context and str(context[name]).startswith(prefix)
+    
+    elif func_name == 'ends_with' and len(args) >= 2:
+        name, suffix = args[0], args[1]
+        return lambda context: name in context and str(context[name]).endswith(suffix)
+    
+    elif func_name == 'is_number' and args:
+        name = args[0]
+        
+        def is_number(context: Mapping[str, Any]) -> bool:
+            if name not in context:
+                return False
+            try:
+                float(context[name])
+                return True
+            except (ValueError, TypeError):
+                return False
+        return is_number
+    
+    elif func_name == 'is_string' and args:
+        name = args[0]
+        return lambda context: name in context and isinstance(context[name], str)
+    
+    elif func_name == 'is_empty' and args:
+        name = args[0]
+        
+        def is_empty(context: Mapping[str, Any]) -> bool:
+            if name not in context:
+                return True
+            value = context[name]
+            return value is None or value == "" or (hasattr(value, '__len__') and len(value) == 0)
+        return is_empty
+    
+    elif func_name == 'matches' and len(args) >= 2:
+        name, pattern = args[0], re.compile(args[1])
+        return lambda context: name in context and bool(pattern.search(str(context[name])))
+    
+    return _false
+
+
+def _compile_comparison(condition: str, op_str: str, op_func) -> CompiledCondition:
+    """`left op right`, each side a context variable if present, else a literal"""
+    parts = condition.split(f' {op_str} ', 1)
+    if len(parts) != 2:
+        return _false
+    
+    left_expr, right_expr = parts[0].strip(), parts[1].strip()
+    left_literal, right_literal = _literal(left_expr), _literal(right_expr)
+    
+    def compare(context: Mapping[str, Any]) -> bool:
+        left_value = context[left_expr] if left_expr in context else left_literal
+        right_value = context[right_expr] if right_expr in context else right_literal
+        left_value, right_value = _coerce_types(left_value, right_value)
+        try:
+            return op_func(left_value, right_value)
+        except Exception as e:
+            logger.warning(f"Comparison failed: {left_value} {op_str} {right_value} - {e}")
+            return False
+    return compare
+
+
+def _compile_node(node: ast.AST) -> Callable[[Mapping[str, Any]], Any]:
+    """Closure evaluating one node of a safe expression"""
+    if isinstance(node, ast.Constant):
+        value = node.value
+        return lambda context: value
+    
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda context: context[name]
+    
+    if isinstance(node, ast.BoolOp):
+        operands = [_compile_node(value) for value in node.values]
+        if isinstance(node.op, ast.And):
+            def all_of(context):
+                result = True
+                for operand in operands:
+                    result = operand(context)
+                    if not result:
+                        return result
+                return result
+            return all_of
+        
+        def any_of(context):
+            result = False
+            for operand in operands:
+                result = operand(context)
+                if result:
+                    return result
+            return result
+        return any_of
+    
+    if isinstance(node, ast.UnaryOp) and type(node.op) in EXPRESSION_UNARY_OPERATORS:
+        op, operand = EXPRESSION_UNARY_OPERATORS[type(node.op)], _compile_node(node.operand)
+        return lambda context: op(operand(context))
+    
+    if isinstance(node, ast.BinOp) and type(node.op) in EXPRESSION_BINARY_OPERATORS:
+        op = EXPRESSION_BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda context: op(left(context), right(context))
+    
+    if isinstance(node, ast.Compare) and all(type(op) in EXPRESSION_COMPARISONS for op in node.ops):
+        left = _compile_node(node.left)
+        chain = [(EXPRESSION_COMPARISONS[type(op)], _compile_node(comparator))
+                 for op, comparator in zip(node.ops, node.comparators)]
+        
+        def compare(context):
+            current = left(context)
+            for op, comparator in chain:
+                value = comparator(context)
+                if not op(current, value):
+                    return False
+                current = value
+            return True
+        return compare
+    
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = _compile_node(node.test), _compile_node(node.body), _compile_node(node.orelse)
+        return lambda context: body(context) if test(context) else orelse(context)
+    
+    if isinstance(node, ast.Subscript) and not isinstance(node.slice, ast.Slice):
+        value, index = _compile_node(node.value), _compile_node(node.slice)
+        return lambda context: value(context)[index(context)]
+    
+    if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+        elements = [_compile_node(element) for element in node.elts]
+        build = {ast.List: list, ast.Tuple: tuple, ast.Set: set}[type(node)]
+        return lambda context: build(element(context) for element in elements)
+    
+    raise ValueError(f"Unsupported expression element: {type(node).__name__}")
+
+
+@lru_cache(maxsize=4096)
+def compile_expression(expression: str, strict: bool = False) -> CompiledCondition:
+    """
+    Compile a restricted Python expression into a closure.
+    
+    Only literals, variable names, arithmetic, comparisons, boolean logic,
+    conditional expressions and subscripts are allowed; anything else (calls,
+    attribute access, comprehensions, ...) compiles to a condition that is
+    always false.
+    
+    Args:
+        expression: Expression text
+        strict: Raise ValueError for invalid or forbidden expressions
+            instead of compiling them to false
+    """
+    try:
+        evaluate = _compile_node(ast.parse(expression.strip(), mode='eval').body)
+    except (SyntaxError, ValueError) as e:
+        if strict:
+            raise ValueError(f"Forbidden or invalid expression: {expression} - {e}")
+        logger.warning(f"Forbidden or invalid expression: {expression} - {e}")
+        return _false
+    return lambda context: bool(evaluate(context))
+
+
+@lru_cache(maxsize=4096)
+def compile_condition(condition: str) -> CompiledCondition:
+    """
+    Compile a condition string into a closure over the context.
+    
+    The condition is parsed once; evaluating the result only looks up the
+    variables it names. Results are cached by condition text.
+    """
+    condition = condition.strip()
+    
+    # Special functions
+    if FUNCTION_PATTERN.match(condition):
+        return _compile_function(condition)
+    
+    # Logical operations ('or' binds loosest)
+    if ' or ' in condition:
+        parts = [_guarded(compile_condition(part.strip()), part) for part in condition.split(' or ')]
+        return lambda context: any(part(context) for part in parts)
+    if ' and ' in condition:
+        parts = [_guarded(compile_condition(part.strip()), part) for part in condition.split(' and ')]
+        return lambda context: all(part(context) for part in parts)
+    
+    # Comparison operations
+    for op_str, op_func in COMPARISON_OPERATORS.items():
+        if f' {op_str} ' in condition:
+            return _compile_comparison(condition, op_str, op_func)
+    
+    # A variable (truthiness), a literal, or else a safe expression
+    lowered = condition.lower()
+    literal = lowered == 'true' if lowered in ['true', 'false'] else None
+    expression = compile_expression(condition) if literal is None else None
+    
+    def single(context: Mapping[str, Any]) -> bool:
+        if condition in context:
+            return bool(context[condition])
+        if literal is not None:
+            return literal
+        return expression(context)
+    return single
+
 
 class ConditionEvaluator:
     """
@@ -30,20 +348,13 @@ class ConditionEvaluator:
     - Pattern matching (contains, starts_with, ends_with)
     - Type checking (is_number, is_string, is_empty)
     - Safe Python expression evaluation
+    
+    Conditions are compiled once into closures and cached by their text.
     """
     
     def __init__(self):
         """Initialize condition evaluator"""
-        self.operators = {
-            '==': operator.eq,
-            '!=': operator.ne,
-            '<': operator.lt,
-            '>': operator.gt,
-            '<=': operator.le,
-            '>=': operator.ge,
-            'in': operator.contains,
-            'not_in': lambda x, y: not operator.contains(y, x)
-        }
+        self.operators = COMPARISON_OPERATORS
         
         self.logical_operators = {
             'and': operator.and_,
@@ -53,6 +364,10 @@ class ConditionEvaluator:
         
         logger.info("Condition evaluator initialized")
     
+    def compile(self, condition: str) -> CompiledCondition:
+        """Compiled form of a condition (cached)"""
+        return compile_condition(condition)
+    
     async def evaluate(self, condition: str, context: Dict[str, Any]) -> bool:
         """
         Evaluate a condition expression.
@@ -60,258 +375,19 @@ class ConditionEvaluator:
         Args:
             condition: Condition string to evaluate
             context: Variable context
-            
+        
         Returns:
             Boolean result of condition evaluation
         """
         try:
-            condition = condition.strip()
-            logger.debug(f"Evaluating condition: {condition}")
-            
-            # Handle special functions
-            if self._is_function_call(condition):
-                return await self._evaluate_function(condition, context)
-            
-            # Handle logical operations (and, or)
-            if ' and ' in condition or ' or ' in condition:
-                return await self._evaluate_logical_expression(condition, context)
-            
-            # Handle comparison operations
-            for op_str, op_func in self.operators.items():
-                if f' {op_str} ' in condition:
-                    return await self._evaluate_comparison(condition, op_str, op_func, context)
-            
-            # Handle single variable (truthiness check)
-            if condition in context:
-                return bool(context[condition])
-            
-            # Handle literal values
-            if condition.lower() in ['true', 'false']:
-                return condition.lower() == 'true'
-            
-            # Try safe Python evaluation as last resort
-            return await self._safe_eval(condition, context)
-            
+            return compile_condition(condition)(context)
         except Exception as e:
             logger.error(f"Condition evaluation failed: {condition} - {e}")
             return False
     
     def _is_function_call(self, condition: str) -> bool:
         """Check if condition is a function call"""
-        function_patterns = [
-            r'^exists\(',
-            r'^not_exists\(',
-            r'^contains\(',
-            r'^starts_with\(',
-            r'^ends_with\(',
-            r'^is_number\(',
-            r'^is_string\(',
-            r'^is_empty\(',
-            r'^matches\('
-        ]
-        
-        return any(re.match(pattern, condition) for pattern in function_patterns)
-    
-    async def _evaluate_function(self, condition: str, context: Dict[str, Any]) -> bool:
-        """Evaluate function-style conditions"""
-        # Extract function name and arguments
-        match = re.match(r'^(\w+)\((.*)\)$', condition)
-        if not match:
-            return False
-        
-        func_name, args_str = match.groups()
-        args = [arg.strip().strip('"\'') for arg in args_str.split(',') if arg.strip()]
-        
-        if func_name == 'exists':
-            return len(args) > 0 and args[0] in context
-        
-        elif func_name == 'not_exists':
-            return len(args) > 0 and args[0] not in context
-        
-        elif func_name == 'contains' and len(args) >= 2:
-            var_name, substring = args[0], args[1]
-            if var_name in context:
-                return substring in str(context[var_name])
-            return False
-        
-        elif func_name == 'starts_with' and len(args) >= 2:
-            var_name, prefix = args[0], args[1]
-            if var_name in context:
-                return str(context[var_name]).startswith(prefix)
-            return False
-        
-        elif func_name == 'ends_with' and len(args) >= 2:
-            var_name, suffix = args[0], args[1]
-            if var_name in context:
-                return str(context[var_name]).endswith(suffix)
-            return False
-        
-        elif func_name == 'is_number' and len(args) > 0:
-            var_name = args[0]
-            if var_name in context:
-                try:
-                    float(context[var_name])
-                    return True
-                except (ValueError, TypeError):
-                    return False
-            return False
-        
-        elif func_name == 'is_string' and len(args) > 0:
-            var_name = args[0]
-            if var_name in context:
-                return isinstance(context[var_name], str)
-            return False
-        
-        elif func_name == 'is_empty' and len(args) > 0:
-            var_name = args[0]
-            if var_name in context:
-                value = context[var_name]
-                return value is None or value == "" or (hasattr(value, '__len__') and len(value) == 0)
-            return True
-        
-        elif func_name == 'matches' and len(args) >= 2:
-            var_name, pattern = args[0], args[1]
-            if var_name in context:
-                return bool(re.search(pattern, str(context[var_name])))
-            return False
-        
-        return False
-    
-    async def _evaluate_logical_expression(self, condition: str, context: Dict[str, Any]) -> bool:
-        """Evaluate logical expressions with and/or"""
-        # Split on 'and' and 'or' while preserving operator precedence
-        # For simplicity, we'll process left to right (could be enhanced)
-        
-        if ' or ' in condition:
-            parts = condition.split(' or ')
-            for part in parts:
-                if await self.evaluate(part.strip(), context):
-                    return True
-            return False
-        
-        elif ' and ' in condition:
-            parts = condition.split(' and ')
-            for part in parts:
-                if not await self.evaluate(part.strip(), context):
-                    return False
-            return True
-        
-        return False
-    
-    async def _evaluate_comparison(self, condition: str, op_str: str, op_func, context: Dict[str, Any]) -> bool:
-        """Evaluate comparison operations"""
-        parts = condition.split(f' {op_str} ', 1)
-        if len(parts) != 2:
-            return False
-        
-        left_expr, right_expr = parts[0].strip(), parts[1].strip()
-        
-        # Get left value
-        left_value = await self._resolve_value(left_expr, context)
-        
-        # Get right value
-        right_value = await self._resolve_value(right_expr, context)
-        
-        # Type coercion for comparison
-        left_value, right_value = self._coerce_types(left_value, right_value)
-        
-        # Perform comparison
-        try:
-            if op_str == 'in':
-                return op_func(left_value, right_value)
-            elif op_str == 'not_in':
-                return op_func(left_value, right_value)
-            else:
-                return op_func(left_value, right_value)
-        except Exception as e:
-            logger.warning(f"Comparison failed: {left_value} {op_str} {right_value} - {e}")
-            return False
-    
-    async def _resolve_value(self, expr: str, context: Dict[str, Any]) -> Any:
-        """Resolve an expression to its value"""
-        expr = expr.strip()
-        
-        # Check if it's a variable
-        if expr in context:
-            return context[expr]
-        
-        # Check if it's a quoted string
-        if (expr.startswith('"') and expr.endswith('"')) or (expr.startswith("'") and expr.endswith("'")):
-            return expr[1:-1]
-        
-        # Check if it's a number
-        try:
-            if '.' in expr:
-                return float(expr)
-            else:
-                return int(expr)
-        except ValueError:
-            pass
-        
-        # Check if it's a boolean
-        if expr.lower() == 'true':
-            return True
-        elif expr.lower() == 'false':
-            return False
-        elif expr.lower() == 'null' or expr.lower() == 'none':
-            return None
-        
-        # Return as string if nothing else matches
-        return expr
-    
-    def _coerce_types(self, left: Any, right: Any) -> tuple:
-        """Coerce types for comparison"""
-        # If both are already the same type, return as-is
-        if type(left) == type(right):
-            return left, right
-        
-        # Try to convert to numbers if possible
-        try:
-            if isinstance(left, str) and isinstance(right, (int, float)):
-                return float(left), right
-            elif isinstance(right, str) and isinstance(left, (int, float)):
-                return left, float(right)
-        except ValueError:
-            pass
-        
-        # Convert both to strings for string comparison
-        return str(left), str(right)
-    
-    async def _safe_eval(self, expression: str, context: Dict[str, Any]) -> bool:
-        """Safely evaluate Python expressions"""
-        try:
-            # Create a restricted environment
-            safe_dict = {
-                '__builtins__': {},
-                'True': True,
-                'False': False,
-                'None': None
-            }
-            
-            # Add context variables
-            safe_dict.update(context)
-            
-            # Parse the expression to check for dangerous operations
-            tree = ast.parse(expression, mode='eval')
-            
-            # Check for forbidden node types
-            forbidden_nodes = (
-                ast.Import, ast.ImportFrom, ast.Call, ast.Attribute,
-                ast.Exec, ast.Global, ast.FunctionDef, ast.ClassDef
-            )
-            
-            for node in ast.walk(tree):
-                if isinstance(node, forbidden_nodes):
-                    logger.warning(f"Forbidden operation in expression: {expression}")
-                    return False
-            
-            # Evaluate the expression
-            result = eval(expression, safe_dict)
-            return bool(result)
-            
-        except Exception as e:
-            logger.warning(f"Safe eval failed: {expression} - {e}")
-            return False
+        return bool(FUNCTION_PATTERN.match(condition))
     
     def validate_condition_syntax(self, condition: str) -> tuple[bool, str]:
         """
@@ -344,6 +420,6 @@ class ConditionEvaluator:
                 return False, "No valid operator, function, or variable found"
             
             return True, ""
-            
+        
         except Exception as e:
             return False, str(e)
\ No newline at end of file
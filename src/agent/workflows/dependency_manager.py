@@ -15,6 +15,7 @@ from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
+from .step_scheduler import topological_sort
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -356,38 +357,11 @@ class DependencyManager:
             return False
     
     def _detect_cycles(self) -> List[List[str]]:
-        """Detect circular dependencies using DFS"""
-        cycles = []
-        visited = set()
-        rec_stack = set()
-        
-        def dfs(step_id: str, path: List[str]) -> bool:
-            if step_id in rec_stack:
-                # Found cycle
-                cycle_start = path.index(step_id)
-                cycles.append(path[cycle_start:] + [step_id])
-                return True
-            
-            if step_id in visited:
-                return False
-            
-            visited.add(step_id)
-            rec_stack.add(step_id)
-            path.append(step_id)
-            
-            if step_id in self.dependency_graph:
-                node = self.dependency_graph[step_id]
-                for dep in node.dependencies:
-                    if dfs(dep.step_id, path.copy()):
-                        return True
-            
-            rec_stack.remove(step_id)
-            return False
-        
-        for step_id in self.dependency_graph:
-            if step_id not in visited:
-                dfs(step_id, [])
-        
+        """Detect circular dependencies (Kahn's algorithm, no recursion)"""
+        _, cycles = topological_sort({
+            step_id: [dep.step_id for dep in node.dependencies]
+            for step_id, node in self.dependency_graph.items()
+        })
         return cycles
     
     def add_dynamic_dependency(self, step_id: str, dependency: Dependency):
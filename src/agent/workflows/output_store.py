@@ -0,0 +1,248 @@
+"""
+Output Store
+
+Content-addressed disk store for large step outputs. Output values above a
+size threshold are written once under the SHA-256 of their content and
+replaced in the workflow context by an OutputRef; steps that read the value
+load it on access, and consumers can stream it from disk in chunks instead
+of holding every workflow's outputs in memory.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Collection, Dict, Iterator, Mapping, Optional, Set, Tuple
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Key marking a serialized OutputRef (journal, status reports)
+REF_KEY = "$output_ref"
+
+
+@dataclass(frozen=True)
+class OutputRef:
+    """Reference to an output value held in the output store"""
+    digest: str
+    size: int
+    encoding: str  # "text", "bytes", "json" or "pickle"
+    path: str
+    
+    def open(self) -> BinaryIO:
+        return open(self.path, "rb")
+    
+    def iter_chunks(self, chunk_size: int = 1 << 20) -> Iterator[bytes]:
+        """Stream the stored bytes"""
+        with self.open() as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+    
+    def load(self) -> Any:
+        """The original value, with its original types"""
+        with self.open() as f:
+            data = f.read()
+        if self.encoding == "bytes":
+            return data
+        if self.encoding == "text":
+            return data.decode("utf-8")
+        if self.encoding == "pickle":
+            return pickle.loads(data)
+        return json.loads(data)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {REF_KEY: self.digest, "size": self.size, "encoding": self.encoding, "path": self.path}
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "OutputRef":
+        return cls(digest=data[REF_KEY], size=data["size"], encoding=data["encoding"], path=data["path"])
+
+
+def encode_refs(output: Mapping[str, Any]) -> Dict[str, Any]:
+    """Output with OutputRefs as plain dicts (JSON-serializable)"""
+    return {key: value.to_dict() if isinstance(value, OutputRef) else value for key, value in output.items()}
+
+
+def decode_refs(output: Mapping[str, Any]) -> Dict[str, Any]:
+    """Inverse of encode_refs"""
+    return {
+        key: OutputRef.from_dict(value) if isinstance(value, dict) and REF_KEY in value else value
+        for key, value in output.items()
+    }
+
+
+def ref_digests(output: Mapping[str, Any]) -> Set[str]:
+    """Digests of the values an output references (OutputRefs or encoded refs)"""
+    digests = set()
+    for value in output.values():
+        if isinstance(value, OutputRef):
+            digests.add(value.digest)
+        elif isinstance(value, dict) and REF_KEY in value:
+            digests.add(value[REF_KEY])
+    return digests
+
+
+def _is_json(value: Any) -> bool:
+    """Whether a value survives a JSON round trip with the same types"""
+    if value is None or type(value) in (str, bool, int, float):
+        return True
+    if type(value) is list:
+        return all(_is_json(item) for item in value)
+    if type(value) is dict:
+        return all(type(key) is str and _is_json(item) for key, item in value.items())
+    return False
+
+
+def serialize_value(value: Any) -> Optional[Tuple[bytes, str]]:
+    """
+    Bytes and encoding to store a value as, or None for small scalars.
+    
+    Plain JSON data is stored as JSON; anything else (tuples, sets,
+    datetimes, non-string keys, ...) is pickled so it loads back unchanged.
+    
+    Raises:
+        TypeError: If the value can't be stored
+    """
+    if isinstance(value, str):
+        return value.encode("utf-8"), "text"
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value), "bytes"
+    if value is None or isinstance(value, (bool, int, float)):
+        return None
+    if _is_json(value):
+        return json.dumps(value).encode("utf-8"), "json"
+    try:
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), "pickle"
+    except Exception as e:
+        raise TypeError(f"Can't store value of type {type(value).__name__}: {e}")
+
+
+class OutputContext(Mapping):
+    """
+    Read-only view of a workflow context that loads referenced outputs on
+    access. Each loaded value is kept for the life of the view (one step).
+    """
+    
+    def __init__(self, context: Mapping[str, Any]):
+        self._context = context
+        self._loaded: Dict[str, Any] = {}
+    
+    def __getitem__(self, key: str) -> Any:
+        value = self._context[key]
+        if not isinstance(value, OutputRef):
+            return value
+        if key not in self._loaded:
+            self._loaded[key] = value.load()
+        return self._loaded[key]
+    
+    def __contains__(self, key: object) -> bool:
+        return key in self._context
+    
+    def __iter__(self):
+        return iter(self._context)
+    
+    def __len__(self) -> int:
+        return len(self._context)
+
+
+class OutputStore:
+    """
+    Content-addressed store of output values on disk.
+    
+    Features:
+    - Values stored once per content (SHA-256)
+    - Atomic writes (temporary file, then rename)
+    - Pruning of values not written or reused recently
+    """
+    
+    def __init__(self, root: str):
+        """
+        Initialize output store.
+        
+        Args:
+            root: Directory for stored values (created if missing)
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        
+        # Statistics
+        self.values_written = 0
+        self.bytes_written = 0
+        self.deduplicated = 0
+        
+        logger.info(f"Output store initialized at: {root}")
+    
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+    
+    def put(self, data: bytes, encoding: str) -> OutputRef:
+        """Store bytes; returns a reference to them"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if os.path.exists(path):
+            # Same content already stored: keep it from being pruned
+            os.utime(path)
+            self.deduplicated += 1
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp_path, path)
+            except BaseException:
+                if os.path.exists(temp_path):
+                    os.unlink(temp_path)
+                raise
+            self.values_written += 1
+            self.bytes_written += len(data)
+        return OutputRef(digest=digest, size=len(data), encoding=encoding, path=path)
+    
+    def prune(self, retention: float, keep: Collection[str] = ()) -> int:
+        """
+        Remove values not written or reused for `retention` seconds.
+        
+        Args:
+            retention: Seconds since a value was last written or reused
+            keep: Digests of values still referenced (e.g. by unfinished
+                runs), never removed
+        
+        Returns:
+            Number of values removed
+        """
+        cutoff = time.time() - retention
+        removed = 0
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name in keep:
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass
+        
+        logger.debug(f"Pruned output store: {removed} values removed")
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get store statistics"""
+        return {
+            "root": self.root,
+            "values_written": self.values_written,
+            "bytes_written": self.bytes_written,
+            "deduplicated": self.deduplicated
+        }
@@ -11,11 +11,16 @@ Session: 2.2
 
 import asyncio
 import time
-from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from collections import ChainMap, deque
+from contextlib import aclosing
+from typing import Dict, List, Any, Optional, AsyncIterator, Callable, Iterable, Tuple
+from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
+from .condition_evaluator import compile_expression
+from .template_renderer import render_template
+from .step_hedging import HedgingConfig, StepHedger
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -49,6 +54,17 @@ class StepResult:
     metadata: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class LoopBodyStep:
+    """Step run once per loop iteration (the loop step's `body` parameter)"""
+    id: str
+    name: str
+    step_type: StepType
+    action: str
+    parameters: Dict[str, Any] = field(default_factory=dict)
+    idempotent: bool = False
+
+
 class StepExecutor:
     """
     Executes individual workflow steps.
@@ -57,16 +73,26 @@ class StepExecutor:
     Provides standardized interface for all step types.
     """
     
-    def __init__(self, orchestrator=None):
+    def __init__(self, orchestrator=None, hedging: Optional[HedgingConfig] = None):
         """
         Initialize step executor.
         
         Args:
             orchestrator: Agent orchestrator for task execution
+            hedging: Hedged request configuration for idempotent MCP and LLM steps
         """
         self.orchestrator = orchestrator
+        self.hedger = StepHedger(hedging)
+        
+        # Called with (step_id, index, result, error) for streamed loop iterations
+        self.loop_listeners: List[Callable[[str, int, Any, Optional[str]], None]] = []
+        
         logger.info("Step executor initialized")
     
+    def add_loop_listener(self, listener: Callable[[str, int, Any, Optional[str]], None]):
+        """Receive results of loops run with stream=True, in iteration order"""
+        self.loop_listeners.append(listener)
+    
     async def execute_step(self, step, context: Dict[str, Any]) -> StepResult:
         """
         Execute a workflow step.
@@ -74,7 +100,7 @@ class StepExecutor:
         Args:
             step: WorkflowStep to execute
             context: Execution context
-            
+        
         Returns:
             Step execution result
         """
@@ -120,7 +146,7 @@ class StepExecutor:
             result.step_type = step.step_type
             
             return result
-            
+        
         except Exception as e:
             logger.error(f"Step execution failed: {step.id} - {e}")
             return StepResult(
@@ -131,7 +157,7 @@ class StepExecutor:
             )
     
     async def _execute_llm_query(self, step, context: Dict[str, Any]) -> StepResult:
-        """Execute LLM query step"""
+        """Execute LLM query step (hedged if the step is idempotent)"""
         if not self.orchestrator or not self.orchestrator.ollama_client:
             return StepResult(
                 success=False,
@@ -142,11 +168,20 @@ class StepExecutor:
         prompt = self._substitute_context_variables(step.action, context)
         model_type = step.parameters.get("model_type", "primary")
         
+        if not getattr(step, "idempotent", False):
+            return await self._query_llm(prompt, model_type, step.id)
+        # The hedge stays out of the step's conversation history
+        return await self.hedger.run(
+            (StepType.LLM_QUERY, model_type),
+            lambda is_hedge: self._query_llm(prompt, model_type, None if is_hedge else step.id)
+        )
+    
+    async def _query_llm(self, prompt: str, model_type: str, conversation_id: Optional[str]) -> StepResult:
         try:
             response = await self.orchestrator.ollama_client.generate(
                 prompt=prompt,
                 model_type=model_type,
-                conversation_id=step.id
+                conversation_id=conversation_id
             )
             
             return StepResult(
@@ -157,12 +192,12 @@ class StepExecutor:
                     "tokens": response.tokens_used
                 }
             )
-            
+        
         except Exception as e:
             return StepResult(success=False, error=str(e))
     
     async def _execute_mcp_tool(self, step, context: Dict[str, Any]) -> StepResult:
-        """Execute MCP tool step"""
+        """Execute MCP tool step (hedged if the step is idempotent)"""
         if not self.orchestrator or not self.orchestrator.mcp_manager:
             return StepResult(
                 success=False,
@@ -180,6 +215,14 @@ class StepExecutor:
             else:
                 parameters[key] = value
         
+        if not getattr(step, "idempotent", False):
+            return await self._call_mcp_tool(tool_name, client_type, parameters)
+        return await self.hedger.run(
+            (StepType.MCP_TOOL, client_type, tool_name),
+            lambda is_hedge: self._call_mcp_tool(tool_name, client_type, parameters)
+        )
+    
+    async def _call_mcp_tool(self, tool_name: str, client_type: str, parameters: Dict[str, Any]) -> StepResult:
         try:
             if client_type == "auto":
                 # Let MCP manager route automatically
@@ -197,7 +240,7 @@ class StepExecutor:
                 success=True,
                 output_data=result
             )
-            
+        
         except Exception as e:
             return StepResult(success=False, error=str(e))
     
@@ -242,14 +285,14 @@ class StepExecutor:
                     },
                     error=stderr.decode() if process.returncode != 0 else None
                 )
-                
+            
             except asyncio.TimeoutError:
                 process.kill()
                 return StepResult(
                     success=False,
                     error=f"Command timed out after {timeout} seconds"
                 )
-                
+        
         except Exception as e:
             return StepResult(success=False, error=str(e))
     
@@ -289,62 +332,136 @@ class StepExecutor:
                 var_name = condition.replace("exists", "").strip()
                 result = var_name in context
             else:
-                # Try to evaluate as Python expression (limited safety)
-                result = eval(condition, {"__builtins__": {}}, context)
+                # Restricted expression, compiled once per condition text;
+                # an invalid one fails the step
+                result = compile_expression(condition, strict=True)(context)
             
             return StepResult(
                 success=True,
                 output_data={"condition_result": result}
             )
-            
+        
         except Exception as e:
             return StepResult(success=False, error=f"Condition evaluation failed: {e}")
     
     async def _execute_loop(self, step, context: Dict[str, Any]) -> StepResult:
-        """Execute loop step"""
+        """
+        Execute loop step.
+        
+        Parameters:
+            type: "count" (count) or "foreach" (items: list or context variable)
+            body: Optional step definition ({"type", "action", "parameters"})
+                run for every iteration
+            parallelism: Iterations run at once (default 1, sequential)
+            error_mode: "fail_fast" (stop at the first failed iteration) or
+                "collect" (run all and report every error)
+            stream: Hand each result to the loop listeners instead of
+                collecting them in the step output
+        """
         loop_type = step.parameters.get("type", "count")
         
         if loop_type == "count":
             count = step.parameters.get("count", 1)
-            results = []
+            items: Iterable[Any] = range(count)
             
-            for i in range(count):
-                loop_context = context.copy()
-                loop_context["loop_index"] = i
-                loop_context["loop_count"] = count
-                
-                # Execute loop action
-                action_result = await self._execute_simple_action(
-                    step.action, step.parameters, loop_context
-                )
-                results.append(action_result)
-            
-            return StepResult(
-                success=True,
-                output_data={"loop_results": results}
-            )
+            def overlay(index: int, item: Any) -> Dict[str, Any]:
+                return {"loop_index": index, "loop_count": count}
         
         elif loop_type == "foreach":
             items = step.parameters.get("items", [])
             if isinstance(items, str) and items in context:
                 items = context[items]
             
-            results = []
-            for item in items:
-                loop_context = context.copy()
-                loop_context["loop_item"] = item
-                
-                action_result = await self._execute_simple_action(
-                    step.action, step.parameters, loop_context
-                )
-                results.append(action_result)
-            
+            def overlay(index: int, item: Any) -> Dict[str, Any]:
+                return {"loop_item": item, "loop_index": index}
+        
+        else:
+            return StepResult(success=False, error=f"Unknown loop type: {loop_type}")
+        
+        parallelism = max(1, int(step.parameters.get("parallelism", 1)))
+        fail_fast = step.parameters.get("error_mode", "fail_fast") != "collect"
+        stream = bool(step.parameters.get("stream", False))
+        
+        results = []
+        errors = []
+        iterations = 0
+        iteration_results = self.iterate_loop(step, context, items, overlay, parallelism, fail_fast)
+        async with aclosing(iteration_results) as ordered:
+            async for index, result, error in ordered:
+                iterations += 1
+                if error is not None:
+                    errors.append({"index": index, "error": error})
+                if stream:
+                    for listener in self.loop_listeners:
+                        listener(step.id, index, result, error)
+                else:
+                    results.append(result if error is None else {"error": error})
+        
+        output_data = {"iterations": iterations}
+        if not stream:
+            output_data["loop_results"] = results
+        if errors:
+            output_data["errors"] = errors
             return StepResult(
-                success=True,
-                output_data={"loop_results": results}
+                success=False,
+                output_data=output_data,
+                error=f"{len(errors)} loop iteration(s) failed; first: {errors[0]['error']}"
             )
+        return StepResult(success=True, output_data=output_data)
+    
+    async def iterate_loop(self, step, context: Dict[str, Any], items: Iterable[Any],
+                           overlay: Callable[[int, Any], Dict[str, Any]], parallelism: int = 1,
+                           fail_fast: bool = True) -> AsyncIterator[Tuple[int, Any, Optional[str]]]:
+        """
+        Run loop iterations on a bounded pool, yielding results in order.
+        
+        Items are consumed lazily and at most `parallelism` iterations run at
+        once, with a bounded window of finished results waiting for earlier
+        ones. Each iteration sees its loop variables layered over the shared
+        context rather than a copy of it.
         
-        return StepResult(success=False, error=f"Unknown loop type: {loop_type}")
+        Yields:
+            (index, result, error) in iteration order; error is None on success
+        """
+        semaphore = asyncio.Semaphore(parallelism)
+        # Sequential loops don't start the next iteration early
+        window_size = 1 if parallelism == 1 else parallelism * 4
+        window = deque()
+        pending_items = enumerate(items)
+        exhausted = False
+        
+        async def run_iteration(index: int, item: Any) -> Tuple[Any, Optional[str]]:
+            async with semaphore:
+                loop_context = ChainMap(overlay(index, item), context)
+                try:
+                    result = await self._execute_simple_action(step.action, step.parameters, loop_context,
+                                                               step_id=step.id)
+                    return result, None
+                except Exception as e:
+                    return None, str(e)
+        
+        try:
+            while True:
+                while not exhausted and len(window) < window_size:
+                    try:
+                        index, item = next(pending_items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    window.append((index, asyncio.create_task(run_iteration(index, item))))
+                
+                if not window:
+                    return
+                index, task = window.popleft()
+                result, error = await task
+                yield index, result, error
+                if error is not None and fail_fast:
+                    return
+        finally:
+            for _, task in window:
+                task.cancel()
+            if window:
+                await asyncio.gather(*(task for _, task in window), return_exceptions=True)
     
     async def _execute_wait(self, step, context: Dict[str, Any]) -> StepResult:
         """Execute wait/delay step"""
@@ -476,7 +593,7 @@ class StepExecutor:
                 )
             
             return result
-            
+        
         except ImportError as e:
             return StepResult(
                 success=False,
@@ -518,7 +635,7 @@ class StepExecutor:
                     "result_count": len(results)
                 }
             )
-            
+        
         except Exception as e:
             return StepResult(
                 success=False,
@@ -565,7 +682,7 @@ class StepExecutor:
                     "service_id": service_id
                 }
             )
-            
+        
         except Exception as e:
             return StepResult(
                 success=False,
@@ -609,7 +726,7 @@ class StepExecutor:
                 },
                 error=result.error if not result.success else None
             )
-            
+        
         except Exception as e:
             return StepResult(
                 success=False,
@@ -650,22 +767,30 @@ class StepExecutor:
         )
     
     async def _execute_simple_action(self, action: str, parameters: Dict[str, Any], 
-                                   context: Dict[str, Any]) -> Dict[str, Any]:
+                                   context: Dict[str, Any], step_id: Optional[str] = None) -> Dict[str, Any]:
         """Execute a simple action (for loops)"""
-        # Simplified action execution for loop contexts
-        return {"action": action, "parameters": parameters}
+        body = parameters.get("body")
+        if not body:
+            # Simplified action execution for loop contexts
+            return {"action": action, "parameters": parameters}
+        
+        # Run the loop body as a step of its own
+        body_step = LoopBodyStep(
+            id=f"{step_id or action}[{context.get('loop_index')}]",
+            name=body.get("name", action),
+            step_type=StepType(body.get("type", "llm_query")),
+            action=body.get("action", ""),
+            parameters=dict(body.get("parameters", {})),
+            idempotent=body.get("idempotent", False)
+        )
+        result = await self.execute_step(body_step, context)
+        if not result.success:
+            raise RuntimeError(result.error or f"{body_step.step_type.value} step failed")
+        return result.output_data
     
     def _substitute_context_variables(self, text: str, context: Dict[str, Any]) -> str:
         """Substitute context variables in text using {variable} syntax"""
-        if not isinstance(text, str):
-            return text
-        
-        for key, value in context.items():
-            placeholder = f"{{{key}}}"
-            if placeholder in text:
-                text = text.replace(placeholder, str(value))
-        
-        return text
+        return render_template(text, context)
     
     async def rollback_step(self, step, context: Dict[str, Any]) -> bool:
         """Rollback a completed step (if possible)"""
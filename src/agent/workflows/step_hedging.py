@@ -0,0 +1,191 @@
+"""
+Step Hedging
+
+Hedged requests for idempotent workflow steps. When a call has been running
+for longer than the recent p95 latency of similar calls, a duplicate is
+launched and whichever succeeds first is used; the other is cancelled.
+Hedges are paid for from a budget shared by all workflows (a fraction of the
+calls made plus a small burst, and a cap on hedges in flight), so a slow
+backend sees a bounded amount of extra load.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class HedgingConfig:
+    """Hedged request configuration"""
+    enabled: bool = True
+    quantile: float = 0.95        # Hedge once a call is slower than this quantile
+    min_samples: int = 20         # Latencies observed before hedging a kind of call
+    min_delay: float = 0.01       # Seconds; never hedge sooner than this
+    window: int = 200             # Latencies kept per kind of call
+    max_keys: int = 1024          # Kinds of call tracked
+    budget_ratio: float = 0.1     # Hedges earned per call
+    budget_burst: float = 10.0    # Hedges that may be saved up
+    max_outstanding: int = 8      # Hedges in flight at once
+
+
+class HedgeBudget:
+    """Token bucket refilled per call, plus a cap on hedges in flight"""
+    
+    def __init__(self, ratio: float, burst: float, max_outstanding: int):
+        self.ratio = ratio
+        self.burst = burst
+        self.max_outstanding = max_outstanding
+        self.tokens = burst
+        self.outstanding = 0
+    
+    def deposit(self):
+        self.tokens = min(self.burst, self.tokens + self.ratio)
+    
+    def withdraw(self) -> bool:
+        if self.tokens < 1.0 or self.outstanding >= self.max_outstanding:
+            return False
+        self.tokens -= 1.0
+        self.outstanding += 1
+        return True
+    
+    def release(self):
+        self.outstanding -= 1
+
+
+class StepHedger:
+    """
+    Runs calls with hedging.
+    
+    Features:
+    - Per-kind latency windows (e.g. per MCP tool) for the hedge delay
+    - First successful result wins, the other call is cancelled
+    - Global hedge budget
+    - Statistics
+    """
+    
+    def __init__(self, config: Optional[HedgingConfig] = None):
+        """
+        Initialize hedger.
+        
+        Args:
+            config: Hedging configuration
+        """
+        self.config = config or HedgingConfig()
+        self.budget = HedgeBudget(self.config.budget_ratio, self.config.budget_burst,
+                                  self.config.max_outstanding)
+        self._latencies: "OrderedDict[Hashable, Deque[float]]" = OrderedDict()
+        
+        # Statistics
+        self.calls = 0
+        self.hedges_launched = 0
+        self.hedges_won = 0
+        self.hedges_denied = 0
+    
+    def hedge_delay(self, key: Hashable) -> Optional[float]:
+        """Quantile of recent latencies for this kind of call, or None while too few are known"""
+        samples = self._latencies.get(key)
+        if samples is None or len(samples) < self.config.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(self.config.quantile * len(ordered)))
+        return max(self.config.min_delay, ordered[index])
+    
+    def _observe(self, key: Hashable, task: asyncio.Task, started: float):
+        """Record the latency of a call that succeeded"""
+        if task.cancelled() or task.exception() is not None or not task.result().success:
+            return
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.config.window)
+            if len(self._latencies) > self.config.max_keys:
+                self._latencies.popitem(last=False)
+        else:
+            self._latencies.move_to_end(key)
+        samples.append(time.perf_counter() - started)
+    
+    async def run(self, key: Hashable, call: Callable[[bool], Awaitable[Any]]) -> Any:
+        """
+        Run a call, hedging it if it is slow.
+        
+        Args:
+            key: Kind of call, for latency tracking (e.g. tool name)
+            call: Makes one attempt; called with True for the hedge. Must
+                return a result with a `success` attribute.
+        
+        Returns:
+            The first successful result, else the first failed one. Its
+            metadata records whether a hedge was launched and won.
+        """
+        self.calls += 1
+        self.budget.deposit()
+        delay = self.hedge_delay(key) if self.config.enabled else None
+        tasks: Dict[asyncio.Task, bool] = {}
+        
+        def launch(is_hedge: bool):
+            started = time.perf_counter()
+            task = asyncio.create_task(call(is_hedge))
+            task.add_done_callback(lambda done: self._observe(key, done, started))
+            if is_hedge:
+                task.add_done_callback(lambda _: self.budget.release())
+            tasks[task] = is_hedge
+        
+        launch(False)
+        hedge_pending = delay is not None  # Still waiting to decide on a hedge
+        hedge_launched = False
+        failure = None
+        try:
+            while tasks:
+                timeout = delay if hedge_pending else None
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Slower than usual: race a duplicate if the budget allows
+                    hedge_pending = False
+                    if self.budget.withdraw():
+                        self.hedges_launched += 1
+                        hedge_launched = True
+                        launch(True)
+                    else:
+                        self.hedges_denied += 1
+                    continue
+                
+                hedge_pending = False
+                for task in done:
+                    is_hedge = tasks.pop(task)
+                    result = task.result()
+                    if result.success:
+                        if is_hedge:
+                            self.hedges_won += 1
+                        result.metadata = {**(result.metadata or {}),
+                                           "hedged": hedge_launched, "hedge_won": is_hedge}
+                        return result
+                    if failure is None:
+                        failure = result
+            return failure
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hedging statistics"""
+        return {
+            "enabled": self.config.enabled,
+            "calls": self.calls,
+            "hedges_launched": self.hedges_launched,
+            "hedges_won": self.hedges_won,
+            "hedges_denied": self.hedges_denied,
+            "hedge_rate": self.hedges_launched / self.calls if self.calls else 0.0,
+            "hedges_outstanding": self.budget.outstanding,
+            "tracked_calls": len(self._latencies)
+        }
@@ -0,0 +1,324 @@
+"""
+Step Scheduler
+
+Event-driven (dataflow) scheduling of workflow steps. Instead of running the
+DAG in levels, where a whole level must finish before the next one starts,
+each step is launched as soon as its last dependency completes, within a
+concurrency budget shared by all running workflows. Ready steps are taken in
+declaration order or, optionally, longest remaining critical path first.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import asyncio
+import hashlib
+import heapq
+import time
+from dataclasses import dataclass
+from enum import Enum
+from types import MappingProxyType
+from typing import Awaitable, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _kahn(dependencies: Mapping[str, Iterable[str]]):
+    """Known dependencies, dependents, topological order and cycles"""
+    known: Dict[str, Tuple[str, ...]] = {}
+    dependents: Dict[str, List[str]] = {step_id: [] for step_id in dependencies}
+    for step_id, deps in dependencies.items():
+        known[step_id] = tuple(dep for dep in dict.fromkeys(deps) if dep in dependents)
+        for dep in known[step_id]:
+            dependents[dep].append(step_id)
+    
+    remaining = {step_id: len(deps) for step_id, deps in known.items()}
+    order = [step_id for step_id, count in remaining.items() if count == 0]
+    for step_id in order:
+        for dependent in dependents[step_id]:
+            remaining[dependent] -= 1
+            if remaining[dependent] == 0:
+                order.append(dependent)
+    if len(order) == len(known):
+        return known, dependents, order, []
+    
+    # Every step left over waits on another one left over: follow those
+    # dependencies until a step repeats
+    cycles: List[List[str]] = []
+    seen: Set[str] = set()
+    for start in known:
+        if not remaining[start] or start in seen:
+            continue
+        path: List[str] = []
+        position: Dict[str, int] = {}
+        current = start
+        while current not in position and current not in seen:
+            position[current] = len(path)
+            path.append(current)
+            current = next(dep for dep in known[current] if remaining[dep])
+        if current in position:
+            cycles.append(path[position[current]:] + [current])
+        seen.update(path)
+    return known, dependents, order, cycles
+
+
+def topological_sort(dependencies: Mapping[str, Iterable[str]]) -> Tuple[List[str], List[List[str]]]:
+    """
+    Kahn's algorithm over step ID -> dependency IDs (iterative, so deep
+    graphs don't hit the recursion limit). References to unknown steps are
+    ignored.
+    
+    Returns:
+        (order, cycles): the steps that can be ordered, dependencies first
+        and otherwise in declaration order, and the cycles among the rest,
+        each as [a, b, ..., a] where a depends on b
+    """
+    _, _, order, cycles = _kahn(dependencies)
+    return order, cycles
+
+
+def validate_dependency_graph(step_ids: Sequence[str], dependencies: Mapping[str, Iterable[str]],
+                              allow_unknown: bool = False) -> List[str]:
+    """
+    One pass over a workflow's dependency graph: duplicate step IDs,
+    references to unknown steps and cycles.
+    
+    Args:
+        step_ids: Step IDs in declaration order (duplicates are reported)
+        dependencies: Step ID -> dependency IDs
+        allow_unknown: Don't report references to unknown steps
+    
+    Returns:
+        Error messages (empty if the graph is valid)
+    """
+    errors = []
+    if len(step_ids) != len(dependencies):
+        errors.append("Duplicate step IDs found")
+    
+    if not allow_unknown:
+        for step_id, deps in dependencies.items():
+            for dep in deps:
+                if dep not in dependencies:
+                    errors.append(f"Step {step_id} depends on non-existent step: {dep}")
+    
+    _, cycles = topological_sort(dependencies)
+    errors.extend(f"Circular dependency detected: {' -> '.join(cycle)}" for cycle in cycles)
+    return errors
+
+
+class SchedulingPolicy(Enum):
+    """Order in which ready steps are launched"""
+    FIFO = "fifo"                    # Declaration order
+    CRITICAL_PATH = "critical_path"  # Longest remaining path to the end first
+
+
+@dataclass(frozen=True)
+class WorkflowPlan:
+    """
+    Compiled dependency structure of a workflow definition.
+    
+    Immutable, so one plan is shared by every run of the same definition.
+    """
+    digest: str
+    step_ids: Tuple[str, ...]                      # Declaration order
+    dependencies: Mapping[str, Tuple[str, ...]]    # References to unknown steps dropped
+    dependents: Mapping[str, Tuple[str, ...]]
+    topological_order: Tuple[str, ...]
+    
+    @staticmethod
+    def digest_of(dependencies: Dict[str, List[str]]) -> str:
+        """Hash of a definition's step IDs and dependencies"""
+        digest = hashlib.blake2b(digest_size=16)
+        for step_id, deps in dependencies.items():
+            digest.update(step_id.encode("utf-8"))
+            digest.update(b"\x1e")
+            digest.update("\x1f".join(deps).encode("utf-8"))
+            digest.update(b"\x1d")
+        return digest.hexdigest()
+    
+    @classmethod
+    def compile(cls, dependencies: Dict[str, List[str]], digest: Optional[str] = None) -> "WorkflowPlan":
+        """
+        Build a plan from step ID -> dependency IDs, in declaration order.
+        
+        Raises:
+            ValueError: If the dependencies contain a cycle
+        """
+        known, dependents, order, cycles = _kahn(dependencies)
+        if cycles:
+            raise ValueError("; ".join(f"Circular dependency detected: {' -> '.join(cycle)}" for cycle in cycles))
+        
+        return cls(
+            digest=digest or cls.digest_of(dependencies),
+            step_ids=tuple(dependencies),
+            dependencies=MappingProxyType(known),
+            dependents=MappingProxyType({step_id: tuple(ids) for step_id, ids in dependents.items()}),
+            topological_order=tuple(order)
+        )
+
+
+def critical_path_priorities(plan: WorkflowPlan, durations: Dict[str, float]) -> Dict[str, float]:
+    """
+    Length of the longest path from each step to the end of the DAG.
+    
+    Args:
+        plan: Compiled workflow plan
+        durations: Estimated duration of each step
+    
+    Returns:
+        Step ID -> own duration plus the longest chain of dependents after it
+    """
+    priorities: Dict[str, float] = {}
+    for step_id in reversed(plan.topological_order):
+        tail = max((priorities[dependent] for dependent in plan.dependents[step_id]), default=0.0)
+        priorities[step_id] = durations.get(step_id, 1.0) + tail
+    return priorities
+
+
+class StepScheduler:
+    """
+    Ready-queue scheduler for one workflow run.
+    
+    Features:
+    - Launches steps as soon as their dependencies complete
+    - Global concurrency budget (a semaphore shared across workflows)
+    - Optional priorities for ready steps (e.g. critical path first)
+    - Skips steps downstream of a failed step
+    - Pause/resume: no new steps start while paused
+    """
+    
+    def __init__(self, plan: WorkflowPlan, priorities: Optional[Dict[str, float]] = None):
+        """
+        Initialize scheduler.
+        
+        Args:
+            plan: Compiled workflow plan (shared, never modified)
+            priorities: Higher runs first among ready steps (default: all equal)
+        """
+        self.plan = plan
+        self.priorities = priorities or {}
+        self.order = {step_id: index for index, step_id in enumerate(plan.step_ids)}
+        self.dependents = plan.dependents
+        self.waiting: Dict[str, int] = {step_id: len(deps) for step_id, deps in plan.dependencies.items()}
+        self.blocked: Set[str] = set()
+        self.ready_at: Dict[str, float] = {}  # When each step's dependencies were done
+        self._ready: List[Tuple[float, int, str]] = []
+        self._paused = False
+        self._events: Optional[asyncio.Queue] = None
+        
+        for step_id, count in self.waiting.items():
+            if count == 0:
+                self._push(step_id)
+    
+    def _push(self, step_id: str):
+        self.ready_at[step_id] = time.time()
+        heapq.heappush(self._ready, (-self.priorities.get(step_id, 0.0), self.order[step_id], step_id))
+    
+    def _pop(self) -> str:
+        return heapq.heappop(self._ready)[2]
+    
+    def _release(self, step_id: str):
+        """A step finished without failing: its dependents may become ready"""
+        for dependent in self.dependents[step_id]:
+            self.waiting[dependent] -= 1
+            if self.waiting[dependent] == 0 and dependent not in self.blocked:
+                self._push(dependent)
+    
+    def _block(self, step_id: str):
+        """A step failed: nothing downstream of it will run"""
+        pending = list(self.dependents[step_id])
+        while pending:
+            dependent = pending.pop()
+            if dependent not in self.blocked:
+                self.blocked.add(dependent)
+                pending.extend(self.dependents[dependent])
+    
+    @property
+    def paused(self) -> bool:
+        return self._paused
+    
+    def pause(self):
+        """Stop launching steps; those already running finish normally"""
+        self._paused = True
+    
+    def resume(self):
+        self._paused = False
+        if self._events is not None:
+            # Wake the run loop
+            self._events.put_nowait(None)
+    
+    async def run(self, execute: Callable[[str], Awaitable[bool]], budget: asyncio.Semaphore) -> Set[str]:
+        """
+        Run every step, each holding one unit of the budget while it executes.
+        
+        Args:
+            execute: Runs one step; returns False if it failed (its dependents
+                are then skipped). An exception cancels the steps in flight
+                and propagates.
+            budget: Concurrency budget shared with other workflows
+        
+        Returns:
+            IDs of steps that never ran because a dependency failed
+        """
+        running: Dict[asyncio.Task, str] = {}
+        acquiring: Optional[asyncio.Task] = None
+        # Finished step tasks and budget acquisitions, in completion order;
+        # one queue rather than asyncio.wait() so each event costs O(1)
+        # however many steps are in flight
+        events: asyncio.Queue = asyncio.Queue()
+        self._events = events
+        
+        def launch(step_id: str):
+            task = asyncio.create_task(execute(step_id))
+            # Released on completion even if the task is cancelled before it starts
+            task.add_done_callback(lambda _: budget.release())
+            task.add_done_callback(events.put_nowait)
+            running[task] = step_id
+        
+        try:
+            while self._ready or running:
+                if not self._paused:
+                    while self._ready and acquiring is None and not budget.locked():
+                        await budget.acquire()
+                        launch(self._pop())
+                    
+                    # Steps are ready but the budget is exhausted: take the
+                    # next unit freed, by this workflow or another
+                    if self._ready and acquiring is None:
+                        acquiring = asyncio.create_task(budget.acquire())
+                        acquiring.add_done_callback(events.put_nowait)
+                
+                task = await events.get()
+                if task is None:
+                    continue
+                if task is acquiring:
+                    acquiring = None
+                    if self._ready and not self._paused:
+                        launch(self._pop())
+                    else:
+                        budget.release()
+                    continue
+                
+                step_id = running.pop(task)
+                if task.result():
+                    self._release(step_id)
+                else:
+                    self._block(step_id)
+        finally:
+            if acquiring is not None:
+                if acquiring.done() and not acquiring.cancelled():
+                    budget.release()
+                else:
+                    acquiring.cancel()
+            if running:
+                for task in running:
+                    task.cancel()
+                await asyncio.gather(*running, return_exceptions=True)
+            self._events = None
+        
+        if self.blocked:
+            logger.info(f"Skipped {len(self.blocked)} steps downstream of failed steps")
+        return self.blocked
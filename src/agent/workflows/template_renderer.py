@@ -0,0 +1,90 @@
+"""
+Template Renderer
+
+Compiled {placeholder} substitution for workflow templates and step
+actions. A string is tokenized once into literal and placeholder segments
+and rendered in a single pass, looking up only the names it contains,
+instead of one str.replace() per known variable. Placeholders with no value
+are left in the text as written.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Callable, Mapping, Tuple
+
+PLACEHOLDER_PATTERN = re.compile(r'\{([^{}]+)\}')
+
+# A compiled structure: values -> rendered copy
+StructureRenderer = Callable[[Mapping[str, Any]], Any]
+
+
+class CompiledTemplate:
+    """
+    A string split into literal and placeholder segments.
+    
+    Segments alternate literal, placeholder, literal, ..., starting and
+    ending with a (possibly empty) literal.
+    """
+    
+    __slots__ = ("text", "segments", "placeholders")
+    
+    def __init__(self, text: str):
+        self.text = text
+        self.segments: Tuple[str, ...] = tuple(PLACEHOLDER_PATTERN.split(text))
+        self.placeholders: Tuple[str, ...] = self.segments[1::2]
+    
+    def render(self, values: Mapping[str, Any]) -> str:
+        """Substitute every placeholder that has a value"""
+        if not self.placeholders:
+            return self.text
+        
+        segments = self.segments
+        parts = [segments[0]]
+        for index in range(1, len(segments), 2):
+            name = segments[index]
+            if name in values:
+                parts.append(str(values[name]))
+            else:
+                parts.append(f"{{{name}}}")
+            parts.append(segments[index + 1])
+        return "".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def compile_template(text: str) -> CompiledTemplate:
+    """Compiled form of a template string (cached by text)"""
+    return CompiledTemplate(text)
+
+
+def render_template(text: Any, values: Mapping[str, Any]) -> Any:
+    """Render a template string; anything that isn't a string is returned as-is"""
+    if not isinstance(text, str):
+        return text
+    return compile_template(text).render(values)
+
+
+def compile_structure(value: Any) -> StructureRenderer:
+    """
+    Compile nested dicts/lists of template strings.
+    
+    The returned function renders a new copy of the structure; dict keys and
+    non-string values are copied as they are.
+    """
+    if isinstance(value, dict):
+        items = [(key, compile_structure(item)) for key, item in value.items()]
+        return lambda values: {key: render(values) for key, render in items}
+    
+    if isinstance(value, list):
+        items = [compile_structure(item) for item in value]
+        return lambda values: [render(values) for render in items]
+    
+    if isinstance(value, str):
+        template = compile_template(value)
+        if template.placeholders:
+            return template.render
+    
+    return lambda values: value
@@ -10,16 +10,26 @@ Session: 2.2
 """
 
 import asyncio
+import json
+import sqlite3
+import sys
 import time
 import uuid
-from typing import Dict, List, Any, Optional, Set
+from collections import OrderedDict, deque
+from typing import Callable, Deque, Dict, List, Any, Optional, Set
 from dataclasses import dataclass, field
 from enum import Enum
 import logging
 
 from .step_executor import StepExecutor, StepResult, StepType
+from .step_hedging import HedgingConfig
 from .condition_evaluator import ConditionEvaluator
-from .dependency_manager import DependencyManager, Dependency, DependencyType
+from .output_store import (
+    OutputContext, OutputRef, OutputStore, decode_refs, encode_refs, ref_digests, serialize_value
+)
+from .step_scheduler import StepScheduler, SchedulingPolicy, WorkflowPlan, critical_path_priorities
+from .workflow_journal import WorkflowJournal
+from .workflow_profiler import SpanKind, WorkflowProfile
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -58,6 +68,8 @@ class WorkflowStep:
     retry_count: int = 3
     timeout: float = 300.0
     parallel_group: Optional[str] = None
+    estimated_duration: Optional[float] = None  # Seconds, for critical-path scheduling
+    idempotent: bool = False  # Safe to run twice: MCP/LLM calls may be hedged
     
     # Runtime state
     status: StepStatus = StepStatus.PENDING
@@ -86,6 +98,39 @@ class WorkflowDefinition:
     completed_at: Optional[float] = None
     current_step: Optional[str] = None
     execution_context: Dict[str, Any] = field(default_factory=dict)
+    profile: WorkflowProfile = field(default_factory=WorkflowProfile)
+
+
+@dataclass
+class WorkflowEngineConfig:
+    """Workflow engine configuration"""
+    max_concurrent_workflows: int = 5
+    max_concurrent_steps: int = 32  # Budget shared by all running workflows
+    scheduling_policy: SchedulingPolicy = SchedulingPolicy.FIFO
+    plan_cache_size: int = 256      # Compiled plans kept, by definition hash
+    journal_path: Optional[str] = None        # SQLite execution journal; None disables it
+    journal_retention: float = 7 * 24 * 3600  # Seconds finished runs stay in the journal
+    journal_compact_interval: int = 100       # Finished runs between compactions (and output store pruning)
+    output_store_path: Optional[str] = None   # Directory for large step outputs; None keeps them in memory
+    output_spill_threshold: int = 1 << 20     # Bytes; larger output values go to the output store
+    max_workflow_output_memory: Optional[int] = None  # Bytes of outputs held in memory per running workflow
+    output_retention: float = 7 * 24 * 3600   # Seconds unused values stay in the output store
+    history_size: int = 100                   # Finished workflows kept for status queries
+    profile_steps: bool = True                # Record per-step timing spans
+    hedging: HedgingConfig = field(default_factory=HedgingConfig)  # Idempotent MCP/LLM steps
+
+
+@dataclass
+class WorkflowRun:
+    """Execution state of one workflow run, never shared between runs"""
+    workflow: WorkflowDefinition
+    plan: WorkflowPlan
+    steps_by_id: Dict[str, WorkflowStep]
+    completed_steps: Set[str] = field(default_factory=set)
+    failed_steps: Set[str] = field(default_factory=set)
+    output_sizes: Dict[str, int] = field(default_factory=dict)  # Context key -> bytes held in memory
+    output_memory: int = 0
+    scheduler: Optional[StepScheduler] = None
 
 
 class WorkflowEngine:
@@ -95,64 +140,96 @@ class WorkflowEngine:
     Features:
     - Multi-step task orchestration
     - Dependency management
-    - Parallel execution groups
+    - Dataflow scheduling with a global step concurrency budget
     - Conditional logic
     - Error recovery and retry
     - Context sharing between steps
     - Workflow templates
     """
     
-    def __init__(self, orchestrator=None):
+    def __init__(self, orchestrator=None, config: WorkflowEngineConfig = None):
         """
         Initialize workflow engine.
         
         Args:
             orchestrator: Agent orchestrator for task execution
+            config: Engine configuration
         """
         self.orchestrator = orchestrator
-        self.step_executor = StepExecutor(orchestrator)
+        self.config = config or WorkflowEngineConfig()
+        self.step_executor = StepExecutor(orchestrator, self.config.hedging)
         self.condition_evaluator = ConditionEvaluator()
-        self.dependency_manager = DependencyManager()
+        
+        # Compiled plans by definition hash, least recently used first
+        self._plans: "OrderedDict[str, WorkflowPlan]" = OrderedDict()
+        self.plan_cache_hits = 0
+        self.plan_cache_misses = 0
         
         # Active workflows
         self.running_workflows: Dict[str, WorkflowDefinition] = {}
-        self.workflow_history: List[WorkflowDefinition] = []
+        self.workflow_history: Deque[WorkflowDefinition] = deque(maxlen=self.config.history_size)
+        self._runs: Dict[str, WorkflowRun] = {}
+        
+        # Durable execution journal
+        self.journal = WorkflowJournal(self.config.journal_path) if self.config.journal_path else None
+        self._finished_since_compaction = 0
+        self._parser = None
+        
+        # Large step outputs, held on disk and passed between steps by reference
+        self.output_store = OutputStore(self.config.output_store_path) if self.config.output_store_path else None
+        self.output_listeners: List[Callable[[str, str, Dict[str, Any]], None]] = []
         
         # Execution control
-        self._max_concurrent_workflows = 5
+        self._max_concurrent_workflows = self.config.max_concurrent_workflows
         self._workflow_semaphore = asyncio.Semaphore(self._max_concurrent_workflows)
+        self._step_budget = asyncio.Semaphore(self.config.max_concurrent_steps)
+        
+        # Observed step durations by (workflow name, step ID), for critical-path estimates
+        self._step_durations: Dict[tuple, float] = {}
         
         logger.info("Workflow engine initialized")
     
-    async def execute_workflow(self, workflow: WorkflowDefinition) -> WorkflowDefinition:
+    async def execute_workflow(self, workflow: WorkflowDefinition, resume: bool = False) -> WorkflowDefinition:
         """
         Execute a complete workflow.
         
         Args:
             workflow: Workflow definition to execute
-            
+            resume: Continue an earlier run of this workflow; steps already
+                marked completed or skipped are not executed again
+        
         Returns:
             Updated workflow with execution results
         """
         async with self._workflow_semaphore:
             workflow_id = workflow.id
             logger.info(f"Starting workflow execution: {workflow_id} - {workflow.name}")
+            interrupted = False
             
             try:
                 # Initialize workflow
                 workflow.status = WorkflowStatus.RUNNING
-                workflow.started_at = time.time()
+                if not resume or workflow.started_at is None:
+                    workflow.started_at = time.time()
+                    workflow.profile = WorkflowProfile()
+                workflow.completed_at = None
                 self.running_workflows[workflow_id] = workflow
+                if resume:
+                    self._journal("workflow_resumed", workflow_id)
+                else:
+                    self._journal("workflow_started", workflow_id, workflow.name,
+                                  self._definition_dict(workflow), workflow.execution_context)
                 
                 # Execute workflow steps
                 await self._execute_workflow_steps(workflow)
                 
-                # Mark as completed
-                workflow.status = WorkflowStatus.COMPLETED
+                # Mark as completed (unless cancelled meanwhile)
+                if workflow.status != WorkflowStatus.CANCELLED:
+                    workflow.status = WorkflowStatus.COMPLETED
                 workflow.completed_at = time.time()
                 
                 logger.info(f"Workflow completed: {workflow_id}")
-                
+            
             except Exception as e:
                 logger.error(f"Workflow failed: {workflow_id} - {e}")
                 workflow.status = WorkflowStatus.FAILED
@@ -161,110 +238,357 @@ class WorkflowEngine:
                 # Handle failure strategy
                 await self._handle_workflow_failure(workflow, str(e))
             
+            except BaseException:
+                # Task cancelled (e.g. shutdown): the run isn't finished. It
+                # stays incomplete in the journal and can be resumed; steps
+                # that were running will run again.
+                interrupted = True
+                workflow.status = WorkflowStatus.PAUSED
+                for step in workflow.steps:
+                    if step.status == StepStatus.RUNNING:
+                        step.status = StepStatus.PENDING
+                logger.warning(f"Workflow interrupted: {workflow_id}")
+                raise
+            
             finally:
-                # Move to history
+                if self.config.profile_steps:
+                    workflow.profile.analyze({step.id: step.dependencies for step in workflow.steps})
                 self.running_workflows.pop(workflow_id, None)
-                self.workflow_history.append(workflow)
-                
-                # Cleanup old history
-                if len(self.workflow_history) > 100:
-                    self.workflow_history = self.workflow_history[-100:]
+                if not interrupted:
+                    self._journal("workflow_finished", workflow_id, workflow.status.value)
+                    self._maybe_compact()
+                    
+                    # Move to history (oldest dropped beyond history_size)
+                    self.workflow_history.append(workflow)
             
             return workflow
     
+    def compile_workflow(self, workflow: WorkflowDefinition) -> WorkflowPlan:
+        """
+        Validated, compiled plan for a workflow's dependency graph.
+        
+        Plans are cached by a hash of the step IDs and dependencies, so
+        repeated runs of the same definition skip validation and sorting.
+        """
+        dependencies = {step.id: step.dependencies for step in workflow.steps}
+        digest = WorkflowPlan.digest_of(dependencies)
+        plan = self._plans.get(digest)
+        if plan is not None:
+            self._plans.move_to_end(digest)
+            self.plan_cache_hits += 1
+            return plan
+        
+        self.plan_cache_misses += 1
+        # Dependencies on unknown steps are ignored, as they always were here
+        try:
+            plan = WorkflowPlan.compile(dependencies, digest)
+        except ValueError as e:
+            raise Exception(f"Invalid workflow dependencies: {e}")
+        self._plans[digest] = plan
+        if len(self._plans) > self.config.plan_cache_size:
+            self._plans.popitem(last=False)
+        return plan
+    
     async def _execute_workflow_steps(self, workflow: WorkflowDefinition):
         """Execute all steps in a workflow with advanced dependency management"""
-        # Setup dependency manager
-        self.dependency_manager.clear()
+        plan = self.compile_workflow(workflow)
+        run = WorkflowRun(
+            workflow=workflow,
+            plan=plan,
+            steps_by_id={step.id: step for step in workflow.steps}
+        )
+        
+        priorities = None
+        if self.config.scheduling_policy == SchedulingPolicy.CRITICAL_PATH:
+            durations = {step.id: self._estimate_duration(workflow, step) for step in workflow.steps}
+            priorities = critical_path_priorities(plan, durations)
+        
+        async def execute(step_id: str) -> bool:
+            # Ready until now, waiting for the step budget
+            self._span(workflow, step_id, SpanKind.QUEUE_WAIT, run.scheduler.ready_at[step_id])
+            return await self._run_scheduled_step(run.steps_by_id[step_id], run)
+        
+        # Each step starts as soon as its dependencies are done, not when
+        # its whole level is
+        run.scheduler = StepScheduler(plan, priorities)
+        self._runs[workflow.id] = run
+        try:
+            blocked = await run.scheduler.run(execute, self._step_budget)
+        finally:
+            self._runs.pop(workflow.id, None)
+        
+        for step_id in blocked:
+            step = run.steps_by_id[step_id]
+            if step.status == StepStatus.PENDING:
+                step.status = StepStatus.SKIPPED
+                step.error = "Skipped because a dependency failed"
+    
+    async def _run_scheduled_step(self, step: WorkflowStep, run: WorkflowRun) -> bool:
+        """Run one ready step; returns False if it failed"""
+        workflow = run.workflow
+        if step.status != StepStatus.PENDING:
+            return step.status != StepStatus.FAILED
+        
+        if step.conditions:
+            checked_at = time.time()
+            conditions_met = await self._check_step_conditions(step, workflow)
+            self._span(workflow, step.id, SpanKind.CONDITION, checked_at)
+        else:
+            conditions_met = True
+        if not conditions_met:
+            step.status = StepStatus.SKIPPED
+            run.completed_steps.add(step.id)
+            self._journal("record", workflow.id, "step_skipped", step.id)
+            return True
         
-        # Add all steps to dependency manager
-        for step in workflow.steps:
-            dependencies = []
-            for dep_id in step.dependencies:
-                dependencies.append(Dependency(
-                    step_id=dep_id,
-                    dependency_type=DependencyType.SUCCESS
-                ))
-            self.dependency_manager.add_step(step.id, dependencies)
-        
-        # Validate dependencies
-        is_valid, errors = self.dependency_manager.validate_dependencies()
-        if not is_valid:
-            raise Exception(f"Invalid workflow dependencies: {'; '.join(errors)}")
-        
-        # Calculate execution order
-        execution_order = self.dependency_manager.calculate_execution_order()
-        logger.info(f"Workflow execution plan: {len(execution_order)} levels")
-        
-        steps_by_id = {step.id: step for step in workflow.steps}
-        completed_steps: Set[str] = set()
-        failed_steps: Set[str] = set()
-        step_results: Dict[str, Any] = {}
-        
-        # Execute steps level by level
-        for level, step_ids in enumerate(execution_order):
-            logger.info(f"Executing level {level}: {step_ids}")
-            
-            # Filter steps that are ready and not failed
-            ready_step_ids = []
-            for step_id in step_ids:
-                if step_id in steps_by_id:
-                    step = steps_by_id[step_id]
-                    if step.status == StepStatus.PENDING:
-                        # Check conditions
-                        if await self._check_step_conditions(step, workflow):
-                            ready_step_ids.append(step_id)
-                        else:
-                            step.status = StepStatus.SKIPPED
-                            completed_steps.add(step_id)
-            
-            if not ready_step_ids:
+        workflow.current_step = step.id
+        self._journal("record", workflow.id, "step_started", step.id)
+        try:
+            result = await self._execute_step_with_recovery(step, workflow)
+        except Exception as e:
+            result = StepResult(success=False, error=str(e))
+        
+        if result.success:
+            step.status = StepStatus.COMPLETED
+            run.completed_steps.add(step.id)
+            self._record_duration(workflow, step)
+            # Journaled and streamed before any dependent starts
+            output = result.output_data
+            if output and self.output_store is not None:
+                output = encode_refs(output)
+            self._journal("record", workflow.id, "step_completed", step.id,
+                          {"output_data": output, "execution_time": result.execution_time})
+            self._notify_output(workflow, step, result.output_data or {})
+            return True
+        
+        run.failed_steps.add(step.id)
+        self._journal("record", workflow.id, "step_failed", step.id, {"error": result.error})
+        await self._handle_step_failure(step, workflow, result.error)
+        return False
+    
+    def _span(self, workflow: WorkflowDefinition, step_id: str, kind: SpanKind, start: float,
+              attempt: Optional[int] = None, detail: Optional[str] = None):
+        """Record a timing span ending now"""
+        if self.config.profile_steps:
+            workflow.profile.record(step_id, kind, start, time.time(), attempt, detail)
+    
+    async def _backoff(self, step: WorkflowStep, workflow: WorkflowDefinition, seconds: float,
+                       detail: str = "retry"):
+        """Sleep before a retry, recorded as a retry backoff span"""
+        started = time.time()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self._span(workflow, step.id, SpanKind.RETRY_BACKOFF, started, step.attempts, detail)
+    
+    def _journal(self, method: str, *args):
+        """Write to the journal if enabled; journal errors don't fail workflows"""
+        if self.journal is None:
+            return
+        try:
+            getattr(self.journal, method)(*args)
+        except sqlite3.Error as e:
+            logger.warning(f"Workflow journal write failed ({method}): {e}")
+    
+    def _maybe_compact(self):
+        """Compact the journal and prune the output store every few finished runs"""
+        if self.journal is None and self.output_store is None:
+            return
+        self._finished_since_compaction += 1
+        if self._finished_since_compaction >= self.config.journal_compact_interval:
+            self._finished_since_compaction = 0
+            self._journal("compact", self.config.journal_retention)
+            if self.output_store is not None:
+                try:
+                    self.output_store.prune(self.config.output_retention, self._referenced_outputs())
+                except OSError as e:
+                    logger.warning(f"Output store pruning failed: {e}")
+    
+    def _referenced_outputs(self) -> Set[str]:
+        """
+        Digests of stored values still in use: by running, paused and recent
+        workflows, and by journaled runs that may still be resumed
+        """
+        digests: Set[str] = set()
+        for workflow in [*self.running_workflows.values(), *self.workflow_history]:
+            digests |= ref_digests(workflow.execution_context)
+            for step in workflow.steps:
+                if step.result is not None and step.result.output_data:
+                    digests |= ref_digests(step.result.output_data)
+        if self.journal is not None:
+            for run in self.journal.get_incomplete_workflows():
+                state = self.journal.load(run["workflow_id"])
+                if state is not None:
+                    for output in [state["context"] or {}, *state["completed"].values()]:
+                        digests |= ref_digests(output)
+        return digests
+    
+    def add_output_listener(self, listener: Callable[[str, str, Dict[str, Any]], None]):
+        """
+        Receive each step's output as soon as the step completes, before
+        its dependents start: listener(workflow_id, step_id, output_data).
+        Spilled values arrive as OutputRefs, which can be streamed with
+        iter_chunks().
+        """
+        self.output_listeners.append(listener)
+    
+    def _notify_output(self, workflow: WorkflowDefinition, step: WorkflowStep, output: Dict[str, Any]):
+        """Hand a step's output to the output listeners; listener errors don't fail workflows"""
+        for listener in self.output_listeners:
+            try:
+                listener(workflow.id, step.id, output)
+            except Exception as e:
+                logger.warning(f"Output listener failed for step {step.id}: {e}")
+    
+    def _step_context(self, workflow: WorkflowDefinition):
+        """Context as steps see it: referenced outputs are loaded on access"""
+        if self.output_store is None:
+            return workflow.execution_context
+        return OutputContext(workflow.execution_context)
+    
+    def _retain_output(self, workflow: WorkflowDefinition, result: StepResult) -> Optional[str]:
+        """
+        Bound the memory held by a step's output before it joins the context.
+        
+        Values above the spill threshold are written to the output store and
+        replaced by references. If the workflow's outputs would then exceed
+        max_workflow_output_memory, the largest remaining values are spilled
+        too; with no store to spill to, the step fails.
+        
+        Returns:
+            Error message if the output can't be kept within the limit
+        """
+        store = self.output_store
+        ceiling = self.config.max_workflow_output_memory
+        if store is None and ceiling is None:
+            return None
+        
+        output = dict(result.output_data)
+        sizes: Dict[str, int] = {}
+        pending: Dict[str, tuple] = {}  # Key -> (bytes, encoding) still held in memory
+        for key, value in output.items():
+            try:
+                serialized = None if isinstance(value, OutputRef) else serialize_value(value)
+            except TypeError as e:
+                # Kept in memory as it is; counts against the limit by its shallow size
+                logger.warning(f"Output {key!r} can't be spilled: {e}")
+                sizes[key] = sys.getsizeof(value)
                 continue
-            
-            # Execute steps in parallel within this level
-            if len(ready_step_ids) == 1:
-                # Single step
-                step = steps_by_id[ready_step_ids[0]]
-                workflow.current_step = step.id
-                result = await self._execute_step_with_recovery(step, workflow)
-                
-                if result.success:
-                    step.status = StepStatus.COMPLETED
-                    completed_steps.add(step.id)
-                    step_results[step.id] = result.output_data or {}
-                    await self.dependency_manager.mark_step_completed(step.id, True, result.output_data)
-                else:
-                    failed_steps.add(step.id)
-                    await self._handle_step_failure(step, workflow, result.error)
+            if serialized is None:
+                sizes[key] = 0
+            elif store is not None and len(serialized[0]) >= self.config.output_spill_threshold:
+                output[key] = store.put(*serialized)
+                sizes[key] = 0
             else:
-                # Multiple steps - execute in parallel
-                tasks = []
-                for step_id in ready_step_ids:
-                    step = steps_by_id[step_id]
-                    workflow.current_step = step.id
-                    task = asyncio.create_task(self._execute_step_with_recovery(step, workflow))
-                    tasks.append((step, task))
-                
-                # Wait for all parallel steps
-                for step, task in tasks:
-                    try:
-                        result = await task
-                        if result.success:
-                            step.status = StepStatus.COMPLETED
-                            completed_steps.add(step.id)
-                            step_results[step.id] = result.output_data or {}
-                            await self.dependency_manager.mark_step_completed(step.id, True, result.output_data)
-                        else:
-                            failed_steps.add(step.id)
-                            await self._handle_step_failure(step, workflow, result.error)
-                    except Exception as e:
-                        failed_steps.add(step.id)
-                        await self._handle_step_failure(step, workflow, str(e))
-            
-            # Check if we should continue after failures
-            if failed_steps and workflow.failure_strategy == "stop":
-                logger.error(f"Stopping workflow due to failed steps: {failed_steps}")
-                break
+                sizes[key] = len(serialized[0])
+                pending[key] = serialized
+        
+        run = self._runs.get(workflow.id)
+        if run is not None and ceiling is not None:
+            # Keys this output overwrites no longer hold their old values
+            held = run.output_memory + sum(sizes.values()) - sum(run.output_sizes.get(key, 0) for key in sizes)
+            if held > ceiling and store is not None:
+                for key in sorted(pending, key=lambda key: sizes[key], reverse=True):
+                    output[key] = store.put(*pending[key])
+                    held -= sizes[key]
+                    sizes[key] = 0
+                    if held <= ceiling:
+                        break
+            if held > ceiling:
+                return f"Step output exceeds the workflow output memory limit ({held} > {ceiling} bytes)"
+            run.output_sizes.update(sizes)
+            run.output_memory = held
+        
+        result.output_data = output
+        return None
+    
+    def _get_parser(self):
+        if self._parser is None:
+            # Imported here: the parser module imports this one
+            from .workflow_parser import WorkflowParser
+            self._parser = WorkflowParser()
+        return self._parser
+    
+    def _definition_dict(self, workflow: WorkflowDefinition) -> Optional[Dict[str, Any]]:
+        """Serializable workflow definition, for the journal"""
+        if self.journal is None:
+            return None
+        return self._get_parser().to_dict(workflow)
+    
+    async def resume_from_journal(self, workflow_id: str,
+                                  workflow: Optional[WorkflowDefinition] = None) -> Optional[WorkflowDefinition]:
+        """
+        Resume a journaled run, e.g. after a restart.
+        
+        Completed and skipped steps keep their journaled outputs and are not
+        executed again; failed, interrupted and pending steps run.
+        
+        Args:
+            workflow_id: ID of the run to resume
+            workflow: Definition to resume into (default: rebuilt from the journal)
+        
+        Returns:
+            Updated workflow, or None if the journal has no such run
+        """
+        if self.journal is None:
+            raise RuntimeError("Workflow journal is not enabled")
+        if workflow_id in self.running_workflows:
+            raise RuntimeError(f"Workflow is already running: {workflow_id}")
+        
+        state = self.journal.load(workflow_id)
+        if state is None:
+            return None
+        
+        if workflow is None:
+            workflow = self._get_parser().parse_from_dict(state["definition"])
+        
+        # Context is the initial context plus the completed steps' outputs,
+        # in completion order
+        context = dict(state["context"] or {})
+        for step in workflow.steps:
+            output = state["completed"].get(step.id)
+            if output is not None:
+                if self.output_store is not None:
+                    output = decode_refs(output)
+                step.status = StepStatus.COMPLETED
+                step.result = StepResult(success=True, output_data=output)
+            elif step.id in state["skipped"]:
+                step.status = StepStatus.SKIPPED
+            else:
+                step.status = StepStatus.PENDING
+                step.result = None
+                step.error = None
+                step.attempts = 0
+        for output in state["completed"].values():
+            context.update(decode_refs(output) if self.output_store is not None else output)
+        workflow.execution_context = context
+        
+        logger.info(f"Resuming workflow {workflow_id}: {len(state['completed'])} steps already completed")
+        return await self.execute_workflow(workflow, resume=True)
+    
+    def get_incomplete_workflows(self) -> List[Dict[str, Any]]:
+        """Journaled runs that never finished (e.g. interrupted by a restart)"""
+        if self.journal is None:
+            return []
+        return [
+            run for run in self.journal.get_incomplete_workflows()
+            if run["workflow_id"] not in self.running_workflows
+        ]
+    
+    def _estimate_duration(self, workflow: WorkflowDefinition, step: WorkflowStep) -> float:
+        """Declared duration, else the duration observed in earlier runs, else 1s"""
+        if step.estimated_duration is not None:
+            return step.estimated_duration
+        return self._step_durations.get((workflow.name, step.id), 1.0)
+    
+    def _record_duration(self, workflow: WorkflowDefinition, step: WorkflowStep):
+        """Moving average of a step's duration across runs"""
+        if step.started_at is None or step.completed_at is None:
+            return
+        duration = step.completed_at - step.started_at
+        key = (workflow.name, step.id)
+        previous = self._step_durations.get(key)
+        self._step_durations[key] = duration if previous is None else 0.7 * previous + 0.3 * duration
     
     async def _execute_step(self, step: WorkflowStep, workflow: WorkflowDefinition) -> StepResult:
         """Execute a single workflow step with retry logic"""
@@ -300,7 +624,7 @@ class WorkflowEngine:
                         step.error = result.error
                         step.completed_at = time.time()
                         return result
-                        
+            
             except asyncio.TimeoutError:
                 error = f"Step timed out after {step.timeout} seconds"
                 logger.error(f"Step timeout: {step.id} - {error}")
@@ -311,7 +635,7 @@ class WorkflowEngine:
                     step.error = error
                     step.completed_at = time.time()
                     return StepResult(success=False, error=error)
-                    
+            
             except Exception as e:
                 error = f"Step execution error: {str(e)}"
                 logger.error(f"Step error: {step.id} - {error}")
@@ -344,18 +668,27 @@ class WorkflowEngine:
                 timeout = step.timeout * (1.2 ** attempt)  # Increase timeout each attempt
                 
                 # Execute the step with timeout
-                result = await asyncio.wait_for(
-                    self.step_executor.execute_step(step, workflow.execution_context),
-                    timeout=timeout
-                )
+                attempt_started = time.time()
+                try:
+                    result = await asyncio.wait_for(
+                        self.step_executor.execute_step(step, self._step_context(workflow)),
+                        timeout=timeout
+                    )
+                finally:
+                    self._span(workflow, step.id, SpanKind.EXECUTION, attempt_started, step.attempts)
                 
                 if result.success:
                     step.completed_at = time.time()
-                    step.result = result
                     
-                    # Update workflow context with step results
+                    # Update workflow context with step results (large values by reference)
                     if result.output_data:
+                        error = self._retain_output(workflow, result)
+                        if error:
+                            step.error = error
+                            step.status = StepStatus.FAILED
+                            return StepResult(success=False, error=error)
                         workflow.execution_context.update(result.output_data)
+                    step.result = result
                     
                     logger.info(f"Step completed successfully: {step.id}")
                     return result
@@ -373,12 +706,12 @@ class WorkflowEngine:
                             # Recovery successful, continue to next attempt
                             wait_time = min(2 ** attempt, 30)  # Cap at 30 seconds
                             logger.info(f"Applying recovery strategy, waiting {wait_time}s before retry")
-                            await asyncio.sleep(wait_time)
+                            await self._backoff(step, workflow, wait_time)
                             continue
                         else:
                             # Recovery failed, exit early
                             break
-                    
+            
             except asyncio.TimeoutError:
                 last_error = f"Step timed out after {timeout:.1f} seconds"
                 logger.error(f"Step timeout: {step.id} - {last_error}")
@@ -387,7 +720,7 @@ class WorkflowEngine:
                     # Try timeout recovery
                     if await self._recover_from_timeout(step, workflow, attempt):
                         continue
-                    
+            
             except Exception as e:
                 last_error = f"Step execution error: {str(e)}"
                 logger.error(f"Step error: {step.id} - {last_error}")
@@ -427,7 +760,7 @@ class WorkflowEngine:
         elif any(keyword in error_lower for keyword in ["memory", "disk", "resource", "quota"]):
             logger.info(f"Resource error in step {step.id}, attempting cleanup")
             # Could trigger cleanup operations
-            await asyncio.sleep(5)  # Wait for resources to free up
+            await self._backoff(step, workflow, 5, "resource recovery")  # Wait for resources to free up
             return True
         
         # File not found errors
@@ -451,7 +784,7 @@ class WorkflowEngine:
         if step.step_type == StepType.FILE_OPERATION:
             if "batch_size" in step.parameters:
                 step.parameters["batch_size"] = max(step.parameters["batch_size"] // 2, 1)
-            
+        
         return True
     
     async def _recover_from_error(self, step: WorkflowStep, workflow: WorkflowDefinition,
@@ -461,7 +794,7 @@ class WorkflowEngine:
         
         # For network-related steps, wait longer between retries
         if step.step_type in [StepType.MCP_TOOL, StepType.SYSTEM_COMMAND]:
-            await asyncio.sleep(min(5 * (attempt + 1), 30))
+            await self._backoff(step, workflow, min(5 * (attempt + 1), 30), "error recovery")
         
         # Try alternative parameters for certain step types
         if step.step_type == StepType.LLM_QUERY and "model_type" in step.parameters:
@@ -479,7 +812,7 @@ class WorkflowEngine:
             return True
         
         for condition in step.conditions:
-            if not await self.condition_evaluator.evaluate(condition, workflow.execution_context):
+            if not await self.condition_evaluator.evaluate(condition, self._step_context(workflow)):
                 logger.debug(f"Step condition not met: {step.id} - {condition}")
                 return False
         
@@ -504,9 +837,9 @@ class WorkflowEngine:
         """Handle overall workflow failure"""
         logger.error(f"Workflow failure: {workflow.id} - {error}")
         
-        # Mark remaining steps as skipped
+        # Mark remaining steps (and those cancelled in flight) as skipped
         for step in workflow.steps:
-            if step.status == StepStatus.PENDING:
+            if step.status in [StepStatus.PENDING, StepStatus.RUNNING]:
                 step.status = StepStatus.SKIPPED
     
     async def _rollback_workflow(self, workflow: WorkflowDefinition, failed_step_id: str):
@@ -530,10 +863,20 @@ class WorkflowEngine:
                 logger.error(f"Rollback failed for step: {step.id} - {e}")
     
     async def pause_workflow(self, workflow_id: str) -> bool:
-        """Pause a running workflow"""
+        """
+        Pause a running workflow.
+        
+        No new steps start; steps already running finish. The pause is one
+        journal event, since the journal already holds every completed
+        step's output.
+        """
         if workflow_id in self.running_workflows:
             workflow = self.running_workflows[workflow_id]
             workflow.status = WorkflowStatus.PAUSED
+            run = self._runs.get(workflow_id)
+            if run and run.scheduler:
+                run.scheduler.pause()
+            self._journal("workflow_paused", workflow_id)
             logger.info(f"Workflow paused: {workflow_id}")
             return True
         return False
@@ -544,6 +887,10 @@ class WorkflowEngine:
             workflow = self.running_workflows[workflow_id]
             if workflow.status == WorkflowStatus.PAUSED:
                 workflow.status = WorkflowStatus.RUNNING
+                run = self._runs.get(workflow_id)
+                if run and run.scheduler:
+                    run.scheduler.resume()
+                self._journal("workflow_resumed", workflow_id)
                 logger.info(f"Workflow resumed: {workflow_id}")
                 return True
         return False
@@ -560,6 +907,11 @@ class WorkflowEngine:
                 if step.status in [StepStatus.PENDING, StepStatus.RUNNING]:
                     step.status = StepStatus.SKIPPED
             
+            # A paused run drains its (now skipped) steps and finishes
+            run = self._runs.get(workflow_id)
+            if run and run.scheduler and run.scheduler.paused:
+                run.scheduler.resume()
+            
             logger.info(f"Workflow cancelled: {workflow_id}")
             return True
         return False
@@ -593,7 +945,48 @@ class WorkflowEngine:
             "completed_at": workflow.completed_at,
             "current_step": workflow.current_step,
             "step_statuses": step_statuses,
-            "execution_context": workflow.execution_context
+            "execution_context": (encode_refs(workflow.execution_context) if self.output_store is not None
+                                  else workflow.execution_context),
+            "profile": workflow.profile.to_dict()
+        }
+    
+    def get_workflow_trace(self, workflow_id: str, path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Timing spans of a workflow in Chrome trace format.
+        
+        Args:
+            workflow_id: Running or recent workflow
+            path: Also write the trace to this JSON file
+        
+        Returns:
+            Trace dict ({"traceEvents": [...]}), or None if the workflow is unknown
+        """
+        workflow = self.running_workflows.get(workflow_id)
+        if workflow is None:
+            workflow = next((w for w in self.workflow_history if w.id == workflow_id), None)
+            if workflow is None:
+                return None
+        
+        trace = workflow.profile.to_chrome_trace(
+            workflow.name, [step.id for step in workflow.steps], workflow.started_at
+        )
+        if path:
+            with open(path, "w") as f:
+                json.dump(trace, f)
+        return trace
+    
+    def get_engine_stats(self) -> Dict[str, Any]:
+        """Get engine statistics"""
+        return {
+            "running_workflows": len(self.running_workflows),
+            "max_concurrent_workflows": self._max_concurrent_workflows,
+            "max_concurrent_steps": self.config.max_concurrent_steps,
+            "cached_plans": len(self._plans),
+            "plan_cache_hits": self.plan_cache_hits,
+            "plan_cache_misses": self.plan_cache_misses,
+            "hedging": self.step_executor.hedger.get_stats(),
+            "journal": self.journal.get_stats() if self.journal else None,
+            "output_store": self.output_store.get_stats() if self.output_store else None
         }
     
     def get_running_workflows(self) -> List[Dict[str, Any]]:
@@ -0,0 +1,224 @@
+"""
+Workflow Journal
+
+Durable, append-only execution journal for workflow runs. Every run records
+its definition and initial context once, then one small event per step
+start, completion (with the step's output), failure or skip, and per
+pause/resume. Nothing is rewritten while a workflow runs, so checkpointing
+costs one insert per event; after a restart a run is rebuilt by replaying
+its events, and completed steps are not executed again.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+from ...utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class WorkflowJournal:
+    """
+    SQLite-backed workflow execution journal.
+    
+    Features:
+    - Append-only event log per workflow run (WAL mode)
+    - Step outputs journaled on completion
+    - Replay of a run's state for resume
+    - Compaction of finished runs
+    """
+    
+    def __init__(self, db_path: str = "workflow_journal.db"):
+        """
+        Initialize workflow journal.
+        
+        Args:
+            db_path: Path to SQLite database file
+        """
+        self.db_path = db_path
+        self.connection = sqlite3.connect(db_path)
+        self.connection.row_factory = sqlite3.Row
+        # Appends are sequential writes to the WAL; NORMAL syncs at checkpoints
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_events (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                workflow_id TEXT NOT NULL,
+                event TEXT NOT NULL,
+                step_id TEXT,
+                timestamp REAL NOT NULL,
+                data TEXT
+            )
+        """)
+        self.connection.execute("""
+            CREATE INDEX IF NOT EXISTS idx_workflow_events
+            ON workflow_events(workflow_id, seq)
+        """)
+        
+        # One row per run, for listing and compaction
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS workflow_runs (
+                workflow_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                status TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                finished_at REAL
+            )
+        """)
+        self.connection.commit()
+        
+        # Statistics
+        self.events_written = 0
+        
+        logger.info(f"Workflow journal initialized with database: {db_path}")
+    
+    def record(self, workflow_id: str, event: str, step_id: Optional[str] = None,
+               data: Optional[Dict[str, Any]] = None):
+        """Append one event"""
+        self.connection.execute(
+            "INSERT INTO workflow_events (workflow_id, event, step_id, timestamp, data) VALUES (?, ?, ?, ?, ?)",
+            (workflow_id, event, step_id, time.time(),
+             json.dumps(data, default=str) if data is not None else None)
+        )
+        self.connection.commit()
+        self.events_written += 1
+    
+    def workflow_started(self, workflow_id: str, name: str, definition: Dict[str, Any],
+                         context: Dict[str, Any]):
+        """Record a new run with everything needed to rebuild it"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO workflow_runs (workflow_id, name, status, started_at, finished_at) "
+            "VALUES (?, ?, 'running', ?, NULL)",
+            (workflow_id, name, time.time())
+        )
+        self.record(workflow_id, "workflow_started", data={"definition": definition, "context": context})
+    
+    def workflow_finished(self, workflow_id: str, status: str):
+        self.connection.execute(
+            "UPDATE workflow_runs SET status = ?, finished_at = ? WHERE workflow_id = ?",
+            (status, time.time(), workflow_id)
+        )
+        self.record(workflow_id, "workflow_finished", data={"status": status})
+    
+    def workflow_paused(self, workflow_id: str):
+        self.connection.execute(
+            "UPDATE workflow_runs SET status = 'paused' WHERE workflow_id = ?", (workflow_id,)
+        )
+        self.record(workflow_id, "workflow_paused")
+    
+    def workflow_resumed(self, workflow_id: str):
+        """Record a resume, after a pause or of an interrupted or failed run"""
+        self.connection.execute(
+            "UPDATE workflow_runs SET status = 'running', finished_at = NULL WHERE workflow_id = ?",
+            (workflow_id,)
+        )
+        self.record(workflow_id, "workflow_resumed")
+    
+    def load(self, workflow_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Replay a run's events.
+        
+        Returns:
+            {"definition", "context", "status", "completed" (step ID -> output,
+            in completion order), "skipped"}, or None if the run is unknown
+        """
+        rows = self.connection.execute(
+            "SELECT event, step_id, data FROM workflow_events WHERE workflow_id = ? ORDER BY seq",
+            (workflow_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        
+        state: Dict[str, Any] = {
+            "definition": None,
+            "context": {},
+            "status": "running",
+            "completed": {},
+            "skipped": set()
+        }
+        for row in rows:
+            event, step_id = row["event"], row["step_id"]
+            data = json.loads(row["data"]) if row["data"] else {}
+            if event == "workflow_started":
+                state["definition"] = data["definition"]
+                state["context"] = data["context"]
+                state["completed"] = {}
+                state["skipped"] = set()
+            elif event == "step_completed":
+                state["completed"][step_id] = data.get("output_data") or {}
+            elif event == "step_skipped":
+                state["skipped"].add(step_id)
+            elif event == "workflow_finished":
+                state["status"] = data["status"]
+            elif event in ("workflow_paused", "workflow_resumed"):
+                state["status"] = "paused" if event == "workflow_paused" else "running"
+        
+        if state["definition"] is None:
+            return None
+        return state
+    
+    def get_incomplete_workflows(self) -> List[Dict[str, Any]]:
+        """Runs that were started (or paused) and never finished"""
+        rows = self.connection.execute(
+            "SELECT workflow_id, name, status, started_at FROM workflow_runs "
+            "WHERE finished_at IS NULL ORDER BY started_at"
+        ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def compact(self, retention: float) -> int:
+        """
+        Compact the journal.
+        
+        Runs finished more than `retention` seconds ago are removed, and
+        finished runs drop their step start events, which only matter for
+        a run that may still be resumed.
+        
+        Returns:
+            Number of events removed
+        """
+        cutoff = time.time() - retention
+        cursor = self.connection.cursor()
+        cursor.execute("""
+            DELETE FROM workflow_events WHERE workflow_id IN (
+                SELECT workflow_id FROM workflow_runs WHERE finished_at < ?
+            )
+        """, (cutoff,))
+        removed = cursor.rowcount
+        cursor.execute("DELETE FROM workflow_runs WHERE finished_at < ?", (cutoff,))
+        cursor.execute("""
+            DELETE FROM workflow_events WHERE event = 'step_started' AND workflow_id IN (
+                SELECT workflow_id FROM workflow_runs WHERE finished_at IS NOT NULL
+            )
+        """)
+        removed += cursor.rowcount
+        self.connection.commit()
+        
+        logger.debug(f"Compacted workflow journal: {removed} events removed")
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get journal statistics"""
+        events = self.connection.execute("SELECT COUNT(*) FROM workflow_events").fetchone()[0]
+        runs = self.connection.execute(
+            "SELECT COUNT(*), SUM(finished_at IS NULL) FROM workflow_runs"
+        ).fetchone()
+        return {
+            "db_path": self.db_path,
+            "events": events,
+            "runs": runs[0],
+            "incomplete_runs": runs[1] or 0,
+            "events_written": self.events_written
+        }
+    
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
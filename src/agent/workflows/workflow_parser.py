@@ -9,19 +9,37 @@ Date: 2025-07-13
 Session: 2.2
 """
 
+import copy
+import hashlib
 import json
+import os
 import yaml
 import uuid
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional, Union
 from dataclasses import dataclass
 import logging
 
 from .workflow_engine import WorkflowDefinition, WorkflowStep
 from .step_executor import StepType
+from .step_scheduler import validate_dependency_graph
 from ...utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# libyaml's loader when PyYAML was built with it (several times faster)
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass
+class ParsedFile:
+    """Parsed workflow file, reused while the file is unchanged"""
+    mtime_ns: int
+    size: int
+    digest: str
+    workflow: WorkflowDefinition  # Never handed out; callers get copies
+    has_id: bool                  # Whether the file fixes the workflow ID
+
 
 class WorkflowParser:
     """
@@ -32,10 +50,23 @@ class WorkflowParser:
     - YAML
     - Python dictionary
     - DSL (Domain Specific Language) strings
+    
+    Parsed files are cached by path and reused while their modification
+    time and size, or failing that their content hash, are unchanged.
     """
     
-    def __init__(self):
-        """Initialize workflow parser"""
+    def __init__(self, cache_size: int = 64):
+        """
+        Initialize workflow parser.
+        
+        Args:
+            cache_size: Parsed workflow files kept
+        """
+        self.cache_size = cache_size
+        self._file_cache: "OrderedDict[str, ParsedFile]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
         logger.info("Workflow parser initialized")
     
     def parse_from_dict(self, workflow_dict: Dict[str, Any]) -> WorkflowDefinition:
@@ -100,7 +131,7 @@ class WorkflowParser:
     def parse_from_yaml(self, yaml_str: str) -> WorkflowDefinition:
         """Parse workflow from YAML string"""
         try:
-            workflow_dict = yaml.safe_load(yaml_str)
+            workflow_dict = yaml.load(yaml_str, Loader=YAML_LOADER)
             return self.parse_from_dict(workflow_dict)
         except yaml.YAMLError as e:
             raise ValueError(f"Invalid YAML format: {e}")
@@ -108,24 +139,97 @@ class WorkflowParser:
     def parse_from_file(self, file_path: str) -> WorkflowDefinition:
         """Parse workflow from file (JSON or YAML based on extension)"""
         try:
-            with open(file_path, 'r') as f:
-                content = f.read()
+            stat = os.stat(file_path)
+            cached = self._file_cache.get(file_path)
+            hit = True
+            if cached is None or (cached.mtime_ns, cached.size) != (stat.st_mtime_ns, stat.st_size):
+                with open(file_path, 'rb') as f:
+                    raw = f.read()
+                digest = hashlib.blake2b(raw, digest_size=16).hexdigest()
+                
+                if cached is not None and cached.digest == digest:
+                    # Touched but not changed
+                    cached.mtime_ns, cached.size = stat.st_mtime_ns, stat.st_size
+                else:
+                    hit = False
+                    self.cache_misses += 1
+                    workflow_dict = self._load_file_dict(file_path, raw.decode('utf-8'))
+                    cached = ParsedFile(
+                        mtime_ns=stat.st_mtime_ns,
+                        size=stat.st_size,
+                        digest=digest,
+                        workflow=self.parse_from_dict(workflow_dict),
+                        has_id='id' in workflow_dict
+                    )
+                    self._file_cache[file_path] = cached
+                    if len(self._file_cache) > self.cache_size:
+                        self._file_cache.popitem(last=False)
             
-            if file_path.endswith('.json'):
-                return self.parse_from_json(content)
-            elif file_path.endswith('.yaml') or file_path.endswith('.yml'):
-                return self.parse_from_yaml(content)
-            else:
-                # Try to auto-detect format
-                try:
-                    return self.parse_from_json(content)
-                except:
-                    return self.parse_from_yaml(content)
+            if hit:
+                self.cache_hits += 1
+                self._file_cache.move_to_end(file_path)
+            # Files without an ID give a fresh ID per call, cached or not
+            return self.copy_workflow(cached.workflow, cached.workflow.id if cached.has_id else None)
                     
         except Exception as e:
             logger.error(f"Failed to parse workflow from file {file_path}: {e}")
             raise ValueError(f"File parsing failed: {e}")
     
+    def _load_file_dict(self, file_path: str, content: str) -> Dict[str, Any]:
+        """Decode a workflow file's JSON or YAML content"""
+        if file_path.endswith('.json'):
+            try:
+                return json.loads(content)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JSON format: {e}")
+        
+        try:
+            if not (file_path.endswith('.yaml') or file_path.endswith('.yml')):
+                # Try to auto-detect format
+                try:
+                    return json.loads(content)
+                except json.JSONDecodeError:
+                    pass
+            return yaml.load(content, Loader=YAML_LOADER)
+        except yaml.YAMLError as e:
+            raise ValueError(f"Invalid YAML format: {e}")
+    
+    def copy_workflow(self, workflow: WorkflowDefinition, workflow_id: Optional[str] = None) -> WorkflowDefinition:
+        """
+        A new, unstarted instance of a workflow definition.
+        
+        Args:
+            workflow: Definition to copy (only its definition fields are used)
+            workflow_id: ID of the copy (default: a new UUID)
+        """
+        steps = [
+            WorkflowStep(
+                id=step.id,
+                name=step.name,
+                step_type=step.step_type,
+                action=step.action,
+                parameters=copy.deepcopy(step.parameters),
+                dependencies=list(step.dependencies),
+                conditions=list(step.conditions),
+                retry_count=step.retry_count,
+                timeout=step.timeout,
+                parallel_group=step.parallel_group,
+                estimated_duration=step.estimated_duration,
+                idempotent=step.idempotent
+            )
+            for step in workflow.steps
+        ]
+        return WorkflowDefinition(
+            id=workflow_id or str(uuid.uuid4()),
+            name=workflow.name,
+            description=workflow.description,
+            steps=steps,
+            global_timeout=workflow.global_timeout,
+            max_retries=workflow.max_retries,
+            failure_strategy=workflow.failure_strategy,
+            context=copy.deepcopy(workflow.context)
+        )
+    
     def parse_from_dsl(self, dsl_str: str) -> WorkflowDefinition:
         """
         Parse workflow from simple DSL format.
@@ -189,6 +293,8 @@ class WorkflowParser:
         retry_count = step_data.get('retry_count', 3)
         timeout = step_data.get('timeout', 300.0)
         parallel_group = step_data.get('parallel_group')
+        estimated_duration = step_data.get('estimated_duration')
+        idempotent = step_data.get('idempotent', False)
         
         return WorkflowStep(
             id=step_id,
@@ -200,7 +306,9 @@ class WorkflowParser:
             conditions=conditions,
             retry_count=retry_count,
             timeout=timeout,
-            parallel_group=parallel_group
+            parallel_group=parallel_group,
+            estimated_duration=estimated_duration,
+            idempotent=idempotent
         )
     
     def _parse_dsl_step(self, line: str) -> WorkflowStep:
@@ -260,49 +368,17 @@ class WorkflowParser:
     
     def _validate_workflow(self, workflow: WorkflowDefinition):
         """Validate workflow definition"""
-        # Check for duplicate step IDs
+        # Duplicate IDs, unknown dependencies and cycles, in one iterative pass
         step_ids = [step.id for step in workflow.steps]
-        if len(step_ids) != len(set(step_ids)):
-            raise ValueError("Duplicate step IDs found")
-        
-        # Check dependency references
-        for step in workflow.steps:
-            for dep in step.dependencies:
-                if dep not in step_ids:
-                    raise ValueError(f"Step {step.id} depends on non-existent step: {dep}")
-        
-        # Check for circular dependencies
-        self._check_circular_dependencies(workflow)
+        errors = validate_dependency_graph(step_ids, {step.id: step.dependencies for step in workflow.steps})
+        if errors:
+            raise ValueError("; ".join(errors))
         
         # Validate step actions
         for step in workflow.steps:
             if not step.action:
                 logger.warning(f"Step {step.id} has empty action")
     
-    def _check_circular_dependencies(self, workflow: WorkflowDefinition):
-        """Check for circular dependencies in workflow"""
-        step_deps = {step.id: set(step.dependencies) for step in workflow.steps}
-        
-        def has_cycle(node, visited, rec_stack):
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in step_deps.get(node, set()):
-                if neighbor not in visited:
-                    if has_cycle(neighbor, visited, rec_stack):
-                        return True
-                elif neighbor in rec_stack:
-                    return True
-            
-            rec_stack.remove(node)
-            return False
-        
-        visited = set()
-        for step_id in step_deps:
-            if step_id not in visited:
-                if has_cycle(step_id, visited, set()):
-                    raise ValueError("Circular dependency detected in workflow")
-    
     def to_dict(self, workflow: WorkflowDefinition) -> Dict[str, Any]:
         """Convert workflow definition to dictionary"""
         return {
@@ -324,7 +400,9 @@ class WorkflowParser:
                     'conditions': step.conditions,
                     'retry_count': step.retry_count,
                     'timeout': step.timeout,
-                    'parallel_group': step.parallel_group
+                    'parallel_group': step.parallel_group,
+                    'estimated_duration': step.estimated_duration,
+                    'idempotent': step.idempotent
                 }
                 for step in workflow.steps
             ]
@@ -0,0 +1,148 @@
+"""
+Workflow Profiler
+
+Per-step timing spans for workflow runs: how long each step waited for the
+concurrency budget once its dependencies were done, how long its condition
+checks and execution attempts took, and how long it slept between retries.
+At completion the critical path (the chain of steps that determined the
+run's duration) is derived from the spans, and a run can be exported in
+Chrome trace format for chrome://tracing or Perfetto.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+
+class SpanKind(Enum):
+    """What a step was doing during a span"""
+    QUEUE_WAIT = "queue_wait"          # Ready, waiting for the step budget
+    CONDITION = "condition"            # Evaluating step conditions
+    EXECUTION = "execution"            # One execution attempt
+    RETRY_BACKOFF = "retry_backoff"    # Sleeping before the next attempt
+
+
+@dataclass
+class TimingSpan:
+    """One timed interval of a step (wall-clock seconds)"""
+    step_id: str
+    kind: SpanKind
+    start: float
+    end: float
+    attempt: Optional[int] = None
+    detail: Optional[str] = None
+    
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class WorkflowProfile:
+    """Timing spans of one workflow run and its critical path"""
+    spans: List[TimingSpan] = field(default_factory=list)
+    critical_path: List[Dict[str, Any]] = field(default_factory=list)
+    critical_path_duration: float = 0.0
+    
+    def record(self, step_id: str, kind: SpanKind, start: float, end: float,
+               attempt: Optional[int] = None, detail: Optional[str] = None):
+        self.spans.append(TimingSpan(step_id, kind, start, end, attempt, detail))
+    
+    def step_totals(self) -> Dict[str, Dict[str, float]]:
+        """Step ID -> seconds spent per span kind, plus first start and last end"""
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            entry = totals.get(span.step_id)
+            if entry is None:
+                entry = totals[span.step_id] = {kind.value: 0.0 for kind in SpanKind}
+                entry["start"], entry["end"] = span.start, span.end
+            entry[span.kind.value] += span.duration
+            entry["start"] = min(entry["start"], span.start)
+            entry["end"] = max(entry["end"], span.end)
+        return totals
+    
+    def analyze(self, dependencies: Mapping[str, Iterable[str]]) -> List[Dict[str, Any]]:
+        """
+        Compute the critical path from the recorded spans.
+        
+        Starting from the step that finished last, repeatedly follow the
+        dependency that finished last, i.e. the one that made the step
+        ready. Steps with no spans (not run in this execution) are ignored.
+        
+        Args:
+            dependencies: Step ID -> IDs of the steps it depends on
+        
+        Returns:
+            The critical path, first step first, each entry with the step's
+            start, end and time per span kind
+        """
+        totals = self.step_totals()
+        path: List[Dict[str, Any]] = []
+        current = max(totals, key=lambda step_id: totals[step_id]["end"], default=None)
+        while current is not None:
+            path.append({"step_id": current, **totals[current]})
+            current = max(
+                (dep for dep in dependencies.get(current, ()) if dep in totals),
+                key=lambda dep: totals[dep]["end"],
+                default=None
+            )
+        path.reverse()
+        
+        self.critical_path = path
+        self.critical_path_duration = path[-1]["end"] - path[0]["start"] if path else 0.0
+        return path
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Per-step timings and critical path, for status reports"""
+        return {
+            "step_timings": self.step_totals(),
+            "critical_path": [entry["step_id"] for entry in self.critical_path],
+            "critical_path_duration": self.critical_path_duration,
+            "critical_path_steps": self.critical_path
+        }
+    
+    def to_chrome_trace(self, name: str, step_ids: List[str], origin: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Spans in Chrome trace event format (one track per step).
+        
+        Args:
+            name: Workflow name (the process name in the trace)
+            step_ids: Steps in declaration order, for track order
+            origin: Time of trace zero (default: first span start)
+        """
+        if origin is None:
+            origin = min((span.start for span in self.spans), default=0.0)
+        critical = {entry["step_id"] for entry in self.critical_path}
+        tracks = {step_id: index + 1 for index, step_id in enumerate(step_ids)}
+        
+        events: List[Dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": 1, "args": {"name": name}}
+        ]
+        for step_id, tid in tracks.items():
+            events.append({"name": "thread_name", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"name": step_id + (" (critical)" if step_id in critical else "")}})
+            events.append({"name": "thread_sort_index", "ph": "M", "pid": 1, "tid": tid,
+                           "args": {"sort_index": tid}})
+        
+        for span in self.spans:
+            args: Dict[str, Any] = {"step_id": span.step_id, "critical_path": span.step_id in critical}
+            if span.attempt is not None:
+                args["attempt"] = span.attempt
+            if span.detail:
+                args["detail"] = span.detail
+            events.append({
+                "name": span.kind.value,
+                "cat": span.kind.value,
+                "ph": "X",
+                "pid": 1,
+                "tid": tracks.get(span.step_id, 0),
+                "ts": round((span.start - origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "args": args
+            })
+        
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
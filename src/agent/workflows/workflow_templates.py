@@ -8,13 +8,16 @@ Date: 2025-07-13
 Session: 2.2
 """
 
-import uuid
+import hashlib
+import json
+from collections import OrderedDict
 from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
 from .workflow_engine import WorkflowDefinition, WorkflowStep
 from .step_executor import StepType
 from .workflow_parser import WorkflowParser
+from .template_renderer import StructureRenderer, compile_structure
 
 
 @dataclass
@@ -32,12 +35,26 @@ class WorkflowTemplates:
     Collection of pre-built workflow templates.
     
     Templates can be instantiated with parameters to create specific workflows.
+    Each template is compiled once for substitution, and instantiated
+    workflows are cached by template and parameters.
     """
     
-    def __init__(self):
-        """Initialize workflow templates"""
+    def __init__(self, cache_size: int = 128):
+        """
+        Initialize workflow templates.
+        
+        Args:
+            cache_size: Instantiated workflows kept, by template and parameters
+        """
         self.parser = WorkflowParser()
         self.templates = self._load_builtin_templates()
+        self._compiled: Dict[str, StructureRenderer] = {}
+        
+        # Parsed workflows, copied for each instantiation
+        self.cache_size = cache_size
+        self._instances: "OrderedDict[tuple, WorkflowDefinition]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
     
     def _load_builtin_templates(self) -> Dict[str, Dict[str, Any]]:
         """Load built-in workflow templates"""
@@ -721,36 +738,37 @@ class WorkflowTemplates:
             if param_name not in parameters and param_def.default is not None:
                 parameters[param_name] = param_def.default
         
-        # Substitute parameters in template
-        workflow_dict = self._substitute_parameters(template['template'], parameters)
-        
-        # Add unique ID
-        workflow_dict['id'] = str(uuid.uuid4())
-        
-        # Parse to workflow definition
-        workflow = self.parser.parse_from_dict(workflow_dict)
+        key = (template_id, self._parameter_hash(parameters))
+        prototype = self._instances.get(key)
+        if prototype is not None:
+            self._instances.move_to_end(key)
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            workflow_dict = self._substitute_parameters(template['template'], parameters, template_id)
+            prototype = self.parser.parse_from_dict(workflow_dict)
+            self._instances[key] = prototype
+            if len(self._instances) > self.cache_size:
+                self._instances.popitem(last=False)
         
-        return workflow
+        # Each instance is a separate run: new ID, own steps and state
+        return self.parser.copy_workflow(prototype)
     
-    def _substitute_parameters(self, template_dict: Dict[str, Any], parameters: Dict[str, Any]) -> Dict[str, Any]:
-        """Recursively substitute parameters in template"""
-        if isinstance(template_dict, dict):
-            result = {}
-            for key, value in template_dict.items():
-                result[key] = self._substitute_parameters(value, parameters)
-            return result
-        elif isinstance(template_dict, list):
-            return [self._substitute_parameters(item, parameters) for item in template_dict]
-        elif isinstance(template_dict, str):
-            # Substitute {parameter} placeholders
-            result = template_dict
-            for param_name, param_value in parameters.items():
-                placeholder = f'{{{param_name}}}'
-                if placeholder in result:
-                    result = result.replace(placeholder, str(param_value))
-            return result
-        else:
-            return template_dict
+    @staticmethod
+    def _parameter_hash(parameters: Dict[str, Any]) -> str:
+        encoded = json.dumps(parameters, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+    
+    def _substitute_parameters(self, template_dict: Dict[str, Any], parameters: Dict[str, Any],
+                               template_id: Optional[str] = None) -> Dict[str, Any]:
+        """Substitute {parameter} placeholders, compiling the template once per template ID"""
+        if template_id is None:
+            return compile_structure(template_dict)(parameters)
+        
+        render = self._compiled.get(template_id)
+        if render is None:
+            render = self._compiled[template_id] = compile_structure(template_dict)
+        return render(parameters)
     
     def add_custom_template(self, template_id: str, name: str, description: str,
                            parameters: List[TemplateParameter], template_dict: Dict[str, Any]):
@@ -761,6 +779,13 @@ class WorkflowTemplates:
             'parameters': parameters,
             'template': template_dict
         }
+        self._invalidate(template_id)
+    
+    def _invalidate(self, template_id: str):
+        """Drop compiled and instantiated forms of a replaced template"""
+        self._compiled.pop(template_id, None)
+        for key in [key for key in self._instances if key[0] == template_id]:
+            del self._instances[key]
     
     def export_template(self, template_id: str, format: str = 'json') -> str:
         """Export template definition"""
@@ -770,7 +795,6 @@ class WorkflowTemplates:
         template = self.templates[template_id]
         
         if format == 'json':
-            import json
             return json.dumps(template, indent=2, default=str)
         elif format == 'yaml':
             import yaml
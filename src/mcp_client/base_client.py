@@ -88,10 +88,15 @@ class BaseMCPClient(ABC):
         
         logger.info(f"Initialized MCP client with {len(config.servers)} servers")
     
-    async def initialize(self) -> bool:
+    async def initialize(self, tool_cache: Optional[Dict[str, List[Dict[str, Any]]]] = None) -> bool:
         """
         Initialize all MCP server connections and discover tools.
         
+        Args:
+            tool_cache: Optional tools/list results keyed by server URL, shared
+                between clients of the same servers. Servers already in the
+                cache are not asked again; new results are added to it.
+        
         Returns:
             True if at least one connection successful
         """
@@ -119,7 +124,7 @@ class BaseMCPClient(ABC):
         logger.info(f"Successfully connected to {successful_connections}/{len(connection_tasks)} servers")
         
         # Discover tools from connected servers
-        await self._discover_tools()
+        await self._discover_tools(tool_cache)
         
         return True
     
@@ -304,14 +309,14 @@ class BaseMCPClient(ABC):
             logger.error(f"Error initializing server {server_config.name}: {e}")
             return False
     
-    async def _discover_tools(self):
+    async def _discover_tools(self, tool_cache: Optional[Dict[str, List[Dict[str, Any]]]] = None):
         """Discover tools from all connected servers"""
         logger.info("Discovering tools from MCP servers...")
         
         discovery_tasks = []
         for server_name, connection in self._connections.items():
             if connection.is_connected:
-                task = self._discover_server_tools(server_name, connection)
+                task = self._discover_server_tools(server_name, connection, tool_cache)
                 discovery_tasks.append(task)
         
         if discovery_tasks:
@@ -320,18 +325,24 @@ class BaseMCPClient(ABC):
         total_tools = len(self._tools)
         logger.info(f"Discovered {total_tools} tools from {len(self._connections)} servers")
     
-    async def _discover_server_tools(self, server_name: str, connection: MCPConnection):
+    async def _discover_server_tools(self, server_name: str, connection: MCPConnection,
+                                     tool_cache: Optional[Dict[str, List[Dict[str, Any]]]] = None):
         """Discover tools from a specific server"""
         try:
-            # Request tools list
-            message = MCPMessage(
-                id=str(uuid.uuid4()),
-                method="tools/list",
-                params={}
-            )
-            
-            response = await connection.send_message(message)
-            tools_data = response.get("tools", [])
+            if tool_cache is not None and connection.server_url in tool_cache:
+                tools_data = tool_cache[connection.server_url]
+            else:
+                # Request tools list
+                message = MCPMessage(
+                    id=str(uuid.uuid4()),
+                    method="tools/list",
+                    params={}
+                )
+                
+                response = await connection.send_message(message)
+                tools_data = response.get("tools", [])
+                if tool_cache is not None:
+                    tool_cache[connection.server_url] = tools_data
             
             server_tool_names = []
             for tool_data in tools_data:
@@ -0,0 +1,74 @@
+"""
+Unit Tests for Compiled Workflow Conditions
+
+Tests the condition and expression compiler, and that conditional steps
+with an invalid expression fail instead of taking the else branch.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.agent.workflows.condition_evaluator import (
+    ConditionEvaluator, compile_condition, compile_expression
+)
+from src.agent.workflows.step_executor import StepExecutor, StepType
+from src.agent.workflows.workflow_engine import WorkflowStep
+
+
+def conditional_step(action: str) -> WorkflowStep:
+    return WorkflowStep(id="check", name="check", step_type=StepType.CONDITIONAL,
+                        action=action, parameters={})
+
+
+@pytest.mark.parametrize("condition, expected", [
+    ("count > 3", True),
+    ("count > 3 and name == 'build'", True),
+    ("exists(name)", True),
+    ("not_exists(missing)", True),
+    ("contains(name, uil)", True),
+    ("count*2==10", True),
+    ("items[0]==1", True),
+    ("false", False),
+])
+def test_compiled_conditions(condition, expected):
+    context = {"count": 5, "name": "build", "items": [1, 2]}
+    assert compile_condition(condition)(context) is expected
+
+
+def test_invalid_condition_is_false():
+    """Workflow step conditions treat invalid expressions as not met"""
+    evaluator = ConditionEvaluator()
+    assert asyncio.run(evaluator.evaluate("(x", {"x": 1})) is False
+    assert asyncio.run(evaluator.evaluate("__import__('os')", {})) is False
+
+
+def test_strict_expression_raises():
+    with pytest.raises(ValueError):
+        compile_expression("(x", strict=True)
+    with pytest.raises(ValueError):
+        compile_expression("open('file')", strict=True)
+    assert compile_expression("x > 1", strict=True)({"x": 2}) is True
+
+
+@pytest.mark.parametrize("action", ["(x", "x > (", "open('file')"])
+def test_conditional_step_with_invalid_expression_fails(action):
+    executor = StepExecutor()
+    result = asyncio.run(executor.execute_step(conditional_step(action), {"x": 1}))
+    assert result.success is False
+    assert "Condition evaluation failed" in result.error
+
+
+def test_conditional_step_result():
+    executor = StepExecutor()
+    result = asyncio.run(executor.execute_step(conditional_step("x > 1"), {"x": 2}))
+    assert result.success is True
+    assert result.output_data == {"condition_result": True}
@@ -0,0 +1,97 @@
+"""
+Unit Tests for Filesystem Server Request Cancellation
+
+Tests that notifications/cancelled only reaches in-flight tool calls of
+the client that sent it, since JSON-RPC request IDs are only unique per
+connection.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 1.2
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-servers" / "filesystem"))
+
+from server import FileSystemMCPServer, FileSystemConfig
+
+
+@pytest.fixture
+def fs_server(tmp_path):
+    """Filesystem server whose tool calls block until released"""
+    server = FileSystemMCPServer(FileSystemConfig(
+        allowed_paths=[str(tmp_path)],
+        sandbox_root=str(tmp_path),
+        index_dir=str(tmp_path / "index"),
+        index_watch=False
+    ))
+    yield server
+    server.close()
+
+
+def tool_call(request_id):
+    return {"jsonrpc": "2.0", "id": request_id, "method": "tools/call",
+            "params": {"name": "read_file", "arguments": {"path": "x"}}}
+
+
+def cancel(request_id):
+    return {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": request_id}}
+
+
+def test_cancel_only_reaches_sender(fs_server):
+    """Clients A and B both use ID 1; A's cancellation leaves B's call running"""
+    async def scenario():
+        release = asyncio.Event()
+        
+        async def blocking_tool_call(params):
+            await release.wait()
+            return {"content": [{"type": "text", "text": "done"}]}
+        
+        fs_server._handle_tool_call = blocking_tool_call
+        
+        call_a = asyncio.create_task(fs_server.handle_mcp_request(tool_call(1), client="A"))
+        call_b = asyncio.create_task(fs_server.handle_mcp_request(tool_call(1), client="B"))
+        await asyncio.sleep(0.01)
+        assert set(fs_server._inflight) == {("A", 1), ("B", 1)}
+        
+        response = await fs_server.handle_mcp_request(cancel(1), client="A")
+        assert response["cancelled"] is True
+        with pytest.raises(asyncio.CancelledError):
+            await call_a
+        assert not call_b.done()
+        assert set(fs_server._inflight) == {("B", 1)}
+        
+        release.set()
+        response_b = await call_b
+        assert response_b["id"] == 1
+        assert response_b["content"][0]["text"] == "done"
+        assert fs_server._inflight == {}
+    
+    asyncio.run(scenario())
+
+
+def test_cancel_unknown_request(fs_server):
+    """Cancelling another client's ID (or an unknown one) is a no-op"""
+    async def scenario():
+        release = asyncio.Event()
+        
+        async def blocking_tool_call(params):
+            await release.wait()
+            return {"content": []}
+        
+        fs_server._handle_tool_call = blocking_tool_call
+        call_b = asyncio.create_task(fs_server.handle_mcp_request(tool_call(7), client="B"))
+        await asyncio.sleep(0.01)
+        
+        response = await fs_server.handle_mcp_request(cancel(7), client="A")
+        assert response["cancelled"] is False
+        
+        release.set()
+        assert (await call_b)["id"] == 7
+    
+    asyncio.run(scenario())
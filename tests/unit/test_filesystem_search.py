@@ -0,0 +1,122 @@
+"""
+Unit Tests for Filesystem Server Search
+
+Tests search_files pattern matching, result order and indexed content
+search, and line matching of the content matcher.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 1.2
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-servers" / "filesystem"))
+
+from content_search import ContentMatcher, SearchStats
+from server import FileSystemMCPServer, FileSystemConfig
+from walker import TreeWalker
+
+
+def make_tree(root: Path, files):
+    for name in files:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("x = 1\n")
+
+
+@pytest.fixture
+def fs_server(tmp_path):
+    root = tmp_path / "root"
+    root.mkdir()
+    server = FileSystemMCPServer(FileSystemConfig(
+        allowed_paths=[str(root)],
+        sandbox_root=str(root),
+        index_dir=str(tmp_path / "index"),
+        index_watch=False
+    ))
+    yield server, root
+    server.close()
+
+
+@pytest.mark.parametrize("pattern, expected", [
+    ("src/*.py", ["lib/src/b.py", "src/a.py"]),
+    ("**/*.py", ["lib/src/b.py", "src/a.py", "src/sub/c.py", "xsrc/d.py"]),
+    ("src/**/c.py", ["src/sub/c.py"]),
+    ("s?c/[ab].py", ["lib/src/b.py", "src/a.py"]),
+])
+def test_slash_pattern_matches_at_any_depth(tmp_path, pattern, expected):
+    """A pattern with '/' behaves like Path.glob('**/' + pattern)"""
+    make_tree(tmp_path, ["src/a.py", "lib/src/b.py", "src/sub/c.py", "xsrc/d.py"])
+    walker = TreeWalker(pattern=pattern, files_only=True)
+    found = sorted(Path(entry.path).relative_to(tmp_path).as_posix() for entry in walker.walk(str(tmp_path)))
+    assert found == expected
+    assert found == sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.glob(f"**/{pattern}"))
+
+
+def test_search_results_sorted(fs_server):
+    server, root = fs_server
+    make_tree(root, [f"d{i}/f{j}.txt" for i in range(5) for j in range(5)])
+    server.config.walk_workers = 4
+    
+    result = server._search_files_sync({"path": str(root), "pattern": "*.txt", "use_index": False})
+    paths = [item["path"] for item in result["results"]]
+    assert len(paths) == 25
+    assert paths == sorted(paths)
+
+
+def test_hidden_entries_only_on_request(fs_server):
+    server, root = fs_server
+    make_tree(root, ["a.txt", ".hidden.txt", ".git/b.txt"])
+    
+    result = server._search_files_sync({"path": str(root), "pattern": "*.txt"})
+    assert [item["name"] for item in result["results"]] == ["a.txt"]
+    
+    result = server._search_files_sync({"path": str(root), "pattern": "*.txt", "include_hidden": True})
+    assert sorted(item["name"] for item in result["results"]) == [".hidden.txt", "a.txt", "b.txt"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("^import", [2, 3]),
+    ("os$", [2]),
+    ("^$", [4]),
+    ("^x", [1, 5]),
+    (r"1\s+import", []),
+    (r"[^#]*sys", [3]),
+])
+def test_regex_matches_single_lines(tmp_path, query, expected):
+    """Anchors match at line boundaries and no match spans a newline"""
+    path = tmp_path / "code.py"
+    path.write_text("x = 1\nimport os\nimport sys\n\nx = 2\n")
+    matches = ContentMatcher(query, regex=True, case_sensitive=True).search_file(str(path), SearchStats())
+    assert [match["line"] for match in matches] == expected
+
+
+def test_indexed_search_checks_unindexed_large_files(tmp_path):
+    """Files over the content size limit are still searched, on disk"""
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "small.txt").write_text("needle\n")
+    (root / "large.txt").write_text("x" * 200 + "\nneedle\n")
+    (root / "binary.txt").write_bytes(b"\0" * 200 + b"needle\n")
+    server = FileSystemMCPServer(FileSystemConfig(
+        allowed_paths=[str(root)],
+        sandbox_root=str(root),
+        index_dir=str(tmp_path / "index"),
+        index_watch=False,
+        index_max_content_size=100
+    ))
+    try:
+        server._query_index_sync({"path": str(root)})
+        args = {"path": str(root), "content_search": "needle"}
+        indexed = server._search_files_sync(args)
+        walked = server._search_files_sync(dict(args, use_index=False))
+        
+        assert indexed["index"] is not None
+        assert [item["name"] for item in indexed["results"]] == ["large.txt", "small.txt"]
+        assert indexed["results"] == walked["results"]
+    finally:
+        server.close()
@@ -0,0 +1,66 @@
+"""
+Unit Tests for the System Log Parser
+
+Tests error pattern analysis: error keywords are looked for in each line's
+message, not in the template that several lines were merged into.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-servers" / "system"))
+
+from log_parser import LogParser
+
+
+def analyze_errors(log_file: Path):
+    async def run():
+        parser = LogParser({"log_paths": [str(log_file)], "follow_logs": False})
+        await parser.initialize()
+        try:
+            return await parser.analyze_patterns({"log_files": [str(log_file)], "type": "errors"})
+        finally:
+            await parser.shutdown()
+    
+    return asyncio.run(run())["analysis"]
+
+
+def test_error_keywords_checked_per_line(tmp_path):
+    """Lines merged into one template are errors only if their own message says so"""
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    log_file = tmp_path / "app.log"
+    log_file.write_text(
+        f"{now} INFO backup job for volume data failed\n"
+        f"{now} INFO backup job for volume home completed\n"
+        f"{now} INFO backup job for volume logs failed\n"
+    )
+    
+    analysis = analyze_errors(log_file)
+    
+    assert analysis["error_count"] == 2
+    assert analysis["error_types"] == {"INFO": 2}
+    assert sorted(entry["message"] for entry in analysis["error_timeline"]) == [
+        "backup job for volume data failed",
+        "backup job for volume logs failed"
+    ]
+
+
+def test_error_levels_and_fixed_keywords(tmp_path):
+    now = time.strftime("%Y-%m-%d %H:%M:%S")
+    log_file = tmp_path / "app.log"
+    log_file.write_text(
+        f"{now} ERROR disk full\n"
+        f"{now} INFO request failed\n"
+        f"{now} INFO request served\n"
+    )
+    
+    analysis = analyze_errors(log_file)
+    
+    assert analysis["error_count"] == 2
+    assert analysis["error_types"] == {"ERROR": 1, "INFO": 1}
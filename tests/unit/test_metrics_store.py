@@ -0,0 +1,41 @@
+"""
+Unit Tests for the System Metrics Store
+
+Tests that rollup buckets average each column over the samples it has, so
+missing values don't drag means towards zero.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-servers" / "system"))
+
+from metrics_store import TimeSeries
+
+
+def test_rollup_mean_skips_missing_samples():
+    series = TimeSeries(["cpu", "load"], capacity=10, rollups={"1s": 5})
+    series.append(0.1, [10.0, np.nan])
+    series.append(0.5, [30.0, 4.0])
+    series.append(0.9, [np.nan, np.nan])
+    series.append(1.2, [0.0, 0.0])
+    
+    rollup = series.buffer("1s")
+    assert len(rollup) == 1
+    assert rollup.values[0].tolist() == [20.0, 4.0]
+
+
+def test_rollup_of_missing_column_is_nan():
+    series = TimeSeries(["cpu", "load"], capacity=10, rollups={"1s": 5})
+    series.append(0.1, [10.0, np.nan])
+    series.append(1.1, [0.0, 0.0])
+    
+    values = series.buffer("1s").values[0]
+    assert values[0] == 10.0
+    assert np.isnan(values[1])
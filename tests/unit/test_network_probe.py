@@ -0,0 +1,63 @@
+"""
+Unit Tests for System Network Probes
+
+Tests target parsing and that a bad target in check_ports gets an error
+row instead of failing the whole batch.
+
+Author: Claude Code
+Date: 2025-07-13
+Phase: 2.1
+"""
+
+import asyncio
+import socket
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / "mcp-servers" / "system"))
+
+from network_monitor import NetworkMonitor
+from network_probe import parse_target, tcp_probe
+
+
+@pytest.mark.parametrize("target, expected", [
+    ("example.com:80", ("example.com", 80)),
+    ("[::1]:8080", ("::1", 8080)),
+    ({"host": "10.0.0.1", "port": "22"}, ("10.0.0.1", 22)),
+    ("localhost:0", ("localhost", 0)),
+    ("localhost:65535", ("localhost", 65535)),
+])
+def test_parse_target(target, expected):
+    assert parse_target(target) == expected
+
+
+@pytest.mark.parametrize("target", [
+    "example.com", "example.com:http", ":80", "localhost:70000", "localhost:-1",
+    {"host": "localhost", "port": 65536}, {"host": "localhost"},
+])
+def test_parse_target_rejects(target):
+    with pytest.raises(ValueError):
+        parse_target(target)
+
+
+def test_tcp_probe_out_of_range_port():
+    result = asyncio.run(tcp_probe("127.0.0.1", 70000, 1.0))
+    assert result["state"] == "error"
+
+
+def test_check_ports_reports_bad_targets_per_row():
+    # A port nothing listens on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    
+    monitor = NetworkMonitor({})
+    result = asyncio.run(monitor.check_ports({"targets": [f"127.0.0.1:{port}", "127.0.0.1:70000"]}))
+    
+    assert result["success"] is True
+    assert result["rows"][0] == ["127.0.0.1", port, "closed", result["rows"][0][3], None]
+    host, _, state, _, error = result["rows"][1]
+    assert (host, state) == ("127.0.0.1:70000", "error")
+    assert "out of range" in error
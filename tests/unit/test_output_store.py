@@ -0,0 +1,175 @@
+"""
+Unit Tests for the Workflow Output Store
+
+Tests spilling of large step outputs to the content-addressed store, that
+spilled values load back with their original types, the per-workflow
+output memory limit, and that pruning keeps values of resumable runs.
+
+Author: Claude Code
+Date: 2025-07-13
+Session: 2.2
+"""
+
+import asyncio
+import datetime
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from src.agent.workflows.output_store import OutputContext, OutputRef, OutputStore, serialize_value
+from src.agent.workflows.workflow_engine import (
+    WorkflowEngine, WorkflowEngineConfig, WorkflowDefinition, WorkflowStep,
+    WorkflowStatus, StepStatus
+)
+from src.agent.workflows.step_executor import StepType
+
+BIG = "x" * 5000
+
+
+def copy_step(step_id: str, source: str, target: str, dependencies=()) -> WorkflowStep:
+    return WorkflowStep(id=step_id, name=step_id, step_type=StepType.TRANSFORMATION, action="copy",
+                        parameters={"type": "copy", "source": source, "target": target},
+                        dependencies=list(dependencies), retry_count=0)
+
+
+def make_workflow() -> WorkflowDefinition:
+    """produce (large output) -> consume (reads it by reference)"""
+    return WorkflowDefinition(
+        id="spill-test",
+        name="spill test",
+        description="",
+        steps=[
+            copy_step("produce", "source", "big"),
+            copy_step("consume", "big", "again", ["produce"])
+        ],
+        execution_context={"source": BIG}
+    )
+
+
+@pytest.mark.parametrize("value", [
+    "text",
+    b"\x00bytes",
+    {"a": [1, 2.5, None, True], "b": {"c": "d"}},
+    (1, 2, 3),
+    {1: "int key"},
+    {"when": datetime.datetime(2025, 7, 13, 12, 0)},
+    {"set": {1, 2}},
+    [("a", 1)],
+])
+def test_round_trip_keeps_types(tmp_path, value):
+    store = OutputStore(str(tmp_path / "outputs"))
+    ref = store.put(*serialize_value(value))
+    loaded = ref.load()
+    assert loaded == value
+    assert type(loaded) is type(value)
+    assert b"".join(ref.iter_chunks(3)) == open(ref.path, "rb").read()
+
+
+def test_unstorable_value_raises():
+    with pytest.raises(TypeError):
+        serialize_value([lambda: None])
+
+
+def test_put_deduplicates(tmp_path):
+    store = OutputStore(str(tmp_path / "outputs"))
+    first = store.put(b"same", "bytes")
+    second = store.put(b"same", "bytes")
+    assert first == second
+    assert store.values_written == 1
+    assert store.deduplicated == 1
+
+
+def test_output_context_loads_on_access(tmp_path):
+    store = OutputStore(str(tmp_path / "outputs"))
+    context = OutputContext({"ref": store.put(*serialize_value(BIG)), "plain": 1})
+    assert "ref" in context
+    assert context["ref"] == BIG
+    assert context.get("plain") == 1
+    assert dict(context) == {"ref": BIG, "plain": 1}
+
+
+def test_large_outputs_spill_and_pass_by_reference(tmp_path):
+    engine = WorkflowEngine(config=WorkflowEngineConfig(
+        output_store_path=str(tmp_path / "outputs"), output_spill_threshold=1000
+    ))
+    streamed = []
+    engine.add_output_listener(lambda workflow_id, step_id, output: streamed.append((step_id, output)))
+    
+    workflow = asyncio.run(engine.execute_workflow(make_workflow()))
+    
+    assert workflow.status == WorkflowStatus.COMPLETED
+    big = workflow.execution_context["big"]
+    assert isinstance(big, OutputRef)
+    assert big.load() == BIG
+    # The consumer read the value, and its copy is the same stored content
+    assert workflow.execution_context["again"] == big
+    assert engine.output_store.values_written == 1
+    assert [step_id for step_id, _ in streamed] == ["produce", "consume"]
+    assert isinstance(streamed[0][1]["big"], OutputRef)
+    
+    status = engine.get_workflow_status("spill-test")
+    assert status["execution_context"]["big"]["$output_ref"] == big.digest
+
+
+def test_output_memory_limit_without_store_fails_step():
+    engine = WorkflowEngine(config=WorkflowEngineConfig(max_workflow_output_memory=1000))
+    workflow = asyncio.run(engine.execute_workflow(make_workflow()))
+    
+    assert workflow.status == WorkflowStatus.FAILED
+    assert workflow.steps[0].status == StepStatus.FAILED
+    assert "output memory limit" in workflow.steps[0].error
+
+
+def test_output_memory_limit_spills_below_threshold(tmp_path):
+    engine = WorkflowEngine(config=WorkflowEngineConfig(
+        output_store_path=str(tmp_path / "outputs"), max_workflow_output_memory=1000
+    ))
+    workflow = asyncio.run(engine.execute_workflow(make_workflow()))
+    
+    assert workflow.status == WorkflowStatus.COMPLETED
+    assert isinstance(workflow.execution_context["big"], OutputRef)
+
+
+def test_prune_keeps_values_of_resumable_runs(tmp_path):
+    """Values referenced by an interrupted, journaled run survive pruning and resume"""
+    config = WorkflowEngineConfig(
+        output_store_path=str(tmp_path / "outputs"),
+        output_spill_threshold=1000,
+        journal_path=str(tmp_path / "journal.db")
+    )
+    engine = WorkflowEngine(config=config)
+    workflow = make_workflow()
+    workflow.steps.append(WorkflowStep(id="slow", name="slow", step_type=StepType.WAIT, action="wait",
+                                       parameters={"duration": 0.5}, dependencies=["consume"],
+                                       retry_count=0))
+    
+    async def interrupt():
+        task = asyncio.create_task(engine.execute_workflow(workflow))
+        for _ in range(200):
+            await asyncio.sleep(0.01)
+            if workflow.steps[2].status == StepStatus.RUNNING:
+                break
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(interrupt())
+    engine.journal.close()
+    unused = engine.output_store.put(b"unused" * 500, "bytes")
+    
+    # Everything is older than the retention period
+    for directory, _, files in os.walk(config.output_store_path):
+        for name in files:
+            os.utime(os.path.join(directory, name), (0, 0))
+    
+    restarted = WorkflowEngine(config=config)
+    restarted.output_store.prune(config.output_retention, restarted._referenced_outputs())
+    assert not os.path.exists(unused.path)
+    
+    resumed = asyncio.run(restarted.resume_from_journal("spill-test"))
+    assert resumed.status == WorkflowStatus.COMPLETED
+    assert resumed.execution_context["big"].load() == BIG